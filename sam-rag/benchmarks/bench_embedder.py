@@ -0,0 +1,61 @@
+"""
+Benchmarks of the EmbedderService paths, with the hashing embedder.
+
+The dense embeddings take no time worth measuring against a provider, so
+these benchmarks time the work the service does around the embedder:
+normalization, the per-text and batch paths and the TF-IDF sparse vectors.
+"""
+
+import pytest
+
+from conftest import HYBRID_EMBEDDING_CONFIG
+from sam_rag.services.embedder.embedder_service import EmbedderService
+
+
+@pytest.fixture(scope="module")
+def hybrid_embedder_service(chunks):
+    service = EmbedderService(HYBRID_EMBEDDING_CONFIG, hybrid_search_config={"enabled": True})
+    service.fit_sparse_model(chunks, publish=False)
+    return service
+
+
+@pytest.mark.benchmark(group="embed")
+def test_embed_texts_batch(benchmark, embedder_service, chunks):
+    result = benchmark(embedder_service.embed_texts_batch, chunks)
+    benchmark.extra_info["chunks"] = len(chunks)
+    assert result["dense_vectors"].shape[0] == len(chunks)
+
+
+@pytest.mark.benchmark(group="embed")
+def test_embed_texts(benchmark, embedder_service, chunks):
+    result = benchmark(embedder_service.embed_texts, chunks)
+    benchmark.extra_info["chunks"] = len(chunks)
+    assert len(result) == len(chunks)
+
+
+@pytest.mark.benchmark(group="embed")
+def test_embed_query(benchmark, embedder_service, queries):
+    result = benchmark(lambda: [embedder_service.embed_text(query) for query in queries])
+    benchmark.extra_info["queries"] = len(queries)
+    assert len(result) == len(queries)
+
+
+@pytest.mark.benchmark(group="embed")
+def test_embed_texts_batch_hybrid(benchmark, hybrid_embedder_service, chunks):
+    result = benchmark(hybrid_embedder_service.embed_texts_batch, chunks)
+    benchmark.extra_info["chunks"] = len(chunks)
+    assert len(result["sparse_vectors"]) == len(chunks)
+
+
+@pytest.mark.benchmark(group="embed")
+def test_embed_query_hybrid(benchmark, hybrid_embedder_service, queries):
+    result = benchmark(lambda: [hybrid_embedder_service.embed_text(query) for query in queries])
+    benchmark.extra_info["queries"] = len(queries)
+    assert all(item["sparse_vector"] is not None for item in result)
+
+
+@pytest.mark.benchmark(group="embed")
+def test_fit_sparse_model(benchmark, chunks):
+    service = EmbedderService(HYBRID_EMBEDDING_CONFIG, hybrid_search_config={"enabled": True})
+    benchmark(service.fit_sparse_model, chunks, publish=False)
+    benchmark.extra_info["chunks"] = len(chunks)
@@ -0,0 +1,126 @@
+"""
+Benchmarks of ingestion and search against locally runnable backends.
+
+Ingestion runs every corpus document through preprocessing, splitting,
+embedding and storage, as the pipeline does. Storage is embedded Chroma or
+Qdrant local mode, and the file tracker uses a SQLite database.
+"""
+
+import itertools
+import os
+
+import pytest
+
+from conftest import BACKEND_MODULES, preprocess, require_backend, vector_db_config
+from sam_rag.services.database import connect as tracker_db
+from sam_rag.services.database.model import StatusEnum, init_db
+from sam_rag.services.ingestor.ingestion_service import IngestionService
+
+BACKENDS = tuple(BACKEND_MODULES)
+
+_collections = itertools.count()
+
+
+def ingest_corpus(corpus, preprocessor_service, splitter_service, embedder_service, ingestion):
+    """Ingest every corpus document and return the number of chunks stored."""
+    chunks, metadata = [], []
+    for entry in corpus["files"]:
+        document = preprocess(preprocessor_service, entry["path"])
+        doc_type = document["metadata"].get("file_type", "text")
+        for section in document["sections"]:
+            for chunk in splitter_service.split_text(section, doc_type):
+                chunks.append(chunk)
+                metadata.append({"file_path": entry["path"], "file_type": doc_type})
+    embeddings = embedder_service.embed_texts_batch(chunks)
+    result = ingestion.ingest_embedding_batch(
+        texts=chunks,
+        dense_vectors=embeddings["dense_vectors"],
+        sparse_vectors=embeddings["sparse_vectors"],
+        metadata=metadata,
+    )
+    assert result["success"], result["message"]
+    return len(result["document_ids"])
+
+
+@pytest.mark.benchmark(group="ingest")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_ingest(
+    benchmark, backend, tmp_path, corpus, preprocessor_service, splitter_service, embedder_service
+):
+    require_backend(backend)
+
+    def setup():
+        # A new collection for every round, so each round ingests into an empty one
+        config = vector_db_config(
+            backend, str(tmp_path / f"db{next(_collections)}"), "bench"
+        )
+        ingestion = IngestionService({"vector_db": config})
+        return (corpus, preprocessor_service, splitter_service, embedder_service, ingestion), {}
+
+    stored = benchmark.pedantic(ingest_corpus, setup=setup, rounds=3)
+    benchmark.extra_info["documents"] = len(corpus["files"])
+    benchmark.extra_info["chunks"] = stored
+
+
+@pytest.fixture(scope="module", params=BACKENDS)
+def loaded_db(request, tmp_path_factory, corpus, preprocessor_service, splitter_service, embedder_service):
+    """A vector database holding the ingested corpus."""
+    require_backend(request.param)
+    config = vector_db_config(
+        request.param, str(tmp_path_factory.mktemp(f"{request.param}_search")), "bench"
+    )
+    ingestion = IngestionService({"vector_db": config})
+    ingest_corpus(corpus, preprocessor_service, splitter_service, embedder_service, ingestion)
+    return ingestion.vector_db
+
+
+@pytest.mark.benchmark(group="search")
+def test_search(benchmark, loaded_db, embedder_service, queries):
+    # The retriever's path without its result cache: embed the query, then search
+    query_vectors = [embedder_service.embed_text(query)["dense_vector"] for query in queries]
+
+    def run():
+        return [loaded_db.search(query_embedding=vector, top_k=5) for vector in query_vectors]
+
+    results = benchmark(run)
+    benchmark.extra_info["backend"] = loaded_db.db_type
+    benchmark.extra_info["queries"] = len(queries)
+    benchmark.extra_info["documents"] = loaded_db.count()
+    assert all(results)
+
+
+@pytest.fixture(scope="module")
+def tracker_session(tmp_path_factory):
+    """A session of a SQLite file tracker database."""
+    config = {"type": "sqlite", "path": str(tmp_path_factory.mktemp("tracker") / "tracker.db")}
+    init_db(config)
+    session_factory = tracker_db.connect(config)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.mark.benchmark(group="tracker")
+def test_tracker_upsert_and_lookup(benchmark, tracker_session, corpus):
+    # The bookkeeping of one scan: record the state of every file, then look them up
+    copies = max(1, 2000 // len(corpus["files"]))
+    documents = [
+        {
+            "path": f"{entry['path']}.{copy}",
+            "file": os.path.basename(entry["path"]),
+            "status": StatusEnum.new,
+            "size": entry["bytes"],
+            "mtime": 0.0,
+        }
+        for entry in corpus["files"]
+        for copy in range(copies)
+    ]
+    paths = [document["path"] for document in documents]
+
+    def run():
+        tracker_db.upsert_documents(tracker_session, documents)
+        return tracker_db.get_document_states(tracker_session, paths)
+
+    states = benchmark(run)
+    benchmark.extra_info["files"] = len(documents)
+    assert len(states) == len(documents)
@@ -0,0 +1,26 @@
+"""
+Benchmarks of the preprocessors, one per corpus format.
+"""
+
+import pytest
+
+from conftest import preprocess
+from sam_rag.evaluation.corpus import FORMATS
+
+
+@pytest.mark.benchmark(group="preprocess")
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_preprocess(benchmark, fmt, files_by_format, preprocessor_service):
+    paths = files_by_format.get(fmt)
+    if not paths:
+        pytest.skip(f"No {fmt} documents in the corpus")
+
+    def run():
+        return [preprocess(preprocessor_service, path) for path in paths]
+
+    results = benchmark(run)
+    benchmark.extra_info["documents"] = len(paths)
+    benchmark.extra_info["characters"] = sum(
+        len(section) for result in results for section in result["sections"]
+    )
+    assert all(result["sections"] for result in results)
@@ -0,0 +1,27 @@
+"""
+Benchmarks of the splitters, one per corpus format.
+"""
+
+import pytest
+
+from sam_rag.evaluation.corpus import FORMATS
+
+
+@pytest.mark.benchmark(group="split")
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_split(benchmark, fmt, sections_by_format, splitter_service):
+    sections = sections_by_format.get(fmt)
+    if not sections:
+        pytest.skip(f"No {fmt} documents in the corpus")
+
+    def run():
+        return [
+            chunk
+            for section in sections
+            for chunk in splitter_service.split_text(section, fmt)
+        ]
+
+    chunks = benchmark(run)
+    benchmark.extra_info["sections"] = len(sections)
+    benchmark.extra_info["chunks"] = len(chunks)
+    assert chunks
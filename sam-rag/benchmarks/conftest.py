@@ -0,0 +1,168 @@
+"""
+Fixtures of the RAG benchmark suites.
+
+The suites run offline: documents come from the synthetic corpus generator,
+embeddings from the hashing embedder, and storage from embedded Chroma,
+Qdrant local mode and a SQLite tracker database. Run them with:
+
+    python -m sam_rag.evaluation.benchmark run --output baseline.json
+"""
+
+import importlib.util
+import os
+from typing import Any, Dict, List
+
+import pytest
+
+from sam_rag.evaluation.benchmark import CORPUS_DOCUMENTS_ENV, CORPUS_PARAGRAPHS_ENV
+from sam_rag.evaluation.corpus import FORMATS, CorpusGenerator
+from sam_rag.services.embedder.embedder_service import EmbedderService
+from sam_rag.services.preprocessor.preprocessor_service import PreprocessorService
+from sam_rag.services.splitter.splitter_service import SplitterService
+
+EMBEDDING_DIMENSION = 384
+
+# Splitters as configured in the plugin's config.yaml
+SPLITTER_CONFIG = {
+    "default": {"method": "CharacterTextSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800, "separator": " "}},
+    "splitters": {
+        "text": {"method": "CharacterTextSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800, "separator": " "}},
+        "txt": {"method": "CharacterTextSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800, "separator": "\n"}},
+        "pdf": {"method": "RecursiveCharacterTextSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800}},
+        "docx": {"method": "RecursiveCharacterTextSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800}},
+        "json": {"method": "RecursiveJSONSplitter", "params": {"chunk_size": 200, "chunk_overlap": 50}},
+        "html": {"method": "HTMLSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800, "tags_to_extract": ["p", "h1", "h2", "h3", "li"]}},
+        "markdown": {"method": "MarkdownSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800}},
+        "md": {"method": "MarkdownSplitter", "params": {"chunk_size": 2048, "chunk_overlap": 800}},
+        "csv": {"method": "CSVSplitter", "params": {"chunk_size": 100, "include_header": False}},
+    },
+}
+
+EMBEDDING_CONFIG = {
+    "embedder_type": "hashing",
+    "embedder_params": {"embedding_dimension": EMBEDDING_DIMENSION, "batch_size": 64},
+    "normalize_embeddings": True,
+}
+
+HYBRID_EMBEDDING_CONFIG = {
+    **EMBEDDING_CONFIG,
+    # The sparse model is kept in memory
+    "hybrid_search": {"sparse_model_config": {"type": "tfidf", "artifact": {"path": ""}}},
+}
+
+
+def _available_formats() -> List[str]:
+    """The corpus formats whose writer dependencies are installed."""
+    if importlib.util.find_spec("docx") is not None:
+        return list(FORMATS)
+    return [fmt for fmt in FORMATS if fmt != "docx"]
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory) -> Dict[str, Any]:
+    """The manifest of a synthetic corpus, generated once per session."""
+    directory = tmp_path_factory.mktemp("corpus")
+    return CorpusGenerator(
+        seed=0, paragraphs=int(os.environ.get(CORPUS_PARAGRAPHS_ENV, 20))
+    ).generate(
+        str(directory),
+        documents=int(os.environ.get(CORPUS_DOCUMENTS_ENV, 3)),
+        formats=_available_formats(),
+    )
+
+
+@pytest.fixture(scope="session")
+def files_by_format(corpus) -> Dict[str, List[str]]:
+    """The corpus files, by format."""
+    files: Dict[str, List[str]] = {}
+    for entry in corpus["files"]:
+        files.setdefault(entry["format"], []).append(entry["path"])
+    return files
+
+
+@pytest.fixture(scope="session")
+def preprocessor_service() -> PreprocessorService:
+    return PreprocessorService({"default_preprocessor": {}, "preprocessors": {}})
+
+
+@pytest.fixture(scope="session")
+def splitter_service() -> SplitterService:
+    return SplitterService(SPLITTER_CONFIG)
+
+
+@pytest.fixture(scope="session")
+def embedder_service() -> EmbedderService:
+    return EmbedderService(EMBEDDING_CONFIG)
+
+
+def preprocess(service: PreprocessorService, file_path: str) -> Dict[str, Any]:
+    """Preprocess a file the way the pipeline does, as a list of sections."""
+    output = service.preprocess_file_stream(file_path)
+    sections = [section for section in output["text_stream"] if section]
+    return {"sections": sections, "metadata": output["metadata"]}
+
+
+@pytest.fixture(scope="session")
+def sections_by_format(files_by_format, preprocessor_service) -> Dict[str, List[str]]:
+    """The preprocessed sections of the corpus, by format."""
+    return {
+        fmt: [
+            section
+            for path in paths
+            for section in preprocess(preprocessor_service, path)["sections"]
+        ]
+        for fmt, paths in files_by_format.items()
+    }
+
+
+@pytest.fixture(scope="session")
+def chunks(sections_by_format, splitter_service) -> List[str]:
+    """The chunks of the whole corpus."""
+    return [
+        chunk
+        for fmt, sections in sections_by_format.items()
+        for section in sections
+        for chunk in splitter_service.split_text(section, fmt)
+    ]
+
+
+@pytest.fixture(scope="session")
+def queries(corpus) -> List[str]:
+    return [entry["query"] for entry in corpus["queries"]]
+
+
+# Client library of each locally runnable backend
+BACKEND_MODULES = {"chroma": "chromadb", "qdrant": "qdrant_client"}
+
+
+def require_backend(backend: str) -> None:
+    """Skip the benchmark if the client library of a backend is not installed."""
+    pytest.importorskip(BACKEND_MODULES[backend])
+
+
+def vector_db_config(backend: str, directory: str, collection: str) -> Dict[str, Any]:
+    """
+    Get the configuration of a locally runnable vector database.
+
+    Args:
+        backend: "chroma" (embedded) or "qdrant" (local mode).
+        directory: Directory holding the data.
+        collection: Name of the collection.
+
+    Returns:
+        The vector_db configuration.
+    """
+    if backend == "chroma":
+        db_params = {"persist_directory": directory}
+    elif backend == "qdrant":
+        db_params = {"path": directory}
+    else:
+        raise ValueError(f"Unsupported benchmark backend '{backend}'") from None
+    return {
+        "db_type": backend,
+        "db_params": {
+            **db_params,
+            "collection_name": collection,
+            "embedding_dimension": EMBEDDING_DIMENSION,
+        },
+    }
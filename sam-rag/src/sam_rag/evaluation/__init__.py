@@ -0,0 +1,7 @@
+"""
+Evaluation package for the SAM RAG plugin.
+
+This package contains offline harnesses that measure retrieval quality against
+exact results, used to choose settings such as vector compression, and the
+synthetic corpus and baselines of the performance benchmarks.
+"""
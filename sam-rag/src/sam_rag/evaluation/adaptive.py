@@ -0,0 +1,353 @@
+"""
+Quality and latency of adaptive retrieval.
+
+Ingests a corpus into a local vector database and answers its queries with
+dense-only search, hybrid search and adaptive retrieval at several confidence
+thresholds. For every mode it reports the hit rate (the query's source
+document is among the results), the mean reciprocal rank of the source, the
+number of results returned, the query latency and, for adaptive retrieval,
+the share of queries that were widened.
+
+The corpus is a directory written by ``sam_rag.evaluation.corpus``, or any
+directory with a ``manifest.json`` holding ``files`` (each with a ``path``)
+and ``queries`` (each with a ``query`` and the ``source`` path expected in
+the results). Without ``--corpus``, a synthetic corpus is generated.
+Embeddings come from the hashing embedder unless ``--embedding`` names a YAML
+file holding an ``embedding`` section, so nothing needs network access by
+default.
+
+Examples:
+    python -m sam_rag.evaluation.adaptive --documents 10 --top-k 5 \\
+        --min-scores 0.3 0.5 0.7 --query-word-drop 0.3
+
+    python -m sam_rag.evaluation.adaptive --corpus ./corpus --backend qdrant \\
+        --embedding embedding.yaml --output adaptive.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from sam_rag.evaluation.corpus import CorpusGenerator, load_manifest
+from sam_rag.services.metrics import InMemorySink, Metrics, set_metrics
+from sam_rag.services.metrics.metrics import ADAPTIVE_RETRIEVALS
+from sam_rag.services.preprocessor.preprocessor_service import PreprocessorService
+from sam_rag.services.rag.adaptive_retrieval import AdaptiveRetrievalPolicy
+from sam_rag.services.rag.retriever import Retriever
+from sam_rag.services.splitter.splitter_service import SplitterService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_SCORES = [0.3, 0.5, 0.7]
+
+HASHING_EMBEDDING_CONFIG = {
+    "embedder_type": "hashing",
+    "embedder_params": {"embedding_dimension": 384},
+    "normalize_embeddings": True,
+}
+
+# The sparse model is fitted on the corpus and kept in memory
+SPARSE_MODEL_CONFIG = {"sparse_model_config": {"type": "tfidf", "artifact": {"path": ""}}}
+
+
+def perturb_query(query: str, word_drop: float, rng: random.Random) -> str:
+    """
+    Drop words from a query, so it no longer matches its source verbatim.
+
+    Args:
+        query: The query text.
+        word_drop: The share of words dropped, from 0 to 1.
+        rng: The random number generator.
+
+    Returns:
+        The perturbed query, with at least one word.
+    """
+    words = query.split()
+    if not word_drop or len(words) < 2:
+        return query
+    kept = [word for word in words if rng.random() >= word_drop]
+    return " ".join(kept or [rng.choice(words)])
+
+
+def build_retriever(
+    directory: str,
+    backend: str,
+    embedding_config: Dict[str, Any],
+    top_k: int,
+) -> Retriever:
+    """
+    Create a retriever on a new local collection.
+
+    Args:
+        directory: Directory holding the collection.
+        backend: "qdrant" (local mode, supports hybrid search) or "chroma".
+        embedding_config: The embedding section.
+        top_k: The number of results of a full search.
+
+    Returns:
+        The retriever, with hybrid search enabled and its cache disabled.
+    """
+    dimension = embedding_config.get("embedder_params", {}).get("embedding_dimension", 384)
+    if backend == "qdrant":
+        db_params = {"path": directory}
+    elif backend == "chroma":
+        db_params = {"persist_directory": directory}
+    else:
+        raise ValueError(f"Unsupported evaluation backend '{backend}'") from None
+    config = {
+        "embedding": {**embedding_config, "hybrid_search": SPARSE_MODEL_CONFIG},
+        "vector_db": {
+            "db_type": backend,
+            "db_params": {
+                **db_params,
+                "collection_name": "adaptive_eval",
+                "embedding_dimension": dimension,
+            },
+        },
+        "retrieval": {"top_k": top_k, "cache": {"enabled": False}},
+    }
+    return Retriever(config=config, hybrid_search_config={"enabled": True})
+
+
+def ingest(retriever: Retriever, manifest: Dict[str, Any]) -> int:
+    """
+    Preprocess, split, embed and store every file of the corpus.
+
+    Args:
+        retriever: The retriever whose embedder and database are used.
+        manifest: The corpus manifest.
+
+    Returns:
+        The number of chunks stored.
+    """
+    preprocessor = PreprocessorService({"default_preprocessor": {}, "preprocessors": {}})
+    splitter = SplitterService({})
+    chunks, metadatas, documents = [], [], []
+    for entry in manifest["files"]:
+        output = preprocessor.preprocess_file_stream(entry["path"])
+        if not output:
+            logger.warning(f"Cannot preprocess {entry['path']}")
+            continue
+        sections = [section for section in output["text_stream"] if section]
+        file_type = output["metadata"].get("file_type", "text")
+        documents.append("\n\n".join(sections))
+        for section in sections:
+            for chunk in splitter.split_text(section, file_type):
+                chunks.append(chunk)
+                metadatas.append({"file_path": entry["path"], "file_type": file_type})
+
+    embedder = retriever.embedding_service
+    embedder.fit_sparse_model(documents, publish=False)
+    embeddings = embedder.embed_texts_batch(chunks)
+    retriever.vector_db.add_documents(
+        documents=chunks,
+        embeddings=embeddings["dense_vectors"],
+        metadatas=metadatas,
+        sparse_vectors=embeddings["sparse_vectors"],
+    )
+    return len(chunks)
+
+
+def evaluate_mode(
+    retriever: Retriever,
+    queries: List[Dict[str, Any]],
+    name: str,
+    hybrid: bool,
+    adaptive: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Answer every query in one retrieval mode.
+
+    Args:
+        retriever: The retriever on the ingested corpus.
+        queries: The queries, each with a "query" and its expected "source".
+        name: The name of the mode in the report.
+        hybrid: Whether full searches are hybrid searches.
+        adaptive: The adaptive retrieval configuration, or None for a full
+            search of every query.
+
+    Returns:
+        The metrics of the mode.
+    """
+    retriever.hybrid_search_enabled = hybrid
+    retriever.adaptive = AdaptiveRetrievalPolicy(
+        {**(adaptive or {}), "enabled": adaptive is not None}, top_k=retriever.top_k
+    )
+    sink = InMemorySink()
+    previous = set_metrics(Metrics(sink))
+    latencies, ranks, returned = [], [], []
+    try:
+        for entry in queries:
+            start = time.perf_counter()
+            results = retriever.retrieve(entry["query"])
+            latencies.append(time.perf_counter() - start)
+            returned.append(len(results))
+            sources = [result.get("metadata", {}).get("file_path") for result in results]
+            ranks.append(sources.index(entry["source"]) + 1 if entry["source"] in sources else None)
+    finally:
+        set_metrics(previous)
+
+    widened = sum(
+        value
+        for (metric, labels), value in sink.counters.items()
+        if metric == ADAPTIVE_RETRIEVALS and dict(labels).get("path") != "dense"
+    )
+    ordered = sorted(latencies)
+    return {
+        "mode": name,
+        "queries": len(queries),
+        "hit_rate": sum(rank is not None for rank in ranks) / len(ranks) if ranks else 0.0,
+        "mrr": sum(1.0 / rank for rank in ranks if rank) / len(ranks) if ranks else 0.0,
+        "mean_results": statistics.fmean(returned) if returned else 0.0,
+        "mean_latency_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p95_latency_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000 if ordered else 0.0,
+        "widened": widened / len(queries) if adaptive is not None and queries else None,
+    }
+
+
+def run_evaluation(
+    manifest: Dict[str, Any],
+    directory: str,
+    backend: str = "qdrant",
+    embedding_config: Optional[Dict[str, Any]] = None,
+    top_k: int = 5,
+    initial_k: int = 3,
+    min_scores: Optional[List[float]] = None,
+    min_score_spread: float = 0.0,
+    query_word_drop: float = 0.0,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Compare full and adaptive retrieval on a corpus.
+
+    Args:
+        manifest: The corpus manifest.
+        directory: Directory holding the collection.
+        backend: "qdrant" or "chroma"; hybrid search needs Qdrant.
+        embedding_config: The embedding section (default: the hashing embedder).
+        top_k: The number of results of a full search.
+        initial_k: The number of results of the adaptive first pass.
+        min_scores: The adaptive confidence thresholds compared.
+        min_score_spread: The adaptive spread check, 0 to disable it.
+        query_word_drop: The share of words dropped from every query.
+        seed: Seed of the query perturbation.
+
+    Returns:
+        One row of metrics per mode.
+    """
+    retriever = build_retriever(
+        directory, backend, embedding_config or HASHING_EMBEDDING_CONFIG, top_k
+    )
+    chunks = ingest(retriever, manifest)
+    logger.info(f"Ingested {chunks} chunks from {len(manifest['files'])} files")
+
+    rng = random.Random(seed)
+    queries = [
+        {**entry, "query": perturb_query(entry["query"], query_word_drop, rng)}
+        for entry in manifest["queries"]
+    ]
+    hybrid = backend == "qdrant"
+    rows = [evaluate_mode(retriever, queries, f"dense@{top_k}", hybrid=False)]
+    if hybrid:
+        rows.append(evaluate_mode(retriever, queries, f"hybrid@{top_k}", hybrid=True))
+    for min_score in min_scores or DEFAULT_MIN_SCORES:
+        adaptive = {
+            "initial_k": initial_k,
+            "min_score": min_score,
+            "min_score_spread": min_score_spread,
+        }
+        rows.append(
+            evaluate_mode(
+                retriever, queries, f"adaptive@{initial_k} min_score={min_score}", hybrid, adaptive
+            )
+        )
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """
+    Format the evaluation as a text table.
+
+    Args:
+        rows: The rows returned by `run_evaluation`.
+
+    Returns:
+        The table.
+    """
+    width = max([len(row["mode"]) for row in rows] + [4])
+    lines = [
+        f"{'mode':<{width}}  {'hit rate':>8}  {'MRR':>6}  {'results':>7}  "
+        f"{'mean ms':>8}  {'p95 ms':>8}  {'widened':>7}",
+    ]
+    for row in rows:
+        widened = f"{row['widened']:.0%}" if row["widened"] is not None else "-"
+        lines.append(
+            f"{row['mode']:<{width}}  {row['hit_rate']:>8.3f}  {row['mrr']:>6.3f}  "
+            f"{row['mean_results']:>7.1f}  {row['mean_latency_ms']:>8.2f}  "
+            f"{row['p95_latency_ms']:>8.2f}  {widened:>7}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the evaluation from the command line."""
+    parser = argparse.ArgumentParser(description="Compare adaptive and full retrieval offline.")
+    parser.add_argument("--corpus", help="Corpus directory with a manifest.json")
+    parser.add_argument("--documents", type=int, default=5, help="Synthetic documents per format")
+    parser.add_argument("--formats", nargs="+", default=["txt", "md", "html"])
+    parser.add_argument("--backend", default="qdrant", choices=["qdrant", "chroma"])
+    parser.add_argument("--embedding", help="YAML file with an embedding section")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--initial-k", type=int, default=3)
+    parser.add_argument("--min-scores", type=float, nargs="+", default=DEFAULT_MIN_SCORES)
+    parser.add_argument("--min-score-spread", type=float, default=0.0)
+    parser.add_argument(
+        "--query-word-drop", type=float, default=0.0, help="Share of query words dropped"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    embedding_config = None
+    if args.embedding:
+        import yaml
+
+        with open(args.embedding, "r", encoding="utf-8") as f:
+            embedding_config = yaml.safe_load(f)["embedding"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.corpus:
+            manifest = load_manifest(args.corpus)
+        else:
+            manifest = CorpusGenerator(seed=args.seed).generate(
+                f"{tmp_dir}/corpus", documents=args.documents, formats=args.formats
+            )
+        rows = run_evaluation(
+            manifest,
+            f"{tmp_dir}/db",
+            backend=args.backend,
+            embedding_config=embedding_config,
+            top_k=args.top_k,
+            initial_k=args.initial_k,
+            min_scores=args.min_scores,
+            min_score_spread=args.min_score_spread,
+            query_word_drop=args.query_word_drop,
+            seed=args.seed,
+        )
+
+    print(format_report(rows))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"arguments": vars(args), "modes": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
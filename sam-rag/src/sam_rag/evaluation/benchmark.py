@@ -0,0 +1,299 @@
+"""
+Performance baselines of the RAG pipeline.
+
+Runs the pytest-benchmark suites in the ``benchmarks`` directory of the
+plugin, which time every preprocessor, splitter and embedder path and
+ingestion and search against local stand-ins (embedded Chroma, Qdrant local
+mode and a SQLite tracker) on a synthetic corpus. Nothing needs network
+access.
+
+The results are written as a compact JSON baseline, and two baselines, or
+a baseline and a pytest-benchmark JSON report, can be compared. ``compare``
+exits with status 1 when a benchmark got slower than the threshold allows, so
+it can gate a release.
+
+Examples:
+    python -m sam_rag.evaluation.benchmark run --output baseline.json
+
+    python -m sam_rag.evaluation.benchmark run --output current.json \\
+        --documents 10 -k "preprocess or split"
+
+    python -m sam_rag.evaluation.benchmark compare baseline.json current.json \\
+        --threshold 0.15
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASELINE_VERSION = 1
+
+# Statistics kept from the pytest-benchmark report, in seconds
+_STATS = ("min", "max", "mean", "median", "stddev", "iqr", "ops", "rounds")
+
+# Environment variables read by the benchmark suites
+CORPUS_DOCUMENTS_ENV = "SAM_RAG_BENCH_DOCUMENTS"
+CORPUS_PARAGRAPHS_ENV = "SAM_RAG_BENCH_PARAGRAPHS"
+
+
+def to_baseline(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a pytest-benchmark JSON report to a baseline.
+
+    Args:
+        report: The report written by `pytest --benchmark-json`.
+
+    Returns:
+        The baseline, with the statistics of every benchmark by name.
+    """
+    if report.get("baseline_version"):
+        return report
+    machine = report.get("machine_info", {})
+    commit = report.get("commit_info", {})
+    benchmarks = {}
+    for bench in report.get("benchmarks", []):
+        stats = bench.get("stats", {})
+        benchmarks[bench.get("fullname") or bench["name"]] = {
+            "group": bench.get("group"),
+            **{key: stats.get(key) for key in _STATS},
+            "extra_info": bench.get("extra_info", {}),
+        }
+    return {
+        "baseline_version": BASELINE_VERSION,
+        "created": report.get("datetime") or datetime.now(timezone.utc).isoformat(),
+        "machine": {
+            "python": machine.get("python_version", platform.python_version()),
+            "system": machine.get("system", platform.system()),
+            "machine": machine.get("machine", platform.machine()),
+            "cpu": (machine.get("cpu") or {}).get("brand_raw"),
+            "cpu_count": (machine.get("cpu") or {}).get("count", os.cpu_count()),
+        },
+        "commit": {key: commit.get(key) for key in ("id", "branch", "dirty")},
+        "benchmarks": benchmarks,
+    }
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """
+    Read a baseline or a pytest-benchmark JSON report.
+
+    Args:
+        path: The JSON file.
+
+    Returns:
+        The baseline.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return to_baseline(json.load(f))
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.10,
+    metric: str = "median",
+) -> List[Dict[str, Any]]:
+    """
+    Compare the timings of two baselines.
+
+    Args:
+        baseline: The reference baseline.
+        current: The baseline to check.
+        threshold: Relative slowdown tolerated before a benchmark counts as
+            regressed, e.g. 0.10 for 10%.
+        metric: The statistic compared (default: "median").
+
+    Returns:
+        One row per benchmark with the baseline and current timings, their
+        ratio and a status of "regressed", "improved", "unchanged", "new" or
+        "missing".
+    """
+    if metric not in _STATS or metric in ("ops", "rounds"):
+        raise ValueError(f"Unsupported metric '{metric}'") from None
+    rows = []
+    old_benchmarks = baseline.get("benchmarks", {})
+    new_benchmarks = current.get("benchmarks", {})
+    for name in sorted(set(old_benchmarks) | set(new_benchmarks)):
+        old = (old_benchmarks.get(name) or {}).get(metric)
+        new = (new_benchmarks.get(name) or {}).get(metric)
+        row = {"name": name, "baseline": old, "current": new, "ratio": None}
+        if old is None:
+            row["status"] = "new"
+        elif new is None:
+            row["status"] = "missing"
+        else:
+            row["ratio"] = new / old if old else float("inf")
+            if row["ratio"] > 1 + threshold:
+                row["status"] = "regressed"
+            elif row["ratio"] < 1 / (1 + threshold):
+                row["status"] = "improved"
+            else:
+                row["status"] = "unchanged"
+        rows.append(row)
+    return rows
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    """Format a duration with a readable unit."""
+    if value is None:
+        return "-"
+    if value < 1e-3:
+        return f"{value * 1e6:.1f}us"
+    if value < 1:
+        return f"{value * 1e3:.2f}ms"
+    return f"{value:.3f}s"
+
+
+def format_comparison(rows: List[Dict[str, Any]], metric: str = "median") -> str:
+    """
+    Format a comparison as a text table.
+
+    Args:
+        rows: The rows returned by `compare`.
+        metric: The statistic compared.
+
+    Returns:
+        The table.
+    """
+    width = max([len(row["name"]) for row in rows] + [9])
+    lines = [
+        f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>7}  status",
+        f"{'':-<{width}}  {'':->10}  {'':->10}  {'':->7}  {'':-<9}",
+    ]
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "-"
+        lines.append(
+            f"{row['name']:<{width}}  {_format_seconds(row['baseline']):>10}  "
+            f"{_format_seconds(row['current']):>10}  {ratio:>7}  {row['status']}"
+        )
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    lines.append(
+        f"{metric}: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    )
+    return "\n".join(lines)
+
+
+def run_benchmarks(
+    output: str,
+    path: str = "benchmarks",
+    documents: Optional[int] = None,
+    paragraphs: Optional[int] = None,
+    pytest_args: Optional[List[str]] = None,
+) -> int:
+    """
+    Run the benchmark suites and write a baseline.
+
+    Args:
+        output: The baseline file to write.
+        path: The directory holding the benchmark suites.
+        documents: Corpus documents per format (default: set by the suites).
+        paragraphs: Paragraphs per corpus document (default: set by the suites).
+        pytest_args: Extra pytest arguments, e.g. ["-k", "split"].
+
+    Returns:
+        The pytest exit code.
+    """
+    # Import pytest only when needed
+    import pytest
+
+    if documents:
+        os.environ[CORPUS_DOCUMENTS_ENV] = str(documents)
+    if paragraphs:
+        os.environ[CORPUS_PARAGRAPHS_ENV] = str(paragraphs)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, "report.json")
+        exit_code = pytest.main(
+            [
+                path,
+                "-o",
+                "python_files=bench_*.py",
+                "-p",
+                "no:cacheprovider",
+                "--benchmark-only",
+                f"--benchmark-json={report_path}",
+                *(pytest_args or []),
+            ]
+        )
+        if not os.path.exists(report_path):
+            logger.error("The benchmarks did not write a report.")
+            return int(exit_code) or 1
+        with open(report_path, "r", encoding="utf-8") as f:
+            baseline = to_baseline(json.load(f))
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Wrote {len(baseline['benchmarks'])} benchmarks to {output}")
+    return int(exit_code)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run or compare the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the RAG pipeline offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write a baseline")
+    run_parser.add_argument("--output", required=True, help="Baseline file to write")
+    run_parser.add_argument("--path", default="benchmarks", help="Benchmark suites directory")
+    run_parser.add_argument("--documents", type=int, help="Corpus documents per format")
+    run_parser.add_argument("--paragraphs", type=int, help="Paragraphs per corpus document")
+    run_parser.add_argument("--compare", help="Baseline to compare the results with")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+    run_parser.add_argument("-k", dest="keyword", help="Only run benchmarks matching this expression")
+
+    compare_parser = commands.add_parser("compare", help="Compare two baselines")
+    compare_parser.add_argument("baseline", help="Reference baseline or pytest-benchmark report")
+    compare_parser.add_argument("current", help="Baseline or pytest-benchmark report to check")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Tolerated relative slowdown"
+    )
+    compare_parser.add_argument("--metric", default="median", help="Statistic compared")
+
+    convert_parser = commands.add_parser(
+        "convert", help="Write a baseline from a pytest-benchmark report"
+    )
+    convert_parser.add_argument("report", help="File written by pytest --benchmark-json")
+    convert_parser.add_argument("--output", required=True, help="Baseline file to write")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "run":
+        exit_code = run_benchmarks(
+            args.output,
+            path=args.path,
+            documents=args.documents,
+            paragraphs=args.paragraphs,
+            pytest_args=["-k", args.keyword] if args.keyword else None,
+        )
+        if exit_code or not args.compare:
+            return exit_code
+        args.baseline, args.current, args.metric = args.compare, args.output, "median"
+
+    if args.command == "convert":
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(load_baseline(args.report), f, indent=2)
+        return 0
+
+    rows = compare(
+        load_baseline(args.baseline),
+        load_baseline(args.current),
+        threshold=args.threshold,
+        metric=args.metric,
+    )
+    print(format_comparison(rows, args.metric))
+    return 1 if any(row["status"] == "regressed" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,532 @@
+"""
+Recall versus storage footprint of compressed vector storage.
+
+Compares compressed variants of a set of embeddings against exact float32
+cosine search and reports recall@k, bytes per vector and query latency.
+
+Two modes are available:
+
+- ``simulate`` (default) encodes the vectors in numpy the way the backends do
+  (float16, int8 scalar quantization, binary quantization, Matryoshka
+  truncation, optional rescoring) and needs no database.
+- A YAML file with a ``vector_db`` section and a list of ``variants`` loads the
+  vectors into a real backend through ``VectorDBService``, once per variant,
+  and queries it.
+
+Examples:
+    python -m sam_rag.evaluation.compression --synthetic 20000 --dim 768 \\
+        --variants float32 float16 int8 int8+rescore binary+rescore float16@256
+
+    python -m sam_rag.evaluation.compression --vectors corpus.npy \\
+        --queries queries.npy --backend compression_eval.yaml --output report.json
+
+A backend file looks like::
+
+    vector_db:
+      db_type: qdrant
+      db_params:
+        url: http://localhost:6333
+        collection_name: compression_eval
+    variants:
+      - name: float32
+      - name: int8+rescore
+        db_params: {quantization: {type: scalar, rescore: true}}
+      - name: binary@512
+        truncate_dimension: 512
+        db_params: {quantization: {type: binary, oversampling: 3.0}}
+"""
+
+import argparse
+import copy
+import json
+import logging
+import math
+import re
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VARIANTS = ["float32", "float16", "int8", "int8+rescore", "binary+rescore"]
+
+# Keys naming the collection, index or table in each backend's db_params
+_COLLECTION_KEYS = ("collection_name", "index_name", "table_name")
+
+_VARIANT_PATTERN = re.compile(r"^(float32|float16|int8|binary)(?:@(\d+))?(\+rescore)?$")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale every row to unit length.
+
+    Args:
+        vectors: A 2D array of vectors.
+
+    Returns:
+        The normalized vectors as float32.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def truncate_rows(vectors: np.ndarray, dimension: Optional[int]) -> np.ndarray:
+    """
+    Keep the leading components of every row and re-normalize, as Matryoshka truncation does.
+
+    Args:
+        vectors: A 2D array of unit vectors.
+        dimension: The number of components to keep, or None to keep all.
+
+    Returns:
+        The truncated, normalized vectors.
+    """
+    if not dimension or dimension >= vectors.shape[1]:
+        return vectors
+    return normalize_rows(vectors[:, :dimension])
+
+
+def synthetic_embeddings(
+    count: int, dim: int, num_queries: int, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate clustered embeddings whose variance decays across dimensions.
+
+    The decay mimics Matryoshka-trained models, where the leading dimensions
+    carry most of the signal. Queries are noisy copies of corpus vectors.
+
+    Args:
+        count: Number of corpus vectors.
+        dim: Vector dimension.
+        num_queries: Number of query vectors.
+        seed: Random seed.
+
+    Returns:
+        A tuple of the corpus and query vectors, both normalized.
+    """
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dim) / 16.0)
+    num_clusters = max(1, count // 100)
+    centers = rng.standard_normal((num_clusters, dim)) * scale
+    labels = rng.integers(0, num_clusters, size=count)
+    corpus = centers[labels] + 0.6 * rng.standard_normal((count, dim)) * scale
+    picks = rng.integers(0, count, size=num_queries)
+    queries = corpus[picks] + 0.4 * rng.standard_normal((num_queries, dim)) * scale
+    return normalize_rows(corpus), normalize_rows(queries)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Compute exact cosine top-k neighbours with float32 vectors.
+
+    Args:
+        corpus: Normalized corpus vectors.
+        queries: Normalized query vectors.
+        top_k: Number of neighbours.
+
+    Returns:
+        An array of shape (queries, top_k) with corpus row indices, best first.
+    """
+    return _top_k(queries @ corpus.T, top_k)
+
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Get the indices of the highest scores per row, best first."""
+    top_k = min(top_k, scores.shape[1])
+    part = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def recall_at_k(found: List[List[int]], truth: np.ndarray) -> float:
+    """
+    Compute the mean recall@k of search results against exact neighbours.
+
+    Args:
+        found: Result indices per query.
+        truth: Exact neighbour indices per query.
+
+    Returns:
+        The fraction of exact neighbours that were found, averaged over queries.
+    """
+    if len(truth) == 0:
+        return 0.0
+    k = truth.shape[1]
+    hits = [len(set(result[:k]) & set(expected)) / k for result, expected in zip(found, truth)]
+    return float(np.mean(hits))
+
+
+def parse_variant(spec: str) -> Dict[str, Any]:
+    """
+    Parse a simulated variant such as ``int8+rescore`` or ``float16@256``.
+
+    Args:
+        spec: ``<float32|float16|int8|binary>[@dimension][+rescore]``.
+
+    Returns:
+        A dictionary with the storage type, truncation dimension and rescore flag.
+
+    Raises:
+        ValueError: If the specification is not valid.
+    """
+    match = _VARIANT_PATTERN.match(spec.strip().lower())
+    if not match:
+        raise ValueError(
+            f"Invalid variant '{spec}'. Expected <float32|float16|int8|binary>[@dim][+rescore]."
+        )
+    storage, dimension, rescore = match.groups()
+    return {
+        "name": spec,
+        "storage": storage,
+        "dimension": int(dimension) if dimension else None,
+        "rescore": bool(rescore),
+    }
+
+
+def bytes_per_vector(storage: str, dim: int, rescore: bool = False) -> Dict[str, int]:
+    """
+    Estimate the storage size of one vector.
+
+    Quantized variants that rescore keep the float32 originals, normally on
+    disk, so they are counted in the total but not in RAM.
+
+    Args:
+        storage: One of float32, float16, int8 or binary.
+        dim: Stored dimension.
+        rescore: Whether the original vectors are kept for rescoring.
+
+    Returns:
+        A dictionary with ``ram`` and ``total`` bytes per vector.
+    """
+    sizes = {
+        "float32": 4 * dim,
+        "float16": 2 * dim,
+        "int8": dim,
+        "binary": math.ceil(dim / 8),
+    }
+    ram = sizes[storage]
+    total = ram + (4 * dim if rescore and storage in ("int8", "binary") else 0)
+    return {"ram": ram, "total": total}
+
+
+def _encode(storage: str, corpus: np.ndarray, quantile: float) -> Tuple[np.ndarray, Any]:
+    """
+    Encode corpus vectors and return them with a function that encodes queries.
+
+    Int8 uses one value range for the whole collection, clipped at the given
+    quantile, as Qdrant scalar quantization does. Binary keeps the sign bits.
+    """
+    if storage == "float16":
+        return corpus.astype(np.float16).astype(np.float32), (
+            lambda q: q.astype(np.float16).astype(np.float32)
+        )
+    if storage == "int8":
+        low, high = np.quantile(corpus, [1.0 - quantile, quantile])
+        step = (high - low) / 255.0 or 1.0
+        codes = np.round((np.clip(corpus, low, high) - low) / step)
+        return (codes * step + low).astype(np.float32), (lambda q: q)
+    if storage == "binary":
+        return np.where(corpus > 0, 1.0, -1.0).astype(np.float32), (
+            lambda q: np.where(q > 0, 1.0, -1.0).astype(np.float32)
+        )
+    return corpus, (lambda q: q)
+
+
+def simulate_variant(
+    variant: Dict[str, Any],
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    top_k: int,
+    oversampling: float = 2.0,
+    quantile: float = 0.99,
+) -> Dict[str, Any]:
+    """
+    Measure one compressed variant in numpy.
+
+    Args:
+        variant: A parsed variant from `parse_variant`.
+        corpus: Normalized full-dimension corpus vectors.
+        queries: Normalized full-dimension query vectors.
+        truth: Exact neighbours of the queries.
+        top_k: Number of results per query.
+        oversampling: Candidates per result fetched before rescoring.
+        quantile: Clipping quantile for int8 quantization.
+
+    Returns:
+        A report row with recall, footprint and latency.
+    """
+    stored_corpus = truncate_rows(corpus, variant["dimension"])
+    stored_queries = truncate_rows(queries, variant["dimension"])
+    encoded, encode_query = _encode(variant["storage"], stored_corpus, quantile)
+
+    rescore = variant["rescore"] and variant["storage"] in ("int8", "binary")
+    limit = math.ceil(top_k * oversampling) if rescore else top_k
+
+    start = time.perf_counter()
+    candidates = _top_k(encode_query(stored_queries) @ encoded.T, limit)
+    if rescore:
+        # Rescore with the original (truncated) vectors, as the backends do
+        exact = np.einsum("qd,qkd->qk", stored_queries, stored_corpus[candidates])
+        order = np.argsort(-exact, axis=1)[:, :top_k]
+        candidates = np.take_along_axis(candidates, order, axis=1)
+    else:
+        candidates = candidates[:, :top_k]
+    elapsed = time.perf_counter() - start
+
+    dim = stored_corpus.shape[1]
+    footprint = bytes_per_vector(variant["storage"], dim, rescore)
+    return {
+        "variant": variant["name"],
+        "dimension": dim,
+        "recall": recall_at_k(candidates.tolist(), truth),
+        "ram_bytes_per_vector": footprint["ram"],
+        "total_bytes_per_vector": footprint["total"],
+        "ram_ratio": footprint["ram"] / (4 * corpus.shape[1]),
+        "ms_per_query": 1000.0 * elapsed / max(1, len(queries)),
+    }
+
+
+def _point_id(index: int) -> str:
+    """Get a backend-neutral document ID for a corpus row (a UUID accepted by every backend)."""
+    return str(uuid.UUID(int=index + 1))
+
+
+def _row_index(point_id: Any) -> int:
+    """Get the corpus row of a document ID returned by a backend."""
+    return uuid.UUID(str(point_id).split(":")[-1]).int - 1
+
+
+def evaluate_backend_variant(
+    vector_db_config: Dict[str, Any],
+    variant: Dict[str, Any],
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    top_k: int,
+    batch_size: int = 256,
+    keep: bool = False,
+) -> Dict[str, Any]:
+    """
+    Load the corpus into a real backend with one variant's settings and measure it.
+
+    Every variant gets its own collection, index or table, named after the
+    configured one with the variant index appended, which is cleared afterwards
+    unless `keep` is set.
+
+    Args:
+        vector_db_config: The ``vector_db`` configuration (db_type, db_params).
+        variant: The variant: name, optional db_params overrides, optional
+            truncate_dimension and optional storage (for the footprint estimate).
+        corpus: Normalized corpus vectors.
+        queries: Normalized query vectors.
+        truth: Exact neighbours of the queries.
+        top_k: Number of results per query.
+        batch_size: Documents added per call.
+        keep: Keep the loaded data after measuring.
+
+    Returns:
+        A report row with recall, footprint estimate and latencies.
+    """
+    from sam_rag.services.database.vector_db_service import VectorDBService
+
+    dimension = variant.get("truncate_dimension")
+    stored_corpus = truncate_rows(corpus, dimension)
+    stored_queries = truncate_rows(queries, dimension)
+    dim = stored_corpus.shape[1]
+
+    config = copy.deepcopy(vector_db_config)
+    db_params = config.setdefault("db_params", {})
+    db_params.update(copy.deepcopy(variant.get("db_params", {})))
+    db_params["embedding_dimension"] = dim
+    suffix = re.sub(r"[^a-z0-9]+", "_", variant["name"].lower()).strip("_")
+    for key in _COLLECTION_KEYS:
+        if key in db_params:
+            db_params[key] = f"{db_params[key]}_{suffix}"
+
+    service = VectorDBService(config=config)
+    service.clear()
+    try:
+        start = time.perf_counter()
+        for offset in range(0, len(stored_corpus), batch_size):
+            batch = stored_corpus[offset : offset + batch_size]
+            service.add_documents(
+                documents=[f"doc {offset + i}" for i in range(len(batch))],
+                embeddings=batch.tolist(),
+                metadatas=[{"row": offset + i} for i in range(len(batch))],
+                ids=[_point_id(offset + i) for i in range(len(batch))],
+            )
+        load_seconds = time.perf_counter() - start
+
+        found = []
+        start = time.perf_counter()
+        for query in stored_queries:
+            results = service.search(query_embedding=query.tolist(), top_k=top_k)
+            found.append([_row_index(result["id"]) for result in results])
+        search_seconds = time.perf_counter() - start
+    finally:
+        if not keep:
+            service.clear()
+
+    storage = variant.get("storage", "float32")
+    footprint = bytes_per_vector(storage, dim, variant.get("rescore", True))
+    return {
+        "variant": variant["name"],
+        "dimension": dim,
+        "recall": recall_at_k(found, truth),
+        "ram_bytes_per_vector": footprint["ram"],
+        "total_bytes_per_vector": footprint["total"],
+        "ram_ratio": footprint["ram"] / (4 * corpus.shape[1]),
+        "ms_per_query": 1000.0 * search_seconds / max(1, len(stored_queries)),
+        "load_seconds": load_seconds,
+    }
+
+
+def _guess_storage(variant: Dict[str, Any]) -> str:
+    """Infer the storage type of a backend variant from its db_params."""
+    params = variant.get("db_params", {})
+    quantization = (params.get("quantization") or {}).get("type", "").lower()
+    if quantization == "scalar":
+        return "int8"
+    if quantization == "binary":
+        return "binary"
+    if str(params.get("vector_datatype", "")).upper() == "FLOAT16":
+        return "float16"
+    if str(params.get("vector_type", "")).lower() == "halfvec":
+        return "float16"
+    return "float32"
+
+
+def format_report(rows: List[Dict[str, Any]], top_k: int) -> str:
+    """
+    Format report rows as a text table.
+
+    Args:
+        rows: Report rows.
+        top_k: The k used for recall.
+
+    Returns:
+        The table.
+    """
+    header = (
+        f"{'variant':<22}{'dim':>6}{f'recall@{top_k}':>12}{'RAM B/vec':>12}"
+        f"{'total B/vec':>13}{'RAM ratio':>11}{'ms/query':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['variant']:<22}{row['dimension']:>6}{row['recall']:>12.4f}"
+            f"{row['ram_bytes_per_vector']:>12}{row['total_bytes_per_vector']:>13}"
+            f"{row['ram_ratio']:>11.3f}{row['ms_per_query']:>10.3f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the evaluation from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Measure recall versus footprint of compressed vector storage."
+    )
+    parser.add_argument("--vectors", help="Corpus embeddings as a .npy file")
+    parser.add_argument("--queries", help="Query embeddings as a .npy file")
+    parser.add_argument("--synthetic", type=int, default=10000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768, help="Synthetic vector dimension")
+    parser.add_argument("--num-queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument(
+        "--backend",
+        default="simulate",
+        help="'simulate' or a YAML file with vector_db and variants",
+    )
+    parser.add_argument(
+        "--variants", nargs="+", default=DEFAULT_VARIANTS, help="Simulated variants"
+    )
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--quantile", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="Keep loaded backend data")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.vectors:
+        corpus = normalize_rows(np.load(args.vectors))
+        if args.queries:
+            queries = normalize_rows(np.load(args.queries))
+        else:
+            rng = np.random.default_rng(args.seed)
+            picks = rng.choice(len(corpus), size=min(args.num_queries, len(corpus)), replace=False)
+            queries = corpus[picks]
+    else:
+        corpus, queries = synthetic_embeddings(
+            args.synthetic, args.dim, args.num_queries, args.seed
+        )
+
+    truth = exact_top_k(corpus, queries, args.top_k)
+
+    rows = []
+    if args.backend == "simulate":
+        for spec in args.variants:
+            rows.append(
+                simulate_variant(
+                    parse_variant(spec),
+                    corpus,
+                    queries,
+                    truth,
+                    args.top_k,
+                    args.oversampling,
+                    args.quantile,
+                )
+            )
+    else:
+        import yaml
+
+        with open(args.backend, "r", encoding="utf-8") as f:
+            backend_config = yaml.safe_load(f) or {}
+        vector_db_config = backend_config.get("vector_db", {})
+        for variant in backend_config.get("variants", [{"name": "float32"}]):
+            variant = dict(variant)
+            variant.setdefault("storage", _guess_storage(variant))
+            rows.append(
+                evaluate_backend_variant(
+                    vector_db_config,
+                    variant,
+                    corpus,
+                    queries,
+                    truth,
+                    args.top_k,
+                    keep=args.keep,
+                )
+            )
+
+    print(
+        f"{len(corpus)} vectors of dimension {corpus.shape[1]}, "
+        f"{len(queries)} queries, backend: {args.backend}"
+    )
+    print(format_report(rows, args.top_k))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "corpus_size": len(corpus),
+                    "dimension": corpus.shape[1],
+                    "queries": len(queries),
+                    "top_k": args.top_k,
+                    "backend": args.backend,
+                    "results": rows,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
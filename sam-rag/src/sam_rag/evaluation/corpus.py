@@ -0,0 +1,343 @@
+"""
+Synthetic document corpus for benchmarks.
+
+Generates PDF, DOCX, HTML, JSON, CSV, Markdown and text files from a seeded
+random generator, so the same arguments always produce the same documents.
+The text is built from a small vocabulary per topic, and a manifest lists
+every file together with queries taken from its text, so retrieval can be
+checked as well as timed.
+
+Only installed dependencies of the plugin are used: PDF files are written
+directly and DOCX files with python-docx.
+
+Example:
+    python -m sam_rag.evaluation.corpus --output bench_corpus --documents 10 \\
+        --paragraphs 40 --formats pdf html json csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import sys
+from html import escape
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("pdf", "docx", "html", "json", "csv", "md", "txt")
+
+MANIFEST_FILE = "manifest.json"
+
+# Words of each topic; sentences mix topic words with common words
+TOPICS = {
+    "energy": "solar wind turbine grid battery storage voltage inverter hydrogen emission carbon panel".split(),
+    "finance": "invoice ledger revenue margin budget forecast audit dividend equity liability asset tax".split(),
+    "medicine": "patient dosage clinical trial symptom diagnosis vaccine therapy cardiology enzyme immune protein".split(),
+    "software": "compiler latency thread cache deployment container kernel schema query index bytecode socket".split(),
+    "logistics": "warehouse freight pallet carrier shipment route customs inventory dock tracking courier fleet".split(),
+    "climate": "glacier rainfall drought aerosol ocean salinity monsoon permafrost forest methane humidity storm".split(),
+}
+COMMON_WORDS = (
+    "the a of and to in for with on by from over under about across between "
+    "report system process team model result data level value review plan "
+    "increase reduce measure improve record share require support expect update"
+).split()
+
+
+class CorpusGenerator:
+    """
+    Writes a reproducible synthetic corpus to a directory.
+    """
+
+    def __init__(self, seed: int = 0, paragraphs: int = 20, sentences: int = 6):
+        """
+        Initialize the generator.
+
+        Args:
+            seed: Seed of the random generator.
+            paragraphs: Paragraphs per document.
+            sentences: Sentences per paragraph.
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.paragraphs = paragraphs
+        self.sentences = sentences
+
+    def sentence(self, topic: str) -> str:
+        """Build one sentence about a topic."""
+        words = []
+        for _ in range(self.rng.randint(8, 18)):
+            pool = TOPICS[topic] if self.rng.random() < 0.4 else COMMON_WORDS
+            words.append(self.rng.choice(pool))
+        words.append(str(self.rng.randint(1, 9999)))
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self, topic: str) -> str:
+        """Build one paragraph about a topic."""
+        return " ".join(self.sentence(topic) for _ in range(self.sentences))
+
+    def document(self, topic: str) -> List[Dict[str, str]]:
+        """Build the sections of a document, each a heading and a paragraph."""
+        return [
+            {
+                "heading": f"{topic.capitalize()} section {i + 1}",
+                "text": self.paragraph(topic),
+            }
+            for i in range(self.paragraphs)
+        ]
+
+    def generate(
+        self,
+        directory: str,
+        documents: int = 5,
+        formats: Optional[List[str]] = None,
+        queries_per_document: int = 2,
+    ) -> Dict[str, Any]:
+        """
+        Write the corpus and its manifest.
+
+        Args:
+            directory: The output directory, created if needed.
+            documents: Documents per format.
+            formats: The formats to write (default: all of FORMATS).
+            queries_per_document: Queries taken from the text of every document.
+
+        Returns:
+            The manifest, also written to `manifest.json` in the directory.
+        """
+        formats = list(formats or FORMATS)
+        unknown = [fmt for fmt in formats if fmt not in FORMATS]
+        if unknown:
+            raise ValueError(f"Unsupported corpus formats: {unknown}") from None
+        os.makedirs(directory, exist_ok=True)
+
+        files = []
+        queries = []
+        topics = sorted(TOPICS)
+        for fmt in formats:
+            writer = getattr(self, f"_write_{fmt}")
+            for index in range(documents):
+                topic = topics[(index + len(files)) % len(topics)]
+                sections = self.document(topic)
+                path = os.path.join(directory, f"{topic}_{index:04d}.{fmt}")
+                writer(path, topic, sections)
+                files.append(
+                    {
+                        "path": path,
+                        "format": fmt,
+                        "topic": topic,
+                        "bytes": os.path.getsize(path),
+                    }
+                )
+                for _ in range(queries_per_document):
+                    text = self.rng.choice(sections)["text"]
+                    sentence = self.rng.choice(text.split(". "))
+                    queries.append({"query": sentence.rstrip("."), "source": path})
+
+        manifest = {
+            "seed": self.seed,
+            "paragraphs": self.paragraphs,
+            "documents_per_format": documents,
+            "formats": formats,
+            "files": files,
+            "queries": queries,
+        }
+        with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Wrote {len(files)} documents to {directory}")
+        return manifest
+
+    def _write_txt(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for section in sections:
+                f.write(f"{section['heading']}\n\n{section['text']}\n\n")
+
+    def _write_md(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {topic.capitalize()}\n\n")
+            for section in sections:
+                f.write(f"## {section['heading']}\n\n{section['text']}\n\n")
+
+    def _write_html(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        body = []
+        for section in sections:
+            items = "".join(
+                f"<li>{escape(sentence)}</li>" for sentence in section["text"].split(". ")[:2]
+            )
+            body.append(
+                f"<section><h2>{escape(section['heading'])}</h2>"
+                f"<p>{escape(section['text'])}</p><ul>{items}</ul></section>"
+            )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+                f"<title>{topic.capitalize()}</title>"
+                "<meta name=\"author\" content=\"Benchmark\">"
+                f"<meta name=\"keywords\" content=\"{topic}, benchmark\">"
+                "<style>body { font-family: sans-serif; }</style></head><body>"
+                "<nav><a href=\"#\">Home</a></nav>"
+                f"<script>var topic = \"{topic}\";</script>"
+                f"<h1>{topic.capitalize()}</h1>{''.join(body)}</body></html>"
+            )
+
+    def _write_json(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        document = {
+            "title": topic.capitalize(),
+            "tags": [topic, "benchmark"],
+            "sections": [
+                {"id": i, "heading": s["heading"], "text": s["text"]}
+                for i, s in enumerate(sections)
+            ],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    def _write_csv(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "topic", "heading", "amount", "notes"])
+            for i, section in enumerate(sections):
+                for j, sentence in enumerate(section["text"].split(". ")):
+                    writer.writerow(
+                        [f"{i}-{j}", topic, section["heading"], self.rng.randint(1, 100000), sentence]
+                    )
+
+    def _write_docx(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        # Import python-docx only when needed
+        from docx import Document
+
+        document = Document()
+        document.core_properties.author = "Benchmark"
+        document.core_properties.title = topic.capitalize()
+        document.add_heading(topic.capitalize(), level=1)
+        for section in sections:
+            document.add_heading(section["heading"], level=2)
+            document.add_paragraph(section["text"])
+        document.save(path)
+
+    def _write_pdf(self, path: str, topic: str, sections: List[Dict[str, str]]) -> None:
+        write_pdf(path, topic.capitalize(), sections)
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    """Wrap text into lines of at most `width` characters."""
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _pdf_string(text: str) -> str:
+    """Escape text for a PDF string literal."""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(
+    path: str, title: str, sections: List[Dict[str, str]], lines_per_page: int = 50
+) -> None:
+    """
+    Write a text-only PDF with the built-in Helvetica font.
+
+    Args:
+        path: The output file.
+        title: The document title, stored in the document information.
+        sections: The sections of the document, each a heading and a text.
+        lines_per_page: Lines of text per page.
+    """
+    lines: List[str] = []
+    for section in sections:
+        lines.append(section["heading"])
+        lines.extend(_wrap(section["text"], 90))
+        lines.append("")
+    pages = [lines[i : i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    # Objects 1-4 are the catalog, page tree, font and info; each page adds a page and a stream
+    objects: List[bytes] = [b"", b"", b"", b""]
+    page_ids = []
+    for page_lines in pages:
+        content = "BT /F1 10 Tf 14 TL 50 800 Td\n" + "".join(
+            f"({_pdf_string(line)}) Tj T*\n" for line in page_lines
+        ) + "ET"
+        stream = content.encode("latin-1", "replace")
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids),
+        len(page_ids),
+    )
+    objects[2] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    objects[3] = b"<< /Title (%s) /Author (Benchmark) >>" % _pdf_string(title).encode("latin-1", "replace")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def load_manifest(directory: str) -> Dict[str, Any]:
+    """
+    Read the manifest of a generated corpus.
+
+    Args:
+        directory: The corpus directory.
+
+    Returns:
+        The manifest.
+    """
+    with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Generate a corpus from the command line."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark corpus.")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--documents", type=int, default=5, help="Documents per format")
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per document")
+    parser.add_argument("--sentences", type=int, default=6, help="Sentences per paragraph")
+    parser.add_argument("--queries", type=int, default=2, help="Queries per document")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    manifest = CorpusGenerator(args.seed, args.paragraphs, args.sentences).generate(
+        args.output, args.documents, args.formats, args.queries
+    )
+    total = sum(entry["bytes"] for entry in manifest["files"])
+    print(
+        f"{len(manifest['files'])} documents ({total / 1024:.0f} KiB) and "
+        f"{len(manifest['queries'])} queries written to {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
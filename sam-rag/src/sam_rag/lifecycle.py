@@ -1,6 +1,7 @@
 """Lifecycle functions for the SAM RAG plugin."""
 
 import logging
+import time
 from typing import Any, Dict
 
 from pydantic import BaseModel, Field
@@ -12,8 +13,11 @@ class RagScannerConfig(BaseModel):
     """Configuration for the RAG scanner component."""
     batch: bool = Field(default=True, description="Process existing files on startup")
     use_memory_storage: bool = Field(default=True, description="Use in-memory storage")
+    memory_storage: Dict[str, Any] = Field(default={}, description="Change log of the in-memory storage: max_changes and spill_path")
     sources: List[Dict[str, Any]] = Field(default=[], description="Multiple sources configuration")
     schedule: Dict[str, Any] = Field(default={"interval": 60}, description="Scanning schedule")
+    database: Dict[str, Any] = Field(default={}, description="Tracker database used when use_memory_storage is false")
+    sharding: Dict[str, Any] = Field(default={}, description="Lease-based sharding of ingestion across instances sharing the tracker database")
 
 class RagPreprocessorConfig(BaseModel):
     """Configuration for the RAG preprocessor component."""
@@ -35,6 +39,7 @@ class RagVectorDBConfig(BaseModel):
     """Configuration for the RAG vector database component."""
     db_type: str = Field(description="Type of vector database")
     db_params: Dict[str, Any] = Field(default={}, description="Parameters for the vector database")
+    sharding: Dict[str, Any] = Field(default={}, description="Sharding across several collections")
 
 class RagLLMConfig(BaseModel):
     """Configuration for the RAG LLM component."""
@@ -43,6 +48,46 @@ class RagLLMConfig(BaseModel):
 class RagRetrievalConfig(BaseModel):
     """Configuration for the RAG retrieval component."""
     top_k: int = Field(default=5, description="Number of documents to retrieve")
+    cache: Dict[str, Any] = Field(default={}, description="Retrieval result cache configuration")
+    context: Dict[str, Any] = Field(default={}, description="Token budget of the context returned to the agent")
+    adaptive: Dict[str, Any] = Field(default={}, description="Dense-only first pass widened for low-confidence queries")
+
+class RagIngestionConfig(BaseModel):
+    """Configuration for streamed ingestion."""
+    window_chunks: int = Field(default=256, description="Chunks of a streamed file deduplicated, embedded and stored together")
+
+class RagJobQueueConfig(BaseModel):
+    """Configuration for the durable ingestion job queue."""
+    enabled: bool = Field(default=True, description="Ingest documents in background jobs")
+    path: str = Field(default="rag_jobs.db", description="Path to the SQLite file holding the queue")
+    workers: int = Field(default=1, description="Number of worker threads running ingestion jobs")
+    poll_interval: float = Field(default=5, description="Maximum seconds an idle worker waits before checking the queue again")
+    max_attempts: int = Field(default=3, description="Attempts before a job is marked failed")
+    backoff_seconds: float = Field(default=5, description="Delay before the first retry, doubled on every retry")
+    max_backoff_seconds: float = Field(default=300, description="Maximum delay between retries")
+    retention_hours: float = Field(default=168, description="Hours finished jobs are kept (0 keeps them forever)")
+
+class RagDedupeConfig(BaseModel):
+    """Configuration for near-duplicate chunk detection."""
+    enabled: bool = Field(default=False, description="Skip chunks that duplicate an ingested chunk")
+    path: str = Field(default="rag_dedupe.db", description="Path to the SQLite file holding chunk signatures")
+    threshold: float = Field(default=0.85, description="Minimum estimated Jaccard similarity of a near duplicate")
+    num_perm: int = Field(default=128, description="Number of MinHash permutations")
+    bands: int = Field(default=16, description="Number of LSH bands; must divide num_perm")
+    shingle_size: int = Field(default=3, description="Number of words per shingle")
+    min_words: int = Field(default=8, description="Chunks with fewer words are only checked for exact duplicates")
+
+class RagStartupConfig(BaseModel):
+    """Configuration for agent startup."""
+    max_seconds: float = Field(default=10, description="Startup time budget; a warning is logged when it is exceeded (0 disables)")
+
+class RagMetricsConfig(BaseModel):
+    """Configuration for ingestion and retrieval metrics."""
+    enabled: bool = Field(default=False, description="Record stage timings and counters")
+    sink: str = Field(default="prometheus", description="prometheus, memory, none, or a custom sink as 'package.module:Class'")
+    sink_params: Dict[str, Any] = Field(default={}, description="Configuration passed to a custom sink")
+    prometheus: Dict[str, Any] = Field(default={"port": 9464}, description="host, port and buckets of the Prometheus /metrics endpoint")
+    tracing: Dict[str, Any] = Field(default={}, description="OpenTelemetry tracing configuration; set enabled to open spans")
 
 class RagAgentConfig(BaseModel):
     """Configuration for the RAG agent."""
@@ -53,6 +98,11 @@ class RagAgentConfig(BaseModel):
     vector_db: RagVectorDBConfig = Field(description="Vector database configuration")
     llm: RagLLMConfig = Field(default_factory=RagLLMConfig, description="LLM configuration")
     retrieval: RagRetrievalConfig = Field(default_factory=RagRetrievalConfig, description="Retrieval configuration")
+    ingestion: RagIngestionConfig = Field(default_factory=RagIngestionConfig, description="Streamed ingestion configuration")
+    job_queue: RagJobQueueConfig = Field(default_factory=RagJobQueueConfig, description="Ingestion job queue configuration")
+    dedupe: RagDedupeConfig = Field(default_factory=RagDedupeConfig, description="Near-duplicate chunk detection configuration")
+    startup: RagStartupConfig = Field(default_factory=RagStartupConfig, description="Startup configuration")
+    metrics: RagMetricsConfig = Field(default_factory=RagMetricsConfig, description="Metrics and tracing configuration")
 
 def initialize_rag_agent(host_component: Any, init_config: RagAgentConfig):
     """
@@ -65,6 +115,7 @@ def initialize_rag_agent(host_component: Any, init_config: RagAgentConfig):
     """
     log_identifier = f"[{host_component.agent_name}:init_rag_agent]"
     log.info("%s Starting RAG Agent initialization...", log_identifier)
+    started = time.perf_counter()
     
     try:
         # Import RAG services
@@ -112,10 +163,16 @@ def initialize_rag_agent(host_component: Any, init_config: RagAgentConfig):
         4. Provide augmented responses using retrieved information
         
         You have access to tools for document ingestion and retrieval.
+        Document ingestion runs in the background: ingest_document returns a job id
+        that can be passed to get_ingestion_status.
         """
         host_component.set_agent_system_instruction_string(system_instruction)
         
-        log.info("%s RAG Agent initialization completed successfully.", log_identifier)
+        log.info(
+            "%s RAG Agent initialization completed successfully in %.2fs.",
+            log_identifier,
+            time.perf_counter() - started,
+        )
         
     except Exception as e:
         log.exception("%s Failed to initialize RAG Agent: %s", log_identifier, e)
@@ -9,6 +9,7 @@ This package contains various services used by the RAG system:
 - preprocessor: Prepares documents for processing
 - splitter: Splits documents into chunks
 - ingestor: Handles document ingestion
+- jobs: Runs document ingestion in durable background jobs
 - memory: Manages memory for RAG operations
 - rag: Core RAG functionality
 """
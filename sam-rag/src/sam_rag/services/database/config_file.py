@@ -0,0 +1,69 @@
+"""
+Loading of agent configuration files for the command line tools.
+
+Agent configurations use `${VAR}` and `${VAR, default}` placeholders that the
+agent host expands from the environment. `yaml.safe_load` leaves them as
+literal strings, so the tools expand them the same way after loading.
+"""
+
+import os
+import re
+from typing import Any, Dict
+
+_PLACEHOLDER = re.compile(r"\$\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:,\s*([^}]*?))?\s*\}")
+
+
+def expand_env(value: Any) -> Any:
+    """
+    Expand `${VAR}` and `${VAR, default}` placeholders in a loaded configuration.
+
+    A string that is a single placeholder is parsed as a YAML scalar after
+    expansion, so e.g. `${PORT, 6333}` becomes an integer and
+    `${DEV_MODE, false}` a boolean. Placeholders of unset variables without a
+    default expand to an empty string.
+
+    Args:
+        value: The configuration, or a part of it.
+
+    Returns:
+        The configuration with the placeholders expanded.
+    """
+    if isinstance(value, dict):
+        return {key: expand_env(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [expand_env(item) for item in value]
+    if not isinstance(value, str) or "${" not in value:
+        return value
+
+    def replace(match: "re.Match[str]") -> str:
+        default = match.group(2)
+        return os.environ.get(match.group(1), default if default is not None else "")
+
+    expanded = _PLACEHOLDER.sub(replace, value)
+    if expanded.strip() and _PLACEHOLDER.fullmatch(value.strip()):
+        import yaml
+
+        try:
+            parsed = yaml.safe_load(expanded)
+        except yaml.YAMLError:
+            return expanded
+        # Keep values that do not parse as a scalar, e.g. "a: b", as strings
+        if parsed is None or isinstance(parsed, (str, int, float, bool)):
+            return parsed
+    return expanded
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """
+    Load a YAML configuration file and expand its placeholders.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        The configuration.
+    """
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        return expand_env(yaml.safe_load(f) or {})
@@ -1,53 +1,433 @@
 import logging
-from typing import Dict
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from sqlalchemy import inspect
+from sqlalchemy import text
+from sqlalchemy import case, or_
 from datetime import datetime, timezone
 
-from sam_rag.services.database.model import Document, StatusEnum, config_db
+from sam_rag.services.database.model import Document, Lease, StatusEnum, config_db
 
 log = logging.getLogger(__name__)
 
 SessionLocal = None
 
+# Rows per statement for bulk upserts and IN lookups, kept well below the
+# bound-parameter limits of SQLite and PostgreSQL
+BULK_CHUNK_SIZE = 500
+
+# Columns added after the initial schema, created on connect for existing databases
+_ADDED_COLUMNS = {
+    "content_hash": "VARCHAR(64)",
+    "size": "BIGINT",
+    "mtime": "FLOAT",
+}
+
 
 def get_db() -> Session:
-    db = SessionLocal()
+    """
+    Create a new database session.
+
+    The caller owns the session and must close it. Prefer `session_scope`,
+    which commits, rolls back and closes the session automatically.
+    """
+    if SessionLocal is None:
+        raise RuntimeError("Database is not connected.") from None
+    return SessionLocal()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Provide a transactional scope around a series of operations.
+
+    The session is committed on success, rolled back on error and always closed.
+    """
+    db = get_db()
     try:
-        return db
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
 
-def insert_document(db: Session, path: str, file: str, status: StatusEnum) -> Document:
-    doc = Document(path=path, file=file, status=status, timestamp=datetime.now(timezone.utc))
-    db.add(doc)
+def _to_status(status: Any) -> StatusEnum:
+    """Coerce a status name or enum member to StatusEnum."""
+    return status if isinstance(status, StatusEnum) else StatusEnum(status)
+
+
+def insert_document(
+    db: Session,
+    path: str,
+    file: str,
+    status: StatusEnum,
+    content_hash: Optional[str] = None,
+    size: Optional[int] = None,
+    mtime: Optional[float] = None,
+) -> Document:
+    doc = Document(
+        path=path,
+        file=file,
+        status=_to_status(status),
+        timestamp=datetime.now(timezone.utc),
+        content_hash=content_hash,
+        size=size,
+        mtime=mtime,
+    )
+    doc = db.merge(doc)
     db.commit()
-    db.refresh(doc)
     return doc
 
 
-def update_document(db: Session, path: str, status: StatusEnum) -> Document:
-    doc = db.query(Document).filter(Document.path == path).first()
+def update_document(
+    db: Session,
+    path: str,
+    status: StatusEnum,
+    content_hash: Optional[str] = None,
+    size: Optional[int] = None,
+    mtime: Optional[float] = None,
+) -> Document:
+    doc = db.get(Document, path)
     if doc:
-        doc.status = status
+        doc.status = _to_status(status)
         doc.timestamp = datetime.now(timezone.utc)
+        if content_hash is not None:
+            doc.content_hash = content_hash
+        if size is not None:
+            doc.size = size
+        if mtime is not None:
+            doc.mtime = mtime
         db.commit()
         db.refresh(doc)
     return doc
 
 
 def delete_document(db: Session, path: str) -> Document:
-    doc = db.query(Document).filter(Document.path == path).first()
+    doc = db.get(Document, path)
     if doc:
         db.delete(doc)
         db.commit()
     return doc
 
 
+def upsert_documents(db: Session, documents: Iterable[Dict[str, Any]]) -> int:
+    """
+    Insert or update many documents in a single transaction.
+
+    Each document is a dict with `path`, `file` and `status`, and optionally
+    `content_hash`, `size` and `mtime`. SQLite and PostgreSQL use a native
+    `INSERT ... ON CONFLICT DO UPDATE`; other dialects fall back to `merge`.
+
+    Args:
+        db: The database session.
+        documents: The documents to upsert.
+
+    Returns:
+        The number of documents written.
+    """
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "path": doc["path"],
+            "file": doc["file"],
+            "status": _to_status(doc.get("status", StatusEnum.new)),
+            "timestamp": now,
+            "content_hash": doc.get("content_hash"),
+            "size": doc.get("size"),
+            "mtime": doc.get("mtime"),
+        }
+        for doc in documents
+    ]
+    if not rows:
+        return 0
+
+    dialect_insert = _dialect_insert(db)
+    try:
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start : start + BULK_CHUNK_SIZE]
+            if dialect_insert is None:
+                for row in chunk:
+                    db.merge(Document(**row))
+                continue
+            stmt = dialect_insert(Document).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Document.path],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in (
+                        "file",
+                        "status",
+                        "timestamp",
+                        "content_hash",
+                        "size",
+                        "mtime",
+                    )
+                },
+            )
+            db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    log.debug("Upserted %d documents", len(rows))
+    return len(rows)
+
+
+def get_document_states(db: Session, paths: Iterable[str]) -> Dict[str, Document]:
+    """
+    Look up tracked documents by path using the primary key index.
+
+    Args:
+        db: The database session.
+        paths: The paths to look up.
+
+    Returns:
+        Mapping of path to Document for the paths that are tracked.
+    """
+    paths = list(paths)
+    states: Dict[str, Document] = {}
+    for start in range(0, len(paths), BULK_CHUNK_SIZE):
+        chunk = paths[start : start + BULK_CHUNK_SIZE]
+        for doc in db.query(Document).filter(Document.path.in_(chunk)):
+            states[doc.path] = doc
+    return states
+
+
+def get_documents_by_status(db: Session, status: StatusEnum) -> List[Document]:
+    """
+    Get all tracked documents with the given status using the status index.
+
+    Args:
+        db: The database session.
+        status: The status to filter by.
+
+    Returns:
+        The matching documents.
+    """
+    return db.query(Document).filter(Document.status == _to_status(status)).all()
+
+
+def _dialect_insert(db: Session):
+    """Get the dialect-specific insert construct supporting ON CONFLICT, or None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        dialect_insert = None
+    return dialect_insert
+
+
+def acquire_leases(
+    db: Session, keys: Iterable[str], owner: str, ttl_seconds: float
+) -> List[str]:
+    """
+    Acquire leases on keys that are free, expired or already held by the owner.
+
+    Each lease is taken with a single conditional upsert, so concurrent
+    instances never both acquire the same key. Leases already held by the
+    owner are renewed.
+
+    Args:
+        db: The database session.
+        keys: The lease keys to acquire.
+        owner: The identity of the acquiring instance.
+        ttl_seconds: How long the leases stay valid without renewal.
+
+    Returns:
+        The keys now leased by the owner.
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    now = time.time()
+    expires_at = now + ttl_seconds
+    dialect_insert = _dialect_insert(db)
+    try:
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = keys[start : start + BULK_CHUNK_SIZE]
+            if dialect_insert is None:
+                for key in chunk:
+                    lease = db.get(Lease, key, with_for_update=True)
+                    if lease is None:
+                        db.add(Lease(key=key, owner=owner, expires_at=expires_at, acquired_at=now))
+                    elif lease.owner == owner or lease.expires_at < now:
+                        if lease.owner != owner:
+                            lease.acquired_at = now
+                        lease.owner = owner
+                        lease.expires_at = expires_at
+                db.flush()
+                continue
+            stmt = dialect_insert(Lease).values(
+                [
+                    {"key": key, "owner": owner, "expires_at": expires_at, "acquired_at": now}
+                    for key in chunk
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Lease.key],
+                set_={
+                    "owner": stmt.excluded.owner,
+                    "expires_at": stmt.excluded.expires_at,
+                    "acquired_at": case(
+                        (Lease.owner == owner, Lease.acquired_at),
+                        else_=stmt.excluded.acquired_at,
+                    ),
+                },
+                # Only take over leases that expired, or renew our own
+                where=or_(Lease.expires_at < now, Lease.owner == owner),
+            )
+            db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return get_held_leases(db, keys, owner)
+
+
+def renew_leases(
+    db: Session, keys: Iterable[str], owner: str, ttl_seconds: float
+) -> List[str]:
+    """
+    Extend the leases the owner still holds.
+
+    Args:
+        db: The database session.
+        keys: The lease keys to renew.
+        owner: The identity of the instance holding the leases.
+        ttl_seconds: How long the leases stay valid without renewal.
+
+    Returns:
+        The keys still leased by the owner; leases taken over by another
+        instance are missing.
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    expires_at = time.time() + ttl_seconds
+    try:
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = keys[start : start + BULK_CHUNK_SIZE]
+            db.query(Lease).filter(Lease.key.in_(chunk), Lease.owner == owner).update(
+                {Lease.expires_at: expires_at}, synchronize_session=False
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return get_held_leases(db, keys, owner)
+
+
+def release_leases(db: Session, keys: Iterable[str], owner: str) -> int:
+    """
+    Release leases held by the owner so other instances can take them immediately.
+
+    Args:
+        db: The database session.
+        keys: The lease keys to release.
+        owner: The identity of the instance holding the leases.
+
+    Returns:
+        The number of leases released.
+    """
+    keys = list(keys)
+    released = 0
+    try:
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = keys[start : start + BULK_CHUNK_SIZE]
+            released += (
+                db.query(Lease)
+                .filter(Lease.key.in_(chunk), Lease.owner == owner)
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return released
+
+
+def get_held_leases(db: Session, keys: Iterable[str], owner: str) -> List[str]:
+    """
+    Get which of the keys are currently leased by the owner.
+
+    Args:
+        db: The database session.
+        keys: The lease keys to check.
+        owner: The identity of the instance.
+
+    Returns:
+        The keys with an unexpired lease held by the owner.
+    """
+    keys = list(keys)
+    now = time.time()
+    held: List[str] = []
+    for start in range(0, len(keys), BULK_CHUNK_SIZE):
+        chunk = keys[start : start + BULK_CHUNK_SIZE]
+        held.extend(
+            key
+            for (key,) in db.query(Lease.key).filter(
+                Lease.key.in_(chunk), Lease.owner == owner, Lease.expires_at >= now
+            )
+        )
+    return held
+
+
+def get_live_leases(db: Session, prefix: str) -> Dict[str, str]:
+    """
+    Get the unexpired leases whose key starts with a prefix.
+
+    Args:
+        db: The database session.
+        prefix: The key prefix, e.g. "shard:".
+
+    Returns:
+        Mapping of lease key to owner.
+    """
+    rows = db.query(Lease.key, Lease.owner).filter(
+        Lease.key.startswith(prefix, autoescape=True), Lease.expires_at >= time.time()
+    )
+    return {key: owner for key, owner in rows}
+
+
+def _ensure_schema(engine) -> None:
+    """
+    Add columns and indexes introduced after a database was first created.
+    """
+    inspector = inspect(engine)
+    if Document.__tablename__ not in inspector.get_table_names():
+        return
+
+    existing = {column["name"] for column in inspector.get_columns(Document.__tablename__)}
+    with engine.begin() as conn:
+        for name, column_type in _ADDED_COLUMNS.items():
+            if name not in existing:
+                conn.execute(
+                    text(f"ALTER TABLE {Document.__tablename__} ADD COLUMN {name} {column_type}")
+                )
+                log.info("Added column %s to %s table", name, Document.__tablename__)
+
+    for index in Document.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    # Tables added after the initial schema
+    Lease.__table__.create(bind=engine, checkfirst=True)
+
+
 def connect(config: Dict = {}) -> Session:
     global SessionLocal
     db_url = config_db(config)
@@ -61,6 +441,8 @@ def connect(config: Dict = {}) -> Session:
         if not inspect(engine).get_table_names():
             raise RuntimeError("Failed to establish a database connection.") from None
 
+        _ensure_schema(engine)
+
         log.info("Database connected")
         return SessionLocal
     except Exception:
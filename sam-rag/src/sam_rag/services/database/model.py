@@ -1,7 +1,7 @@
 import enum
 import logging
 from typing import Dict
-from sqlalchemy import create_engine, Column, String, Enum, DateTime
+from sqlalchemy import create_engine, Column, String, Enum, DateTime, BigInteger, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime, timezone
 
@@ -17,11 +17,34 @@ class StatusEnum(enum.Enum):
 
 class Document(Base):
     __tablename__ = "document"
+    __table_args__ = (
+        Index("ix_document_status_timestamp", "status", "timestamp"),
+    )
 
     path = Column(String, primary_key=True)
     file = Column(String, nullable=False)
-    status = Column(Enum(StatusEnum), nullable=False)
-    timestamp = Column(DateTime, default=datetime.now(timezone.utc))
+    status = Column(Enum(StatusEnum), nullable=False, index=True)
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # File state used for change detection without re-reading the file
+    content_hash = Column(String(64), nullable=True, index=True)
+    size = Column(BigInteger, nullable=True)
+    mtime = Column(Float, nullable=True)
+
+
+class Lease(Base):
+    """
+    A time-bounded claim by one agent instance on a unit of work.
+
+    Keys name either a path shard ("shard:<n>") or an instance membership
+    record ("member:<owner>"). Times are epoch seconds.
+    """
+
+    __tablename__ = "lease"
+
+    key = Column(String, primary_key=True)
+    owner = Column(String, nullable=False, index=True)
+    expires_at = Column(Float, nullable=False, index=True)
+    acquired_at = Column(Float, nullable=False)
 
 
 def config_db(config: Dict = {}):
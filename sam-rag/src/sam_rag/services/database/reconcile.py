@@ -0,0 +1,638 @@
+"""
+Reconciliation and garbage collection of the vector database.
+
+Deleted files, re-ingests that store chunks under new IDs and failed partial
+ingests leave chunks in the vector database that no tracked document owns.
+The reconciler reads every chunk once, without its vectors, and marks:
+
+- orphans: chunks whose source (the "file_path" or "source" metadata) is in
+  the managed scope but is no longer tracked or no longer on disk,
+- stale chunks: chunks of a tracked source whose "content_hash" metadata is
+  not the content hash the tracker holds for it, left by an earlier version
+  of the file, and
+- duplicates: chunks with the same source and text as a chunk read earlier.
+
+Digests of the chunks read and the IDs to delete are kept in a temporary
+SQLite file rather than in memory, so memory use does not grow with the size
+of the corpus. Marked chunks are deleted in batches once the scan is
+complete, because deleting while paging would shift offset-based iterators.
+Backend-specific compaction can run afterwards.
+
+Run it with the agent configuration:
+
+    python -m sam_rag.services.database.reconcile --config config.yaml --dry-run
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sam_rag.services.database.vector_db_service import VectorDBService
+from sam_rag.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Verdicts on sources kept between batches; chunks of a source are usually
+# stored together, so a small cache saves most tracker lookups
+DEFAULT_CACHE_SIZE = 100_000
+
+# Rows per statement, below the bound-parameter limit of older SQLite builds
+_SQLITE_CHUNK_SIZE = 500
+
+_SPILL_SCHEMA = """
+CREATE TABLE seen (digest BLOB PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE marked (seq INTEGER PRIMARY KEY, id TEXT NOT NULL);
+CREATE TABLE orphan_sources (source TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+
+def chunk_source(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Get the source document of a chunk.
+
+    Args:
+        metadata: The chunk metadata.
+
+    Returns:
+        The "file_path" or "source" of the chunk, or None.
+    """
+    metadata = metadata or {}
+    source = metadata.get("file_path") or metadata.get("source")
+    return str(source) if source else None
+
+
+class SourceChecker:
+    """
+    Decides whether the sources of chunks are still part of the corpus.
+
+    Only sources in the scope are checked; chunks of other sources, such as
+    uploaded artifacts, are never treated as orphans.
+    """
+
+    def __init__(
+        self,
+        scope: Sequence[str],
+        use_tracker: bool = False,
+        check_files: bool = True,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        """
+        Initialize the checker.
+
+        Args:
+            scope: Directories or URI prefixes whose documents are managed.
+            use_tracker: Whether sources must be tracked in the scanner
+                database; `connect` must have been called.
+            check_files: Whether local sources must exist on disk.
+            cache_size: The number of verdicts kept between lookups.
+        """
+        self.scope = [prefix.rstrip("/\\") for prefix in scope if prefix]
+        self.use_tracker = use_tracker
+        self.check_files = check_files
+        self.cache_size = max(0, cache_size)
+        self._cache: "collections.OrderedDict[str, Tuple[bool, Optional[str]]]" = (
+            collections.OrderedDict()
+        )
+
+    def in_scope(self, source: str) -> bool:
+        """
+        Check whether a source is managed.
+
+        Args:
+            source: The source of a chunk.
+
+        Returns:
+            Whether the source is one of the scope prefixes or below one.
+        """
+        for prefix in self.scope:
+            if source == prefix or source.startswith((prefix + "/", prefix + os.sep)):
+                return True
+        return False
+
+    def check(self, sources: Iterable[str]) -> Dict[str, bool]:
+        """
+        Check whether sources are live.
+
+        Args:
+            sources: The sources to check.
+
+        Returns:
+            Mapping of every source to whether it is live. Sources outside
+            the scope are live.
+        """
+        return {source: live for source, (live, _) in self.check_states(sources).items()}
+
+    def check_states(self, sources: Iterable[str]) -> Dict[str, Tuple[bool, Optional[str]]]:
+        """
+        Check whether sources are live and get their current content hashes.
+
+        Args:
+            sources: The sources to check.
+
+        Returns:
+            Mapping of every source to whether it is live and the content
+            hash the tracker holds for it, or None if it is not known.
+            Sources outside the scope are live with an unknown hash.
+        """
+        states: Dict[str, Tuple[bool, Optional[str]]] = {}
+        pending = []
+        for source in set(sources):
+            if not self.in_scope(source):
+                states[source] = (True, None)
+            elif source in self._cache:
+                self._cache.move_to_end(source)
+                states[source] = self._cache[source]
+            else:
+                pending.append(source)
+        if not pending:
+            return states
+
+        tracked = self._tracked(pending) if self.use_tracker else None
+        for source in pending:
+            live = True
+            content_hash = None
+            if tracked is not None:
+                live = source in tracked
+                content_hash = tracked.get(source)
+            if live and self.check_files and "://" not in source:
+                live = os.path.exists(source)
+            states[source] = (live, content_hash)
+            self._remember(source, states[source])
+        return states
+
+    def _tracked(self, sources: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Get the sources tracked in the scanner database and not marked deleted.
+
+        Returns:
+            Mapping of the tracked sources to their content hashes, or None
+            if the lookup failed.
+        """
+        from sam_rag.services.database.connect import get_document_states, session_scope
+        from sam_rag.services.database.model import StatusEnum
+
+        try:
+            with session_scope() as db:
+                return {
+                    path: doc.content_hash
+                    for path, doc in get_document_states(db, sources).items()
+                    if doc.status != StatusEnum.deleted
+                }
+        except Exception:
+            # Without an answer, no chunk of these sources is deleted
+            logger.exception("Error reading tracked documents, keeping their chunks.")
+            return None
+
+    def _remember(self, source: str, state: Tuple[bool, Optional[str]]) -> None:
+        """Cache a verdict, evicting the least recently used ones."""
+        if not self.cache_size:
+            return
+        self._cache[source] = state
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+class _SpillStore:
+    """
+    Disk-backed sets of the chunk digests seen and the chunk IDs to delete.
+    """
+
+    def __init__(self, work_dir: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(prefix="sam_rag_reconcile_", suffix=".db", dir=work_dir)
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        # Scratch data: nothing has to survive a crash
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript(_SPILL_SCHEMA)
+
+    def first_seen(self, digests: List[bytes]) -> List[bool]:
+        """
+        Record digests and report which of them were not seen before.
+
+        Args:
+            digests: The digests, in order.
+
+        Returns:
+            For every digest, whether it is the first occurrence.
+        """
+        existing = set()
+        for start in range(0, len(digests), _SQLITE_CHUNK_SIZE):
+            batch = digests[start : start + _SQLITE_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            existing.update(
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT digest FROM seen WHERE digest IN ({placeholders})", batch
+                )
+            )
+        fresh = []
+        first = []
+        for digest in digests:
+            is_first = digest not in existing
+            first.append(is_first)
+            if is_first:
+                existing.add(digest)
+                fresh.append((digest,))
+        self._conn.executemany("INSERT INTO seen (digest) VALUES (?)", fresh)
+        self._conn.commit()
+        return first
+
+    def mark(self, ids: List[Any]) -> None:
+        """Record the IDs of chunks to delete; JSON keeps integer IDs intact."""
+        self._conn.executemany(
+            "INSERT INTO marked (id) VALUES (?)", [(json.dumps(doc_id),) for doc_id in ids]
+        )
+        self._conn.commit()
+
+    def add_orphan_sources(self, sources: Iterable[str]) -> None:
+        """Record sources that have orphaned chunks."""
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO orphan_sources (source) VALUES (?)",
+            [(source,) for source in sources],
+        )
+        self._conn.commit()
+
+    def orphan_source_count(self) -> int:
+        """Get the number of sources with orphaned chunks."""
+        return self._conn.execute("SELECT COUNT(*) FROM orphan_sources").fetchone()[0]
+
+    def sample_orphan_sources(self, limit: int) -> List[str]:
+        """Get up to `limit` sources with orphaned chunks, for reporting."""
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT source FROM orphan_sources ORDER BY source LIMIT ?", (limit,)
+            )
+        ]
+
+    def iter_marked(self, batch_size: int) -> Iterator[List[Any]]:
+        """
+        Read the marked IDs back, in batches.
+
+        Yields:
+            Lists of chunk IDs.
+        """
+        last = 0
+        while True:
+            rows = self._conn.execute(
+                "SELECT seq, id FROM marked WHERE seq > ? ORDER BY seq LIMIT ?",
+                (last, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [json.loads(doc_id) for _, doc_id in rows]
+
+    def close(self) -> None:
+        """Close and remove the file."""
+        self._conn.close()
+        try:
+            os.unlink(self.path)
+        except OSError as e:
+            logger.warning(f"Failed to remove {self.path}: {e}")
+
+
+class VectorStoreReconciler:
+    """
+    Deletes orphaned, stale and duplicate chunks from the vector database.
+    """
+
+    def __init__(
+        self,
+        vector_db: VectorDBService,
+        source_checker: SourceChecker,
+        deduplicator: Any = None,
+        batch_size: int = 500,
+        work_dir: Optional[str] = None,
+    ):
+        """
+        Initialize the reconciler.
+
+        Args:
+            vector_db: The vector database service.
+            source_checker: Decides which sources are live.
+            deduplicator: Optional `ChunkDeduplicator` of the agent. Orphans
+                that are the stored copy of a duplicate in a live source are
+                kept, and deleted chunks are removed from its index.
+            batch_size: Chunks read and deleted per batch.
+            work_dir: Directory of the temporary file (default: the system
+                temporary directory).
+        """
+        self.vector_db = vector_db
+        self.source_checker = source_checker
+        self.deduplicator = deduplicator
+        self.batch_size = max(1, batch_size)
+        self.work_dir = work_dir
+
+    def run(
+        self,
+        dry_run: bool = False,
+        orphans: bool = True,
+        duplicates: bool = True,
+        compact: bool = False,
+        reindex: bool = False,
+        stale: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Scan the vector database and delete the chunks found.
+
+        Args:
+            dry_run: Only count the chunks that would be deleted.
+            orphans: Whether chunks of sources that are gone are deleted.
+            duplicates: Whether repeated chunks of a source are deleted.
+            compact: Whether the backend is compacted afterwards.
+            reindex: Whether compaction also rebuilds indexes.
+            stale: Whether chunks of an earlier version of a tracked source
+                are deleted.
+
+        Returns:
+            The number of chunks "scanned", "orphans", "stale",
+            "duplicates", "linked" orphans and stale chunks kept for live
+            duplicates, chunks without a
+            source ("unsourced") or outside the scope ("unmanaged"),
+            "deleted" and "failed" chunks, "orphan_sources", a sample of them
+            under "sample_sources", and whether the backend was "compacted".
+        """
+        stats: Dict[str, Any] = {
+            "scanned": 0,
+            "orphans": 0,
+            "stale": 0,
+            "duplicates": 0,
+            "linked": 0,
+            "unsourced": 0,
+            "unmanaged": 0,
+            "deleted": 0,
+            "failed": 0,
+            "orphan_sources": 0,
+            "sample_sources": [],
+            "compacted": False,
+        }
+        store = _SpillStore(self.work_dir)
+        try:
+            with get_metrics().stage("reconcile", dry_run=dry_run):
+                batches = self.vector_db.db.iter_documents(
+                    self.batch_size, include_embeddings=False
+                )
+                for number, documents in enumerate(batches, 1):
+                    self._scan(documents, store, stats, orphans, duplicates, stale)
+                    if number % 100 == 0:
+                        logger.info(
+                            f"Scanned {stats['scanned']} chunks: {stats['orphans']} orphans, "
+                            f"{stats['stale']} stale, {stats['duplicates']} duplicates."
+                        )
+                stats["orphan_sources"] = store.orphan_source_count()
+                stats["sample_sources"] = store.sample_orphan_sources(10)
+                if not dry_run:
+                    self._delete(store, stats)
+        finally:
+            store.close()
+
+        if compact and not dry_run:
+            try:
+                stats["compacted"] = self.vector_db.compact(reindex)
+            except Exception:
+                logger.exception("Error compacting the vector database.")
+        return stats
+
+    def _scan(
+        self,
+        documents: List[Dict[str, Any]],
+        store: _SpillStore,
+        stats: Dict[str, Any],
+        orphans: bool,
+        duplicates: bool,
+        stale: bool = True,
+    ) -> None:
+        """Mark the orphans, stale chunks and duplicates of a batch of chunks."""
+        stats["scanned"] += len(documents)
+        sources = [chunk_source(doc.get("metadata")) for doc in documents]
+        states = (
+            self.source_checker.check_states(source for source in sources if source)
+            if orphans or stale
+            else {}
+        )
+
+        marked: List[Any] = []
+        orphan_sources = set()
+        candidates: List[Any] = []
+        digests: List[bytes] = []
+        for doc, source in zip(documents, sources):
+            if not source:
+                stats["unsourced"] += 1
+                continue
+            live, current_hash = states.get(source, (True, None))
+            if orphans and not live:
+                if self._linked_to_live(doc["id"]):
+                    stats["linked"] += 1
+                    continue
+                marked.append(doc["id"])
+                orphan_sources.add(source)
+                stats["orphans"] += 1
+                continue
+            chunk_hash = (doc.get("metadata") or {}).get("content_hash")
+            if stale and live and current_hash and chunk_hash and chunk_hash != current_hash:
+                if self._linked_to_live(doc["id"]):
+                    stats["linked"] += 1
+                    continue
+                marked.append(doc["id"])
+                stats["stale"] += 1
+                continue
+            if not self.source_checker.in_scope(source):
+                stats["unmanaged"] += 1
+            if duplicates:
+                text = doc.get("text") or ""
+                candidates.append(doc["id"])
+                digests.append(
+                    hashlib.blake2b(
+                        f"{source}\0{text}".encode("utf-8", "surrogatepass"), digest_size=16
+                    ).digest()
+                )
+
+        if digests:
+            for doc_id, first in zip(candidates, store.first_seen(digests)):
+                if not first:
+                    marked.append(doc_id)
+                    stats["duplicates"] += 1
+        if marked:
+            store.mark(marked)
+        if orphan_sources:
+            store.add_orphan_sources(orphan_sources)
+
+    def _linked_to_live(self, document_id: Any) -> bool:
+        """Check whether a chunk is the stored copy of a duplicate in a live source."""
+        if self.deduplicator is None:
+            return False
+        try:
+            linked = self.deduplicator.linked_sources(str(document_id))
+        except Exception:
+            logger.exception("Error reading the dedupe index, keeping the chunk.")
+            return True
+        return bool(linked) and any(self.source_checker.check(linked).values())
+
+    def _delete(self, store: _SpillStore, stats: Dict[str, Any]) -> None:
+        """Delete the marked chunks in batches."""
+        for ids in store.iter_marked(self.batch_size):
+            try:
+                self.vector_db.delete(ids)
+            except Exception:
+                logger.exception(f"Error deleting {len(ids)} chunks.")
+                stats["failed"] += len(ids)
+                continue
+            stats["deleted"] += len(ids)
+            if self.deduplicator is not None:
+                try:
+                    self.deduplicator.forget_documents([str(doc_id) for doc_id in ids])
+                except Exception:
+                    logger.exception("Error removing deleted chunks from the dedupe index.")
+        if stats["deleted"]:
+            logger.info(f"Deleted {stats['deleted']} chunks.")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Reconcile the vector database with the tracked documents from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Delete orphaned and duplicate chunks from the vector database "
+        "and compact it."
+    )
+    parser.add_argument(
+        "--config",
+        required=True,
+        help="YAML file with a vector_db section (or an agent config containing one)",
+    )
+    parser.add_argument(
+        "--scope",
+        action="append",
+        default=None,
+        help="Directory or URI prefix whose documents are managed; repeatable "
+        "(default: the directories of the filesystem sources of the scanner)",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    parser.add_argument("--skip-orphans", action="store_true", help="Keep orphaned chunks")
+    parser.add_argument(
+        "--skip-stale",
+        action="store_true",
+        help="Keep chunks of earlier versions of tracked files",
+    )
+    parser.add_argument("--skip-duplicates", action="store_true", help="Keep duplicate chunks")
+    parser.add_argument(
+        "--no-file-check",
+        action="store_true",
+        help="Do not treat local sources missing on disk as orphans",
+    )
+    parser.add_argument("--compact", action="store_true", help="Compact the backend afterwards")
+    parser.add_argument(
+        "--reindex", action="store_true", help="Also rebuild indexes while compacting (pgvector)"
+    )
+    parser.add_argument("--work-dir", help="Directory of the temporary file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    from sam_rag.services.database.config_file import load_config
+
+    config = load_config(args.config)
+    vector_db_config = _find_section(config, "vector_db")
+    if not vector_db_config:
+        parser.error(f"No vector_db section found in {args.config}")
+    scanner_config = _find_section(config, "scanner") or {}
+
+    scope = args.scope if args.scope is not None else _scanner_directories(scanner_config)
+    use_tracker = False
+    database_config = scanner_config.get("database")
+    if not scanner_config.get("use_memory_storage", False) and database_config:
+        from sam_rag.services.database.connect import connect
+
+        connect(database_config)
+        use_tracker = True
+    if not args.skip_orphans and not scope:
+        logger.warning("No scope configured or given with --scope; orphans are not deleted.")
+
+    deduplicator = None
+    dedupe_config = _find_section(config, "dedupe") or {}
+    if dedupe_config.get("enabled", False):
+        from sam_rag.services.dedupe import ChunkDeduplicator
+
+        deduplicator = ChunkDeduplicator(dedupe_config)
+
+    vector_db = VectorDBService(
+        vector_db_config, hybrid_search_config=_find_section(config, "hybrid_search")
+    )
+    checker = SourceChecker(scope, use_tracker=use_tracker, check_files=not args.no_file_check)
+    reconciler = VectorStoreReconciler(
+        vector_db,
+        checker,
+        deduplicator=deduplicator,
+        batch_size=args.batch_size,
+        work_dir=args.work_dir,
+    )
+    try:
+        stats = reconciler.run(
+            dry_run=args.dry_run,
+            orphans=not args.skip_orphans,
+            duplicates=not args.skip_duplicates,
+            compact=args.compact,
+            reindex=args.reindex,
+            stale=not args.skip_stale,
+        )
+    finally:
+        if deduplicator is not None:
+            deduplicator.close()
+
+    removable = stats["orphans"] + stats["stale"] + stats["duplicates"]
+    print(
+        f"Scanned {stats['scanned']} chunks: {stats['orphans']} orphans of "
+        f"{stats['orphan_sources']} sources, {stats['stale']} stale, "
+        f"{stats['duplicates']} duplicates, {stats['linked']} kept for live duplicates, "
+        f"{stats['unsourced']} without a source, {stats['unmanaged']} outside the scope."
+    )
+    for source in stats["sample_sources"]:
+        print(f"  orphaned: {source}")
+    if args.dry_run:
+        print(f"Would delete {removable} chunks.")
+    else:
+        print(f"Deleted {stats['deleted']} chunks, {stats['failed']} failed.")
+    if args.compact and not args.dry_run:
+        print("Compacted the backend." if stats["compacted"] else "The backend was not compacted.")
+    return 1 if stats["failed"] else 0
+
+
+def _scanner_directories(scanner_config: Dict[str, Any]) -> List[str]:
+    """Get the directories of the filesystem sources of a scanner configuration."""
+    sources = scanner_config.get("sources") or []
+    if not sources and scanner_config.get("source"):
+        sources = [scanner_config["source"]]
+    directories: List[str] = []
+    for source in sources:
+        if isinstance(source, dict) and source.get("type", "filesystem") == "filesystem":
+            directories.extend(str(d) for d in source.get("directories") or [] if d)
+    return directories
+
+
+def _find_section(config: Any, name: str) -> Optional[Dict[str, Any]]:
+    """Find the first section with the given name in a configuration."""
+    if isinstance(config, dict):
+        if isinstance(config.get(name), dict):
+            return config[name]
+        values = config.values()
+    elif isinstance(config, list):
+        values = config
+    else:
+        return None
+    for value in values:
+        found = _find_section(value, name)
+        if found:
+            return found
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
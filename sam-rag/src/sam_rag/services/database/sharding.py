@@ -0,0 +1,806 @@
+"""
+Sharding of a vector database across several collections.
+
+Each shard is a separate collection, index or table of the configured
+backend. Writes are routed to a shard by a metadata field (e.g. the tenant)
+or by hash. Searches go only to the shards a filter selects, or fan out to
+all shards in parallel, and the results are merged by score.
+
+The shards in use are recorded in a small JSON registry, so searches still
+reach shards that are no longer produced by the routing (e.g. after the
+number of hash shards changed) until they are rebalanced.
+
+Rebalancing moves documents to the shard the current routing assigns them
+to, and can migrate an unsharded collection into the shards:
+
+    python -m sam_rag.services.database.sharding --config config.yaml
+    python -m sam_rag.services.database.sharding --config config.yaml --from-unsharded
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Type
+
+import numpy as np
+
+from sam_rag.services.database.vector_db_base import (
+    Embeddings,
+    PartialWriteError,
+    VectorDBBase,
+)
+
+logger = logging.getLogger(__name__)
+
+# The db_params key naming the collection, index or table of each backend,
+# and its default value
+SHARD_NAME_PARAMS = {
+    "chroma": ("collection_name", "documents"),
+    "qdrant": ("collection_name", "documents"),
+    "pgvector": ("table_name", "documents"),
+    "pinecone": ("index_name", None),
+    "redis_legacy": ("index_name", "documents"),
+    "redis_vl": ("index_name", "rag-redis-index"),
+}
+
+# Backends whose search results are ranked by a score where higher is better.
+# The others return a distance where lower is better.
+HIGHER_IS_BETTER = {"qdrant", "pinecone"}
+
+_SHARD_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+class ShardedVectorDB(VectorDBBase):
+    """
+    Vector database that spreads documents over one collection per shard.
+    """
+
+    def __init__(
+        self,
+        db_type: str,
+        implementation: Type[VectorDBBase],
+        db_params: Dict[str, Any],
+        sharding_config: Dict[str, Any],
+        hybrid_search_config: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize the sharded vector database.
+
+        Args:
+            db_type: The backend type, e.g. "qdrant".
+            implementation: The backend class.
+            db_params: The backend parameters. The collection, index or table
+                name is suffixed with the shard name for each shard.
+            sharding_config: The sharding configuration.
+                - strategy: "key" to use the value of `key` as the shard, or
+                  "hash" to hash it (or the document ID) into `num_shards`
+                  shards (default: "key" if `key` is set, else "hash").
+                - key: Metadata field to route by, e.g. "tenant_id".
+                - num_shards: Number of shards with the hash strategy (default: 4).
+                - shards: Shards to open at startup with the key strategy.
+                - default_shard: Shard of documents without a `key` value
+                  with the key strategy (default: "default").
+                - registry_path: JSON file recording the shards in use
+                  (default: "rag_shards.json").
+                - max_parallel: Shards queried or written at the same time (default: 8).
+            hybrid_search_config: Optional dictionary containing hybrid search configuration.
+        """
+        super().__init__(config=db_params, hybrid_search_config=hybrid_search_config)
+        if db_type not in SHARD_NAME_PARAMS:
+            raise ValueError(f"Sharding is not supported for {db_type}") from None
+
+        self.db_type = db_type
+        self.implementation = implementation
+        self.db_params = db_params or {}
+        self.sharding_config = sharding_config or {}
+
+        self.key = self.sharding_config.get("key")
+        self.strategy = self.sharding_config.get("strategy", "key" if self.key else "hash")
+        if self.strategy not in ("key", "hash"):
+            raise ValueError(f"Unknown sharding strategy: {self.strategy}") from None
+        if self.strategy == "key" and not self.key:
+            raise ValueError("Sharding by key requires 'key' to be set") from None
+        self.num_shards = max(1, int(self.sharding_config.get("num_shards", 4)))
+        self.default_shard = self._shard_name(
+            self.sharding_config.get("default_shard", "default")
+        )
+        self.registry_path = self.sharding_config.get("registry_path", "rag_shards.json")
+        self.max_parallel = max(1, int(self.sharding_config.get("max_parallel", 8)))
+        self.higher_is_better = db_type in HIGHER_IS_BETTER
+
+        self._name_param, default_name = SHARD_NAME_PARAMS[db_type]
+        self._base_name = self.db_params.get(self._name_param, default_name)
+        if not self._base_name:
+            raise ValueError(f"'{self._name_param}' is required for sharding") from None
+        # Pinecone index names only allow lowercase letters, digits and "-"
+        self._separator = "-" if db_type == "pinecone" else "_"
+
+        self._shards: Dict[str, VectorDBBase] = {}
+        self._lock = threading.Lock()
+        self._registry_mtime: Optional[int] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_parallel, thread_name_prefix="vector-shard"
+        )
+
+        initial = set(self._load_registry())
+        self._registry_mtime = self._registry_stat()
+        if self.strategy == "hash":
+            initial.update(str(i) for i in range(self.num_shards))
+        else:
+            initial.update(self._shard_name(s) for s in self.sharding_config.get("shards", []))
+            initial.add(self.default_shard)
+        for shard in sorted(initial):
+            self._get_shard(shard)
+        logger.info(
+            f"Sharded {db_type} by {self.strategy}"
+            f"{f' of {self.key}' if self.key else ''} over {len(self._shards)} shards."
+        )
+
+    @staticmethod
+    def _shard_name(value: Any) -> str:
+        """Get a shard name that is valid in collection names of all backends."""
+        name = _SHARD_PATTERN.sub("_", str(value).lower()).strip("_")
+        return name or "default"
+
+    def _load_registry(self) -> List[str]:
+        """Read the shards in use from the registry."""
+        if not self.registry_path or not os.path.exists(self.registry_path):
+            return []
+        try:
+            with open(self.registry_path, "r", encoding="utf-8") as f:
+                registry = json.load(f)
+            return list(registry.get(self._registry_key(), []))
+        except Exception as e:
+            logger.warning(f"Could not read shard registry {self.registry_path}: {e}")
+            return []
+
+    def _registry_key(self) -> str:
+        """Get the registry entry of this database."""
+        return f"{self.db_type}:{self._base_name}"
+
+    def _registry_stat(self) -> Optional[int]:
+        """Get the modification time of the registry, or None if it does not exist."""
+        try:
+            return os.stat(self.registry_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh_registry(self) -> None:
+        """
+        Open the shards other processes added to the registry since it was read.
+
+        The ingestion and retrieval services each have their own instance, so
+        shards created by one only reach the other through the registry.
+        """
+        if not self.registry_path:
+            return
+        mtime = self._registry_stat()
+        if mtime is None or mtime == self._registry_mtime:
+            return
+        self._registry_mtime = mtime
+        for shard in self._load_registry():
+            if shard not in self._shards:
+                self._get_shard(shard)
+
+    @contextmanager
+    def _registry_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the registry across processes."""
+        try:
+            import fcntl
+        except ImportError:
+            # No advisory locks on Windows, the atomic replace still keeps
+            # the file intact
+            yield
+            return
+        with open(f"{self.registry_path}.lock", "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_registry(self, retired: Optional[Set[str]] = None) -> None:
+        """
+        Record the shards in use. Called with the lock held.
+
+        The shards are merged with those recorded by other processes, so
+        concurrent writers do not drop each other's shards.
+
+        Args:
+            retired: Shards to remove from the registry.
+        """
+        if not self.registry_path:
+            return
+        with self._registry_lock():
+            registry = {}
+            if os.path.exists(self.registry_path):
+                try:
+                    with open(self.registry_path, "r", encoding="utf-8") as f:
+                        registry = json.load(f)
+                except Exception:
+                    registry = {}
+            shards = set(registry.get(self._registry_key(), [])) | set(self._shards)
+            registry[self._registry_key()] = sorted(shards - (retired or set()))
+            tmp_path = f"{self.registry_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(registry, f, indent=2)
+            os.replace(tmp_path, self.registry_path)
+
+    def _shard_params(self, shard: str) -> Dict[str, Any]:
+        """Get the backend parameters of a shard."""
+        params = copy.deepcopy(self.db_params)
+        name = f"{self._base_name}{self._separator}{shard}"
+        if self.db_type == "pinecone":
+            name = name.replace("_", "-")
+        params[self._name_param] = name
+        if self.db_type == "redis_legacy":
+            # The index covers all keys with its prefix
+            params["prefix"] = f"{params.get('prefix', 'doc:')}{shard}:"
+        return params
+
+    def _get_shard(self, shard: str) -> VectorDBBase:
+        """Get the backend of a shard, creating its collection on first use."""
+        db = self._shards.get(shard)
+        if db is not None:
+            return db
+        with self._lock:
+            db = self._shards.get(shard)
+            if db is None:
+                db = self.implementation(
+                    config=self._shard_params(shard),
+                    hybrid_search_config=self.hybrid_search_config,
+                )
+                self._shards[shard] = db
+                self._save_registry()
+                logger.info(f"Opened shard '{shard}' of {self.db_type}.")
+        return db
+
+    def shard_names(self) -> List[str]:
+        """
+        Get the shards in use, including those other processes added since.
+
+        Returns:
+            The shard names.
+        """
+        self._refresh_registry()
+        return sorted(self._shards)
+
+    def route(self, doc_id: str, metadata: Optional[Dict[str, Any]]) -> str:
+        """
+        Get the shard a document belongs to under the current routing.
+
+        Args:
+            doc_id: The document ID.
+            metadata: The document metadata.
+
+        Returns:
+            The shard name.
+        """
+        value = (metadata or {}).get(self.key) if self.key else None
+        if self.strategy == "key":
+            return self._shard_name(value) if value not in (None, "") else self.default_shard
+        routing_value = value if value not in (None, "") else doc_id
+        return str(zlib.crc32(str(routing_value).encode("utf-8")) % self.num_shards)
+
+    def _routes_by_id(self) -> bool:
+        """Check whether a document's shard follows from its ID alone."""
+        return self.strategy == "hash" and not self.key
+
+    def _filter_shards(self, filter: Optional[Dict[str, Any]]) -> List[str]:
+        """Get the shards a search filter can match."""
+        if self.key and filter and self.key in filter:
+            value = filter[self.key]
+            if isinstance(value, dict):
+                value = value.get("$eq") if set(value) == {"$eq"} else None
+            if isinstance(value, (str, int)):
+                shard = self.route("", {self.key: value})
+                if shard not in self._shards:
+                    self._refresh_registry()
+                return [shard] if shard in self._shards else []
+        return self.shard_names()
+
+    def _map(self, shards: Iterable[str], call: Callable[[str, VectorDBBase], Any]) -> Dict[str, Any]:
+        """
+        Call a function for several shards in parallel.
+
+        Returns:
+            The result of each shard.
+        """
+        futures = {
+            shard: self._executor.submit(call, shard, self._get_shard(shard))
+            for shard in shards
+        }
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def _locate(self, ids: List[str]) -> Dict[str, List[str]]:
+        """Find the shard of each document by ID."""
+        if self._routes_by_id():
+            located: Dict[str, List[str]] = {}
+            for doc_id in ids:
+                located.setdefault(self.route(doc_id, None), []).append(doc_id)
+            return located
+        found = self._map(self.shard_names(), lambda shard, db: db.get(ids))
+        return {
+            shard: [doc["id"] for doc in docs] for shard, docs in found.items() if docs
+        }
+
+    def add_documents(
+        self,
+        documents: List[str],
+        embeddings: Embeddings,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        sparse_vectors: Optional[List[Optional[Dict[int, float]]]] = None,
+    ) -> List[str]:
+        """
+        Add documents to the shards their metadata or IDs route them to.
+
+        Unless the shard follows from the ID alone, the IDs written are then
+        deleted from the other shards. Chunk IDs are deterministic, so a
+        document ingested again after its routing key changed would otherwise
+        leave its earlier chunks in the shard of the old key.
+
+        Args:
+            documents: The documents to add.
+            embeddings: The dense embeddings of the documents.
+            metadatas: Optional metadata for each document.
+            ids: Optional IDs for each document.
+            sparse_vectors: Optional sparse vector representations for each document.
+
+        Returns:
+            The IDs of the added documents.
+        """
+        if not documents or len(embeddings) == 0:
+            return []
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in range(len(documents))]
+        if metadatas is None:
+            metadatas = [{"source": "unknown"} for _ in range(len(documents))]
+
+        groups: Dict[str, List[int]] = {}
+        for i, doc_id in enumerate(ids):
+            metadata = metadatas[i] if i < len(metadatas) else {}
+            groups.setdefault(self.route(doc_id, metadata), []).append(i)
+
+        def add(shard: str, db: VectorDBBase) -> List[str]:
+            rows = groups[shard]
+            if isinstance(embeddings, np.ndarray):
+                shard_embeddings = embeddings[rows]
+            else:
+                shard_embeddings = [embeddings[i] for i in rows]
+            return db.add_documents(
+                documents=[documents[i] for i in rows],
+                embeddings=shard_embeddings,
+                metadatas=[metadatas[i] if i < len(metadatas) else {} for i in rows],
+                ids=[ids[i] for i in rows],
+                sparse_vectors=[sparse_vectors[i] for i in rows] if sparse_vectors else None,
+            )
+
+        written_ids: List[str] = []
+        failed_ids: List[str] = []
+        errors: List[Exception] = []
+        futures = {
+            shard: self._executor.submit(add, shard, self._get_shard(shard))
+            for shard in groups
+        }
+        for shard, future in futures.items():
+            try:
+                written_ids.extend(future.result())
+            except PartialWriteError as e:
+                written_ids.extend(e.written_ids)
+                failed_ids.extend(e.failed_ids)
+                errors.extend(e.errors)
+            except Exception as e:
+                logger.error(f"Failed to add {len(groups[shard])} documents to shard '{shard}': {e}")
+                failed_ids.extend(ids[i] for i in groups[shard])
+                errors.append(e)
+
+        if written_ids and not self._routes_by_id():
+            self._delete_from_other_shards(groups, ids, set(written_ids))
+
+        if failed_ids:
+            if not written_ids:
+                raise errors[0]
+            raise PartialWriteError(
+                f"{len(failed_ids)} of {len(ids)} documents were not added",
+                written_ids,
+                failed_ids,
+                errors,
+            )
+        return ids
+
+    def _delete_from_other_shards(
+        self, groups: Dict[str, List[int]], ids: List[str], written: Set[str]
+    ) -> None:
+        """
+        Delete written documents from the shards they were not written to.
+
+        Args:
+            groups: The rows written to each shard.
+            ids: The IDs of all rows.
+            written: The IDs that were stored.
+        """
+        shards = self.shard_names()
+        if len(shards) < 2:
+            return
+
+        def delete(shard: str, db: VectorDBBase) -> None:
+            stale = [
+                ids[i]
+                for target, rows in groups.items()
+                if target != shard
+                for i in rows
+                if ids[i] in written
+            ]
+            if stale:
+                db.delete(stale)
+
+        try:
+            self._map(shards, delete)
+        except Exception as e:
+            logger.warning(f"Could not delete re-routed documents from their earlier shards: {e}")
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        query_sparse_vector: Optional[Dict[int, float]] = None,
+        request_hybrid: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the shards a filter selects, or all shards, and merge the results.
+
+        Args:
+            query_embedding: The dense query embedding.
+            top_k: The number of results to return.
+            filter: Optional filter to apply to the search. An equality
+                condition on the routing key limits the search to one shard.
+            query_sparse_vector: Optional sparse vector for the query.
+            request_hybrid: Flag to request hybrid search if available and enabled.
+
+        Returns:
+            A list of dictionaries containing the search results.
+        """
+        shards = self._filter_shards(filter)
+        if not shards:
+            return []
+        logger.debug(f"Searching {len(shards)} of {len(self._shards)} shards.")
+        results = self._map(
+            shards,
+            lambda shard, db: db.search(
+                query_embedding=query_embedding,
+                top_k=top_k,
+                filter=filter,
+                query_sparse_vector=query_sparse_vector,
+                request_hybrid=request_hybrid,
+            ),
+        )
+        merged = [result for shard in shards for result in results[shard]]
+        if len(shards) > 1:
+            merged.sort(key=self._rank, reverse=self.higher_is_better)
+        return merged[:top_k]
+
+    def _rank(self, result: Dict[str, Any]) -> float:
+        """Get the ranking value of a search result."""
+        value = result.get("score", result.get("distance"))
+        if value is None:
+            return float("-inf") if self.higher_is_better else float("inf")
+        return float(value)
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Delete documents from the shards that hold them.
+
+        Args:
+            ids: The IDs of the documents to delete.
+        """
+        if not ids:
+            return
+        if self._routes_by_id():
+            located = self._locate(ids)
+            self._map(located, lambda shard, db: db.delete(located[shard]))
+        else:
+            self._map(self.shard_names(), lambda shard, db: db.delete(ids))
+
+    def get(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get documents from the shards that hold them.
+
+        Args:
+            ids: The IDs of the documents to get.
+
+        Returns:
+            A list of dictionaries containing the documents.
+        """
+        if not ids:
+            return []
+        if self._routes_by_id():
+            located = self._locate(ids)
+            found = self._map(located, lambda shard, db: db.get(located[shard]))
+        else:
+            found = self._map(self.shard_names(), lambda shard, db: db.get(ids))
+        return [doc for docs in found.values() for doc in docs]
+
+    def update(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        sparse_vectors: Optional[List[Optional[Dict[int, float]]]] = None,
+    ) -> None:
+        """
+        Update documents in the shards that hold them.
+
+        A document whose routing key changes stays in its shard until the
+        shards are rebalanced.
+
+        Args:
+            ids: The IDs of the documents to update.
+            documents: Optional new document contents.
+            embeddings: Optional new embeddings.
+            metadatas: Optional new metadata.
+            sparse_vectors: Optional sparse vector representations for each document.
+        """
+        if not ids:
+            return
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        located = self._locate(ids)
+
+        def pick(values: Optional[List[Any]], shard_ids: List[str]) -> Optional[List[Any]]:
+            if values is None or len(values) == 0:
+                return None
+            return [values[position[doc_id]] for doc_id in shard_ids]
+
+        self._map(
+            located,
+            lambda shard, db: db.update(
+                located[shard],
+                pick(documents, located[shard]),
+                pick(embeddings, located[shard]),
+                pick(metadatas, located[shard]),
+                pick(sparse_vectors, located[shard]),
+            ),
+        )
+
+    def count(self) -> int:
+        """
+        Get the number of documents in all shards.
+
+        Returns:
+            The number of documents.
+        """
+        return sum(self._map(self.shard_names(), lambda shard, db: db.count()).values())
+
+    def clear(self) -> None:
+        """
+        Clear all documents from all shards.
+        """
+        self._map(self.shard_names(), lambda shard, db: db.clear())
+
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all documents of all shards, in batches.
+
+        Args:
+            batch_size: The number of documents per batch.
+            include_embeddings: Whether the vectors are read.
+
+        Yields:
+            Lists of documents.
+        """
+        for shard in self.shard_names():
+            yield from self._get_shard(shard).iter_documents(batch_size, include_embeddings)
+
+    def compact(self, reindex: bool = False) -> bool:
+        """
+        Compact every shard.
+
+        Args:
+            reindex: Whether indexes are also rebuilt, where the backend
+                supports it.
+
+        Returns:
+            Whether compaction was run or started on any shard.
+        """
+        compacted = False
+        for shard in self.shard_names():
+            compacted = self._get_shard(shard).compact(reindex) or compacted
+        return compacted
+
+    def _copy(
+        self,
+        documents: List[Dict[str, Any]],
+        source_shard: Optional[str],
+        dry_run: bool,
+    ) -> List[str]:
+        """
+        Copy documents to the shards they are routed to, unless they are there already.
+
+        Returns:
+            The IDs of the copied documents.
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in documents:
+            groups.setdefault(self.route(str(doc["id"]), doc.get("metadata")), []).append(doc)
+        copied: List[str] = []
+        for target, docs in groups.items():
+            if target == source_shard:
+                continue
+            if not dry_run:
+                sparse = [doc.get("sparse_vector") for doc in docs]
+                self._get_shard(target).add_documents(
+                    documents=[doc.get("text", "") for doc in docs],
+                    embeddings=[list(doc["embedding"]) for doc in docs],
+                    metadatas=[doc.get("metadata") or {} for doc in docs],
+                    ids=[doc["id"] for doc in docs],
+                    sparse_vectors=sparse if any(sparse) else None,
+                )
+            copied.extend(doc["id"] for doc in docs)
+            logger.info(
+                f"{'Would move' if dry_run else 'Moved'} {len(docs)} documents to shard '{target}'."
+            )
+        return copied
+
+    def rebalance(
+        self,
+        source: Optional[VectorDBBase] = None,
+        batch_size: int = 500,
+        dry_run: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Move documents to the shards the current routing assigns them to.
+
+        Documents of every shard in use are checked, so changing `num_shards`
+        or the routing key and rebalancing brings the shards in line with the
+        new routing. Shards left empty are removed from the registry; their
+        collections are not dropped.
+
+        Args:
+            source: Optional unsharded database to migrate into the shards.
+            batch_size: Documents read per batch.
+            dry_run: Only count the documents that would move.
+
+        Returns:
+            The number of documents "moved" and "kept" in place, and the
+            number of shards "retired".
+        """
+        stats = {"moved": 0, "kept": 0, "retired": 0}
+        sources = [(None, source)] if source is not None else []
+        sources += [(shard, self._get_shard(shard)) for shard in self.shard_names()]
+        if source is not None:
+            self._exclude_shard_keys(source)
+        # Documents moved into a shard that is read later are not moved again
+        arrived = set()
+        for shard, db in sources:
+            logger.info(f"Rebalancing documents of {f'shard {shard!r}' if shard else 'the source'}.")
+            # Documents are deleted from the source after it has been read,
+            # so deletes do not shift the pages of offset-based iterators
+            moved: List[str] = []
+            for documents in db.iter_documents(batch_size):
+                documents = [doc for doc in documents if doc["id"] not in arrived]
+                copied = self._copy(documents, shard, dry_run)
+                if shard is None:
+                    self._exclude_shard_keys(db)
+                moved.extend(copied)
+                arrived.update(copied)
+                stats["kept"] += len(documents) - len(copied)
+            if moved and not dry_run:
+                for i in range(0, len(moved), batch_size):
+                    db.delete(moved[i : i + batch_size])
+            stats["moved"] += len(moved)
+
+        if not dry_run:
+            with self._lock:
+                retired = set()
+                for shard in list(self._shards):
+                    if shard in self._active_shards():
+                        continue
+                    if self._shards[shard].count() == 0:
+                        del self._shards[shard]
+                        retired.add(shard)
+                        logger.info(f"Shard '{shard}' is empty and was removed from the registry.")
+                self._save_registry(retired)
+                self._registry_mtime = self._registry_stat()
+            stats["retired"] = len(retired)
+        return stats
+
+    def _exclude_shard_keys(self, source: VectorDBBase) -> None:
+        """
+        Keep an unsharded Redis source from reading the keys of the shards.
+
+        The shard key prefixes extend the prefix of the unsharded index, so
+        a scan of its prefix would also return, copy and delete documents
+        that are already sharded.
+        """
+        if self.db_type == "redis_legacy":
+            source.exclude_prefixes = tuple(
+                self._shard_params(shard)["prefix"] for shard in self.shard_names()
+            )
+
+    def _active_shards(self) -> List[str]:
+        """Get the shards that are always kept open."""
+        if self.strategy == "hash":
+            return [str(i) for i in range(self.num_shards)]
+        return [self.default_shard] + [
+            self._shard_name(s) for s in self.sharding_config.get("shards", [])
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Rebalance the shards of a vector database from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Move vector database documents to the shards the current routing assigns them to."
+    )
+    parser.add_argument(
+        "--config",
+        required=True,
+        help="YAML file with a vector_db section (or an agent config containing one)",
+    )
+    parser.add_argument(
+        "--from-unsharded",
+        action="store_true",
+        help="Also migrate the unsharded collection named in db_params",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would move")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    from sam_rag.services.database.config_file import load_config
+    from sam_rag.services.database.vector_db_implementation import load_implementation
+
+    config = load_config(args.config)
+    vector_db_config = _find_vector_db_config(config)
+    if not vector_db_config:
+        parser.error(f"No vector_db section found in {args.config}")
+    sharding_config = dict(vector_db_config.get("sharding") or {})
+    if not sharding_config.get("enabled", False):
+        parser.error("vector_db.sharding.enabled is not set")
+
+    db_type = vector_db_config.get("db_type", "chroma")
+    db_params = vector_db_config.get("db_params", {})
+    implementation = load_implementation(db_type)
+    db = ShardedVectorDB(db_type, implementation, db_params, sharding_config)
+    source = implementation(config=db_params) if args.from_unsharded else None
+
+    stats = db.rebalance(source=source, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(
+        f"{'Would move' if args.dry_run else 'Moved'} {stats['moved']} documents, "
+        f"{stats['kept']} already in place, {stats['retired']} shards retired."
+    )
+    return 0
+
+
+def _find_vector_db_config(config: Any) -> Optional[Dict[str, Any]]:
+    """Find the first vector_db section in a configuration."""
+    if isinstance(config, dict):
+        if isinstance(config.get("vector_db"), dict):
+            return config["vector_db"]
+        values = config.values()
+    elif isinstance(config, list):
+        values = config
+    else:
+        return None
+    for value in values:
+        found = _find_vector_db_config(value)
+        if found:
+            return found
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
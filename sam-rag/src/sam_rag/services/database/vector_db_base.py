@@ -3,7 +3,88 @@ Base class for vector databases.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Dense embeddings as a float32 matrix with one row per document, or as lists
+Embeddings = Union[np.ndarray, Sequence[Sequence[float]]]
+
+
+def as_embedding_matrix(embeddings: Embeddings, dtype: Any = np.float32) -> np.ndarray:
+    """
+    Get dense embeddings as a C-contiguous matrix with one row per document.
+
+    A matrix that already has the requested type is returned without a copy.
+
+    Args:
+        embeddings: The embeddings as a matrix or a list of lists.
+        dtype: The element type of the matrix (default: float32).
+
+    Returns:
+        The embeddings as a 2D array.
+    """
+    if len(embeddings) == 0:
+        return np.empty((0, 0), dtype=dtype)
+    matrix = np.ascontiguousarray(embeddings, dtype=dtype)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(embeddings), -1)
+    return matrix
+
+
+def embedding_rows(embeddings: Embeddings) -> List[List[float]]:
+    """
+    Get dense embeddings as lists of floats, for clients that only accept lists.
+
+    Call this once per batch at the storage client boundary.
+
+    Args:
+        embeddings: The embeddings as a matrix or a list of lists.
+
+    Returns:
+        The embeddings as a list of lists of floats.
+    """
+    if isinstance(embeddings, np.ndarray):
+        return embeddings.tolist()
+    return [list(embedding) for embedding in embeddings]
+
+
+def chunked(items: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    """
+    Split a sequence into consecutive chunks.
+
+    Args:
+        items: The items to split.
+        size: The maximum number of items per chunk.
+
+    Returns:
+        The chunks, in order.
+    """
+    size = max(1, int(size))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class PartialWriteError(RuntimeError):
+    """
+    Raised when some batches of a write were stored and others failed.
+
+    Attributes:
+        written_ids: The IDs of the documents that were stored.
+        failed_ids: The IDs of the documents that were not stored.
+        errors: The error of each failed batch.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        written_ids: List[str],
+        failed_ids: List[str],
+        errors: Optional[List[Exception]] = None,
+    ):
+        super().__init__(message)
+        self.written_ids = written_ids
+        self.failed_ids = failed_ids
+        self.errors = errors or []
 
 
 class VectorDBBase(ABC):
@@ -31,7 +112,7 @@ class VectorDBBase(ABC):
     def add_documents(
         self,
         documents: List[str],
-        embeddings: List[List[float]],
+        embeddings: Embeddings,
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None,
         sparse_vectors: Optional[List[Optional[Dict[int, float]]]] = None,
@@ -135,3 +216,41 @@ class VectorDBBase(ABC):
         Clear all documents from the vector database.
         """
         pass
+
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all documents in the vector database, in batches.
+
+        Used to migrate documents between collections. Documents have the
+        format returned by `get`, plus "sparse_vector" where the backend
+        stores one.
+
+        Args:
+            batch_size: The number of documents per batch.
+            include_embeddings: Whether the vectors are read. Scans that only
+                need texts and metadata skip them where the backend allows;
+                "embedding" is then an empty list.
+
+        Yields:
+            Lists of documents.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support iterating over documents"
+        )
+
+    def compact(self, reindex: bool = False) -> bool:
+        """
+        Reclaim the space of deleted documents and tidy the index.
+
+        Backends that compact on their own do nothing.
+
+        Args:
+            reindex: Whether indexes are also rebuilt, where the backend
+                supports it.
+
+        Returns:
+            Whether compaction was run or started.
+        """
+        return False
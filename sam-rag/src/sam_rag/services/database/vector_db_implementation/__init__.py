@@ -2,32 +2,59 @@
 Vector DB Implementations Package.
 
 This package contains specific implementations for various vector databases.
+Implementations are imported on first access, so only the configured backend
+and its client library are loaded.
 """
 
-from sam_rag.services.database.vector_db_implementation.pinecone_db import PineconeDB
-from sam_rag.services.database.vector_db_implementation.qdrant_db import QdrantDB
-from sam_rag.services.database.vector_db_implementation.redis_legacy_db import RedisDB as RedisLegacyDB  # Alias to avoid name clash
-from sam_rag.services.database.vector_db_implementation.pgvector_db import PgVectorDB
-from sam_rag.services.database.vector_db_implementation.chroma_db import ChromaDB
-from sam_rag.services.database.vector_db_implementation.redis_vl_db import RedisDB as RedisVLDB  # Alias for the redisvl version
-
-# You can define an __all__ list if you want to specify what gets imported
-# when a client does 'from . import *'
-__all__ = [
-    "PineconeDB",
-    "QdrantDB",
-    "RedisLegacyDB",  # Use the alias
-    "PgVectorDB",
-    "ChromaDB",
-    "RedisVLDB",  # Use the alias
-]
-
-# Optional: A dictionary mapping names to classes for easier dynamic loading
+import importlib
+from typing import Type
+
+# Mapping of exported class names to (module, class) in this package
+_EXPORTS = {
+    "PineconeDB": ("pinecone_db", "PineconeDB"),
+    "QdrantDB": ("qdrant_db", "QdrantDB"),
+    "RedisLegacyDB": ("redis_legacy_db", "RedisDB"),  # Alias to avoid name clash
+    "PgVectorDB": ("pgvector_db", "PgVectorDB"),
+    "ChromaDB": ("chroma_db", "ChromaDB"),
+    "RedisVLDB": ("redis_vl_db", "RedisDB"),  # Alias for the redisvl version
+}
+
+__all__ = list(_EXPORTS)
+
+# Mapping of db_type names to exported class names for dynamic loading
 IMPLEMENTATIONS = {
-    "pinecone": PineconeDB,
-    "qdrant": QdrantDB,
-    "redis_legacy": RedisLegacyDB,
-    "pgvector": PgVectorDB,
-    "chroma": ChromaDB,
-    "redis_vl": RedisVLDB,
+    "pinecone": "PineconeDB",
+    "qdrant": "QdrantDB",
+    "redis_legacy": "RedisLegacyDB",
+    "pgvector": "PgVectorDB",
+    "chroma": "ChromaDB",
+    "redis_vl": "RedisVLDB",
 }
+
+
+def load_implementation(db_type: str) -> Type:
+    """
+    Import the vector database class for a db_type.
+
+    Args:
+        db_type: The configured database type, e.g. "qdrant".
+
+    Returns:
+        The implementation class.
+
+    Raises:
+        ValueError: If the db_type is unknown.
+    """
+    if db_type not in IMPLEMENTATIONS:
+        raise ValueError(f"Unsupported vector database type: {db_type}") from None
+    return __getattr__(IMPLEMENTATIONS[db_type])
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, class_name = _EXPORTS[name]
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    implementation = getattr(module, class_name)
+    globals()[name] = implementation
+    return implementation
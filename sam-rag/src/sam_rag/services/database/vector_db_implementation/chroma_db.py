@@ -5,9 +5,14 @@ ChromaDB vector database implementation.
 import logging
 import os
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
-from sam_rag.services.database.vector_db_base import VectorDBBase
+from sam_rag.services.database.vector_db_base import (
+    PartialWriteError,
+    VectorDBBase,
+    chunked,
+    embedding_rows,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +34,8 @@ class ChromaDB(VectorDBBase):
                 - persist_directory: The directory to persist the database to (default: "./chroma_db").
                 - collection_name: The name of the collection to use (default: "documents").
                 - embedding_dimension: The dimension of the embeddings (default: 768).
+                - batch_size: Documents per add, update, get or delete call
+                  (default: 1000). Capped at the maximum batch size of the server.
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
                                   Note: This ChromaDB implementation does not support hybrid search.
         """
@@ -45,9 +52,11 @@ class ChromaDB(VectorDBBase):
         self.embedding_dimension = self.config.get(
             "embedding_dimension", 768
         )  # Used for metadata
+        self.batch_size = int(self.config.get("batch_size", 1000))
         self.client = None
         self.collection = None
         self._setup_client()
+        self.batch_size = self._effective_batch_size()
 
     def _setup_client(self) -> None:
         """
@@ -94,6 +103,23 @@ class ChromaDB(VectorDBBase):
             logger.error(f"Error setting up ChromaDB client: {e}")
             raise ConnectionError(f"Failed to set up ChromaDB client: {e}") from e
 
+    def _effective_batch_size(self) -> int:
+        """Get the configured batch size, capped at the maximum batch size of the server."""
+        max_batch_size = None
+        try:
+            if hasattr(self.client, "get_max_batch_size"):
+                max_batch_size = self.client.get_max_batch_size()
+            else:
+                max_batch_size = getattr(self.client, "max_batch_size", None)
+        except Exception as e:
+            logger.debug(f"ChromaDB: Could not read the maximum batch size: {e}")
+        if isinstance(max_batch_size, int) and 0 < max_batch_size < self.batch_size:
+            logger.info(
+                f"ChromaDB: Batch size {self.batch_size} exceeds the server maximum, using {max_batch_size}."
+            )
+            return max_batch_size
+        return max(1, self.batch_size)
+
     def add_documents(
         self,
         documents: List[str],
@@ -120,7 +146,7 @@ class ChromaDB(VectorDBBase):
                 "ChromaDB: 'sparse_vectors' parameter was provided but will be ignored as ChromaDB currently only supports dense vectors through this interface."
             )
 
-        if not documents or not embeddings:
+        if not documents or len(embeddings) == 0:
             return []
 
         # Generate IDs if not provided
@@ -137,18 +163,41 @@ class ChromaDB(VectorDBBase):
                 [{"source": "unknown"}] * (len(documents) - len(metadatas))
             )
 
-        # Add the documents to the collection
-        # ChromaDB expects embeddings to be a list of lists, which is already the case.
-        # Documents should be a list of strings.
-        # Metadatas should be a list of dictionaries.
-        # IDs should be a list of strings.
-        self.collection.add(
-            documents=documents,  # List of strings
-            embeddings=embeddings,  # List of lists of floats
-            metadatas=metadatas,  # List of dicts
-            ids=ids,  # List of strings
-        )
-
+        # Upsert the documents in batches the server accepts, so that adding
+        # documents again under the same ids replaces them.
+        # ChromaDB expects embeddings to be a list of lists, converted per batch.
+        # A failed batch does not stop the remaining ones; the caller is told
+        # which documents were stored.
+        written_ids: List[str] = []
+        failed_ids: List[str] = []
+        errors: List[Exception] = []
+        for start in range(0, len(documents), self.batch_size):
+            end = start + self.batch_size
+            batch_ids = ids[start:end]
+            try:
+                self.collection.upsert(
+                    documents=documents[start:end],  # List of strings
+                    embeddings=embedding_rows(embeddings[start:end]),  # List of lists of floats
+                    metadatas=metadatas[start:end],  # List of dicts
+                    ids=batch_ids,  # List of strings
+                )
+                written_ids.extend(batch_ids)
+            except Exception as e:
+                logger.error(
+                    f"ChromaDB: Failed to add {len(batch_ids)} documents ({start}-{end - 1}): {e}"
+                )
+                failed_ids.extend(batch_ids)
+                errors.append(e)
+
+        if failed_ids:
+            if not written_ids:
+                raise errors[0]
+            raise PartialWriteError(
+                f"ChromaDB: {len(failed_ids)} of {len(ids)} documents were not added",
+                written_ids,
+                failed_ids,
+                errors,
+            )
         return ids
 
     def search(
@@ -219,7 +268,8 @@ class ChromaDB(VectorDBBase):
         """
         if not ids:
             return
-        self.collection.delete(ids=ids)
+        for batch in chunked(ids, self.batch_size):
+            self.collection.delete(ids=batch)
 
     def get(self, ids: List[str]) -> List[Dict[str, Any]]:
         """
@@ -233,27 +283,28 @@ class ChromaDB(VectorDBBase):
         """
         if not ids:
             return []
-        # Get the documents
-        # ChromaDB get() returns a dict with 'ids', 'embeddings', 'metadatas', 'documents'
-        results = self.collection.get(
-            ids=ids,
-            include=["metadatas", "documents", "embeddings"],  # Specify what to include
-        )
-
-        # Format the results
         formatted_results = []
-        if results and results["ids"]:
+        for batch in chunked(ids, self.batch_size):
+            # Get the documents
+            # ChromaDB get() returns a dict with 'ids', 'embeddings', 'metadatas', 'documents'
+            results = self.collection.get(
+                ids=batch,
+                include=["metadatas", "documents", "embeddings"],  # Specify what to include
+            )
+
+            # Format the results
+            if not results or not results["ids"]:
+                continue
+            documents = results["documents"]
+            metadatas = results["metadatas"]
+            embeddings = results["embeddings"]
             for i in range(len(results["ids"])):
                 formatted_results.append(
                     {
                         "id": results["ids"][i],
-                        "text": results["documents"][i] if results["documents"] else "",
-                        "metadata": results["metadatas"][i]
-                        if results["metadatas"]
-                        else {},
-                        "embedding": results["embeddings"][i]
-                        if results["embeddings"]
-                        else [],
+                        "text": documents[i] if documents is not None else "",
+                        "metadata": metadatas[i] if metadatas is not None else {},
+                        "embedding": embeddings[i] if embeddings is not None else [],
                     }
                 )
         return formatted_results
@@ -300,18 +351,79 @@ class ChromaDB(VectorDBBase):
         # Let's stick to the direct `update` call. If `documents` is not None, it must be a list of len(ids).
         # Same for embeddings and metadatas.
 
-        self.collection.update(
-            ids=ids,
-            documents=documents
-            if documents
-            else None,  # Pass None if not updating documents
-            embeddings=embeddings
-            if embeddings
-            else None,  # Pass None if not updating embeddings
-            metadatas=metadatas
-            if metadatas
-            else None,  # Pass None if not updating metadatas
-        )
+        # Pass None for a field that is not updated
+        documents = documents if documents else None
+        embeddings = embedding_rows(embeddings) if embeddings is not None and len(embeddings) else None
+        metadatas = metadatas if metadatas else None
+
+        written_ids: List[str] = []
+        failed_ids: List[str] = []
+        errors: List[Exception] = []
+        for start in range(0, len(ids), self.batch_size):
+            end = start + self.batch_size
+            batch_ids = ids[start:end]
+            try:
+                self.collection.update(
+                    ids=batch_ids,
+                    documents=documents[start:end] if documents else None,
+                    embeddings=embeddings[start:end] if embeddings else None,
+                    metadatas=metadatas[start:end] if metadatas else None,
+                )
+                written_ids.extend(batch_ids)
+            except Exception as e:
+                logger.error(f"ChromaDB: Failed to update {len(batch_ids)} documents: {e}")
+                failed_ids.extend(batch_ids)
+                errors.append(e)
+
+        if failed_ids:
+            if not written_ids:
+                raise errors[0]
+            raise PartialWriteError(
+                f"ChromaDB: {len(failed_ids)} of {len(ids)} documents were not updated",
+                written_ids,
+                failed_ids,
+                errors,
+            )
+
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all documents in the collection, in batches.
+
+        Args:
+            batch_size: The number of documents per batch.
+            include_embeddings: Whether the vectors are read.
+
+        Yields:
+            Lists of documents in the format returned by `get`.
+        """
+        batch_size = min(batch_size, self.batch_size)
+        offset = 0
+        while True:
+            results = self.collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["metadatas", "documents"]
+                + (["embeddings"] if include_embeddings else []),
+            )
+            if not results or not results["ids"]:
+                return
+            documents = results["documents"]
+            metadatas = results["metadatas"]
+            embeddings = results.get("embeddings")
+            yield [
+                {
+                    "id": results["ids"][i],
+                    "text": documents[i] if documents is not None else "",
+                    "metadata": metadatas[i] if metadatas is not None else {},
+                    "embedding": embeddings[i] if embeddings is not None else [],
+                }
+                for i in range(len(results["ids"]))
+            ]
+            if len(results["ids"]) < batch_size:
+                return
+            offset += len(results["ids"])
 
     def count(self) -> int:
         """
@@ -5,9 +5,9 @@ PostgreSQL with pgvector extension vector database implementation.
 import logging
 import uuid
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
-from sam_rag.services.database.vector_db_base import VectorDBBase
+from sam_rag.services.database.vector_db_base import VectorDBBase, embedding_rows
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +33,8 @@ class PgVectorDB(VectorDBBase):
                 - password: The PostgreSQL password (optional).
                 - table_name: The name of the table to use (default: "documents").
                 - embedding_dimension: The dimension of the embeddings (default: 768).
+                - vector_type: Column type of the embeddings, "vector" (float32) or
+                  "halfvec" (float16, pgvector 0.7+) (default: "vector").
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
                                   Note: This PgVectorDB implementation does not support hybrid search.
         """
@@ -52,6 +54,11 @@ class PgVectorDB(VectorDBBase):
 
         self.table_name = self.config.get("table_name", "documents")
         self.embedding_dimension = self.config.get("embedding_dimension", 768)
+        self.vector_type = self.config.get("vector_type", "vector").lower()
+        if self.vector_type not in ("vector", "halfvec"):
+            raise ValueError(
+                f"Unsupported pgvector type '{self.vector_type}'. Use 'vector' or 'halfvec'."
+            ) from None
         self.conn = None
         self._setup_client()
 
@@ -111,12 +118,32 @@ class PgVectorDB(VectorDBBase):
                     CREATE TABLE IF NOT EXISTS {self.table_name} (
                         id TEXT PRIMARY KEY,
                         text TEXT NOT NULL,
-                        embedding vector({self.embedding_dimension}) NOT NULL,
+                        embedding {self.vector_type}({self.embedding_dimension}) NOT NULL,
                         metadata JSONB
                     );
                 """
                 )
 
+                # An existing table keeps its column type; queries must match it
+                cursor.execute(
+                    """
+                    SELECT t.typname FROM pg_attribute a
+                    JOIN pg_type t ON t.oid = a.atttypid
+                    WHERE a.attrelid = %s::regclass AND a.attname = 'embedding'
+                    """,
+                    (self.table_name,),
+                )
+                row = cursor.fetchone()
+                if row and row[0] != self.vector_type:
+                    logger.warning(
+                        f"PgVectorDB: Table '{self.table_name}' stores embeddings as '{row[0]}', "
+                        f"not the configured '{self.vector_type}'. Using '{row[0]}'. To convert it, run "
+                        f"ALTER TABLE {self.table_name} ALTER COLUMN embedding TYPE "
+                        f"{self.vector_type}({self.embedding_dimension}) and recreate the index "
+                        f"{self.table_name}_embedding_idx with {self.vector_type}_cosine_ops."
+                    )
+                    self.vector_type = row[0]
+
                 # Create an index for vector similarity search
                 # Index name needs to be unique, incorporate table_name
                 index_name = f"{self.table_name}_embedding_idx"
@@ -124,7 +151,7 @@ class PgVectorDB(VectorDBBase):
                     f"""
                     CREATE INDEX IF NOT EXISTS {index_name}
                     ON {self.table_name}
-                    USING ivfflat (embedding vector_cosine_ops)
+                    USING ivfflat (embedding {self.vector_type}_cosine_ops)
                     WITH (lists = 100);
                 """
                 )  # Consider HNSW for better performance on larger datasets: USING hnsw (embedding vector_cosine_ops)
@@ -172,9 +199,12 @@ class PgVectorDB(VectorDBBase):
                 "PgVectorDB: 'sparse_vectors' parameter was provided but will be ignored as PgVectorDB currently only supports dense vectors through this interface."
             )
 
-        if not documents or not embeddings:
+        if not documents or len(embeddings) == 0:
             return []
 
+        # psycopg2 adapts lists of floats to arrays cast to the vector column
+        embeddings = embedding_rows(embeddings)
+
         # Generate IDs if not provided
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(documents))]
@@ -239,7 +269,7 @@ class PgVectorDB(VectorDBBase):
         # Using <=> for cosine distance (0=exact match, 1=orthogonal, 2=opposite)
         # Similarity = 1 - distance for cosine
         query_sql = f"""
-            SELECT id, text, metadata, 1 - (embedding <=> %s::vector({self.embedding_dimension})) as similarity
+            SELECT id, text, metadata, 1 - (embedding <=> %s::{self.vector_type}({self.embedding_dimension})) as similarity
             FROM {self.table_name}
         """
 
@@ -442,6 +472,49 @@ class PgVectorDB(VectorDBBase):
                 cursor.execute(update_sql, tuple(params_update))
             self.conn.commit()
 
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all documents in the table, in batches ordered by ID.
+
+        Args:
+            batch_size: The number of documents per batch.
+            include_embeddings: Whether the vectors are read.
+
+        Yields:
+            Lists of documents in the format returned by `get`.
+        """
+        columns = "id, text, embedding, metadata" if include_embeddings else "id, text, NULL, metadata"
+        last_id = None
+        while True:
+            with self.conn.cursor() as cursor:
+                if last_id is None:
+                    cursor.execute(
+                        f"SELECT {columns} FROM {self.table_name} ORDER BY id LIMIT %s",
+                        (batch_size,),
+                    )
+                else:
+                    cursor.execute(
+                        f"SELECT {columns} FROM {self.table_name} WHERE id > %s ORDER BY id LIMIT %s",
+                        (last_id, batch_size),
+                    )
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            yield [
+                {
+                    "id": doc_id,
+                    "text": text,
+                    "metadata": metadata_db if metadata_db else {},
+                    "embedding": list(embedding_val) if embedding_val is not None else [],
+                }
+                for doc_id, text, embedding_val, metadata_db in rows
+            ]
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
     def count(self) -> int:
         """
         Get the number of documents in the vector database.
@@ -462,6 +535,36 @@ class PgVectorDB(VectorDBBase):
             cursor.execute(f"DELETE FROM {self.table_name}")
             self.conn.commit()
 
+    def compact(self, reindex: bool = False) -> bool:
+        """
+        Vacuum the table and optionally rebuild its indexes.
+
+        VACUUM makes the space of deleted rows reusable and refreshes the
+        planner statistics. REINDEX rebuilds the vector index, which keeps
+        entries of deleted rows until then; it runs concurrently, so writes
+        are not blocked (PostgreSQL 12 or later).
+
+        Args:
+            reindex: Whether the indexes of the table are rebuilt.
+
+        Returns:
+            True once the table was vacuumed.
+        """
+        # VACUUM and REINDEX CONCURRENTLY cannot run inside a transaction
+        self.conn.commit()
+        autocommit = self.conn.autocommit
+        self.conn.autocommit = True
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"VACUUM (ANALYZE) {self.table_name}")
+                logger.info(f"Vacuumed table '{self.table_name}'.")
+                if reindex:
+                    cursor.execute(f"REINDEX TABLE CONCURRENTLY {self.table_name}")
+                    logger.info(f"Rebuilt the indexes of table '{self.table_name}'.")
+        finally:
+            self.conn.autocommit = autocommit
+        return True
+
     def __del__(self):
         """
         Close the database connection when the object is deleted.
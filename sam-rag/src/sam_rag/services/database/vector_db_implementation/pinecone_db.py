@@ -2,14 +2,30 @@
 Pinecone vector database implementation.
 """
 
+import json
 import logging
+import random
+import re
+import threading
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 
-from sam_rag.services.database.vector_db_base import VectorDBBase
+from sam_rag.services.database.vector_db_base import VectorDBBase, embedding_rows
 
 logger = logging.getLogger(__name__)
 
+# Pinecone request limits for upserts
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+MAX_REQUEST_VECTORS = 1000
+
+# gRPC status codes that are worth retrying
+_RETRYABLE_GRPC_CODES = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED"}
+
+_NAMESPACE_PATTERN = re.compile(r"[^A-Za-z0-9_\-]")
+
+
 class PineconeDB(VectorDBBase):
     """
     Vector database using Pinecone.
@@ -28,9 +44,22 @@ class PineconeDB(VectorDBBase):
                 - api_key: The Pinecone API key (required).
                 - index_name: The name of the index to use (required).
                 - namespace: The namespace to use (default: "default").
+                - namespace_field: Optional metadata field that routes each
+                  document to the namespace named by its value, e.g. a tenant id.
                 - embedding_dimension: The dimension of the embeddings (default: 768).
                 - cloud: The cloud provider to use (default: "aws").
                 - region: The region to use (default: "us-east-1").
+                - use_grpc: Use the gRPC transport if pinecone[grpc] is
+                  installed (default: True).
+                - batch_max_bytes: Estimated payload size of one upsert
+                  request (default: 2 MB, the Pinecone limit).
+                - batch_max_vectors: Vectors per upsert request (default: 1000).
+                - upsert_concurrency: Upsert and query requests in flight at
+                  the same time (default: 8).
+                - max_retries: Retries of a request rejected with 429 or 5xx
+                  (default: 5).
+                - retry_backoff: Delay before the first retry in seconds,
+                  doubled on every retry (default: 0.5).
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
         """
         super().__init__(config=config, hybrid_search_config=hybrid_search_config)
@@ -43,10 +72,22 @@ class PineconeDB(VectorDBBase):
             raise ValueError("Pinecone index name is required") from None
 
         self.namespace = self.config.get("namespace", "default")
+        self.namespace_field = self.config.get("namespace_field")
         self.embedding_dimension = self.config.get("embedding_dimension", 768)
         self.cloud = self.config.get("cloud", "aws")
         self.region = self.config.get("region", "us-east-1")
 
+        self.use_grpc = self.config.get("use_grpc", True)
+        self.batch_max_bytes = min(
+            int(self.config.get("batch_max_bytes", MAX_REQUEST_BYTES)), MAX_REQUEST_BYTES
+        )
+        self.batch_max_vectors = min(
+            int(self.config.get("batch_max_vectors", MAX_REQUEST_VECTORS)), MAX_REQUEST_VECTORS
+        )
+        self.concurrency = max(1, int(self.config.get("upsert_concurrency", 8)))
+        self.max_retries = int(self.config.get("max_retries", 5))
+        self.retry_backoff = float(self.config.get("retry_backoff", 0.5))
+
         # Hybrid search specific params for Pinecone
         self.hybrid_search_params = self.config.get("hybrid_search_params", {})
         self.hybrid_alpha = self.hybrid_search_params.get(
@@ -54,17 +95,44 @@ class PineconeDB(VectorDBBase):
         )  # Store alpha, though not used in client.query directly
 
         self.index = None
+        self.grpc = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Namespaces written or seen by this instance, for routed queries;
+        # upserts from several threads add to it while queries read it
+        self._known_namespaces = {self.namespace}
+        self._namespaces_lock = threading.Lock()
+        self._namespaces_refreshed = 0.0
         self._setup_client()
 
     def _setup_client(self) -> None:
         """
         Set up the Pinecone client.
+
+        The gRPC client is used when it is installed and `use_grpc` is set; it
+        sends vectors as packed floats instead of JSON.
         """
         try:
-            from pinecone import Pinecone, ServerlessSpec
+            from pinecone import ServerlessSpec
+
+            pinecone_class = None
+            if self.use_grpc:
+                try:
+                    from pinecone.grpc import PineconeGRPC
+
+                    pinecone_class = PineconeGRPC
+                    self.grpc = True
+                except ImportError:
+                    logger.info(
+                        "PineconeDB: pinecone[grpc] is not installed, using the REST transport."
+                    )
+            if pinecone_class is None:
+                from pinecone import Pinecone
+
+                pinecone_class = Pinecone
 
             # Initialize Pinecone with the new API
-            pc = Pinecone(api_key=self.api_key)
+            pc = pinecone_class(api_key=self.api_key)
 
             # Check if the index exists
             if self.index_name not in pc.list_indexes().names():
@@ -91,14 +159,206 @@ class PineconeDB(VectorDBBase):
                     # in the used client version, it could be added here.
                 )
 
-            # Connect to the index
-            self.index = pc.Index(self.index_name)
+            # Connect to the index. The REST client needs a connection per
+            # concurrent request; the gRPC channel multiplexes them.
+            if self.grpc:
+                self.index = pc.Index(self.index_name)
+            else:
+                self.index = pc.Index(self.index_name, pool_threads=self.concurrency)
+            logger.info(
+                f"PineconeDB: Connected to index '{self.index_name}' over "
+                f"{'gRPC' if self.grpc else 'REST'} with {self.concurrency} concurrent requests."
+            )
         except ImportError:
             raise ImportError(
                 "The pinecone-client package is required for PineconeDB. "
                 "Please install it with `pip install pinecone-client`."
             ) from None
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the thread pool that runs concurrent requests, creating it on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="pinecone"
+                )
+            return self._executor
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Check whether a failed request was throttled or hit a server error."""
+        status = getattr(error, "status", None) or getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status == 429 or 500 <= status < 600
+        code = getattr(error, "code", None)
+        if callable(code):
+            try:
+                return getattr(code(), "name", None) in _RETRYABLE_GRPC_CODES
+            except Exception:
+                return False
+        return isinstance(error, (ConnectionError, TimeoutError))
+
+    def _with_retries(self, description: str, request: Callable[[], Any]) -> Any:
+        """
+        Run a request, retrying throttled and server errors with exponential backoff.
+
+        Args:
+            description: What the request does, for logging.
+            request: The request to run.
+
+        Returns:
+            The result of the request.
+        """
+        attempt = 0
+        while True:
+            try:
+                return request()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                logger.warning(
+                    f"PineconeDB: {description} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.2f}s."
+                )
+                time.sleep(delay)
+
+    def _run_parallel(self, description: str, requests: List[Callable[[], Any]]) -> List[Any]:
+        """
+        Run requests concurrently, each with retries.
+
+        Args:
+            description: What the requests do, for logging.
+            requests: The requests to run.
+
+        Returns:
+            The results, in the order of the requests.
+        """
+        if len(requests) == 1:
+            return [self._with_retries(description, requests[0])]
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._with_retries, description, request) for request in requests
+        ]
+        return [future.result() for future in futures]
+
+    def _namespace_for(self, metadata: Optional[Dict[str, Any]]) -> str:
+        """Get the namespace a document is routed to."""
+        if self.namespace_field and metadata:
+            value = metadata.get(self.namespace_field)
+            if value not in (None, ""):
+                return _NAMESPACE_PATTERN.sub("_", str(value))
+        return self.namespace
+
+    def _estimate_bytes(self, vector: Dict[str, Any]) -> int:
+        """Estimate the request payload size of one vector."""
+        float_bytes = 4 if self.grpc else 12
+        size = len(vector["id"]) + len(vector["values"]) * float_bytes + 64
+        size += len(json.dumps(vector["metadata"], default=str))
+        sparse = vector.get("sparse_values")
+        if sparse:
+            size += len(sparse["indices"]) * (float_bytes + 8)
+        return size
+
+    def _batches(self, vectors: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split vectors into requests below the byte and vector limits."""
+        batches = []
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+        for vector in vectors:
+            vector_bytes = self._estimate_bytes(vector)
+            if batch and (
+                batch_bytes + vector_bytes > self.batch_max_bytes
+                or len(batch) >= self.batch_max_vectors
+            ):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(vector)
+            batch_bytes += vector_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _upsert(self, vectors_by_namespace: Dict[str, List[Dict[str, Any]]]) -> None:
+        """
+        Upsert vectors, sending the requests of all namespaces concurrently.
+
+        Args:
+            vectors_by_namespace: Vectors to upsert, grouped by namespace.
+        """
+        with self._namespaces_lock:
+            self._known_namespaces.update(vectors_by_namespace)
+        requests = []
+        for namespace, vectors in vectors_by_namespace.items():
+            for batch in self._batches(vectors):
+                requests.append(
+                    lambda batch=batch, namespace=namespace: self.index.upsert(
+                        vectors=batch, namespace=namespace
+                    )
+                )
+        if not requests:
+            return
+        started = time.perf_counter()
+        self._run_parallel("Upsert", requests)
+        logger.debug(
+            f"PineconeDB: Upserted {sum(len(v) for v in vectors_by_namespace.values())} vectors "
+            f"in {len(requests)} requests to {len(vectors_by_namespace)} namespace(s) "
+            f"in {time.perf_counter() - started:.2f}s."
+        )
+
+    def _namespaces(self) -> List[str]:
+        """
+        Get the namespaces to read from.
+
+        With namespace routing, these are the namespaces of the index, listed
+        at most once a minute, plus the ones written by this instance.
+        """
+        if not self.namespace_field:
+            return [self.namespace]
+        if time.monotonic() - self._namespaces_refreshed > 60:
+            try:
+                stats = self._with_retries("Describe index", self.index.describe_index_stats)
+                with self._namespaces_lock:
+                    self._known_namespaces.update(self._stats_namespaces(stats))
+                self._namespaces_refreshed = time.monotonic()
+            except Exception as e:
+                logger.warning(f"PineconeDB: Could not list namespaces: {e}")
+        with self._namespaces_lock:
+            return sorted(self._known_namespaces)
+
+    @staticmethod
+    def _stats_namespaces(stats: Any) -> Dict[str, int]:
+        """Get the vector count of every namespace from index stats."""
+        namespaces = getattr(stats, "namespaces", None)
+        if namespaces is None and isinstance(stats, dict):
+            namespaces = stats.get("namespaces")
+        counts = {}
+        for name, summary in (namespaces or {}).items():
+            count = getattr(summary, "vector_count", None)
+            if count is None and isinstance(summary, dict):
+                count = summary.get("vector_count", 0)
+            counts[name] = count or 0
+        return counts
+
+    def _split_namespace_filter(
+        self, filter: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Take an equality condition on the namespace field out of a filter.
+
+        Returns:
+            The namespace selected by the filter (or None) and the remaining filter.
+        """
+        if not self.namespace_field or not filter or self.namespace_field not in filter:
+            return None, filter
+        condition = filter[self.namespace_field]
+        if isinstance(condition, dict):
+            if set(condition) != {"$eq"}:
+                return None, filter
+            condition = condition["$eq"]
+        remaining = {k: v for k, v in filter.items() if k != self.namespace_field}
+        return self._namespace_for({self.namespace_field: condition}), remaining or None
+
     def add_documents(
         self,
         documents: List[str],
@@ -120,9 +380,12 @@ class PineconeDB(VectorDBBase):
         Returns:
             The IDs of the added documents.
         """
-        if not documents or not embeddings:
+        if not documents or len(embeddings) == 0:
             return []
 
+        # The Pinecone client sends lists of floats
+        embeddings = embedding_rows(embeddings)
+
         # Generate IDs if not provided
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(documents))]
@@ -143,7 +406,7 @@ class PineconeDB(VectorDBBase):
                 adjusted_sparse_vectors[i] = sparse_vectors[i]
             sparse_vectors = adjusted_sparse_vectors
 
-        vectors_to_upsert = []
+        vectors_by_namespace: Dict[str, List[Dict[str, Any]]] = {}
         for i in range(len(documents)):
             current_metadata = (
                 metadatas[i].copy() if metadatas and i < len(metadatas) else {}
@@ -169,16 +432,12 @@ class PineconeDB(VectorDBBase):
                         "values": list(current_sparse.values()),
                     }
 
-            vectors_to_upsert.append(vector_data)
+            vectors_by_namespace.setdefault(
+                self._namespace_for(current_metadata), []
+            ).append(vector_data)
 
-        # Upsert the vectors in batches
-        batch_size = 100  # Pinecone's recommended batch size
-        for i in range(0, len(vectors_to_upsert), batch_size):
-            batch = vectors_to_upsert[i : i + batch_size]
-            self.index.upsert(vectors=batch, namespace=self.namespace)
-            logger.debug(
-                f"PineconeDB: Upserted batch of {len(batch)} vectors to namespace '{self.namespace}'."
-            )
+        # Upsert the vectors in size-limited batches, concurrently
+        self._upsert(vectors_by_namespace)
 
         return ids
 
@@ -193,6 +452,10 @@ class PineconeDB(VectorDBBase):
         """
         Search for documents similar to the query embedding, optionally using hybrid search.
 
+        With namespace routing, a filter on the namespace field selects one
+        namespace; otherwise all namespaces are queried concurrently and the
+        best matches are merged.
+
         Args:
             query_embedding: The dense query embedding.
             top_k: The number of results to return.
@@ -203,17 +466,19 @@ class PineconeDB(VectorDBBase):
         Returns:
             A list of dictionaries containing the search results.
         """
+        namespace, filter = self._split_namespace_filter(filter)
+        namespaces = [namespace] if namespace else self._namespaces()
+
         query_params = {
-            "vector": query_embedding,
+            "vector": embedding_rows([query_embedding])[0],
             "top_k": top_k,
             "include_metadata": True,
-            "namespace": self.namespace,
             "filter": filter,
         }
 
         if request_hybrid and self.hybrid_search_enabled and query_sparse_vector:
             logger.info(
-                f"PineconeDB: Performing hybrid search with sparse vector in namespace '{self.namespace}'."
+                f"PineconeDB: Performing hybrid search with sparse vector in {len(namespaces)} namespace(s)."
             )
             query_params["sparse_vector"] = {
                 "indices": list(query_sparse_vector.keys()),
@@ -226,25 +491,34 @@ class PineconeDB(VectorDBBase):
             # For now, we assume providing both is sufficient for the server to perform hybrid search.
         else:
             logger.info(
-                f"PineconeDB: Performing dense-only search in namespace '{self.namespace}'."
+                f"PineconeDB: Performing dense-only search in {len(namespaces)} namespace(s)."
             )
 
-        results = self.index.query(**query_params)
+        responses = self._run_parallel(
+            "Query",
+            [
+                lambda namespace=namespace: self.index.query(namespace=namespace, **query_params)
+                for namespace in namespaces
+            ],
+        )
 
         # Format the results
         formatted_results = []
-        for match in results.matches:
-            formatted_results.append(
-                {
-                    "id": match.id,
-                    "text": match.metadata.get("text", ""),
-                    "metadata": {
-                        k: v for k, v in match.metadata.items() if k != "text"
-                    },
-                    "distance": match.score,
-                }
-            )
+        for results in responses:
+            for match in results.matches:
+                metadata = match.metadata or {}
+                formatted_results.append(
+                    {
+                        "id": match.id,
+                        "text": metadata.get("text", ""),
+                        "metadata": {k: v for k, v in metadata.items() if k != "text"},
+                        "distance": match.score,
+                    }
+                )
 
+        if len(responses) > 1:
+            formatted_results.sort(key=lambda result: result["distance"], reverse=True)
+            formatted_results = formatted_results[:top_k]
         return formatted_results
 
     def delete(self, ids: List[str]) -> None:
@@ -254,7 +528,18 @@ class PineconeDB(VectorDBBase):
         Args:
             ids: The IDs of the documents to delete.
         """
-        self.index.delete(ids=ids, namespace=self.namespace)
+        if not ids:
+            return
+        self._run_parallel(
+            "Delete",
+            [
+                lambda namespace=namespace, batch=ids[i : i + MAX_REQUEST_VECTORS]: self.index.delete(
+                    ids=batch, namespace=namespace
+                )
+                for namespace in self._namespaces()
+                for i in range(0, len(ids), MAX_REQUEST_VECTORS)
+            ],
+        )
 
     def get(self, ids: List[str]) -> List[Dict[str, Any]]:
         """
@@ -266,22 +551,34 @@ class PineconeDB(VectorDBBase):
         Returns:
             A list of dictionaries containing the documents.
         """
+        if not ids:
+            return []
+
         # Fetch the vectors
-        results = self.index.fetch(ids=ids, namespace=self.namespace)
+        responses = self._run_parallel(
+            "Fetch",
+            [
+                lambda namespace=namespace, batch=ids[i : i + MAX_REQUEST_VECTORS]: self.index.fetch(
+                    ids=batch, namespace=namespace
+                )
+                for namespace in self._namespaces()
+                for i in range(0, len(ids), MAX_REQUEST_VECTORS)
+            ],
+        )
 
         # Format the results
         formatted_results = []
-        for id, vector in results.vectors.items():
-            formatted_results.append(
-                {
-                    "id": id,
-                    "text": vector.metadata.get("text", ""),
-                    "metadata": {
-                        k: v for k, v in vector.metadata.items() if k != "text"
-                    },
-                    "embedding": vector.values,
-                }
-            )
+        for results in responses:
+            for id, vector in results.vectors.items():
+                metadata = vector.metadata or {}
+                formatted_results.append(
+                    {
+                        "id": id,
+                        "text": metadata.get("text", ""),
+                        "metadata": {k: v for k, v in metadata.items() if k != "text"},
+                        "embedding": vector.values,
+                    }
+                )
 
         return formatted_results
 
@@ -304,7 +601,9 @@ class PineconeDB(VectorDBBase):
             sparse_vectors: Optional sparse vector representations for each document.
         """
         # Get the current documents
-        current_docs = self.get(ids)
+        current_docs = {doc["id"]: doc for doc in self.get(ids)}
+        if embeddings is not None:
+            embeddings = embedding_rows(embeddings)
 
         # If sparse_vectors is not provided, initialize with None for each ID
         if sparse_vectors is None:
@@ -321,61 +620,102 @@ class PineconeDB(VectorDBBase):
             sparse_vectors = adjusted_sparse_vectors
 
         # Prepare the vectors to upsert
-        vectors_to_upsert = []
+        vectors_by_namespace: Dict[str, List[Dict[str, Any]]] = {}
         for i, doc_id in enumerate(ids):
-            if i < len(current_docs):
-                current_doc = current_docs[i]
-
-                # Update the document content if provided
-                doc_content = (
-                    documents[i]
-                    if documents and i < len(documents)
-                    else current_doc["text"]
-                )
+            current_doc = current_docs.get(doc_id)
+            if current_doc is None:
+                continue
+
+            # Update the document content if provided
+            doc_content = (
+                documents[i]
+                if documents and i < len(documents)
+                else current_doc["text"]
+            )
 
-                # Update the embedding if provided
-                embedding = (
-                    embeddings[i]
-                    if embeddings and i < len(embeddings)
-                    else current_doc["embedding"]
-                )
+            # Update the embedding if provided
+            embedding = (
+                embeddings[i]
+                if embeddings and i < len(embeddings)
+                else current_doc["embedding"]
+            )
 
-                # Update the metadata if provided
-                metadata = current_doc["metadata"].copy()
-                if metadatas and i < len(metadatas):
-                    metadata.update(metadatas[i])
-
-                # Add document text to metadata
-                metadata["text"] = doc_content
-
-                # Create vector data structure
-                vector_data = {
-                    "id": doc_id,
-                    "values": embedding,
-                    "metadata": metadata,
-                }
-
-                # Add sparse vector if provided and hybrid search is enabled
-                if (
-                    self.hybrid_search_enabled
-                    and sparse_vectors
-                    and i < len(sparse_vectors)
-                    and sparse_vectors[i] is not None
-                ):
-                    current_sparse = sparse_vectors[i]
-                    if current_sparse:  # Ensure it's not None and not empty
-                        vector_data["sparse_values"] = {
-                            "indices": list(current_sparse.keys()),
-                            "values": list(current_sparse.values()),
-                        }
+            # Update the metadata if provided
+            metadata = current_doc["metadata"].copy()
+            if metadatas and i < len(metadatas):
+                metadata.update(metadatas[i])
+
+            # Add document text to metadata
+            metadata["text"] = doc_content
+
+            # Create vector data structure
+            vector_data = {
+                "id": doc_id,
+                "values": list(embedding),
+                "metadata": metadata,
+            }
+
+            # Add sparse vector if provided and hybrid search is enabled
+            if (
+                self.hybrid_search_enabled
+                and sparse_vectors
+                and i < len(sparse_vectors)
+                and sparse_vectors[i] is not None
+            ):
+                current_sparse = sparse_vectors[i]
+                if current_sparse:  # Ensure it's not None and not empty
+                    vector_data["sparse_values"] = {
+                        "indices": list(current_sparse.keys()),
+                        "values": list(current_sparse.values()),
+                    }
 
-                vectors_to_upsert.append(vector_data)
+            vectors_by_namespace.setdefault(self._namespace_for(metadata), []).append(
+                vector_data
+            )
+
+        # Upsert the vectors in size-limited batches, concurrently
+        self._upsert(vectors_by_namespace)
+
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all vectors in the index, in batches.
+
+        Listing vector IDs requires a serverless index.
 
-        # Upsert the vectors in batches
-        batch_size = 100
-        for i in range(0, len(vectors_to_upsert), batch_size):
-            batch = vectors_to_upsert[i : i + batch_size]
-            self.index.upsert(vectors=batch, namespace=self.namespace)
+        Args:
+            batch_size: The number of vectors per batch.
+            include_embeddings: Unused; fetches always return the values.
+
+        Yields:
+            Lists of documents in the format returned by `get`, with
+            "sparse_vector" set for vectors that have one.
+        """
+        batch_size = min(batch_size, MAX_REQUEST_VECTORS)
+        for namespace in self._namespaces():
+            for id_page in self.index.list(namespace=namespace, limit=batch_size):
+                results = self._with_retries(
+                    "Fetch",
+                    lambda ids=list(id_page): self.index.fetch(ids=ids, namespace=namespace),
+                )
+                documents = []
+                for id, vector in results.vectors.items():
+                    metadata = vector.metadata or {}
+                    sparse = getattr(vector, "sparse_values", None)
+                    documents.append(
+                        {
+                            "id": id,
+                            "text": metadata.get("text", ""),
+                            "metadata": {k: v for k, v in metadata.items() if k != "text"},
+                            "embedding": vector.values,
+                            "sparse_vector": dict(zip(sparse.indices, sparse.values))
+                            if sparse
+                            else None,
+                        }
+                    )
+                if documents:
+                    yield documents
 
     def count(self) -> int:
         """
@@ -384,11 +724,20 @@ class PineconeDB(VectorDBBase):
         Returns:
             The number of documents.
         """
-        stats = self.index.describe_index_stats()
-        return stats.namespaces.get(self.namespace, {}).get("vector_count", 0)
+        stats = self._with_retries("Describe index", self.index.describe_index_stats)
+        counts = self._stats_namespaces(stats)
+        if self.namespace_field:
+            return sum(counts.values())
+        return counts.get(self.namespace, 0)
 
     def clear(self) -> None:
         """
         Clear all documents from the vector database.
         """
-        self.index.delete(delete_all=True, namespace=self.namespace)
+        self._run_parallel(
+            "Clear",
+            [
+                lambda namespace=namespace: self.index.delete(delete_all=True, namespace=namespace)
+                for namespace in self._namespaces()
+            ],
+        )
@@ -4,9 +4,9 @@ Qdrant vector database implementation.
 
 import logging
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
-from sam_rag.services.database.vector_db_base import VectorDBBase
+from sam_rag.services.database.vector_db_base import VectorDBBase, embedding_rows
 
 logger = logging.getLogger(__name__)
 
@@ -27,13 +27,24 @@ class QdrantDB(VectorDBBase):
             config: A dictionary containing configuration parameters.
                 - url: The Qdrant URL (default: "http://localhost:6333").
                 - api_key: The Qdrant API key (optional).
+                - path: Run Qdrant in local mode, storing the collection in this
+                  directory instead of connecting to a server. ":memory:" keeps it
+                  in memory (optional).
                 - collection_name: The name of the collection to use (default: "documents").
                 - embedding_dimension: The dimension of the embeddings (default: 768).
+                - quantization: Optional compression of the dense vectors:
+                    - type: "scalar" (int8) or "binary" (default: no quantization).
+                    - quantile: Quantile used to clip outliers for scalar quantization (default: 0.99).
+                    - always_ram: Keep the quantized vectors in RAM (default: True).
+                    - on_disk: Keep the original vectors on disk (default: True when quantized).
+                    - rescore: Rescore candidates with the original vectors (default: True).
+                    - oversampling: Candidates fetched per result before rescoring (default: 2.0).
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
         """
         super().__init__(config=config, hybrid_search_config=hybrid_search_config)
         self.url = self.config.get("url", "http://localhost:6333")
         self.api_key = self.config.get("api_key")
+        self.path = self.config.get("path")
         self.collection_name = self.config.get("collection_name", "documents")
         self.embedding_dimension = self.config.get(
             "embedding_dimension", 768
@@ -46,6 +57,15 @@ class QdrantDB(VectorDBBase):
             "sparse_db",  # Default sparse vector name to match config
         )
 
+        # Quantization of the dense vectors
+        self.quantization = self.config.get("quantization") or {}
+        self.quantization_type = (self.quantization.get("type") or "none").lower()
+        if self.quantization_type not in ("none", "scalar", "binary"):
+            raise ValueError(
+                f"Unsupported Qdrant quantization type '{self.quantization_type}'. "
+                "Use 'scalar', 'binary' or 'none'."
+            ) from None
+
         self.client = None
         self._setup_client()
 
@@ -58,7 +78,12 @@ class QdrantDB(VectorDBBase):
             from qdrant_client.http import models
 
             # Create the client
-            self.client = QdrantClient(url=self.url, api_key=self.api_key)
+            if self.path == ":memory:":
+                self.client = QdrantClient(location=":memory:")
+            elif self.path:
+                self.client = QdrantClient(path=self.path)
+            else:
+                self.client = QdrantClient(url=self.url, api_key=self.api_key)
 
             # Check if the collection exists
             collections = self.client.get_collections().collections
@@ -75,7 +100,9 @@ class QdrantDB(VectorDBBase):
                 dense_vector_config = models.VectorParams(
                     size=self.embedding_dimension,
                     distance=models.Distance.COSINE,
+                    on_disk=self._vectors_on_disk(),
                 )
+                quantization_config = self._quantization_config(models)
 
                 if self.hybrid_search_enabled:
                     logger.info(
@@ -94,6 +121,7 @@ class QdrantDB(VectorDBBase):
                         sparse_vectors_config={
                             self.sparse_vector_name: sparse_vector_config
                         },
+                        quantization_config=quantization_config,
                     )
                     logger.info(
                         f"Collection '{self.collection_name}' created successfully with dense and sparse vector configurations."
@@ -105,12 +133,26 @@ class QdrantDB(VectorDBBase):
                     self.client.create_collection(
                         collection_name=self.collection_name,
                         vectors_config=dense_vector_config,  # Single dense vector config
+                        quantization_config=quantization_config,
                     )
                     logger.info(
                         f"Collection '{self.collection_name}' created successfully with dense vector configuration."
                     )
             else:
                 logger.info(f"Collection '{self.collection_name}' already exists.")
+                quantization_config = self._quantization_config(models)
+                if quantization_config is not None:
+                    # Qdrant builds the quantized vectors in the background
+                    self.client.update_collection(
+                        collection_name=self.collection_name,
+                        vectors_config={
+                            "": models.VectorParamsDiff(on_disk=self._vectors_on_disk())
+                        },
+                        quantization_config=quantization_config,
+                    )
+                    logger.info(
+                        f"Applied {self.quantization_type} quantization to collection '{self.collection_name}'."
+                    )
                 # TODO: Potentially update existing collection if hybrid search settings changed
                 # For now, we assume the collection is compatible or re-created if not.
         except ImportError:
@@ -119,6 +161,62 @@ class QdrantDB(VectorDBBase):
                 "Please install it with `pip install qdrant-client`."
             ) from None
 
+    def _vectors_on_disk(self) -> Optional[bool]:
+        """
+        Decide whether the original dense vectors are stored on disk.
+
+        Quantization only saves memory if the original vectors leave RAM, so
+        they go to disk by default when quantization is enabled.
+        """
+        if self.quantization_type == "none":
+            return None
+        return self.quantization.get("on_disk", True)
+
+    def _quantization_config(self, models: Any) -> Optional[Any]:
+        """
+        Build the Qdrant quantization configuration.
+
+        Args:
+            models: The `qdrant_client.http.models` module.
+
+        Returns:
+            The quantization configuration, or None if quantization is disabled.
+        """
+        always_ram = self.quantization.get("always_ram", True)
+        if self.quantization_type == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=self.quantization.get("quantile", 0.99),
+                    always_ram=always_ram,
+                )
+            )
+        if self.quantization_type == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+            )
+        return None
+
+    def _search_params(self, models: Any) -> Optional[Any]:
+        """
+        Build the search parameters that control rescoring of quantized results.
+
+        Args:
+            models: The `qdrant_client.http.models` module.
+
+        Returns:
+            The search parameters, or None if quantization is disabled.
+        """
+        if self.quantization_type == "none":
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                ignore=False,
+                rescore=self.quantization.get("rescore", True),
+                oversampling=self.quantization.get("oversampling", 2.0),
+            )
+        )
+
     def add_documents(
         self,
         documents: List[str],
@@ -147,9 +245,12 @@ class QdrantDB(VectorDBBase):
         Returns:
             The IDs of the added documents.
         """
-        if not documents or not embeddings:
+        if not documents or len(embeddings) == 0:
             return []
 
+        # The Qdrant client sends lists of floats
+        embeddings = embedding_rows(embeddings)
+
         # Generate IDs if not provided
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(documents))]
@@ -267,49 +368,55 @@ class QdrantDB(VectorDBBase):
                 )
             qdrant_filter = models.Filter(must=conditions)
 
-        query_input: Any  # Can be List[float] or List[models.Query]
-
-        print("request_hybrid:", request_hybrid)
-        print("hybrid_search_enabled:", self.hybrid_search_enabled)
-        print(
-            "query_sparse_vector:",
-            query_sparse_vector is not None and len(query_sparse_vector) > 0,
-        )
         if request_hybrid and self.hybrid_search_enabled and query_sparse_vector:
             logger.info(
                 f"Performing hybrid search with sparse vector on Qdrant collection '{self.collection_name}'."
             )
-            # Construct a list of query objects for hybrid search
-            query_input = [
-                models.NamedVectorQuery(
-                    name="",
-                    vector=query_embedding,  # Use empty string for default/unnamed dense vector
-                ),
-                models.NamedSparseVectorQuery(
-                    name=self.sparse_vector_name,
-                    vector=models.SparseVector(
-                        indices=list(query_sparse_vector.keys()),
-                        values=list(query_sparse_vector.values()),
+            # The dense and sparse vectors each fetch candidates, which are
+            # fused by reciprocal rank
+            prefetch_limit = max(
+                top_k, self.hybrid_search_params.get("prefetch_limit", top_k * 2)
+            )
+            query_args: Dict[str, Any] = {
+                "prefetch": [
+                    models.Prefetch(
+                        query=query_embedding,
+                        using="",  # Default/unnamed dense vector
+                        filter=qdrant_filter,
+                        params=self._search_params(models),
+                        limit=prefetch_limit,
+                    ),
+                    models.Prefetch(
+                        query=models.SparseVector(
+                            indices=list(query_sparse_vector.keys()),
+                            values=list(query_sparse_vector.values()),
+                        ),
+                        using=self.sparse_vector_name,
+                        filter=qdrant_filter,
+                        limit=prefetch_limit,
                     ),
-                ),
-            ]
-            logger.debug(f"Hybrid search query input: {query_input}")
+                ],
+                "query": models.FusionQuery(fusion=models.Fusion.RRF),
+            }
         else:
             logger.info(
                 f"Performing dense-only search on Qdrant collection '{self.collection_name}'."
             )
-            # For dense-only, query_input is just the dense vector
-            # The client.query_points API can accept a single vector directly for the default dense vector
-            query_input = query_embedding
+            query_args = {
+                "query": query_embedding,
+                "search_params": self._search_params(models),
+            }
+            if self.hybrid_search_enabled:
+                # The collection holds named vectors
+                query_args["using"] = ""
 
-        # Use query_points API
         search_results = self.client.query_points(
             collection_name=self.collection_name,
-            query=query_input,
             limit=top_k,
             query_filter=qdrant_filter,
             with_payload=True,
             with_vectors=False,
+            **query_args,
         )
 
         # Format the results
@@ -534,6 +641,54 @@ class QdrantDB(VectorDBBase):
                         ],
                     )
 
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all points in the collection, in batches.
+
+        Args:
+            batch_size: The number of points per batch.
+            include_embeddings: Whether the vectors are read.
+
+        Yields:
+            Lists of documents in the format returned by `get`, with
+            "sparse_vector" set for points that have one.
+        """
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=include_embeddings,
+            )
+            documents = []
+            for point in points:
+                payload = point.payload or {}
+                embedding = point.vector
+                sparse_vector = None
+                if isinstance(embedding, dict):
+                    # Named vectors: the dense vector is unnamed
+                    sparse = embedding.get(self.sparse_vector_name)
+                    if sparse is not None:
+                        sparse_vector = dict(zip(sparse.indices, sparse.values))
+                    embedding = embedding.get("", [])
+                documents.append(
+                    {
+                        "id": point.id,
+                        "text": payload.get("text", ""),
+                        "metadata": {k: v for k, v in payload.items() if k != "text"},
+                        "embedding": embedding if embedding is not None else [],
+                        "sparse_vector": sparse_vector,
+                    }
+                )
+            if documents:
+                yield documents
+            if offset is None:
+                return
+
     def count(self) -> int:
         """
         Get the number of documents in the vector database.
@@ -541,8 +696,9 @@ class QdrantDB(VectorDBBase):
         Returns:
             The number of documents.
         """
-        collection_info = self.client.get_collection(self.collection_name)
-        return collection_info.vectors_count
+        # vectors_count counts every named vector of a point and was removed from
+        # newer clients; the point count is the number of documents
+        return self.client.count(self.collection_name, exact=True).count
 
     def clear(self) -> None:
         """
@@ -550,3 +706,32 @@ class QdrantDB(VectorDBBase):
         """
         self.client.delete_collection(self.collection_name)
         self._setup_client()
+
+    def compact(self, reindex: bool = False) -> bool:
+        """
+        Start the optimizers of the collection.
+
+        Re-applying the optimizer configuration restarts the optimizers,
+        which vacuum segments whose share of deleted points is above
+        `deleted_threshold` and merge small segments. They run in the
+        background; the collection status is yellow until they finish.
+
+        Args:
+            reindex: Unused; the optimizers rebuild the index of the segments
+                they rewrite.
+
+        Returns:
+            Whether the optimizers were started.
+        """
+        from qdrant_client import models
+
+        optimizer = self.client.get_collection(self.collection_name).config.optimizer_config
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizers_config=models.OptimizersConfigDiff(
+                deleted_threshold=optimizer.deleted_threshold,
+                vacuum_min_vector_number=optimizer.vacuum_min_vector_number,
+            ),
+        )
+        logger.info(f"Started the optimizers of Qdrant collection '{self.collection_name}'.")
+        return True
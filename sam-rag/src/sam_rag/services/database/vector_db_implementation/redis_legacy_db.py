@@ -6,9 +6,12 @@ This version uses the 'redis' package directly.
 import logging
 import uuid
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
-from sam_rag.services.database.vector_db_base import VectorDBBase
+from sam_rag.services.database.vector_db_base import VectorDBBase, as_embedding_matrix
+from sam_rag.services.database.vector_db_implementation.redis_vector_types import (
+    resolve_redis_datatype,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +35,11 @@ class RedisDB(VectorDBBase):
                 - password: The Redis password (optional).
                 - index_name: The name of the index to use (default: "documents").
                 - prefix: The prefix to use for keys (default: "doc:").
+                - exclude_prefixes: Key prefixes that `iter_documents` skips,
+                  e.g. those of shards that share `prefix` (default: none).
                 - embedding_dimension: The dimension of the embeddings (default: 768).
+                - vector_datatype: Storage type of the vectors, "FLOAT32", "FLOAT16"
+                  or "FLOAT64" (default: "FLOAT32"). Fixed when the index is created.
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
                                   Note: This legacy RedisDB implementation does not support hybrid search.
         """
@@ -50,7 +57,11 @@ class RedisDB(VectorDBBase):
         self.password = self.config.get("password")
         self.index_name = self.config.get("index_name", "documents")
         self.prefix = self.config.get("prefix", "doc:")
+        self.exclude_prefixes = tuple(self.config.get("exclude_prefixes", ()))
         self.embedding_dimension = self.config.get("embedding_dimension", 768)
+        self.vector_datatype, self.vector_dtype = resolve_redis_datatype(
+            self.config.get("vector_datatype")
+        )
         self.client = None
         self._setup_client()
 
@@ -83,7 +94,7 @@ class RedisDB(VectorDBBase):
                         "embedding",
                         "FLAT",
                         {
-                            "TYPE": "FLOAT32",
+                            "TYPE": self.vector_datatype,
                             "DIM": self.embedding_dimension,
                             "DISTANCE_METRIC": "COSINE",
                         },
@@ -127,9 +138,12 @@ class RedisDB(VectorDBBase):
             logger.warning(
                 "RedisDB (legacy): 'sparse_vectors' parameter was provided but will be ignored."
             )
-        if not documents or not embeddings:
+        if not documents or len(embeddings) == 0:
             return []
 
+        # One matrix in the index datatype; each row is written as raw bytes
+        embedding_matrix = as_embedding_matrix(embeddings, self.vector_dtype)
+
         # Generate IDs if not provided
         if ids is None:
             ids = [str(uuid.uuid4()) for _ in range(len(documents))]
@@ -142,7 +156,7 @@ class RedisDB(VectorDBBase):
         pipeline = self.client.pipeline()
         for i in range(len(documents)):
             # Convert embedding to bytes
-            embedding_bytes = np.array(embeddings[i], dtype=np.float32).tobytes()
+            embedding_bytes = embedding_matrix[i].tobytes()
 
             # Prepare the hash fields
             hash_fields: Dict[str, Any] = {  # Ensure type for hash_fields
@@ -227,7 +241,7 @@ class RedisDB(VectorDBBase):
             query_str = f"*=>[KNN {top_k} @embedding $embedding AS distance]"
 
         # Convert embedding to bytes
-        embedding_bytes = np.array(query_embedding, dtype=np.float32).tobytes()
+        embedding_bytes = np.array(query_embedding, dtype=self.vector_dtype).tobytes()
 
         # Execute the search
         from redis.commands.search.query import Query  # Ensure Query is imported
@@ -337,7 +351,7 @@ class RedisDB(VectorDBBase):
                     )  # Assuming it was stored as raw bytes then decoded
                     try:
                         embedding = np.frombuffer(
-                            embedding_bytes, dtype=np.float32
+                            embedding_bytes, dtype=self.vector_dtype
                         ).tolist()
                     except ValueError as e:
                         logger.error(
@@ -397,7 +411,7 @@ class RedisDB(VectorDBBase):
 
             # Update the embedding if provided
             if embeddings and i < len(embeddings) and embeddings[i] is not None:
-                embedding_bytes = np.array(embeddings[i], dtype=np.float32).tobytes()
+                embedding_bytes = np.array(embeddings[i], dtype=self.vector_dtype).tobytes()
                 updates["embedding"] = embedding_bytes
 
             # Update the metadata if provided
@@ -418,6 +432,36 @@ class RedisDB(VectorDBBase):
         # Execute the pipeline
         pipeline.execute()
 
+    def iter_documents(
+        self, batch_size: int = 500, include_embeddings: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all documents with the key prefix, in batches.
+
+        Keys starting with one of `exclude_prefixes` are skipped. The
+        exclusions are read for every key, so they can be extended while
+        iterating.
+
+        Args:
+            batch_size: The number of documents per batch.
+            include_embeddings: Unused; documents are read whole.
+
+        Yields:
+            Lists of documents in the format returned by `get`.
+        """
+        ids = []
+        for key in self.client.scan_iter(match=f"{self.prefix}*", count=batch_size):
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            if self.exclude_prefixes and key.startswith(self.exclude_prefixes):
+                continue
+            ids.append(key[len(self.prefix) :])
+            if len(ids) >= batch_size:
+                yield self.get(ids)
+                ids = []
+        if ids:
+            yield self.get(ids)
+
     def count(self) -> int:
         """
         Get the number of documents in the vector database.
@@ -441,3 +485,25 @@ class RedisDB(VectorDBBase):
         # Delete all keys
         if keys:
             self.client.delete(*keys)
+
+    def compact(self, reindex: bool = False) -> bool:
+        """
+        Run the garbage collection of the search index.
+
+        Deleted hashes leave entries in the inverted indexes until the
+        background garbage collection removes them; this runs it now. It
+        uses FT.DEBUG, which some managed Redis services do not allow.
+
+        Args:
+            reindex: Unused.
+
+        Returns:
+            Whether the garbage collection ran.
+        """
+        try:
+            self.client.execute_command("FT.DEBUG", "GC_FORCEINVOKE", self.index_name)
+        except Exception as e:
+            logger.warning(f"Cannot run the garbage collection of index '{self.index_name}': {e}")
+            return False
+        logger.info(f"Ran the garbage collection of index '{self.index_name}'.")
+        return True
@@ -0,0 +1,40 @@
+"""
+Vector storage types shared by the Redis vector database implementations.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# RediSearch vector datatypes and the numpy types used to encode them
+REDIS_VECTOR_DATATYPES = {
+    "FLOAT32": np.float32,
+    "FLOAT16": np.float16,
+    "FLOAT64": np.float64,
+}
+
+
+def resolve_redis_datatype(name: str = None) -> Tuple[str, type]:
+    """
+    Resolve the configured vector datatype of a Redis index.
+
+    FLOAT16 halves the memory used by the vectors compared to FLOAT32 and
+    requires Redis Stack 7.4 (RediSearch 2.10) or later.
+
+    Args:
+        name: The configured datatype (default: "FLOAT32").
+
+    Returns:
+        A tuple of the RediSearch datatype name and the numpy type used to
+        encode vectors for it.
+
+    Raises:
+        ValueError: If the datatype is not supported.
+    """
+    datatype = (name or "FLOAT32").upper()
+    if datatype not in REDIS_VECTOR_DATATYPES:
+        raise ValueError(
+            f"Unsupported Redis vector datatype '{name}'. "
+            f"Use one of {', '.join(REDIS_VECTOR_DATATYPES)}."
+        ) from None
+    return datatype, REDIS_VECTOR_DATATYPES[datatype]
@@ -7,9 +7,17 @@ import logging
 import uuid
 import json
 import numpy as np
-from typing import Dict, Any, List, Optional
-
-from sam_rag.services.database.vector_db_base import VectorDBBase
+from typing import Dict, Any, Iterator, List, Optional
+
+from sam_rag.services.database.vector_db_base import (
+    PartialWriteError,
+    VectorDBBase,
+    as_embedding_matrix,
+    chunked,
+)
+from sam_rag.services.database.vector_db_implementation.redis_vector_types import (
+    resolve_redis_datatype,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -98,6 +106,10 @@ else:  # Proceed only if redisvl was imported successfully
                     - embedding_dimension: Dimension of the embeddings. (Required)
                     - text_field_name: Name for the text content field (for FT search). (Default: "content")
                     - vector_field_name: Name for the vector field. (Default: "embedding")
+                    - vector_datatype: Storage type of the vectors, "FLOAT32", "FLOAT16" or
+                      "FLOAT64". (Default: "FLOAT32") Fixed when the index is created.
+                    - write_batch_size: Documents per pipelined write. (Default: 500)
+                    - read_batch_size: Keys per pipelined read or delete. (Default: 1000)
                     - (Optional) hybrid_search_params:
                         - text_score_weight: Weight for text search score in client-side fusion (0.0-1.0). (Default: 0.5)
                         - vector_score_weight: Weight for vector search score in client-side fusion (0.0-1.0). (Default: 0.5)
@@ -118,6 +130,9 @@ else:  # Proceed only if redisvl was imported successfully
 
             self.text_field_name = self.config.get("text_field_name", "content")
             self.vector_field_name = self.config.get("vector_field_name", "embedding")
+            self.vector_datatype, self.vector_dtype = resolve_redis_datatype(
+                self.config.get("vector_datatype")
+            )
 
             # Hybrid search specific parameters from config (can be overridden by global hybrid_search_config)
             # These are more for client-side fusion if redisvl doesn't support server-side weighted hybrid directly.
@@ -127,6 +142,9 @@ else:  # Proceed only if redisvl was imported successfully
                 "vector_score_weight", 0.5
             )
 
+            self.write_batch_size = max(1, int(self.config.get("write_batch_size", 500)))
+            self.read_batch_size = max(1, int(self.config.get("read_batch_size", 1000)))
+
             self.client = None  # Underlying redis.Redis client
             self.index: Optional[SearchIndex] = (
                 None  # redisvl.index.SearchIndex instance
@@ -179,7 +197,7 @@ else:  # Proceed only if redisvl was imported successfully
                                 "dims": self.embedding_dimension,
                                 "algorithm": "FLAT",  # or "HNSW" for larger datasets
                                 "distance_metric": "COSINE",
-                                "datatype": "FLOAT32",  # Or FLOAT64
+                                "datatype": self.vector_datatype,
                             },
                         },
                         # Example of a tag field for filtering (must be added to schema if used in filters)
@@ -230,9 +248,12 @@ else:  # Proceed only if redisvl was imported successfully
                     "Hybrid search uses full-text search on stored text content."
                 )
 
-            if not documents or not embeddings:
+            if not documents or len(embeddings) == 0:
                 return []
 
+            # One matrix in the index datatype; each row is written as raw bytes
+            embedding_matrix = as_embedding_matrix(embeddings, self.vector_dtype)
+
             if ids is None:
                 ids = [str(uuid.uuid4()) for _ in range(len(documents))]
             if metadatas is None:
@@ -242,38 +263,80 @@ else:  # Proceed only if redisvl was imported successfully
             if len(metadatas) < len(documents):
                 metadatas.extend([{} for _ in range(len(documents) - len(metadatas))])
 
-            data_to_load = []
-            for i, doc_text in enumerate(documents):
-                record = {
-                    "id": ids[i],  # redisvl uses 'id' by default for the key suffix
-                    self.text_field_name: doc_text,
-                    # redisvl expects vector as numpy array of float32
-                    self.vector_field_name: np.array(embeddings[i], dtype=np.float32),
-                }
-                # Add metadata. Ensure keys match schema fields if they are indexed (e.g., as tags).
-                # Unindexed metadata will still be stored with the HASH.
-                current_meta = metadatas[i]
-                for k, v in current_meta.items():
-                    # redisvl schema fields for tags/text need simple types (str, int, float, bool)
-                    # If a metadata field is defined in schema (e.g. as TagField), ensure type compatibility.
-                    if isinstance(
-                        v, (list, dict)
-                    ):  # Store complex types as JSON strings
-                        record[k] = json.dumps(v)
-                    else:
-                        record[k] = v
-                data_to_load.append(record)
-
-            if data_to_load and self.index:
-                # redisvl's load method handles creating keys like "doc:index_name:id_value"
-                self.index.load(
-                    data_to_load
-                )  # No need to specify keys if 'id' is in records
-                logger.info(
-                    f"RedisDB (redisvl): Added {len(data_to_load)} documents to index '{self.index_name}'."
+            if not self.index:
+                return ids
+
+            # Records are built and sent one batch at a time, so a large ingest
+            # never holds more than one batch of hash payloads. A failed batch
+            # does not stop the remaining ones; the caller is told which
+            # documents were stored.
+            written_ids: List[str] = []
+            failed_ids: List[str] = []
+            errors: List[Exception] = []
+            for start in range(0, len(documents), self.write_batch_size):
+                end = min(start + self.write_batch_size, len(documents))
+                batch_ids = ids[start:end]
+                records = [
+                    self._record(ids[i], documents[i], embedding_matrix[i], metadatas[i])
+                    for i in range(start, end)
+                ]
+                try:
+                    # redisvl's load method handles creating keys like "doc:index_name:id_value"
+                    # and writes the records in one pipeline.
+                    self.index.load(records, id_field="id", batch_size=len(records))
+                    written_ids.extend(batch_ids)
+                except Exception as e:
+                    logger.error(
+                        f"RedisDB (redisvl): Failed to add {len(batch_ids)} documents ({start}-{end - 1}): {e}"
+                    )
+                    failed_ids.extend(batch_ids)
+                    errors.append(e)
+
+            logger.info(
+                f"RedisDB (redisvl): Added {len(written_ids)} documents to index '{self.index_name}'."
+            )
+            if failed_ids:
+                if not written_ids:
+                    raise errors[0]
+                raise PartialWriteError(
+                    f"RedisDB (redisvl): {len(failed_ids)} of {len(ids)} documents were not added",
+                    written_ids,
+                    failed_ids,
+                    errors,
                 )
             return ids
 
+        def _record(
+            self,
+            doc_id: str,
+            doc_text: Optional[str],
+            embedding: Optional[np.ndarray],
+            metadata: Optional[Dict[str, Any]],
+        ) -> Dict[str, Any]:
+            """
+            Build the hash fields of a document. Fields given as None are left out.
+            """
+            record: Dict[str, Any] = {"id": doc_id}  # redisvl uses 'id' by default for the key suffix
+            if doc_text is not None:
+                record[self.text_field_name] = doc_text
+            if embedding is not None:
+                # Hash storage expects the vector as bytes of the index datatype
+                record[self.vector_field_name] = embedding.tobytes()
+            # Add metadata. Ensure keys match schema fields if they are indexed (e.g., as tags).
+            # Unindexed metadata will still be stored with the HASH.
+            for k, v in (metadata or {}).items():
+                # redisvl schema fields for tags/text need simple types (str, int, float, bool)
+                # If a metadata field is defined in schema (e.g. as TagField), ensure type compatibility.
+                if isinstance(v, (list, dict)):  # Store complex types as JSON strings
+                    record[k] = json.dumps(v)
+                else:
+                    record[k] = v
+            return record
+
+        def _key(self, doc_id: str) -> str:
+            """Get the Redis key of a document."""
+            return f"{self.index.schema.index_prefix}:{doc_id}"
+
         def search(
             self,
             query_embedding: List[float],
@@ -319,7 +382,7 @@ else:  # Proceed only if redisvl was imported successfully
                     redis_filter_expression = current_filter_obj
 
             # Prepare the vector for query
-            query_vector_np = np.array(query_embedding, dtype=np.float32)
+            query_vector_np = np.array(query_embedding, dtype=self.vector_dtype)
 
             # Construct the query
             # For hybrid search, redisvl might require a specific query structure or manual query string.
@@ -395,6 +458,7 @@ else:  # Proceed only if redisvl was imported successfully
                         vector=query_vector_np,
                         vector_field_name=self.vector_field_name,
                         num_results=top_k,
+                        dtype=self.vector_datatype.lower(),
                         filter_expression=redis_filter_expression,  # Only metadata filter for now
                         # return_fields=[self.text_field_name, "id", ... other metadata fields]
                     )
@@ -408,6 +472,7 @@ else:  # Proceed only if redisvl was imported successfully
                     vector=query_vector_np,
                     vector_field_name=self.vector_field_name,
                     num_results=top_k,
+                    dtype=self.vector_datatype.lower(),
                     filter_expression=redis_filter_expression,
                     # Specify fields to return, including metadata and the text field
                     # return_fields=['id', self.text_field_name, self.vector_field_name, 'vector_distance', ... any other metadata fields in schema]
@@ -464,50 +529,48 @@ else:  # Proceed only if redisvl was imported successfully
                 return
             # redisvl SearchIndex.delete expects full keys or just IDs if prefix is known.
             # Using underlying client.delete with full keys is safer.
-            full_keys = [f"{self.index.schema.index_prefix}:{id_val}" for id_val in ids]
-            if full_keys:
-                self.client.delete(*full_keys)
-                logger.info(
-                    f"RedisDB (redisvl): Deleted {len(ids)} documents from index '{self.index_name}'."
-                )
+            for batch in chunked(ids, self.read_batch_size):
+                self.client.delete(*[self._key(id_val) for id_val in batch])
+            logger.info(
+                f"RedisDB (redisvl): Deleted {len(ids)} documents from index '{self.index_name}'."
+            )
 
         def get(self, ids: List[str]) -> List[Dict[str, Any]]:
             if not ids or not self.index or not self.client:
                 return []
 
-            full_keys = [f"{self.index.schema.index_prefix}:{id_val}" for id_val in ids]
             # Fetching raw documents by key. redisvl SearchIndex might not have a direct 'get_documents_by_ids'.
-            # Use underlying client's mget to get raw Redis hash objects.
-            # Note: mget returns list of bytes (for HASH values) or None.
-            # We need hgetall for each key to get all fields.
-
+            # HGETALL for each key, sent in one pipeline per batch of keys so
+            # a large read stays within one round trip per batch.
+            raw_docs_fields_list = []  # List of Dict[bytes, bytes]
+            for batch in chunked(ids, self.read_batch_size):
+                pipeline = self.client.pipeline(transaction=False)
+                for id_val in batch:
+                    pipeline.hgetall(self._key(id_val))
+                raw_docs_fields_list.extend(pipeline.execute())
+
+            vector_field_key = self.vector_field_name.encode("utf-8")
             formatted_results = []
-            pipeline = self.client.pipeline(transaction=False)
-            for key in full_keys:
-                pipeline.hgetall(key)
-
-            raw_docs_fields_list = pipeline.execute()  # List of Dict[bytes, bytes]
-
             for i, raw_doc_fields_bytes in enumerate(raw_docs_fields_list):
                 if raw_doc_fields_bytes:  # If key existed and HGETALL returned fields
-                    # Decode field names and string values from bytes to str
+                    # Decode field names and string values from bytes to str.
+                    # The vector is binary and decoded separately below.
                     doc_fields = {
                         k.decode("utf-8"): v.decode("utf-8")
                         for k, v in raw_doc_fields_bytes.items()
                         if isinstance(k, bytes)
                         and isinstance(v, bytes)  # Ensure they are bytes
+                        and k != vector_field_key
                     }
 
                     text = doc_fields.get(self.text_field_name, "")
 
                     # Vector is stored as bytes by redisvl, needs to be converted back
-                    embedding_bytes = raw_doc_fields_bytes.get(
-                        self.vector_field_name.encode("utf-8")
-                    )
+                    embedding_bytes = raw_doc_fields_bytes.get(vector_field_key)
                     embedding = None
                     if embedding_bytes and isinstance(embedding_bytes, bytes):
                         embedding = np.frombuffer(
-                            embedding_bytes, dtype=np.float32
+                            embedding_bytes, dtype=self.vector_dtype
                         ).tolist()
 
                     metadata = {
@@ -543,26 +606,17 @@ else:  # Proceed only if redisvl was imported successfully
             ] = None,  # Ignored
         ) -> None:
             # redisvl's `load` method (used by `add_documents`) acts as an upsert.
-            # So, update can be implemented by calling `add_documents` with the new data.
-            # This requires that if a field is not provided for update, its old value might be lost
-            # unless `add_documents` is smart enough or we fetch-modify-add.
-            # For simplicity, assume `update` means providing the full new state for the document.
-            if not ids:
+            # Documents given with text and embedding are replaced through `add_documents`.
+            # For the others, only the given fields are written with HSET, in
+            # pipelines, to documents that exist.
+            if not ids or not self.index or not self.client:
                 return
 
-            logger.info(
-                "RedisDB (redisvl): Update operation implemented as a full replace (upsert) using add_documents."
-            )
-
-            # We need to construct the arguments for add_documents carefully.
-            # If a field (documents, embeddings, metadatas) is None for a particular ID,
-            # we cannot simply pass it to add_documents as it expects complete data for each item.
-            # This means an update must provide all necessary fields (text, embedding) for each ID.
-
             docs_for_add = []
             embeds_for_add = []
             metas_for_add = []
             ids_for_add = []
+            partial_updates = []
 
             for i, doc_id in enumerate(ids):
                 doc_text = (
@@ -588,22 +642,106 @@ else:  # Proceed only if redisvl was imported successfully
                     docs_for_add.append(doc_text)
                     embeds_for_add.append(doc_embed)
                     metas_for_add.append(doc_meta)
-                else:
-                    logger.warning(
-                        f"RedisDB (redisvl): Skipping update for ID {doc_id} due to missing document text or embedding."
+                elif doc_text is not None or doc_embed is not None or doc_meta:
+                    embedding = (
+                        as_embedding_matrix([doc_embed], self.vector_dtype)[0]
+                        if doc_embed is not None
+                        else None
+                    )
+                    partial_updates.append(
+                        self._record(doc_id, doc_text, embedding, doc_meta)
                     )
 
+            written_ids: List[str] = []
+            failed_ids: List[str] = []
+            errors: List[Exception] = []
             if ids_for_add:
-                self.add_documents(
-                    documents=docs_for_add,
-                    embeddings=embeds_for_add,
-                    metadatas=metas_for_add,
-                    ids=ids_for_add,
-                )
-                logger.info(
-                    f"RedisDB (redisvl): Processed update for {len(ids_for_add)} documents."
+                try:
+                    self.add_documents(
+                        documents=docs_for_add,
+                        embeddings=embeds_for_add,
+                        metadatas=metas_for_add,
+                        ids=ids_for_add,
+                    )
+                    written_ids.extend(ids_for_add)
+                except PartialWriteError as e:
+                    written_ids.extend(e.written_ids)
+                    failed_ids.extend(e.failed_ids)
+                    errors.extend(e.errors)
+                except Exception as e:
+                    failed_ids.extend(ids_for_add)
+                    errors.append(e)
+
+            for batch in chunked(partial_updates, self.write_batch_size):
+                batch_ids = [record.pop("id") for record in batch]
+                try:
+                    # Check which documents exist, so HSET does not create partial ones
+                    pipeline = self.client.pipeline(transaction=False)
+                    for doc_id in batch_ids:
+                        pipeline.exists(self._key(doc_id))
+                    exists = pipeline.execute()
+
+                    pipeline = self.client.pipeline(transaction=False)
+                    for doc_id, record, found in zip(batch_ids, batch, exists):
+                        if found:
+                            pipeline.hset(self._key(doc_id), mapping=record)
+                        else:
+                            logger.warning(
+                                f"RedisDB (redisvl): Skipping update for ID {doc_id}, the document does not exist."
+                            )
+                    pipeline.execute()
+                    written_ids.extend(
+                        doc_id for doc_id, found in zip(batch_ids, exists) if found
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"RedisDB (redisvl): Failed to update {len(batch_ids)} documents: {e}"
+                    )
+                    failed_ids.extend(batch_ids)
+                    errors.append(e)
+
+            logger.info(
+                f"RedisDB (redisvl): Processed update for {len(written_ids)} documents."
+            )
+            if failed_ids:
+                if not written_ids:
+                    raise errors[0]
+                raise PartialWriteError(
+                    f"RedisDB (redisvl): {len(failed_ids)} of {len(ids)} documents were not updated",
+                    written_ids,
+                    failed_ids,
+                    errors,
                 )
 
+        def iter_documents(
+            self, batch_size: int = 500, include_embeddings: bool = True
+        ) -> Iterator[List[Dict[str, Any]]]:
+            """
+            Iterate over all documents of the index, in batches.
+
+            Keys are listed with SCAN and read with pipelined HGETALLs.
+
+            Args:
+                batch_size: The number of documents per batch.
+                include_embeddings: Unused; documents are read whole.
+
+            Yields:
+                Lists of documents in the format returned by `get`.
+            """
+            if not self.index or not self.client:
+                return
+            prefix = f"{self.index.schema.index_prefix}:"
+            ids = []
+            for key in self.client.scan_iter(match=f"{prefix}*", count=batch_size):
+                if isinstance(key, bytes):
+                    key = key.decode("utf-8")
+                ids.append(key[len(prefix) :])
+                if len(ids) >= batch_size:
+                    yield self.get(ids)
+                    ids = []
+            if ids:
+                yield self.get(ids)
+
         def count(self) -> int:
             if not self.index:
                 return 0
@@ -661,6 +799,32 @@ else:  # Proceed only if redisvl was imported successfully
                         f"RedisDB (redisvl): Fallback clear failed, client or prefix not available."
                     )
 
+        def compact(self, reindex: bool = False) -> bool:
+            """
+            Run the garbage collection of the search index.
+
+            Deleted hashes leave entries in the inverted indexes until the
+            background garbage collection removes them; this runs it now. It
+            uses FT.DEBUG, which some managed Redis services do not allow.
+
+            Args:
+                reindex: Unused.
+
+            Returns:
+                Whether the garbage collection ran.
+            """
+            if not self.client:
+                return False
+            try:
+                self.client.execute_command("FT.DEBUG", "GC_FORCEINVOKE", self.index_name)
+            except Exception as e:
+                logger.warning(
+                    f"RedisDB (redisvl): Cannot run the garbage collection of index '{self.index_name}': {e}"
+                )
+                return False
+            logger.info(f"RedisDB (redisvl): Ran the garbage collection of index '{self.index_name}'.")
+            return True
+
         def __del__(self):
             """
             Close the Redis connection if managed by this instance.
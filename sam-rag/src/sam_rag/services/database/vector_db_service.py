@@ -2,20 +2,49 @@
 Service for vector database operations.
 """
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 
-from sam_rag.services.database.vector_db_base import VectorDBBase
-from sam_rag.services.database.vector_db_implementation import (  # Corrected import path
-    PineconeDB,
-    QdrantDB,
-    RedisLegacyDB,
-    RedisVLDB,
-    PgVectorDB,
-    ChromaDB,
+from sam_rag.services.database.vector_db_base import Embeddings, VectorDBBase
+from sam_rag.services.database.vector_db_implementation import (
+    IMPLEMENTATIONS,
+    load_implementation,
 )
+from sam_rag.services.metrics import get_metrics
+from sam_rag.services.metrics.metrics import VECTOR_DB_DOCUMENTS, VECTOR_DB_DURATION
 
 logger = logging.getLogger(__name__)
 
+# Counts writes to the vector database in this process. Cached retrieval
+# results are tagged with the generation they were computed at and are
+# discarded once it changes.
+_index_generation = 0
+_index_generation_lock = threading.Lock()
+
+
+def get_index_generation() -> int:
+    """
+    Get the current index generation.
+
+    Returns:
+        The number of vector database writes made in this process.
+    """
+    return _index_generation
+
+
+def bump_index_generation() -> int:
+    """
+    Advance the index generation after documents are added, changed or deleted.
+
+    Returns:
+        The new index generation.
+    """
+    global _index_generation
+    with _index_generation_lock:
+        _index_generation += 1
+        return _index_generation
+
+
 class VectorDBService:
     """
     Service for vector database operations.
@@ -33,12 +62,14 @@ class VectorDBService:
             config: A dictionary containing configuration parameters for the vector database.
                 - db_type: The type of vector database to use (default: "chroma").
                 - db_params: The parameters to pass to the vector database.
+                - sharding: Optional sharding configuration, see `ShardedVectorDB`.
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
                 - enabled: Boolean flag to enable/disable hybrid search.
         """
         self.config = config or {}
         self.db_type = self.config.get("db_type", "chroma")
         self.db_params = self.config.get("db_params", {})
+        self.sharding_config = self.config.get("sharding") or {}
 
         self.hybrid_search_config = hybrid_search_config or {}
         self.hybrid_search_enabled = self.hybrid_search_config.get("enabled", False)
@@ -52,41 +83,29 @@ class VectorDBService:
         Returns:
             The vector database instance.
         """
-        # Pass hybrid_search_config to individual DB implementations
-        if self.db_type == "chroma":
-            return ChromaDB(
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
-            )
-        elif self.db_type == "pinecone":
-            return PineconeDB(
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
-            )
-        elif self.db_type == "qdrant":
-            return QdrantDB(
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
-            )
-        elif self.db_type == "redis_legacy":  # Updated
-            return RedisLegacyDB(  # Updated
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
-            )
-        elif self.db_type == "redis_vl":  # Added
-            return RedisVLDB(  # Added
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
-            )
-        elif self.db_type == "pgvector":
-            return PgVectorDB(
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
-            )
-        else:
-            # Default to ChromaDB
-            return ChromaDB(
-                config=self.db_params, hybrid_search_config=self.hybrid_search_config
+        # Only the configured implementation and its client library are imported.
+        # Unknown types default to ChromaDB.
+        db_type = self.db_type if self.db_type in IMPLEMENTATIONS else "chroma"
+        implementation = load_implementation(db_type)
+        if self.sharding_config.get("enabled", False):
+            from sam_rag.services.database.sharding import ShardedVectorDB
+
+            return ShardedVectorDB(
+                db_type,
+                implementation,
+                self.db_params,
+                self.sharding_config,
+                hybrid_search_config=self.hybrid_search_config,
             )
+        # Pass hybrid_search_config to individual DB implementations
+        return implementation(
+            config=self.db_params, hybrid_search_config=self.hybrid_search_config
+        )
 
     def add_documents(
         self,
         documents: List[str],
-        embeddings: List[List[float]],  # These are dense embeddings
+        embeddings: Embeddings,  # These are dense embeddings
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None,
         sparse_vectors: Optional[List[Optional[Dict[int, float]]]] = None,
@@ -96,20 +115,29 @@ class VectorDBService:
 
         Args:
             documents: The documents to add.
-            embeddings: The embeddings of the documents.
+            embeddings: The embeddings of the documents, as a float32 matrix
+                or a list of lists.
             metadatas: Optional metadata for each document.
             ids: Optional IDs for each document.
 
         Returns:
             The IDs of the added documents.
         """
-        return self.db.add_documents(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids,
-            sparse_vectors=sparse_vectors,
-        )
+        metrics = get_metrics()
+        try:
+            with metrics.timer(VECTOR_DB_DURATION, backend=self.db_type, operation="add"):
+                added_ids = self.db.add_documents(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=metadatas,
+                    ids=ids,
+                    sparse_vectors=sparse_vectors,
+                )
+            metrics.count(VECTOR_DB_DOCUMENTS, len(added_ids), backend=self.db_type, operation="add")
+            return added_ids
+        finally:
+            # Bump even on failure, a partial write may have landed
+            bump_index_generation()
 
     def search(
         self,
@@ -135,19 +163,43 @@ class VectorDBService:
             f"[HYBRID_SEARCH_DEBUG] VectorDBService.search called with db_type: {self.db_type}, request_hybrid: {request_hybrid}, has_sparse_vector: {query_sparse_vector is not None and len(query_sparse_vector) > 0 if query_sparse_vector else False}"
         )
 
-        results = self.db.search(
-            query_embedding=query_embedding,
-            top_k=top_k,
-            filter=filter,
-            query_sparse_vector=query_sparse_vector,
-            request_hybrid=request_hybrid,
-        )
+        with get_metrics().timer(VECTOR_DB_DURATION, backend=self.db_type, operation="search"):
+            results = self.db.search(
+                query_embedding=query_embedding,
+                top_k=top_k,
+                filter=filter,
+                query_sparse_vector=query_sparse_vector,
+                request_hybrid=request_hybrid,
+            )
 
         logger.debug(
             f"[HYBRID_SEARCH_DEBUG] VectorDBService.search returned {len(results)} results"
         )
         return results
 
+    def similarity(self, result: Dict[str, Any]) -> Optional[float]:
+        """
+        Get the cosine similarity of a dense search result, higher is better.
+
+        The backends report relevance differently: Qdrant returns a "score",
+        Pinecone a similarity under "distance", and the others a cosine
+        distance.
+
+        Args:
+            result: A result returned by `search`.
+
+        Returns:
+            The similarity, or None if the result has no score.
+        """
+        if result.get("score") is not None:
+            return float(result["score"])
+        distance = result.get("distance")
+        if distance is None:
+            return None
+        if self.db_type == "pinecone":
+            return float(distance)
+        return 1.0 - float(distance)
+
     def delete(self, ids: List[str]) -> None:
         """
         Delete documents from the vector database.
@@ -155,7 +207,13 @@ class VectorDBService:
         Args:
             ids: The IDs of the documents to delete.
         """
-        self.db.delete(ids)
+        metrics = get_metrics()
+        try:
+            with metrics.timer(VECTOR_DB_DURATION, backend=self.db_type, operation="delete"):
+                self.db.delete(ids)
+            metrics.count(VECTOR_DB_DOCUMENTS, len(ids), backend=self.db_type, operation="delete")
+        finally:
+            bump_index_generation()
 
     def get(self, ids: List[str]) -> List[Dict[str, Any]]:
         """
@@ -185,7 +243,13 @@ class VectorDBService:
             embeddings: Optional new embeddings.
             metadatas: Optional new metadata.
         """
-        self.db.update(ids, documents, embeddings, metadatas)
+        metrics = get_metrics()
+        try:
+            with metrics.timer(VECTOR_DB_DURATION, backend=self.db_type, operation="update"):
+                self.db.update(ids, documents, embeddings, metadatas)
+            metrics.count(VECTOR_DB_DOCUMENTS, len(ids), backend=self.db_type, operation="update")
+        finally:
+            bump_index_generation()
 
     def count(self) -> int:
         """
@@ -200,7 +264,24 @@ class VectorDBService:
         """
         Clear all documents from the vector database.
         """
-        self.db.clear()
+        try:
+            self.db.clear()
+        finally:
+            bump_index_generation()
+
+    def compact(self, reindex: bool = False) -> bool:
+        """
+        Reclaim the space of deleted documents, see `VectorDBBase.compact`.
+
+        Args:
+            reindex: Whether indexes are also rebuilt, where the backend
+                supports it.
+
+        Returns:
+            Whether compaction was run or started.
+        """
+        with get_metrics().timer(VECTOR_DB_DURATION, backend=self.db_type, operation="compact"):
+            return self.db.compact(reindex)
 
     def add_file_embeddings(
         self,
@@ -0,0 +1,10 @@
+"""
+Dedupe package for the SAM RAG plugin.
+
+This package contains the near-duplicate chunk detection that runs between
+splitting and embedding, so repeated boilerplate is embedded and stored once.
+"""
+
+from .chunk_dedupe import ChunkDeduplicator, DedupePlan
+
+__all__ = ["ChunkDeduplicator", "DedupePlan"]
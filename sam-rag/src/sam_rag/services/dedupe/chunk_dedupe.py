@@ -0,0 +1,467 @@
+"""
+Near-duplicate chunk detection between splitting and embedding.
+
+Chunks are compared with two checks. The first is an exact hash of the
+normalized text. The second is a MinHash signature of word shingles, looked up
+through locality-sensitive hashing (LSH) bands. Signatures of embedded chunks
+are kept in a local SQLite file, so duplicates are found across the whole
+corpus and across restarts. A duplicate is not embedded; it is linked to the
+vector database id of its canonical chunk instead.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.85
+
+# Mersenne prime used by the MinHash permutations
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    exact_hash TEXT NOT NULL,
+    signature BLOB,
+    document_id TEXT NOT NULL,
+    source TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_chunks_exact ON chunks (exact_hash);
+CREATE INDEX IF NOT EXISTS ix_chunks_source ON chunks (source);
+CREATE INDEX IF NOT EXISTS ix_chunks_document ON chunks (document_id);
+CREATE TABLE IF NOT EXISTS bands (
+    key INTEGER NOT NULL,
+    chunk_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_bands_key ON bands (key);
+CREATE INDEX IF NOT EXISTS ix_bands_chunk ON bands (chunk_id);
+CREATE TABLE IF NOT EXISTS links (
+    exact_hash TEXT NOT NULL,
+    source TEXT,
+    canonical_id INTEGER NOT NULL,
+    similarity REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_links_canonical ON links (canonical_id);
+CREATE INDEX IF NOT EXISTS ix_links_source ON links (source);
+"""
+
+
+class DedupePlan:
+    """
+    The result of checking a batch of chunks for duplicates.
+
+    Attributes:
+        keep: Indices of the chunks to embed, in order.
+        duplicates: One entry per duplicate chunk with its `index`, the
+            `canonical_index` of a kept chunk in the same batch or the
+            `canonical_document_id` of an already stored chunk, the estimated
+            `similarity` and whether the match was `exact`.
+    """
+
+    def __init__(self):
+        self.keep: List[int] = []
+        self.duplicates: List[Dict[str, Any]] = []
+        # (exact hash, signature) of every chunk in the batch
+        self.entries: List[Tuple[str, Optional[np.ndarray]]] = []
+
+
+class ChunkDeduplicator:
+    """
+    Finds exact and near-duplicate chunks against a persistent signature index.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Open (or create) the signature index.
+
+        Args:
+            config: The `dedupe` configuration:
+                - path: SQLite file holding the signatures (default: "rag_dedupe.db").
+                - num_perm: Number of MinHash permutations (default: 128).
+                - bands: Number of LSH bands; must divide num_perm (default: 16).
+                - shingle_size: Words per shingle (default: 3).
+                - threshold: Minimum estimated Jaccard similarity for a near
+                  duplicate (default: 0.85).
+                - min_words: Chunks with fewer words are only checked for exact
+                  duplicates (default: 8).
+        """
+        config = config or {}
+        self.path = config.get("path", "rag_dedupe.db")
+        self.num_perm = int(config.get("num_perm", DEFAULT_NUM_PERM))
+        self.bands = int(config.get("bands", DEFAULT_BANDS))
+        if self.bands <= 0 or self.num_perm % self.bands:
+            raise ValueError(
+                f"dedupe.bands ({self.bands}) must divide dedupe.num_perm ({self.num_perm})"
+            ) from None
+        self.rows_per_band = self.num_perm // self.bands
+        self.shingle_size = max(1, int(config.get("shingle_size", DEFAULT_SHINGLE_SIZE)))
+        self.threshold = float(config.get("threshold", DEFAULT_THRESHOLD))
+        self.min_words = int(config.get("min_words", 8))
+
+        # Fixed permutations, so signatures stay comparable across restarts
+        rng = np.random.default_rng(1)
+        self._perm_a = rng.integers(1, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        self._perm_b = rng.integers(0, 1 << 32, size=self.num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        logger.info(f"Chunk dedupe index opened at {self.path}")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase a chunk and collapse whitespace, so trivial differences do not matter."""
+        return " ".join(text.lower().split())
+
+    def exact_hash(self, text: str) -> str:
+        """Get the hash used for exact duplicate detection."""
+        return hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a chunk's word shingles.
+
+        Args:
+            text: The chunk text.
+
+        Returns:
+            A uint32 array of `num_perm` values, or None if the chunk has
+            fewer than `min_words` words.
+        """
+        words = _WORD_PATTERN.findall(text.lower())
+        if len(words) < max(1, self.min_words):
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (self._perm_a[:, None] * hashes[None, :] + self._perm_b[:, None]) % _PRIME
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """Get the LSH bucket key of every band of a signature."""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows_per_band : (band + 1) * self.rows_per_band]
+            digest = hashlib.blake2b(
+                band.to_bytes(2, "big") + rows.tobytes(), digest_size=8
+            ).digest()
+            keys.append(int.from_bytes(digest, "big", signed=True))
+        return keys
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimate the Jaccard similarity of two chunks from their signatures."""
+        return float(np.mean(first == second))
+
+    def plan(self, texts: List[str]) -> DedupePlan:
+        """
+        Decide which chunks of a batch to embed.
+
+        A chunk is a duplicate if its normalized text matches an earlier chunk
+        of the batch or a stored chunk, or if its estimated similarity to one of
+        them reaches the threshold.
+
+        Args:
+            texts: The chunk texts, in order.
+
+        Returns:
+            The plan with the chunks to keep and the duplicate links.
+        """
+        plan = DedupePlan()
+        batch_exact: Dict[str, int] = {}
+        batch_bands: Dict[int, List[int]] = {}
+
+        with self._lock:
+            for index, text in enumerate(texts):
+                exact_hash = self.exact_hash(text)
+                signature = self.signature(text)
+                plan.entries.append((exact_hash, signature))
+
+                match = self._match_in_batch(
+                    exact_hash, signature, batch_exact, batch_bands, plan
+                ) or self._match_stored(exact_hash, signature)
+                if match:
+                    match["index"] = index
+                    plan.duplicates.append(match)
+                    continue
+
+                plan.keep.append(index)
+                batch_exact.setdefault(exact_hash, index)
+                if signature is not None:
+                    for key in self._band_keys(signature):
+                        batch_bands.setdefault(key, []).append(index)
+
+        if plan.duplicates:
+            logger.info(
+                f"Dedupe: {len(plan.duplicates)} of {len(texts)} chunks are duplicates"
+            )
+        return plan
+
+    def _match_in_batch(
+        self,
+        exact_hash: str,
+        signature: Optional[np.ndarray],
+        batch_exact: Dict[str, int],
+        batch_bands: Dict[int, List[int]],
+        plan: DedupePlan,
+    ) -> Optional[Dict[str, Any]]:
+        """Find a kept chunk of the same batch that this chunk duplicates."""
+        if exact_hash in batch_exact:
+            return {"canonical_index": batch_exact[exact_hash], "similarity": 1.0, "exact": True}
+        if signature is None:
+            return None
+        best = None
+        for key in self._band_keys(signature):
+            for candidate in batch_bands.get(key, ()):
+                similarity = self.similarity(signature, plan.entries[candidate][1])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+        if best:
+            return {"canonical_index": best[0], "similarity": best[1], "exact": False}
+        return None
+
+    def _match_stored(
+        self, exact_hash: str, signature: Optional[np.ndarray]
+    ) -> Optional[Dict[str, Any]]:
+        """Find a stored chunk that this chunk duplicates."""
+        row = self._conn.execute(
+            "SELECT id, document_id FROM chunks WHERE exact_hash = ? LIMIT 1", (exact_hash,)
+        ).fetchone()
+        if row:
+            return {
+                "canonical_id": row["id"],
+                "canonical_document_id": row["document_id"],
+                "similarity": 1.0,
+                "exact": True,
+            }
+        if signature is None:
+            return None
+
+        keys = self._band_keys(signature)
+        placeholders = ",".join("?" * len(keys))
+        rows = self._conn.execute(
+            f"SELECT DISTINCT c.id, c.document_id, c.signature FROM bands b "
+            f"JOIN chunks c ON c.id = b.chunk_id WHERE b.key IN ({placeholders})",
+            keys,
+        ).fetchall()
+        best = None
+        for row in rows:
+            similarity = self.similarity(
+                signature, np.frombuffer(row["signature"], dtype=np.uint32)
+            )
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (row, similarity)
+        if best:
+            return {
+                "canonical_id": best[0]["id"],
+                "canonical_document_id": best[0]["document_id"],
+                "similarity": best[1],
+                "exact": False,
+            }
+        return None
+
+    def record(
+        self,
+        plan: DedupePlan,
+        document_ids: List[str],
+        sources: Optional[List[Optional[str]]] = None,
+    ) -> None:
+        """
+        Store the kept chunks and the duplicate links after ingestion succeeded.
+
+        Args:
+            plan: The plan returned by `plan`.
+            document_ids: The vector database ids of the kept chunks, aligned
+                with `plan.keep`.
+            sources: Optional source (file path) of every chunk in the batch.
+        """
+        if len(document_ids) != len(plan.keep):
+            logger.warning(
+                f"Dedupe: got {len(document_ids)} document ids for {len(plan.keep)} kept chunks; "
+                "not recording the batch"
+            )
+            return
+
+        sources = sources or [None] * len(plan.entries)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                chunk_ids: Dict[int, int] = {}
+                for index, document_id in zip(plan.keep, document_ids):
+                    exact_hash, signature = plan.entries[index]
+                    cursor = self._conn.execute(
+                        "INSERT INTO chunks (exact_hash, signature, document_id, source, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            exact_hash,
+                            signature.tobytes() if signature is not None else None,
+                            str(document_id),
+                            sources[index],
+                            now,
+                        ),
+                    )
+                    chunk_ids[index] = cursor.lastrowid
+                    if signature is not None:
+                        self._conn.executemany(
+                            "INSERT INTO bands (key, chunk_id) VALUES (?, ?)",
+                            [(key, cursor.lastrowid) for key in self._band_keys(signature)],
+                        )
+
+                for duplicate in plan.duplicates:
+                    canonical_id = duplicate.get("canonical_id")
+                    if canonical_id is None:
+                        canonical_id = chunk_ids.get(duplicate.get("canonical_index"))
+                    if canonical_id is None:
+                        continue
+                    self._conn.execute(
+                        "INSERT INTO links (exact_hash, source, canonical_id, similarity, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            plan.entries[duplicate["index"]][0],
+                            sources[duplicate["index"]],
+                            canonical_id,
+                            duplicate["similarity"],
+                            now,
+                        ),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def linked_sources(self, document_id: str) -> List[str]:
+        """
+        Get the sources whose duplicate chunks are linked to a stored chunk.
+
+        Args:
+            document_id: The vector database id of the canonical chunk.
+
+        Returns:
+            The distinct sources of the linked duplicates.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT l.source FROM links l JOIN chunks c ON c.id = l.canonical_id "
+                "WHERE c.document_id = ? AND l.source IS NOT NULL",
+                (str(document_id),),
+            ).fetchall()
+        return [row["source"] for row in rows]
+
+    def forget_source(self, source: str) -> int:
+        """
+        Remove the chunks and links of a source, e.g. after its vectors were deleted.
+
+        Duplicates that were linked to the removed chunks are not embedded
+        again until their own source is re-ingested.
+
+        Args:
+            source: The source (file path) to forget.
+
+        Returns:
+            The number of chunks removed.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [
+                    row["id"]
+                    for row in self._conn.execute(
+                        "SELECT id FROM chunks WHERE source = ?", (source,)
+                    ).fetchall()
+                ]
+                for start in range(0, len(ids), 500):
+                    batch = ids[start : start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    self._conn.execute(f"DELETE FROM bands WHERE chunk_id IN ({placeholders})", batch)
+                    self._conn.execute(f"DELETE FROM links WHERE canonical_id IN ({placeholders})", batch)
+                    self._conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+                self._conn.execute("DELETE FROM links WHERE source = ?", (source,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(ids)
+
+    def forget_documents(self, document_ids: List[str]) -> int:
+        """
+        Remove the chunks of deleted vector database documents and their links.
+
+        Args:
+            document_ids: The vector database ids of the deleted chunks.
+
+        Returns:
+            The number of chunks removed.
+        """
+        document_ids = [str(document_id) for document_id in document_ids]
+        removed = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for start in range(0, len(document_ids), 500):
+                    batch = document_ids[start : start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    ids = [
+                        row["id"]
+                        for row in self._conn.execute(
+                            f"SELECT id FROM chunks WHERE document_id IN ({placeholders})", batch
+                        ).fetchall()
+                    ]
+                    if not ids:
+                        continue
+                    placeholders = ",".join("?" * len(ids))
+                    self._conn.execute(f"DELETE FROM bands WHERE chunk_id IN ({placeholders})", ids)
+                    self._conn.execute(f"DELETE FROM links WHERE canonical_id IN ({placeholders})", ids)
+                    self._conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", ids)
+                    removed += len(ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    def clear(self) -> None:
+        """Remove all signatures and links, e.g. after the vector database was cleared."""
+        with self._lock:
+            self._conn.executescript("DELETE FROM bands; DELETE FROM links; DELETE FROM chunks;")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the size of the index.
+
+        Returns:
+            The number of stored chunks and duplicate links.
+        """
+        with self._lock:
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            links = self._conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        return {"chunks": chunks, "duplicates": links}
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            self._conn.close()
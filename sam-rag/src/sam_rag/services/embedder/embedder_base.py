@@ -2,10 +2,17 @@
 Base class for embedders.
 """
 
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+# Dimensions learned from embedding responses, shared by the embedders of the
+# same model in this process
+_dimension_cache: Dict[str, int] = {}
+
 
 class EmbedderBase(ABC):
     """
@@ -58,6 +65,40 @@ class EmbedderBase(ABC):
 
         return embeddings
 
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed multiple text strings into one float32 matrix.
+
+        Embedders that can fill the matrix straight from the provider response
+        override this to avoid building lists of Python floats.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A C-contiguous float32 array with one row per text.
+        """
+        embeddings = self.embed_texts(texts)
+        if not embeddings:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def normalize_rows(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Normalize every row of an embedding matrix to unit length, in place.
+
+        Args:
+            embeddings: A float array with one embedding per row.
+
+        Returns:
+            The same array, normalized. All-zero rows are left unchanged.
+        """
+        if embeddings.size:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            embeddings /= norms
+        return embeddings
+
     def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Embed a batch of text strings.
@@ -71,19 +112,53 @@ class EmbedderBase(ABC):
         # Default implementation: embed each text individually
         return [self.embed_text(text) for text in texts]
 
+    def _dimension_cache_key(self) -> Optional[str]:
+        """
+        Get the key under which the learned dimension is shared in this process.
+
+        Returns:
+            The key, or None if the dimension should not be shared.
+        """
+        return None
+
+    def remember_dimension(self, dimension: int) -> None:
+        """
+        Record the dimension seen in an embedding response.
+
+        Args:
+            dimension: The number of components of the embeddings.
+        """
+        if self.embedding_dimension is None:
+            self.embedding_dimension = dimension
+        key = self._dimension_cache_key()
+        if key is not None:
+            _dimension_cache[key] = dimension
+
     def get_embedding_dimension(self) -> int:
         """
         Get the dimension of the embeddings produced by this embedder.
 
+        The dimension comes from the configuration, or from an earlier response
+        for the same model. Only if neither is known is a sample text embedded.
+
         Returns:
             The dimension of the embeddings.
         """
         if self.embedding_dimension is not None:
             return self.embedding_dimension
 
-        # If the dimension is not specified, embed a sample text to determine it
+        key = self._dimension_cache_key()
+        if key is not None and key in _dimension_cache:
+            self.embedding_dimension = _dimension_cache[key]
+            return self.embedding_dimension
+
+        # If the dimension is not known, embed a sample text to determine it
+        logger.warning(
+            "Embedding dimension is not configured; embedding a sample text to detect it. "
+            "Set embedding_dimension to avoid this call."
+        )
         sample_embedding = self.embed_text("Sample text for dimension detection")
-        self.embedding_dimension = len(sample_embedding)
+        self.remember_dimension(len(sample_embedding))
         return self.embedding_dimension
 
     def normalize_embedding(self, embedding: List[float]) -> List[float]:
@@ -111,6 +186,26 @@ class EmbedderBase(ABC):
         # Convert back to list
         return normalized_embedding.tolist()
 
+    def truncate_embedding(self, embedding: List[float], dimension: int) -> List[float]:
+        """
+        Truncate an embedding to its first components and re-normalize it.
+
+        Models trained with Matryoshka representation learning keep most of
+        their quality in the leading dimensions, so a shorter prefix can be
+        stored instead of the full vector.
+
+        Args:
+            embedding: The embedding to truncate.
+            dimension: The number of leading components to keep.
+
+        Returns:
+            The truncated, unit-length embedding, or the embedding unchanged if
+            it is not longer than the dimension.
+        """
+        if not dimension or len(embedding) <= dimension:
+            return embedding
+        return self.normalize_embedding(embedding[:dimension])
+
     def normalize_embeddings(self, embeddings: List[List[float]]) -> List[List[float]]:
         """
         Normalize multiple embeddings to unit length.
@@ -1,32 +1,73 @@
 import logging
-from sklearn.feature_extraction.text import TfidfVectorizer
-from nltk.corpus import stopwords
 from typing import Dict, Any, List, Optional, Callable
-import nltk
 import re
 import string  # For punctuation removal
 
 logger = logging.getLogger(__name__)
 
-# Ensure NLTK stopwords are available during module load or first use.
-# This is a common pattern but can be moved to __init__ if preferred for explicitness.
-try:
-    stopwords.words("english")  # Check for default language stopwords
-except LookupError:
-    nltk.download("stopwords")
 """
 Service for embedding text chunks into vector representations.
 """
 
 from typing import Dict, Any, List, Tuple, Optional
 import random  # For potential future use or more complex placeholders
+import threading
+import time
 import numpy as np
 
 from sam_rag.services.embedder.embedder_base import EmbedderBase
+from sam_rag.services.embedder.sparse_model_store import SparseModelStore
+from sam_rag.services.embedder.stopwords import load_stopwords
 
+from sam_rag.services.embedder.hashing_embedder import HashingEmbedder
 from sam_rag.services.embedder.litellm_embedder import LiteLLMEmbedder
 
 
+# Sample corpus of diverse vocabulary, used until a real corpus is fitted
+SAMPLE_CORPUS = [
+    "This is a sample document for TF-IDF model fitting and testing purposes.",
+    "The quick brown fox jumps over the lazy dog in the forest.",
+    "Machine learning and natural language processing are fascinating fields of study.",
+    "Vector databases store and retrieve high-dimensional vectors efficiently for search.",
+    "Hybrid search combines dense and sparse vector representations for better results.",
+    "Embeddings capture semantic meaning of text in high-dimensional vector space.",
+    "Information retrieval systems help find relevant documents from large collections.",
+    "Document similarity can be measured using cosine distance and other metrics.",
+    "Query expansion improves search results by adding related terms and synonyms.",
+    "Sparse vectors represent text using term frequency and statistical methods.",
+    "Dense vectors capture contextual relationships between words and phrases.",
+    "Tokenization splits text into meaningful units for further processing and analysis.",
+    "Stop words are common words that are filtered out during text processing steps.",
+    "Stemming reduces words to their root form for better matching and retrieval.",
+    "TF-IDF weighs terms based on their frequency in documents and entire corpus.",
+    "Data science involves analyzing large datasets to extract meaningful insights.",
+    "Artificial intelligence systems can process and understand human language effectively.",
+    "Search engines use complex algorithms to rank and retrieve relevant web pages.",
+    "Text preprocessing includes cleaning, normalization, and feature extraction steps.",
+    "Knowledge graphs represent relationships between entities in structured format.",
+    "Recommendation systems suggest relevant items based on user preferences and behavior.",
+    "Classification algorithms categorize documents into predefined classes or categories.",
+    "Clustering techniques group similar documents together without predefined labels.",
+    "Feature engineering creates meaningful representations from raw text data.",
+    "Model evaluation measures performance using metrics like precision, recall, and accuracy.",
+    "Cross-validation techniques ensure robust model performance across different datasets.",
+    "Hyperparameter tuning optimizes model configuration for better performance results.",
+    "Deep learning models can learn complex patterns from large amounts of data.",
+    "Neural networks consist of interconnected layers that process information sequentially.",
+    "Transformer architectures have revolutionized natural language understanding tasks.",
+    "Attention mechanisms help models focus on relevant parts of input sequences.",
+    "Pre-trained models can be fine-tuned for specific downstream tasks and applications.",
+    "Transfer learning leverages knowledge from one domain to improve performance in another.",
+    "Evaluation metrics help assess model quality and compare different approaches.",
+    "Data augmentation techniques increase training data diversity and model robustness.",
+    "Regularization methods prevent overfitting and improve model generalization capabilities.",
+    "Ensemble methods combine multiple models to achieve better predictive performance.",
+    "Feature selection identifies most relevant attributes for model training and inference.",
+    "Dimensionality reduction techniques compress high-dimensional data while preserving information.",
+    "Semantic search understands query intent and meaning rather than just keyword matching.",
+]
+
+
 class EmbedderService:
     """
     Service for embedding text chunks into vector representations.
@@ -36,20 +77,29 @@ class EmbedderService:
         self,
         config: Dict[str, Any] = None,
         hybrid_search_config: Optional[Dict[str, Any]] = None,
+        embedding_dimension: Optional[int] = None,
     ):
         """
         Initialize the embedder service.
 
+        Nothing is fitted or called here: the sparse model is loaded or fitted
+        on first use, and the embedding dimension is taken from the
+        configuration instead of being probed.
+
         Args:
             config: A dictionary containing configuration parameters for the embedder.
                 - embedder_type: The type of embedder to use (default: "openai").
                 - embedder_params: The parameters to pass to the embedder.
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
                 - enabled: Boolean flag to enable/disable hybrid search.
+            embedding_dimension: Dimension to use when embedder_params does not
+                set one, usually the dimension configured for the vector database.
         """
         self.config = config or {}
         self.embedder_type = self.config.get("embedder_type", "openai")
-        self.embedder_params = self.config.get("embedder_params", {})
+        self.embedder_params = dict(self.config.get("embedder_params", {}) or {})
+        if embedding_dimension and not self.embedder_params.get("embedding_dimension"):
+            self.embedder_params["embedding_dimension"] = embedding_dimension
         self.normalize = self.config.get("normalize_embeddings", True)
 
         _hybrid_search_config = hybrid_search_config or {}
@@ -64,6 +114,20 @@ class EmbedderService:
         self.tokenizer_options = {}
         self._stop_words_set = None  # For caching stopwords
         self._sample_corpus_fitted = False  # Track if we've fitted a sample corpus
+        # Combined with the actual corpus on refit, even if it was never fitted alone
+        self._sample_corpus_texts = list(SAMPLE_CORPUS)
+
+        # Shared, versioned copy of the fitted sparse model
+        self.sparse_model_store = None
+        self.sparse_model_version = None
+        self._sparse_check_interval = 5.0
+        self._sparse_next_check = 0.0
+        self._sparse_lock = threading.Lock()
+        # The vectorizer in use and its published version, replaced as one
+        # tuple so a concurrent reload never mixes two versions
+        self._sparse_model: Tuple[Any, Optional[str]] = (None, None)
+        # Set once ingestion has fitted or loaded a model of the real corpus
+        self._corpus_model_ready = False
 
         if self.hybrid_search_enabled:
             # Load sparse_model_config from the main 'embedding' config section,
@@ -91,27 +155,9 @@ class EmbedderService:
             self.tokenizer_options = {**default_tokenizer_opts, **config_tokenizer_opts}
 
             if self.tokenizer_options.get("remove_stopwords"):
-                try:
-                    self._stop_words_set = set(
-                        stopwords.words(
-                            self.tokenizer_options.get("stopword_language", "english")
-                        )
-                    )
-                except LookupError:
-                    logger.warning(
-                        f"NLTK stopwords for '{self.tokenizer_options.get('stopword_language', 'english')}' not found. Downloading..."
-                    )
-                    nltk.download("stopwords")
-                    self._stop_words_set = set(
-                        stopwords.words(
-                            self.tokenizer_options.get("stopword_language", "english")
-                        )
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Error loading NLTK stopwords: {e}. Stopword removal will be skipped."
-                    )
-                    self._stop_words_set = set()
+                self._stop_words_set = load_stopwords(
+                    self.tokenizer_options.get("stopword_language", "english")
+                )
 
             logger.info(
                 f"Hybrid search enabled. Sparse model type: '{self.sparse_model_type}'. "
@@ -121,6 +167,16 @@ class EmbedderService:
                 logger.warning(
                     f"Sparse model type '{self.sparse_model_type}' is configured, but only 'tfidf' is currently implemented for sparse vector generation."
                 )
+
+            artifact_config = self.sparse_model_config.get("artifact", {}) or {}
+            artifact_path = artifact_config.get("path", "rag_sparse_model")
+            if artifact_path:
+                self.sparse_model_store = SparseModelStore(
+                    artifact_path, keep_versions=artifact_config.get("keep_versions", 3)
+                )
+                self._sparse_check_interval = float(
+                    artifact_config.get("check_interval", 5)
+                )
         else:
             logger.info(
                 "Hybrid search disabled. Sparse model components will not be actively used."
@@ -128,14 +184,6 @@ class EmbedderService:
 
         self.embedder = self._create_embedder()  # For dense embeddings
 
-        # If hybrid search is enabled, fit the sparse model with a sample corpus
-        if (
-            self.hybrid_search_enabled
-            and self.sparse_model_type == "tfidf"
-            and not self._sample_corpus_fitted
-        ):
-            self._fit_sample_corpus()
-
     def _create_embedder(self) -> EmbedderBase:
         """
         Create the appropriate embedder based on the configuration.
@@ -169,6 +217,9 @@ class EmbedderService:
         elif self.embedder_type == "litellm":
             # Direct use of LiteLLM embedder
             return LiteLLMEmbedder(self.embedder_params)
+        elif self.embedder_type == "hashing":
+            # Deterministic offline embeddings, for benchmarks and development
+            return HashingEmbedder(self.embedder_params)
         else:
             raise ValueError(
                 f"Unsupported embedder type: {self.embedder_type}"
@@ -256,8 +307,12 @@ class EmbedderService:
 
     def refit_sparse_model_with_corpus(self, corpus_texts: List[str]) -> None:
         """
-        Refits the sparse model with actual corpus documents.
-        This should be called after document ingestion to improve sparse vector quality.
+        Refits the sparse model with actual corpus documents and publishes it.
+
+        A refit changes the vocabulary indices, so sparse vectors stored with
+        an earlier `sparse_model_version` no longer match queries until they
+        are re-embedded, see `sam_rag.services.embedder.sparse_refit`. The
+        ingestion pipeline therefore only calls `fit_sparse_model_once`.
 
         Args:
             corpus_texts: List of actual document texts from the ingested corpus
@@ -288,7 +343,81 @@ class EmbedderService:
         self.fit_sparse_model(combined_corpus)
         logger.info("TF-IDF model successfully refitted with actual corpus documents.")
 
-    def fit_sparse_model(self, corpus_texts: List[str]) -> None:
+    def fit_sparse_model_once(self, corpus_texts: List[str]) -> bool:
+        """
+        Fit the sparse model on the first chunks ingested, unless a model exists.
+
+        Stored sparse vectors only match queries vectorized with the same
+        vocabulary, so ingestion fits the model once and afterwards only
+        loads the published version. When a model was already published it
+        is loaded instead. Of several instances fitting at the same time,
+        the first to publish wins and the others load its version.
+
+        Args:
+            corpus_texts: The texts of the first chunks to ingest; combined
+                with the sample corpus.
+
+        Returns:
+            True once a model of the corpus is in use, whether it was fitted
+            now or earlier or loaded from the store.
+        """
+        if self._corpus_model_ready:
+            return True
+        if not self.hybrid_search_enabled or self.sparse_model_type != "tfidf":
+            return False
+        if not corpus_texts:
+            return False
+
+        with self._sparse_lock:
+            if self._corpus_model_ready:
+                return True
+            if self.sparse_model_store is not None:
+                version = self.sparse_model_store.current_version()
+                if version:
+                    if version != self.sparse_model_version:
+                        self._load_sparse_model(version)
+                    self._corpus_model_ready = True
+                    return True
+
+            logger.info(
+                f"No sparse model published yet, fitting one on {len(corpus_texts)} chunks"
+            )
+            self.fit_sparse_model(
+                list(corpus_texts) + self._sample_corpus_texts, publish=False
+            )
+            if self.tfidf_vectorizer is None:
+                return False
+            if self.sparse_model_store is not None:
+                try:
+                    version = self.sparse_model_store.publish(
+                        self.tfidf_vocabulary_,
+                        self.tfidf_idf_,
+                        self._sparse_model_params(),
+                        replace=False,
+                    )
+                    if version is None:
+                        # Another instance published first; use its vocabulary
+                        self._load_sparse_model(self.sparse_model_store.current_version())
+                    else:
+                        self._set_sparse_model(self.tfidf_vectorizer, version)
+                except Exception as e:
+                    logger.error(f"Error publishing the TF-IDF model: {e}", exc_info=True)
+                    return False
+            self._corpus_model_ready = True
+            return True
+
+    def sparse_model(self) -> Tuple[Any, Optional[str]]:
+        """
+        Get the sparse model to vectorize with, loading a newer version if needed.
+
+        Returns:
+            The fitted TF-IDF vectorizer, or None if there is none, and its
+            published version, or None if it was not published.
+        """
+        self._ensure_sparse_model()
+        return self._sparse_model
+
+    def fit_sparse_model(self, corpus_texts: List[str], publish: bool = True) -> None:
         """
         Fits the sparse model (e.g., TfidfVectorizer) on the provided corpus texts.
         This method should be called once during the ingestion pipeline setup
@@ -297,6 +426,8 @@ class EmbedderService:
         Args:
             corpus_texts: A list of text strings representing the entire corpus
                           (or a representative sample) to fit the model on.
+            publish: Whether to publish the fitted model to the shared store,
+                     so retrievers vectorize queries with the same vocabulary.
         """
         logger.debug(
             f"[HYBRID_SEARCH_DEBUG] fit_sparse_model called with hybrid_search_enabled={self.hybrid_search_enabled}, sparse_model_type={self.sparse_model_type}"
@@ -319,6 +450,8 @@ class EmbedderService:
                     f"[HYBRID_SEARCH_DEBUG] Sample corpus texts (first 3): {corpus_texts[:3] if len(corpus_texts) >= 3 else corpus_texts}"
                 )
 
+                from sklearn.feature_extraction.text import TfidfVectorizer
+
                 custom_tokenizer = self._create_tokenizer()
 
                 # Adjust parameters based on corpus size to avoid min_df/max_df conflicts
@@ -344,7 +477,7 @@ class EmbedderService:
                     min_df_param = 2
                     max_df_param = 0.95
 
-                self.tfidf_vectorizer = TfidfVectorizer(
+                tfidf_vectorizer = TfidfVectorizer(
                     tokenizer=custom_tokenizer,
                     max_df=max_df_param,
                     min_df=min_df_param,
@@ -355,12 +488,13 @@ class EmbedderService:
                     sublinear_tf=True,  # Better for sparse vectors
                 )
 
-                self.tfidf_vectorizer.fit(corpus_texts)
-                self.tfidf_vocabulary_ = self.tfidf_vectorizer.vocabulary_
-                self.tfidf_idf_ = self.tfidf_vectorizer.idf_
+                tfidf_vectorizer.fit(corpus_texts)
+                self._set_sparse_model(tfidf_vectorizer, None)
                 logger.info(
                     f"TF-IDF model fitted successfully. Vocabulary size: {len(self.tfidf_vocabulary_)}"
                 )
+                if publish and self.sparse_model_store is not None:
+                    self._publish_sparse_model()
                 logger.debug(
                     f"[HYBRID_SEARCH_DEBUG] TF-IDF parameters: min_df={min_df_param}, max_df={max_df_param}, max_features=50000"
                 )
@@ -369,21 +503,115 @@ class EmbedderService:
                 )
             except Exception as e:
                 logger.error(f"Error fitting TF-IDF model: {e}", exc_info=True)
-                self.tfidf_vectorizer = None
-                self.tfidf_vocabulary_ = None
-                self.tfidf_idf_ = None
+                self._set_sparse_model(None, None)
         else:
             logger.warning(
                 f"Sparse model type '{self.sparse_model_type}' is configured, "
                 "but no fitting logic is implemented for it. Skipping fitting."
             )
 
-    def embed_text(self, text: str) -> Dict[str, Any]:
+    def _sparse_model_params(self) -> Dict[str, Any]:
+        """Get the parameters needed to rebuild the TF-IDF vectorizer from its vocabulary."""
+        return {
+            "type": "tfidf",
+            "ngram_range": list(self.tfidf_vectorizer.ngram_range),
+            "use_idf": self.tfidf_vectorizer.use_idf,
+            "smooth_idf": self.tfidf_vectorizer.smooth_idf,
+            "sublinear_tf": self.tfidf_vectorizer.sublinear_tf,
+            "tokenizer_options": self.tokenizer_options,
+        }
+
+    def _set_sparse_model(self, tfidf_vectorizer, version: Optional[str]) -> None:
+        """Make a TF-IDF vectorizer and its published version the sparse model in use."""
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.tfidf_vocabulary_ = tfidf_vectorizer.vocabulary_ if tfidf_vectorizer else None
+        self.tfidf_idf_ = tfidf_vectorizer.idf_ if tfidf_vectorizer else None
+        self.sparse_model_version = version
+        self._sparse_model = (tfidf_vectorizer, version)
+
+    def _publish_sparse_model(self) -> None:
+        """Publish the fitted TF-IDF model as a new version of the shared store."""
+        try:
+            version = self.sparse_model_store.publish(
+                self.tfidf_vocabulary_, self.tfidf_idf_, self._sparse_model_params()
+            )
+            self._set_sparse_model(self.tfidf_vectorizer, version)
+        except Exception as e:
+            logger.error(f"Error publishing the TF-IDF model: {e}", exc_info=True)
+
+    def _ensure_sparse_model(self) -> None:
+        """
+        Make sure a sparse model is available before vectorizing.
+
+        The current version of the shared model is loaded if it changed; the
+        store is checked at most once per `check_interval` seconds. When no
+        model was fitted or published yet, the sample corpus is fitted instead.
+        """
+        if self.sparse_model_type != "tfidf":
+            return
+        if self.sparse_model_store is None:
+            if self.tfidf_vectorizer is None and not self._sample_corpus_fitted:
+                with self._sparse_lock:
+                    if self.tfidf_vectorizer is None and not self._sample_corpus_fitted:
+                        self._fit_sample_corpus()
+            return
+        now = time.monotonic()
+        if now < self._sparse_next_check:
+            return
+
+        with self._sparse_lock:
+            if now < self._sparse_next_check:
+                return
+            self._sparse_next_check = now + self._sparse_check_interval
+            try:
+                version = self.sparse_model_store.current_version()
+                if version and version != self.sparse_model_version:
+                    self._load_sparse_model(version)
+            except Exception as e:
+                logger.error(f"Error loading the shared TF-IDF model: {e}", exc_info=True)
+
+            if self.tfidf_vectorizer is None and not self._sample_corpus_fitted:
+                self._fit_sample_corpus()
+
+    def _load_sparse_model(self, version: str) -> None:
+        """
+        Replace the TF-IDF vectorizer with a published version.
+
+        Args:
+            version: The version to load.
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vocabulary, idf, params = self.sparse_model_store.load(version)
+        if params.get("tokenizer_options") != self.tokenizer_options:
+            logger.warning(
+                f"Sparse model version {version} was fitted with different tokenizer options; "
+                "sparse vectors of queries and documents may not match."
+            )
+
+        tfidf_vectorizer = TfidfVectorizer(
+            tokenizer=self._create_tokenizer(),
+            vocabulary=vocabulary,
+            ngram_range=tuple(params.get("ngram_range", (1, 2))),
+            use_idf=params.get("use_idf", True),
+            smooth_idf=params.get("smooth_idf", True),
+            sublinear_tf=params.get("sublinear_tf", True),
+        )
+        tfidf_vectorizer.idf_ = idf
+
+        self._set_sparse_model(tfidf_vectorizer, version)
+        logger.info(
+            f"Loaded sparse model version {version}. Vocabulary size: {len(vocabulary)}"
+        )
+
+    def embed_text(self, text: str, include_sparse: bool = True) -> Dict[str, Any]:
         """
         Embed a single text string, generating both dense and sparse (if enabled) vectors.
 
         Args:
             text: The text to embed.
+            include_sparse: Whether the sparse vector is generated when hybrid
+                search is enabled; without it, "sparse_vector" is None.
 
         Returns:
             A dictionary containing the dense vector and optionally a sparse vector.
@@ -446,17 +674,18 @@ class EmbedderService:
         sparse_vector_dict = {}  # Default to empty dict for sparse if hybrid is on
         # Will be populated if successful, or remains {} if not/error
 
-        if self.hybrid_search_enabled:
+        if self.hybrid_search_enabled and include_sparse:
             if self.sparse_model_type == "tfidf":
+                tfidf_vectorizer, _ = self.sparse_model()
                 if (
-                    self.tfidf_vectorizer
-                    and hasattr(self.tfidf_vectorizer, "vocabulary_")
-                    and self.tfidf_vectorizer.vocabulary_
+                    tfidf_vectorizer
+                    and hasattr(tfidf_vectorizer, "vocabulary_")
+                    and tfidf_vectorizer.vocabulary_
                 ):
                     try:
                         # The TfidfVectorizer's tokenizer (our custom_tokenizer) will be applied.
                         # transform expects an iterable of documents.
-                        vector_transformed = self.tfidf_vectorizer.transform([text])
+                        vector_transformed = tfidf_vectorizer.transform([text])
 
                         # Convert the sparse matrix row to {index: value} format
                         # vector_transformed is a csr_matrix of shape (1, num_features)
@@ -488,9 +717,9 @@ class EmbedderService:
                             )
 
                             # Map indices back to actual terms for better understanding
-                            if self.tfidf_vocabulary_:
+                            if tfidf_vectorizer.vocabulary_:
                                 reverse_vocab = {
-                                    v: k for k, v in self.tfidf_vocabulary_.items()
+                                    v: k for k, v in tfidf_vectorizer.vocabulary_.items()
                                 }
                                 term_scores = {}
                                 for idx, score in sparse_vector_dict.items():
@@ -518,10 +747,10 @@ class EmbedderService:
                             )
 
                             # Analyze why sparse vector is empty
-                            if self.tfidf_vocabulary_:
+                            if tfidf_vectorizer.vocabulary_:
                                 custom_tokenizer = self._create_tokenizer()
                                 query_tokens = custom_tokenizer(text)
-                                vocab_tokens = set(self.tfidf_vocabulary_.keys())
+                                vocab_tokens = set(tfidf_vectorizer.vocabulary_.keys())
                                 matching_tokens = [
                                     token
                                     for token in query_tokens
@@ -560,11 +789,45 @@ class EmbedderService:
                     "is not 'tfidf' or not implemented for generation. Returning empty sparse vector."
                 )
                 # sparse_vector_dict remains {}
-        else:  # Hybrid search not enabled
+        else:  # Hybrid search not enabled or sparse vector not requested
             sparse_vector_dict = None  # Explicitly None if hybrid search is off
 
         return {"dense_vector": dense_vector, "sparse_vector": sparse_vector_dict}
 
+    def embed_sparse_text(self, text: str) -> Optional[Dict[int, float]]:
+        """
+        Generate only the sparse vector of a text, e.g. for a query whose dense
+        vector is already known.
+
+        Args:
+            text: The text to vectorize.
+
+        Returns:
+            The {term index: weight} dictionary, or None if hybrid search is disabled.
+        """
+        if not self.hybrid_search_enabled:
+            return None
+        sparse_vectors, _ = self._sparse_vectors_batch([text or ""])
+        return sparse_vectors[0]
+
+    def embed_sparse_texts(
+        self, texts: List[str]
+    ) -> Tuple[List[Dict[int, float]], Optional[str]]:
+        """
+        Generate only the sparse vectors of a batch of texts, e.g. to re-embed
+        stored chunks after a refit.
+
+        Args:
+            texts: The texts to vectorize.
+
+        Returns:
+            One {term index: weight} dictionary per text, and the model
+            version used, or None if the model was not published.
+        """
+        if not self.hybrid_search_enabled:
+            return [{} for _ in texts], None
+        return self._sparse_vectors_batch(texts)
+
     def embed_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
         """
         Embed multiple text strings.
@@ -585,6 +848,87 @@ class EmbedderService:
             results.append(self.embed_text(text_content))
         return results
 
+    def embed_texts_batch(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Embed multiple text strings as one batch for ingestion.
+
+        Dense embeddings stay in a single float32 matrix from the provider
+        response to the vector database write, and sparse vectors are computed
+        with one TF-IDF transform for the whole batch. Errors are raised
+        instead of being replaced by zero vectors.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A dictionary containing:
+            - dense_vectors: A C-contiguous float32 array with one row per text.
+            - sparse_vectors: A list with one sparse vector per text if hybrid
+              search is enabled, otherwise None.
+            - sparse_model_version: The published sparse model version the
+              sparse vectors were computed with, or None.
+        """
+        dense_vectors = self.embedder.embed_texts_array(texts)
+        if self.normalize:
+            self.embedder.normalize_rows(dense_vectors)
+
+        sparse_vectors = None
+        sparse_model_version = None
+        if self.hybrid_search_enabled:
+            sparse_vectors, sparse_model_version = self._sparse_vectors_batch(texts)
+
+        return {
+            "dense_vectors": dense_vectors,
+            "sparse_vectors": sparse_vectors,
+            "sparse_model_version": sparse_model_version,
+        }
+
+    def _sparse_vectors_batch(
+        self, texts: List[str]
+    ) -> Tuple[List[Dict[int, float]], Optional[str]]:
+        """
+        Generate TF-IDF sparse vectors for a batch of texts.
+
+        Args:
+            texts: The texts to vectorize.
+
+        Returns:
+            One {term index: weight} dictionary per text, empty if the model
+            is not fitted or no terms matched, and the model version used.
+        """
+        empty = [{} for _ in texts]
+        if self.sparse_model_type != "tfidf" or not texts:
+            return empty, None
+        tfidf_vectorizer, version = self.sparse_model()
+        if not (
+            tfidf_vectorizer
+            and hasattr(tfidf_vectorizer, "vocabulary_")
+            and tfidf_vectorizer.vocabulary_
+        ):
+            logger.warning(
+                "TF-IDF model is not fitted. Returning empty sparse vectors for the batch."
+            )
+            return empty, None
+
+        try:
+            matrix = tfidf_vectorizer.transform(texts).tocsr()
+        except Exception as e:
+            logger.error(f"Error generating TF-IDF sparse vectors: {e}", exc_info=True)
+            return empty, None
+
+        sparse_vectors = []
+        for row in range(matrix.shape[0]):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            sparse_vectors.append(
+                dict(
+                    zip(
+                        matrix.indices[start:end].tolist(),
+                        matrix.data[start:end].tolist(),
+                    )
+                )
+            )
+        return sparse_vectors, version
+
     def embed_chunks(self, chunks: List[str]) -> List[Dict[str, Any]]:
         """
         Embed a list of text chunks.
@@ -655,55 +999,8 @@ class EmbedderService:
 
         logger.info("Fitting TF-IDF model with sample corpus...")
 
-        # Create a comprehensive sample corpus with diverse vocabulary
-        sample_corpus = [
-            "This is a sample document for TF-IDF model fitting and testing purposes.",
-            "The quick brown fox jumps over the lazy dog in the forest.",
-            "Machine learning and natural language processing are fascinating fields of study.",
-            "Vector databases store and retrieve high-dimensional vectors efficiently for search.",
-            "Hybrid search combines dense and sparse vector representations for better results.",
-            "Embeddings capture semantic meaning of text in high-dimensional vector space.",
-            "Information retrieval systems help find relevant documents from large collections.",
-            "Document similarity can be measured using cosine distance and other metrics.",
-            "Query expansion improves search results by adding related terms and synonyms.",
-            "Sparse vectors represent text using term frequency and statistical methods.",
-            "Dense vectors capture contextual relationships between words and phrases.",
-            "Tokenization splits text into meaningful units for further processing and analysis.",
-            "Stop words are common words that are filtered out during text processing steps.",
-            "Stemming reduces words to their root form for better matching and retrieval.",
-            "TF-IDF weighs terms based on their frequency in documents and entire corpus.",
-            "Data science involves analyzing large datasets to extract meaningful insights.",
-            "Artificial intelligence systems can process and understand human language effectively.",
-            "Search engines use complex algorithms to rank and retrieve relevant web pages.",
-            "Text preprocessing includes cleaning, normalization, and feature extraction steps.",
-            "Knowledge graphs represent relationships between entities in structured format.",
-            "Recommendation systems suggest relevant items based on user preferences and behavior.",
-            "Classification algorithms categorize documents into predefined classes or categories.",
-            "Clustering techniques group similar documents together without predefined labels.",
-            "Feature engineering creates meaningful representations from raw text data.",
-            "Model evaluation measures performance using metrics like precision, recall, and accuracy.",
-            "Cross-validation techniques ensure robust model performance across different datasets.",
-            "Hyperparameter tuning optimizes model configuration for better performance results.",
-            "Deep learning models can learn complex patterns from large amounts of data.",
-            "Neural networks consist of interconnected layers that process information sequentially.",
-            "Transformer architectures have revolutionized natural language understanding tasks.",
-            "Attention mechanisms help models focus on relevant parts of input sequences.",
-            "Pre-trained models can be fine-tuned for specific downstream tasks and applications.",
-            "Transfer learning leverages knowledge from one domain to improve performance in another.",
-            "Evaluation metrics help assess model quality and compare different approaches.",
-            "Data augmentation techniques increase training data diversity and model robustness.",
-            "Regularization methods prevent overfitting and improve model generalization capabilities.",
-            "Ensemble methods combine multiple models to achieve better predictive performance.",
-            "Feature selection identifies most relevant attributes for model training and inference.",
-            "Dimensionality reduction techniques compress high-dimensional data while preserving information.",
-            "Semantic search understands query intent and meaning rather than just keyword matching.",
-        ]
-
-        # Store sample corpus for later combination with actual corpus
-        self._sample_corpus_texts = sample_corpus
-
-        # Fit the TF-IDF model with the sample corpus
-        self.fit_sparse_model(sample_corpus)
+        # Fit the TF-IDF model with the sample corpus; it is never published
+        self.fit_sparse_model(self._sample_corpus_texts, publish=False)
         self._sample_corpus_fitted = True
         logger.info("Sample corpus fitted successfully.")
 
@@ -0,0 +1,108 @@
+"""
+Deterministic local embedder based on feature hashing.
+
+The embeddings need no model or network access and are the same on every
+machine, so they are used for benchmarks and offline development. Texts that
+share words get similar embeddings, which is enough to exercise search, but
+they carry no semantic meaning.
+"""
+
+import hashlib
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from sam_rag.services.embedder.embedder_base import EmbedderBase
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def _feature(token: str, dimension: int) -> Tuple[int, float]:
+    """Get the component and sign a token is hashed to."""
+    digest = int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+    return digest % dimension, 1.0 if (digest >> 63) & 1 else -1.0
+
+
+class HashingEmbedder(EmbedderBase):
+    """
+    Embedder hashing the words of a text into a fixed number of components.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the hashing embedder.
+
+        Args:
+            config: A dictionary containing configuration parameters.
+                - embedding_dimension: The dimension of the embeddings (default: 384).
+                - ngram_range: Word n-gram lengths hashed, as [min, max] (default: [1, 2]).
+                - batch_size: The batch size to use (default: 64).
+                - latency_ms: Delay added to every batch to stand in for a
+                  provider round trip (default: 0).
+        """
+        super().__init__(config)
+        self.embedding_dimension = int(self.embedding_dimension or 384)
+        self.batch_size = self.config.get("batch_size", 64)
+        ngram_range = self.config.get("ngram_range", [1, 2])
+        self.min_n, self.max_n = int(ngram_range[0]), int(ngram_range[1])
+        if self.min_n < 1 or self.max_n < self.min_n:
+            raise ValueError(f"Invalid ngram_range: {ngram_range}") from None
+        self.latency = float(self.config.get("latency_ms", 0)) / 1000.0
+
+    def _fill_row(self, row: np.ndarray, text: str) -> None:
+        """Add the hashed n-grams of a text to an embedding row."""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                index, sign = _feature(" ".join(tokens[i : i + n]), self.embedding_dimension)
+                row[index] += sign
+
+    def embed_text(self, text: str) -> List[float]:
+        """
+        Embed a single text string.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            A list of floats representing the embedding.
+        """
+        return self.embed_texts_array([text])[0].tolist()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of text strings.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A list of embeddings, where each embedding is a list of floats.
+        """
+        return self.embed_texts_array(texts).tolist()
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed multiple text strings into one float32 matrix.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A C-contiguous float32 array with one row per text.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        embeddings = np.zeros((len(texts), self.embedding_dimension), dtype=np.float32)
+        for row, text in zip(embeddings, texts):
+            self._fill_row(row, text)
+        if self.latency:
+            batches = -(-len(texts) // max(1, int(self.batch_size)))
+            time.sleep(self.latency * batches)
+        return embeddings
@@ -2,9 +2,20 @@
 LiteLLM-based embedder that supports multiple embedding providers.
 """
 
+import base64
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+
 from sam_rag.services.embedder.embedder_base import EmbedderBase
+from sam_rag.services.lazy_imports import import_litellm, is_available
+from sam_rag.services.metrics import get_metrics
+from sam_rag.services.metrics.metrics import (
+    EMBEDDING_DURATION,
+    EMBEDDING_REQUESTS,
+    EMBEDDING_TEXTS,
+    EMBEDDING_TOKENS,
+)
 
 
 class LiteLLMEmbedder(EmbedderBase):
@@ -23,10 +34,16 @@ class LiteLLMEmbedder(EmbedderBase):
                 - api_base: The base URL for the API (optional).
                 - api_version: The API version (optional, for Azure).
                 - dimensions: The dimensions of the embeddings (optional).
+                - truncate_dimension: Keep only the first N components of each
+                  embedding, for Matryoshka models whose API cannot shorten
+                  them (optional).
                 - batch_size: The batch size to use (default: 32).
+                - encoding_format: "base64" asks providers that support it
+                  (such as OpenAI) for packed float32 embeddings (optional).
                 - additional_kwargs: Additional keyword arguments to pass to the embedding API.
         """
         super().__init__(config)
+        self.batch_size = self.config.get("batch_size", 32)
         self.model = self.config.get("model")
         if not self.model:
             raise ValueError("Model name is required for LiteLLMEmbedder") from None
@@ -35,20 +52,31 @@ class LiteLLMEmbedder(EmbedderBase):
         self.api_base = self.config.get("api_base")
         self.api_version = self.config.get("api_version")
         self.dimensions = self.config.get("dimensions")
+        self.encoding_format = self.config.get("encoding_format")
         self.additional_kwargs = self.config.get("additional_kwargs", {})
         self.normalize = self.config.get("normalize_embeddings", True)
-
-        # Import litellm here to avoid importing it if not needed
-        try:
-            import litellm
-
-            self.litellm = litellm
-        except ImportError:
+        self.truncate_dimension = self.config.get("truncate_dimension")
+        if self.truncate_dimension:
+            self.embedding_dimension = self.truncate_dimension
+        elif self.embedding_dimension is None and self.dimensions:
+            self.embedding_dimension = self.dimensions
+
+        # litellm is imported on the first embedding request
+        if not is_available("litellm"):
             raise ImportError(
                 "The litellm package is required for LiteLLMEmbedder. "
                 "Please install it with `pip install litellm`."
             ) from None
 
+    @property
+    def litellm(self) -> Any:
+        """The litellm module, imported on first use."""
+        return import_litellm()
+
+    def _dimension_cache_key(self) -> Optional[str]:
+        """Embeddings of the same model and requested size share a dimension."""
+        return f"{self.model}:{self.dimensions}:{self.truncate_dimension}"
+
     def embed_text(self, text: str) -> List[float]:
         """
         Embed a single text string.
@@ -68,10 +96,12 @@ class LiteLLMEmbedder(EmbedderBase):
         kwargs = self._prepare_kwargs()
 
         # Get the embedding from the API
-        response = self.litellm.embedding(model=self.model, input=[text], **kwargs)
+        response = self._request([text], kwargs)
 
         # Extract the embedding
-        embedding = response["data"][0]["embedding"]
+        embedding = self._decode_embedding(response["data"][0]["embedding"])
+        embedding = self.truncate_embedding(embedding, self.truncate_dimension)
+        self.remember_dimension(len(embedding))
 
         return embedding
 
@@ -101,12 +131,17 @@ class LiteLLMEmbedder(EmbedderBase):
         kwargs = self._prepare_kwargs()
 
         # Get the embeddings from the API
-        response = self.litellm.embedding(
-            model=self.model, input=non_empty_texts, **kwargs
-        )
+        response = self._request(non_empty_texts, kwargs)
 
         # Extract the embeddings
-        embeddings = [data["embedding"] for data in response["data"]]
+        embeddings = [
+            self.truncate_embedding(
+                self._decode_embedding(data["embedding"]), self.truncate_dimension
+            )
+            for data in response["data"]
+        ]
+        if embeddings:
+            self.remember_dimension(len(embeddings[0]))
 
         # Reinsert zero vectors for empty texts
         result = []
@@ -124,6 +159,114 @@ class LiteLLMEmbedder(EmbedderBase):
 
         return result
 
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed multiple text strings into one float32 matrix.
+
+        Each batch response is copied straight into its rows of a preallocated
+        matrix. Truncation and normalization work on the whole batch at once.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A C-contiguous float32 array with one row per text. Empty texts get
+            zero rows.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        kwargs = self._prepare_kwargs()
+        matrix: Optional[np.ndarray] = None
+
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start : start + self.batch_size]
+            rows = [start + i for i, text in enumerate(batch) if text]
+            if not rows:
+                continue
+
+            response = self._request([texts[row] for row in rows], kwargs)
+            batch_matrix = self._response_matrix(response)
+            if self.truncate_dimension and batch_matrix.shape[1] > self.truncate_dimension:
+                batch_matrix = self.normalize_rows(
+                    batch_matrix[:, : self.truncate_dimension].copy()
+                )
+
+            if matrix is None:
+                matrix = np.zeros((len(texts), batch_matrix.shape[1]), dtype=np.float32)
+                self.remember_dimension(batch_matrix.shape[1])
+            matrix[rows] = batch_matrix
+
+        if matrix is None:
+            matrix = np.zeros((len(texts), self.get_embedding_dimension()), dtype=np.float32)
+        return matrix
+
+    def _request(self, texts: List[str], kwargs: Dict[str, Any]) -> Any:
+        """
+        Send one embedding request, recording its duration and usage.
+
+        Args:
+            texts: The texts to embed.
+            kwargs: The provider parameters from `_prepare_kwargs`.
+
+        Returns:
+            The LiteLLM embedding response.
+        """
+        metrics = get_metrics()
+        try:
+            with metrics.timer(EMBEDDING_DURATION, model=self.model):
+                response = self.litellm.embedding(model=self.model, input=texts, **kwargs)
+        except Exception:
+            metrics.count(EMBEDDING_REQUESTS, model=self.model, status="error")
+            raise
+        metrics.count(EMBEDDING_REQUESTS, model=self.model, status="ok")
+        metrics.count(EMBEDDING_TEXTS, len(texts), model=self.model)
+        usage = self._field(response, "usage")
+        if usage:
+            metrics.count(EMBEDDING_TOKENS, self._field(usage, "total_tokens") or 0, model=self.model)
+        return response
+
+    @staticmethod
+    def _field(value: Any, name: str) -> Any:
+        """Read a field of a LiteLLM response object or of a plain dict."""
+        if isinstance(value, dict):
+            return value.get(name)
+        return getattr(value, name, None)
+
+    @staticmethod
+    def _decode_embedding(value: Any) -> List[float]:
+        """
+        Get one embedding from a response as a list of floats.
+
+        Args:
+            value: A list of floats, or a base64 string of little-endian float32.
+
+        Returns:
+            The embedding as a list of floats.
+        """
+        if isinstance(value, str):
+            return np.frombuffer(base64.b64decode(value), dtype="<f4").tolist()
+        return value
+
+    @staticmethod
+    def _response_matrix(response: Any) -> np.ndarray:
+        """
+        Copy the embeddings of a response into a float32 matrix.
+
+        Args:
+            response: The LiteLLM embedding response.
+
+        Returns:
+            A float32 array with one row per returned embedding.
+        """
+        values = [data["embedding"] for data in response["data"]]
+        if values and isinstance(values[0], str):
+            # Packed float32 payloads decode without creating Python floats
+            return np.vstack(
+                [np.frombuffer(base64.b64decode(value), dtype="<f4") for value in values]
+            ).astype(np.float32, copy=False)
+        return np.array(values, dtype=np.float32)
+
     def _prepare_kwargs(self) -> Dict[str, Any]:
         """
         Prepare the keyword arguments for the embedding API.
@@ -149,6 +292,10 @@ class LiteLLMEmbedder(EmbedderBase):
         if self.dimensions:
             kwargs["dimensions"] = self.dimensions
 
+        # Ask for packed embeddings if configured
+        if self.encoding_format:
+            kwargs["encoding_format"] = self.encoding_format
+
         # Add any additional kwargs
         kwargs.update(self.additional_kwargs)
 
@@ -0,0 +1,168 @@
+"""
+Versioned on-disk store for the fitted sparse (TF-IDF) model.
+
+Ingestion publishes the model it fits on the first chunks it ingests, and
+every EmbedderService that shares the store path loads the current version
+lazily. Queries are then vectorized with the same vocabulary as the stored
+documents. An explicit refit publishes a new version, after which the sparse
+vectors stored with an older version are re-embedded (see sparse_refit).
+
+Layout of the store directory:
+
+    CURRENT              name of the current version
+    <version>/terms.json term of every vocabulary index, in index order
+    <version>/idf.npy    inverse document frequencies, memory-mapped on load
+    <version>/params.json vectorizer and tokenizer parameters
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+
+
+class SparseModelStore:
+    """
+    Publishes and loads versions of the sparse model in a local directory.
+    """
+
+    def __init__(self, path: str, keep_versions: int = 3):
+        """
+        Initialize the store.
+
+        Args:
+            path: Directory holding the model versions; created on first publish.
+            keep_versions: Number of versions kept on disk. Older versions are
+                deleted after a publish.
+        """
+        self.path = path
+        self.keep_versions = max(1, int(keep_versions))
+
+    def current_version(self) -> Optional[str]:
+        """
+        Get the current version.
+
+        Returns:
+            The current version, or None if no model was published yet.
+        """
+        try:
+            with open(os.path.join(self.path, CURRENT_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(
+        self,
+        vocabulary: Dict[str, int],
+        idf: np.ndarray,
+        params: Dict[str, Any],
+        replace: bool = True,
+    ) -> Optional[str]:
+        """
+        Write a new version and make it current.
+
+        The version directory is written completely before CURRENT is replaced,
+        so readers never see a partial model.
+
+        Args:
+            vocabulary: Mapping of term to vocabulary index.
+            idf: Inverse document frequency of every vocabulary index.
+            params: JSON-serializable vectorizer and tokenizer parameters.
+            replace: Whether an existing current version is replaced. If
+                False and a version was already published, nothing is
+                published.
+
+        Returns:
+            The published version, or None if `replace` is False and a
+            version already existed.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+        terms = [None] * len(vocabulary)
+        for term, index in vocabulary.items():
+            terms[int(index)] = term
+
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.path)
+        try:
+            with open(os.path.join(staging, "terms.json"), "w", encoding="utf-8") as f:
+                json.dump(terms, f, ensure_ascii=False)
+            np.save(os.path.join(staging, "idf.npy"), np.ascontiguousarray(idf, dtype=np.float64))
+            with open(os.path.join(staging, "params.json"), "w", encoding="utf-8") as f:
+                json.dump(params, f)
+            os.replace(staging, os.path.join(self.path, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        current_tmp = os.path.join(self.path, f".{CURRENT_FILE}.{uuid.uuid4().hex[:8]}")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        if replace:
+            os.replace(current_tmp, os.path.join(self.path, CURRENT_FILE))
+        else:
+            try:
+                # Linking fails if CURRENT exists, so only the first publisher wins
+                os.link(current_tmp, os.path.join(self.path, CURRENT_FILE))
+            except FileExistsError:
+                shutil.rmtree(os.path.join(self.path, version), ignore_errors=True)
+                return None
+            finally:
+                os.remove(current_tmp)
+
+        self._prune(version)
+        logger.info(f"Published sparse model version {version} to {self.path}")
+        return version
+
+    def load(self, version: str) -> Tuple[Dict[str, int], np.ndarray, Dict[str, Any]]:
+        """
+        Load a version of the model.
+
+        Args:
+            version: The version to load.
+
+        Returns:
+            A tuple of the vocabulary, the memory-mapped idf array and the
+            parameters.
+        """
+        directory = os.path.join(self.path, version)
+        with open(os.path.join(directory, "terms.json"), encoding="utf-8") as f:
+            terms = json.load(f)
+        idf = np.load(os.path.join(directory, "idf.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "params.json"), encoding="utf-8") as f:
+            params = json.load(f)
+        if len(terms) != len(idf):
+            raise ValueError(
+                f"Sparse model version {version} is corrupt: {len(terms)} terms, {len(idf)} idf values"
+            ) from None
+        return {term: index for index, term in enumerate(terms)}, idf, params
+
+    def _prune(self, current: str) -> None:
+        """Delete versions beyond `keep_versions` and abandoned staging directories."""
+        versions = []
+        for name in os.listdir(self.path):
+            full_path = os.path.join(self.path, name)
+            if not os.path.isdir(full_path):
+                continue
+            if name.startswith(".staging-"):
+                # Staging directories older than an hour were left by a crash
+                if time.time() - os.path.getmtime(full_path) > 3600:
+                    shutil.rmtree(full_path, ignore_errors=True)
+                continue
+            versions.append(name)
+
+        # Versions start with their publish time, so they sort oldest first
+        versions.sort()
+        for name in versions[: -self.keep_versions]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
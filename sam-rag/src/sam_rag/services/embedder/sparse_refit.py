@@ -0,0 +1,287 @@
+"""
+Versioned refit of the sparse (TF-IDF) model and re-embedding of sparse vectors.
+
+Ingestion fits the TF-IDF vocabulary once, on the first window of chunks, and
+keeps it stable afterwards because a new fit renumbers the vocabulary. Once
+the corpus has grown past that first window, its vocabulary can be refitted
+explicitly:
+
+1. A sample of up to `sample_chunks` stored chunk texts is drawn uniformly
+   (reservoir sampling) in one pass over the vector database.
+2. The model is fitted on the sample and published as a new version of the
+   shared store. Ingestion and retrieval load it on their next check.
+3. Every chunk whose `sparse_model_version` metadata differs from the new
+   version gets a new sparse vector. Its text, dense vector and other
+   metadata are written back unchanged, so no embedding provider is called.
+
+Until step 3 is complete, chunks with an older version match queries on
+their dense vectors only. Re-embedding is idempotent: running it again, for
+example with `--reembed-only`, picks up chunks that were ingested with the
+older version while the refit was running.
+
+Run it with the agent configuration:
+
+    python -m sam_rag.services.embedder.sparse_refit --config config.yaml --sample-chunks 20000
+"""
+
+import argparse
+import logging
+import random
+import sys
+from typing import Any, Dict, List, Optional
+
+from sam_rag.services.database.vector_db_base import as_embedding_matrix
+from sam_rag.services.database.vector_db_service import VectorDBService
+from sam_rag.services.embedder.embedder_service import EmbedderService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_CHUNKS = 20_000
+
+
+class SparseModelRefitter:
+    """
+    Refits the shared sparse model on a sample of the stored chunks and
+    rewrites the sparse vectors computed with an earlier version.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbedderService,
+        vector_db: VectorDBService,
+        sample_chunks: int = DEFAULT_SAMPLE_CHUNKS,
+        batch_size: int = 500,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the refitter.
+
+        Args:
+            embedder: The embedder service whose sparse model is refitted.
+                Hybrid search must be enabled with the "tfidf" sparse model.
+            vector_db: The vector database holding the chunks.
+            sample_chunks: Maximum number of chunk texts the model is fitted on.
+            batch_size: The number of chunks read and written per batch.
+            seed: Seed of the sampling, for repeatable samples (optional).
+        """
+        if not embedder.hybrid_search_enabled or embedder.sparse_model_type != "tfidf":
+            raise ValueError(
+                "Refitting requires hybrid search with the 'tfidf' sparse model"
+            ) from None
+        self.embedder = embedder
+        self.vector_db = vector_db
+        self.sample_chunks = max(1, int(sample_chunks))
+        self.batch_size = max(1, int(batch_size))
+        self._random = random.Random(seed)
+
+    def sample_corpus(self) -> List[str]:
+        """
+        Draw a uniform sample of the stored chunk texts in one pass.
+
+        Returns:
+            Up to `sample_chunks` non-empty chunk texts.
+        """
+        sample: List[str] = []
+        seen = 0
+        for batch in self.vector_db.db.iter_documents(
+            batch_size=self.batch_size, include_embeddings=False
+        ):
+            for document in batch:
+                text = document.get("text")
+                if not text:
+                    continue
+                seen += 1
+                if len(sample) < self.sample_chunks:
+                    sample.append(text)
+                else:
+                    index = self._random.randrange(seen)
+                    if index < self.sample_chunks:
+                        sample[index] = text
+        logger.info(f"Sampled {len(sample)} of {seen} stored chunks for the sparse model")
+        return sample
+
+    def refit(self) -> Optional[str]:
+        """
+        Fit the sparse model on a sample of the stored chunks and publish it.
+
+        Returns:
+            The published version, or None if there was nothing to fit on or
+            the model could not be fitted or published.
+        """
+        sample = self.sample_corpus()
+        if not sample:
+            logger.warning("No stored chunks to fit the sparse model on")
+            return None
+        previous = self.embedder.sparse_model_version
+        self.embedder.refit_sparse_model_with_corpus(sample)
+        version = self.embedder.sparse_model_version
+        if version is None or version == previous:
+            logger.error("The refitted sparse model was not published")
+            return None
+        return version
+
+    def reembed(self, version: Optional[str] = None) -> Dict[str, int]:
+        """
+        Rewrite the sparse vectors of chunks computed with another model version.
+
+        Chunks are written back with their text, dense vector and metadata,
+        with `sparse_model_version` set to the version in use.
+
+        Args:
+            version: The version the chunks must have (default: the current
+                version of the shared store).
+
+        Returns:
+            Counts of the chunks "scanned", "updated" and "failed".
+        """
+        if version is None:
+            _, version = self.embedder.sparse_model()
+        if version is None:
+            raise ValueError("No published sparse model version to re-embed with") from None
+
+        stats = {"scanned": 0, "updated": 0, "failed": 0}
+        for batch in self.vector_db.db.iter_documents(
+            batch_size=self.batch_size, include_embeddings=True
+        ):
+            stats["scanned"] += len(batch)
+            outdated = [
+                document
+                for document in batch
+                if document.get("text")
+                and (document.get("metadata") or {}).get("sparse_model_version") != version
+            ]
+            if outdated:
+                self._rewrite(outdated, version, stats)
+        logger.info(
+            f"Re-embedded sparse vectors of {stats['updated']} of {stats['scanned']} chunks "
+            f"with version {version}, {stats['failed']} failed"
+        )
+        return stats
+
+    def _rewrite(self, documents: List[Dict[str, Any]], version: str, stats: Dict[str, int]) -> None:
+        """Compute new sparse vectors for a batch of chunks and write them back."""
+        texts = [document["text"] for document in documents]
+        sparse_vectors, used_version = self.embedder.embed_sparse_texts(texts)
+        if used_version != version:
+            # A newer version was published meanwhile; a later run updates these
+            logger.warning(
+                f"Sparse model version changed to {used_version} while re-embedding; "
+                "run the re-embedding again"
+            )
+            stats["failed"] += len(documents)
+            return
+        try:
+            self.vector_db.add_documents(
+                documents=texts,
+                embeddings=as_embedding_matrix([document["embedding"] for document in documents]),
+                metadatas=[
+                    dict(document.get("metadata") or {}, sparse_model_version=version)
+                    for document in documents
+                ],
+                ids=[document["id"] for document in documents],
+                sparse_vectors=sparse_vectors,
+            )
+            stats["updated"] += len(documents)
+        except Exception as e:
+            logger.error(f"Error writing re-embedded sparse vectors: {str(e)}")
+            stats["failed"] += len(documents)
+
+    def run(self, refit: bool = True) -> Dict[str, Any]:
+        """
+        Refit the sparse model, then re-embed the outdated sparse vectors.
+
+        Args:
+            refit: Whether a new version is fitted first. If False, chunks are
+                only brought up to the current version.
+
+        Returns:
+            The re-embedding counts plus the "version" used, or only
+            "version": None if the refit failed.
+        """
+        version = None
+        if refit:
+            version = self.refit()
+            if version is None:
+                return {"version": None}
+        stats = self.reembed(version)
+        return {"version": version or self.embedder.sparse_model_version, **stats}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Refit the sparse model and re-embed the sparse vectors from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Refit the TF-IDF sparse model on a sample of the stored chunks, "
+        "publish it as a new version and re-embed the sparse vectors."
+    )
+    parser.add_argument(
+        "--config",
+        required=True,
+        help="Agent YAML file with embedding, vector_db and hybrid_search sections",
+    )
+    parser.add_argument(
+        "--sample-chunks",
+        type=int,
+        default=DEFAULT_SAMPLE_CHUNKS,
+        help="Maximum number of stored chunks the model is fitted on",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--reembed-only",
+        action="store_true",
+        help="Only bring chunks up to the current version, without refitting",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    from sam_rag.services.database.config_file import load_config
+
+    app_config = _find_app_config(load_config(args.config))
+    if app_config is None:
+        parser.error(f"No section with embedding and vector_db found in {args.config}")
+    hybrid_search_config = app_config.get("hybrid_search") or {}
+    vector_db_config = app_config["vector_db"]
+
+    embedder = EmbedderService(
+        config=app_config["embedding"],
+        hybrid_search_config=hybrid_search_config,
+        embedding_dimension=vector_db_config.get("db_params", {}).get("embedding_dimension"),
+    )
+    vector_db = VectorDBService(vector_db_config, hybrid_search_config=hybrid_search_config)
+    try:
+        refitter = SparseModelRefitter(
+            embedder, vector_db, sample_chunks=args.sample_chunks, batch_size=args.batch_size
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    stats = refitter.run(refit=not args.reembed_only)
+    if stats["version"] is None:
+        print("The sparse model was not refitted.")
+        return 1
+    print(
+        f"Sparse model version {stats['version']}: re-embedded {stats['updated']} of "
+        f"{stats['scanned']} chunks, {stats['failed']} failed."
+    )
+    return 1 if stats["failed"] else 0
+
+
+def _find_app_config(config: Any) -> Optional[Dict[str, Any]]:
+    """Find the first section holding both an embedding and a vector_db section."""
+    if isinstance(config, dict):
+        if isinstance(config.get("embedding"), dict) and isinstance(config.get("vector_db"), dict):
+            return config
+        values = config.values()
+    elif isinstance(config, list):
+        values = config
+    else:
+        return None
+    for value in values:
+        found = _find_app_config(value)
+        if found:
+            return found
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Stopword lists for the sparse (TF-IDF) tokenizer.
+
+The English list is bundled, so the tokenizer works without downloading NLTK
+data. Other languages are read from an installed NLTK stopwords corpus, if
+one is present; nothing is downloaded.
+"""
+
+import logging
+from typing import FrozenSet
+
+logger = logging.getLogger(__name__)
+
+# The NLTK English stopword list
+ENGLISH_STOPWORDS = frozenset(
+    """
+    i me my myself we our ours ourselves you you're you've you'll you'd your
+    yours yourself yourselves he him his himself she she's her hers herself it
+    it's its itself they them their theirs themselves what which who whom this
+    that that'll these those am is are was were be been being have has had
+    having do does did doing a an the and but if or because as until while of
+    at by for with about against between into through during before after
+    above below to from up down in out on off over under again further then
+    once here there when where why how all any both each few more most other
+    some such no nor not only own same so than too very s t can will just don
+    don't should should've now d ll m o re ve y ain aren aren't couldn
+    couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't haven haven't
+    isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't
+    shouldn shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+    """.split()
+)
+
+BUNDLED_STOPWORDS = {"english": ENGLISH_STOPWORDS}
+
+
+def load_stopwords(language: str = "english") -> FrozenSet[str]:
+    """
+    Get the stopwords of a language.
+
+    Args:
+        language: The language name as used by NLTK (default: "english").
+
+    Returns:
+        The stopwords, or an empty set if none are available offline.
+    """
+    language = (language or "english").lower()
+    if language in BUNDLED_STOPWORDS:
+        return BUNDLED_STOPWORDS[language]
+
+    try:
+        from nltk.corpus import stopwords
+
+        return frozenset(stopwords.words(language))
+    except ImportError:
+        logger.warning(
+            f"No bundled stopwords for '{language}' and nltk is not installed. "
+            "Stopword removal will be skipped."
+        )
+    except LookupError:
+        logger.warning(
+            f"No bundled stopwords for '{language}' and the NLTK stopwords corpus is not "
+            "installed. Run `python -m nltk.downloader stopwords` to enable them. "
+            "Stopword removal will be skipped."
+        )
+    except Exception as e:
+        logger.error(f"Error loading NLTK stopwords: {e}. Stopword removal will be skipped.")
+    return frozenset()
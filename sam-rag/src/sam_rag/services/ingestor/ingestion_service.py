@@ -9,6 +9,9 @@ splitting, and embedding steps are handled by the RAG pipeline.
 import logging
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+
+from sam_rag.services.database.vector_db_base import PartialWriteError, as_embedding_matrix
 from sam_rag.services.database.vector_db_service import VectorDBService
 from sam_rag.services.ingestor.ingestion_base import IngestionBase
 
@@ -106,6 +109,58 @@ class IngestionService(IngestionBase):
             metadata: Optional metadata for each text chunk.
             ids: Optional IDs for each text chunk.
 
+        Returns:
+            A dictionary containing the ingestion results.
+        """
+        # Verify that texts and embeddings have the same length
+        if len(texts) != len(embeddings):
+            error_msg = f"Number of texts ({len(texts)}) does not match number of embedding structures ({len(embeddings)})"
+            logger.error(error_msg)
+            return {
+                "success": False,
+                "message": error_msg,
+                "document_ids": [],
+            }
+
+        if any(emb_data.get("dense_vector") is None for emb_data in embeddings):
+            error_msg = "Some texts have no dense embedding"
+            logger.error(error_msg)
+            return {
+                "success": False,
+                "message": error_msg,
+                "document_ids": [],
+            }
+
+        dense_vectors = as_embedding_matrix(
+            [emb_data["dense_vector"] for emb_data in embeddings]
+        )
+        sparse_vectors = [emb_data.get("sparse_vector") for emb_data in embeddings]
+
+        return self.ingest_embedding_batch(
+            texts, dense_vectors, sparse_vectors, metadata=metadata, ids=ids
+        )
+
+    def ingest_embedding_batch(
+        self,
+        texts: List[str],
+        dense_vectors: np.ndarray,
+        sparse_vectors: Optional[List[Optional[Dict[int, float]]]] = None,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ingest a batch of texts whose dense embeddings are one float32 matrix.
+
+        The matrix is handed to the vector database as is; each backend converts
+        it once to the format its client sends.
+
+        Args:
+            texts: List of pre-processed text chunks.
+            dense_vectors: Float32 array with one embedding row per text.
+            sparse_vectors: Optional sparse vector for each text.
+            metadata: Optional metadata for each text chunk.
+            ids: Optional IDs for each text chunk.
+
         Returns:
             A dictionary containing the ingestion results.
         """
@@ -115,9 +170,8 @@ class IngestionService(IngestionBase):
         if metadata is None:
             metadata = [{"source": "direct_text"} for _ in range(len(texts))]
 
-        # Verify that texts and embeddings have the same length
-        if len(texts) != len(embeddings):
-            error_msg = f"Number of texts ({len(texts)}) does not match number of embedding structures ({len(embeddings)})"
+        if len(texts) != len(dense_vectors):
+            error_msg = f"Number of texts ({len(texts)}) does not match number of embeddings ({len(dense_vectors)})"
             logger.error(error_msg)
             return {
                 "success": False,
@@ -125,12 +179,8 @@ class IngestionService(IngestionBase):
                 "document_ids": [],
             }
 
-        dense_vectors: List[List[float]] = []
-        sparse_vectors: List[Optional[Dict[int, float]]] = []
-
-        for emb_data in embeddings:
-            dense_vectors.append(emb_data["dense_vector"])
-            sparse_vectors.append(emb_data.get("sparse_vector"))
+        if sparse_vectors is None:
+            sparse_vectors = [None] * len(texts)
 
         # Store embeddings in vector database
         try:
@@ -155,6 +205,17 @@ class IngestionService(IngestionBase):
                 "message": f"Successfully ingested {len(document_ids)} points into vector database",
                 "document_ids": document_ids,
             }
+        except PartialWriteError as e:
+            logger.error(
+                f"Stored {len(e.written_ids)} of {len(texts)} documents in vector database: {e}"
+            )
+            return {
+                "success": False,
+                "message": f"Stored {len(e.written_ids)} of {len(texts)} documents; "
+                f"{len(e.failed_ids)} failed.",
+                "document_ids": e.written_ids,
+                "failed_ids": e.failed_ids,
+            }
         except Exception:
             error_msg = "Error storing embeddings in vector database."
             logger.error(error_msg)
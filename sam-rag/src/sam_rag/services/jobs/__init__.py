@@ -0,0 +1,15 @@
+"""
+Jobs package for the SAM RAG plugin.
+
+This package contains the durable background job queue and worker pool used to
+run document ingestion outside of tool calls and scanner threads.
+"""
+
+from .job_queue import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    JobQueue,
+    JobWorkerPool,
+)
+
+__all__ = ["JobQueue", "JobWorkerPool", "PRIORITY_BATCH", "PRIORITY_INTERACTIVE"]
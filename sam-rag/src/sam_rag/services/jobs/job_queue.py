@@ -0,0 +1,466 @@
+"""
+Durable background job queue for document ingestion.
+
+Jobs are stored in a local SQLite file, so queued and in-flight work survives
+a restart. Workers claim the highest-priority job that is due, and failed jobs
+are retried with exponential backoff until they run out of attempts. A job
+submitted for a source whose latest job has the same content hash is not
+queued again; the existing job id is returned instead.
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Interactive ingests (tool calls) are claimed before batch scan jobs
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BATCH = 0
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_SECONDS = 5.0
+DEFAULT_MAX_BACKOFF_SECONDS = 300.0
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    source TEXT,
+    content_hash TEXT,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (status, priority DESC, available_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_source ON jobs (source, created_at);
+"""
+
+_COLUMNS = (
+    "id",
+    "kind",
+    "source",
+    "content_hash",
+    "payload",
+    "priority",
+    "status",
+    "attempts",
+    "max_attempts",
+    "available_at",
+    "created_at",
+    "updated_at",
+    "result",
+    "error",
+)
+
+
+class JobQueue:
+    """
+    A persistent, prioritized job queue backed by a SQLite file.
+
+    The queue is shared by the threads of one process. Jobs left running by a
+    previous process are queued again when the queue is opened.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+    ):
+        """
+        Open (or create) the job queue.
+
+        Args:
+            path: Path to the SQLite file.
+            max_attempts: Default number of attempts before a job is marked failed.
+            backoff_seconds: Delay before the first retry; doubled on every retry.
+            max_backoff_seconds: Upper bound on the retry delay.
+        """
+        self.path = path
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_seconds = float(backoff_seconds)
+        self.max_backoff_seconds = float(max_backoff_seconds)
+        self._lock = threading.Lock()
+        # Set whenever a job becomes available, to wake idle workers
+        self.job_available = threading.Event()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        recovered = self._conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+            (QUEUED, time.time(), RUNNING),
+        ).rowcount
+        if recovered:
+            logger.info(f"Requeued {recovered} interrupted jobs from {path}")
+            self.job_available.set()
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = PRIORITY_BATCH,
+        source: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> str:
+        """
+        Add a job to the queue.
+
+        If the latest job for `source` has the same `content_hash` and has not
+        failed, no new job is created and the id of that job is returned.
+
+        Args:
+            kind: The job type, used to pick the handler.
+            payload: JSON-serializable job arguments.
+            priority: Higher priorities are claimed first.
+            source: The document the job is about, used for deduplication.
+            content_hash: Hash of the document content, used for deduplication.
+            max_attempts: Number of attempts before the job is marked failed.
+
+        Returns:
+            The job id.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if source is not None and content_hash:
+                    latest = self._conn.execute(
+                        "SELECT id, content_hash, status FROM jobs WHERE source = ? "
+                        "ORDER BY created_at DESC LIMIT 1",
+                        (source,),
+                    ).fetchone()
+                    if (
+                        latest
+                        and latest["content_hash"] == content_hash
+                        and latest["status"] != FAILED
+                    ):
+                        self._conn.execute("COMMIT")
+                        logger.info(
+                            f"Job {latest['id']} already covers {source}, not queued again"
+                        )
+                        return latest["id"]
+
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, source, content_hash, payload, priority, "
+                    "status, attempts, max_attempts, available_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                    (
+                        job_id,
+                        kind,
+                        source,
+                        content_hash,
+                        json.dumps(payload),
+                        int(priority),
+                        QUEUED,
+                        int(max_attempts or self.max_attempts),
+                        now,
+                        now,
+                        now,
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        self.job_available.set()
+        logger.debug(f"Queued {kind} job {job_id} with priority {priority}")
+        return job_id
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Claim the highest-priority job that is due, marking it running.
+
+        Returns:
+            The claimed job, or None if no job is due.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND available_at <= ? "
+                    "ORDER BY priority DESC, available_at, created_at LIMIT 1",
+                    (QUEUED, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (RUNNING, now, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        job = self._to_dict(row)
+        job["status"] = RUNNING
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Mark a job as succeeded.
+
+        Args:
+            job_id: The job id.
+            result: Optional JSON-serializable result to store with the job.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (SUCCEEDED, json.dumps(result, default=str), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> str:
+        """
+        Record a failed attempt, scheduling a retry if attempts remain.
+
+        Args:
+            job_id: The job id.
+            error: A description of the failure.
+
+        Returns:
+            The new status of the job: "queued" if it will be retried, else "failed".
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return FAILED
+            if row["attempts"] < row["max_attempts"]:
+                status = QUEUED
+                available_at = now + self._backoff(row["attempts"])
+            else:
+                status = FAILED
+                available_at = now
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (status, error, available_at, now, job_id),
+            )
+
+        if status == QUEUED:
+            logger.warning(
+                f"Job {job_id} failed (attempt {row['attempts']}/{row['max_attempts']}), "
+                f"retrying in {available_at - now:.1f}s: {error}"
+            )
+        else:
+            logger.error(f"Job {job_id} failed after {row['attempts']} attempts: {error}")
+        return status
+
+    def _backoff(self, attempts: int) -> float:
+        """Get the jittered delay before retrying a job that has failed `attempts` times."""
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job by id.
+
+        Args:
+            job_id: The job id.
+
+        Returns:
+            The job, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Count the jobs in each status.
+
+        Returns:
+            Mapping of status to number of jobs.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS count FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    def next_available_in(self) -> Optional[float]:
+        """
+        Get the number of seconds until the next queued job is due.
+
+        Returns:
+            The delay in seconds (0 if a job is due now), or None if nothing is queued.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(available_at) AS available_at FROM jobs WHERE status = ?",
+                (QUEUED,),
+            ).fetchone()
+        if row is None or row["available_at"] is None:
+            return None
+        return max(0.0, row["available_at"] - time.time())
+
+    def purge(self, older_than_seconds: float) -> int:
+        """
+        Delete finished jobs last updated more than `older_than_seconds` ago.
+
+        Args:
+            older_than_seconds: Age threshold in seconds.
+
+        Returns:
+            The number of jobs deleted.
+        """
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (SUCCEEDED, FAILED, cutoff),
+            ).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} finished jobs from {self.path}")
+        return deleted
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a job row to a dictionary, decoding its JSON fields."""
+        job = {column: row[column] for column in _COLUMNS}
+        job["payload"] = json.loads(job["payload"])
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+
+class JobWorkerPool:
+    """
+    A pool of threads that run jobs from a JobQueue.
+
+    Each claimed job is passed to the handler registered for its kind. A
+    handler signals failure by raising; its return value is stored as the job
+    result.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+        workers: int = 1,
+        poll_interval: float = 5.0,
+    ):
+        """
+        Initialize the worker pool.
+
+        Args:
+            queue: The queue to take jobs from.
+            handlers: Mapping of job kind to a callable taking the claimed job.
+            workers: Number of worker threads.
+            poll_interval: Maximum time an idle worker waits before checking
+                the queue again.
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"rag-job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} ingestion job workers")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the worker threads after their current jobs.
+
+        Args:
+            timeout: Maximum time to wait for each thread.
+        """
+        self._stop.set()
+        self.queue.job_available.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self) -> None:
+        """Claim and run jobs until the pool is stopped."""
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                logger.error(f"Error claiming a job: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wait_for_job()
+                continue
+
+            self._run(job)
+
+    def _wait_for_job(self) -> None:
+        """Sleep until a job is queued, the next retry is due, or the poll interval passes."""
+        self.queue.job_available.clear()
+        try:
+            due_in = self.queue.next_available_in()
+        except Exception:
+            due_in = None
+        timeout = self.poll_interval if due_in is None else min(due_in, self.poll_interval)
+        if timeout > 0:
+            self.queue.job_available.wait(timeout)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        """Run a claimed job and record its outcome."""
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            self.queue.fail(job["id"], f"No handler for job kind '{job['kind']}'")
+            return
+
+        logger.info(
+            f"Running {job['kind']} job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})"
+        )
+        try:
+            result = handler(job)
+        except Exception as e:
+            self.queue.fail(job["id"], str(e) or e.__class__.__name__)
+            return
+        self.queue.complete(job["id"], result)
+        logger.info(f"Job {job['id']} succeeded")
@@ -0,0 +1,57 @@
+"""
+Deferred imports of heavyweight optional dependencies.
+
+LiteLLM takes seconds to import and, by default, fetches its model cost map
+from the network on import. Importing it only when a model is first called
+keeps agent startup short and lets the agent start without network access.
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_litellm = None
+_litellm_lock = threading.Lock()
+
+
+def is_available(module_name: str) -> bool:
+    """
+    Check whether a module can be imported, without importing it.
+
+    Args:
+        module_name: The top-level module name.
+
+    Returns:
+        True if the module is installed.
+    """
+    return importlib.util.find_spec(module_name) is not None
+
+
+def import_litellm() -> Any:
+    """
+    Import LiteLLM on first use.
+
+    The bundled model cost map is used unless LITELLM_LOCAL_MODEL_COST_MAP is
+    set explicitly, so the import does not need network access.
+
+    Returns:
+        The litellm module.
+
+    Raises:
+        ImportError: If litellm is not installed.
+    """
+    global _litellm
+    if _litellm is None:
+        with _litellm_lock:
+            if _litellm is None:
+                os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+                module = importlib.import_module("litellm")
+                module.set_verbose = False
+                _litellm = module
+                logger.debug("Imported litellm")
+    return _litellm
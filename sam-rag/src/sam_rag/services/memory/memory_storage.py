@@ -4,15 +4,29 @@ In-memory storage implementation for the scanner module.
 This module provides an in-memory storage option for the scanner module,
 allowing it to store file information in memory instead of a database.
 """
+import atexit
 import logging
+import sqlite3
+import threading
+from bisect import bisect_right
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Default maximum number of entries kept in the in-memory change log
+DEFAULT_MAX_CHANGES = 10000
+
+
 class MemoryStorage:
     """
     A singleton class for in-memory storage of file information.
+
+    File events are recorded in a bounded, time-ordered change log. Only the
+    latest change per path is kept, and timestamps are indexed so that
+    `get_changes_since` is a binary search rather than a full scan. Entries
+    evicted from the log can optionally be spilled to a local SQLite file so
+    that change history survives restarts.
     """
 
     _instance = None
@@ -26,8 +40,164 @@ class MemoryStorage:
     def _initialize(self):
         """Initialize the memory storage."""
         self.files = {}  # Dict to store file information: {path: {metadata}}
-        self.changes = []  # List to store file changes: [{path, status, timestamp}]
         self.last_scan_time = None
+        self.max_changes = DEFAULT_MAX_CHANGES
+        self.spill_path: Optional[str] = None
+        self._spill_conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._reset_change_log()
+
+    def _reset_change_log(self) -> None:
+        """Reset the in-memory change log and its indexes."""
+        # Time-ordered change entries; superseded entries are replaced by None
+        self._change_log: List[Optional[Dict[str, Any]]] = []
+        # Timestamps parallel to _change_log, used for bisect lookups
+        self._change_timestamps: List[str] = []
+        # Position of the latest change for each path in _change_log
+        self._latest_change: Dict[str, int] = {}
+        self._stale_changes = 0
+
+    def configure(
+        self,
+        max_changes: int = DEFAULT_MAX_CHANGES,
+        spill_path: Optional[str] = None,
+    ) -> None:
+        """
+        Configure the change log.
+
+        Args:
+            max_changes: Maximum number of change entries kept in memory.
+            spill_path: Optional path to a SQLite file. Evicted changes are written
+                there and remain queryable through `get_changes_since`.
+        """
+        with self._lock:
+            self.max_changes = max(1, int(max_changes))
+            if spill_path and spill_path != self.spill_path:
+                self._open_spill(spill_path)
+            self._compact_changes()
+
+        logger.info(
+            f"Memory storage change log configured: max_changes={self.max_changes}, "
+            f"spill={'enabled' if self.spill_path else 'disabled'}"
+        )
+
+    def _open_spill(self, spill_path: str) -> None:
+        """
+        Open (or create) the SQLite file used to spill evicted changes.
+
+        Args:
+            spill_path: Path to the SQLite file.
+        """
+        if self._spill_conn is not None:
+            self._spill_conn.close()
+
+        conn = sqlite3.connect(spill_path, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            "path TEXT PRIMARY KEY, status TEXT NOT NULL, timestamp TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_changes_timestamp ON changes (timestamp)"
+        )
+        conn.commit()
+
+        self._spill_conn = conn
+        self.spill_path = spill_path
+        atexit.register(self.flush)
+
+    def _spill(self, changes: List[Dict[str, Any]]) -> None:
+        """
+        Write changes to the spill file, keeping only the latest entry per path.
+
+        Args:
+            changes: The change entries to write.
+        """
+        if self._spill_conn is None or not changes:
+            return
+
+        try:
+            with self._spill_conn:
+                self._spill_conn.executemany(
+                    "INSERT INTO changes (path, status, timestamp) VALUES (?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET status = excluded.status, "
+                    "timestamp = excluded.timestamp "
+                    "WHERE excluded.timestamp >= changes.timestamp",
+                    [
+                        (change["path"], change["status"], change["timestamp"])
+                        for change in changes
+                    ],
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to spill changes to {self.spill_path}: {e}")
+
+    def flush(self) -> None:
+        """Write all in-memory changes to the spill file, if one is configured."""
+        with self._lock:
+            self._spill([c for c in self._change_log if c is not None])
+
+    def _now(self) -> str:
+        """
+        Get a timestamp for a new change, never earlier than the last logged one.
+
+        Returns:
+            An ISO 8601 UTC timestamp.
+        """
+        timestamp = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        if self._change_timestamps and timestamp < self._change_timestamps[-1]:
+            return self._change_timestamps[-1]
+        return timestamp
+
+    def _record_change(self, path: str, status: str, timestamp: str) -> None:
+        """
+        Append a change to the log, superseding any earlier change for the path.
+
+        Args:
+            path: The path to the document.
+            status: The status of the change.
+            timestamp: The timestamp of the change.
+        """
+        previous = self._latest_change.get(path)
+        if previous is not None:
+            self._change_log[previous] = None
+            self._stale_changes += 1
+
+        self._latest_change[path] = len(self._change_log)
+        self._change_log.append(
+            {"path": path, "status": status, "timestamp": timestamp}
+        )
+        self._change_timestamps.append(timestamp)
+
+        live_changes = len(self._change_log) - self._stale_changes
+        if self._stale_changes > live_changes or live_changes > self.max_changes:
+            self._compact_changes()
+
+    def _compact_changes(self) -> None:
+        """
+        Drop superseded entries and evict the oldest changes beyond `max_changes`.
+
+        Evicted changes are spilled to SQLite when configured. Compaction only runs
+        once stale entries outnumber live ones or the bound is exceeded, so its
+        cost is amortised over the appends that triggered it.
+        """
+        live = [change for change in self._change_log if change is not None]
+
+        # Evict down to 90% of the bound so compaction is not re-triggered on every append
+        if len(live) > self.max_changes:
+            keep = max(1, int(self.max_changes * 0.9))
+            evicted, live = live[:-keep], live[-keep:]
+            self._spill(evicted)
+            logger.debug(f"Evicted {len(evicted)} changes from memory change log")
+
+        self._change_log = live
+        self._change_timestamps = [change["timestamp"] for change in live]
+        self._latest_change = {change["path"]: i for i, change in enumerate(live)}
+        self._stale_changes = 0
+
+    @property
+    def changes(self) -> List[Dict[str, Any]]:
+        """The latest change per path held in memory, oldest first."""
+        with self._lock:
+            return [change for change in self._change_log if change is not None]
 
     def insert_document(self, path: str, file: str, **kwargs) -> None:
         """
@@ -38,15 +208,16 @@ class MemoryStorage:
             file: The filename of the document.
             **kwargs: Additional metadata for the document.
         """
-        timestamp = datetime.now(timezone.utc).isoformat()
-        self.files[path] = {
-            "path": path,
-            "file": file,
-            "status": "new",
-            "timestamp": timestamp,
-            **kwargs,
-        }
-        self.changes.append({"path": path, "status": "new", "timestamp": timestamp})
+        with self._lock:
+            timestamp = self._now()
+            self.files[path] = {
+                "path": path,
+                "file": file,
+                "status": "new",
+                "timestamp": timestamp,
+                **kwargs,
+            }
+            self._record_change(path, "new", timestamp)
         logger.info("Document inserted in memory.")
 
     def update_document(self, path: str, status: str, **kwargs) -> None:
@@ -58,17 +229,16 @@ class MemoryStorage:
             status: The new status of the document.
             **kwargs: Additional metadata to update.
         """
-        if path in self.files:
-            timestamp = datetime.now(timezone.utc).isoformat()
-            self.files[path].update(
-                {"status": status, "timestamp": timestamp, **kwargs}
-            )
-            self.changes.append(
-                {"path": path, "status": status, "timestamp": timestamp}
-            )
-            logger.info("Document updated in memory.")
-        else:
-            logger.warning("Document not found in memory.")
+        with self._lock:
+            if path in self.files:
+                timestamp = self._now()
+                self.files[path].update(
+                    {"status": status, "timestamp": timestamp, **kwargs}
+                )
+                self._record_change(path, status, timestamp)
+                logger.info("Document updated in memory.")
+            else:
+                logger.warning("Document not found in memory.")
 
     def delete_document(self, path: str) -> None:
         """
@@ -77,15 +247,14 @@ class MemoryStorage:
         Args:
             path: The path to the document.
         """
-        if path in self.files:
-            timestamp = datetime.now(timezone.utc).isoformat()
-            del self.files[path]
-            self.changes.append(
-                {"path": path, "status": "deleted", "timestamp": timestamp}
-            )
-            logger.info("Document deleted from memory.")
-        else:
-            logger.warning("Document not found in memory.")
+        with self._lock:
+            if path in self.files:
+                timestamp = self._now()
+                del self.files[path]
+                self._record_change(path, "deleted", timestamp)
+                logger.info("Document deleted from memory.")
+            else:
+                logger.warning("Document not found in memory.")
 
     def get_document(self, path: str) -> Optional[Dict[str, Any]]:
         """
@@ -118,22 +287,62 @@ class MemoryStorage:
         """
         Get changes since the given timestamp.
 
+        Only the latest change per path is returned, oldest first. When a spill
+        file is configured, changes evicted from memory are included as well.
+
         Args:
             timestamp: The timestamp to get changes since. If None, returns all changes.
 
         Returns:
             A list of changes.
         """
-        if timestamp is None:
-            return self.changes
+        with self._lock:
+            start = (
+                0
+                if timestamp is None
+                else bisect_right(self._change_timestamps, timestamp)
+            )
+            recent = [
+                change for change in self._change_log[start:] if change is not None
+            ]
 
-        return [change for change in self.changes if change["timestamp"] > timestamp]
+            # Older changes may have been spilled; only consult SQLite if the
+            # requested window reaches past the start of the in-memory log
+            if self._spill_conn is None or (
+                timestamp is not None
+                and self._change_timestamps
+                and timestamp >= self._change_timestamps[0]
+            ):
+                return recent
+
+            query = "SELECT path, status, timestamp FROM changes"
+            params: tuple = ()
+            if timestamp is not None:
+                query += " WHERE timestamp > ?"
+                params = (timestamp,)
+            query += " ORDER BY timestamp"
+            try:
+                rows = self._spill_conn.execute(query, params).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to read spilled changes from {self.spill_path}: {e}")
+                return recent
+
+            spilled = [
+                {"path": path, "status": status, "timestamp": ts}
+                for path, status, ts in rows
+                if path not in self._latest_change
+            ]
+            return spilled + recent
 
     def clear(self) -> None:
         """Clear the memory storage."""
-        self.files = {}
-        self.changes = []
-        self.last_scan_time = None
+        with self._lock:
+            self.files = {}
+            self._reset_change_log()
+            self.last_scan_time = None
+            if self._spill_conn is not None:
+                with self._spill_conn:
+                    self._spill_conn.execute("DELETE FROM changes")
         logger.info("Memory storage cleared")
 
     def set_last_scan_time(self) -> None:
@@ -0,0 +1,27 @@
+"""
+Metrics package for the SAM RAG plugin.
+
+This package contains the stage-level metrics and optional tracing of the
+ingestion and retrieval paths, and the sinks they are exported through.
+"""
+
+from .metrics import (
+    Metrics,
+    configure_metrics,
+    get_metrics,
+    set_metrics,
+    shutdown_metrics,
+)
+from .sinks import InMemorySink, MetricsSink, NullSink, PrometheusSink
+
+__all__ = [
+    "Metrics",
+    "MetricsSink",
+    "InMemorySink",
+    "NullSink",
+    "PrometheusSink",
+    "configure_metrics",
+    "get_metrics",
+    "set_metrics",
+    "shutdown_metrics",
+]
@@ -0,0 +1,311 @@
+"""
+Stage-level metrics and tracing of the RAG services.
+
+The services record through the process-wide `Metrics` returned by
+`get_metrics`. Until `configure_metrics` enables a sink, every call is a
+no-op, so instrumented code needs no checks of its own.
+"""
+
+import contextlib
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from ..lazy_imports import is_available
+from .sinks import InMemorySink, MetricsSink, NullSink, PrometheusSink
+
+logger = logging.getLogger(__name__)
+
+# Names of the metrics recorded by the services
+STAGE_DURATION = "sam_rag_stage_duration_seconds"
+STAGE_ERRORS = "sam_rag_stage_errors_total"
+DOCUMENTS = "sam_rag_documents_total"
+SECTIONS = "sam_rag_sections_total"
+CHUNKS = "sam_rag_chunks_total"
+EMBEDDING_REQUESTS = "sam_rag_embedding_requests_total"
+EMBEDDING_TEXTS = "sam_rag_embedding_texts_total"
+EMBEDDING_TOKENS = "sam_rag_embedding_tokens_total"
+EMBEDDING_DURATION = "sam_rag_embedding_request_duration_seconds"
+LLM_REQUESTS = "sam_rag_llm_requests_total"
+LLM_TOKENS = "sam_rag_llm_tokens_total"
+CACHE_REQUESTS = "sam_rag_cache_requests_total"
+VECTOR_DB_DURATION = "sam_rag_vector_db_duration_seconds"
+VECTOR_DB_DOCUMENTS = "sam_rag_vector_db_documents_total"
+JOB_QUEUE_JOBS = "sam_rag_job_queue_jobs"
+ADAPTIVE_RETRIEVALS = "sam_rag_adaptive_retrievals_total"
+
+DESCRIPTIONS = {
+    STAGE_DURATION: "Duration of the ingestion and retrieval stages.",
+    STAGE_ERRORS: "Stages that raised an exception.",
+    DOCUMENTS: "Documents processed by the ingestion pipeline, by status.",
+    SECTIONS: "Pages or sections read by the preprocessors.",
+    CHUNKS: "Chunks produced by the splitters, by status.",
+    EMBEDDING_REQUESTS: "Requests made to the embedding model.",
+    EMBEDDING_TEXTS: "Texts sent to the embedding model.",
+    EMBEDDING_TOKENS: "Tokens billed by the embedding model.",
+    EMBEDDING_DURATION: "Duration of the requests to the embedding model.",
+    LLM_REQUESTS: "Requests made to the augmentation model, by status.",
+    LLM_TOKENS: "Tokens billed by the augmentation model, by kind.",
+    CACHE_REQUESTS: "Lookups of the retrieval and augmentation caches, by result.",
+    VECTOR_DB_DURATION: "Duration of the vector database operations.",
+    VECTOR_DB_DOCUMENTS: "Documents written to or deleted from the vector database.",
+    JOB_QUEUE_JOBS: "Jobs in the ingestion job queue, by status.",
+    ADAPTIVE_RETRIEVALS: "Adaptive retrievals, by the search that answered them.",
+}
+
+
+class Metrics:
+    """
+    Facade over a metrics sink and an optional OpenTelemetry tracer.
+    """
+
+    def __init__(self, sink: Optional[MetricsSink] = None, tracer: Any = None):
+        """
+        Initialize the facade.
+
+        Args:
+            sink: The sink the metrics are sent to (default: a NullSink).
+            tracer: An OpenTelemetry tracer; spans are opened around stages
+                when set.
+        """
+        self.sink = sink or NullSink()
+        self.tracer = tracer
+
+    @property
+    def enabled(self) -> bool:
+        """Whether metrics or spans are recorded."""
+        return not isinstance(self.sink, NullSink) or self.tracer is not None
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name: The metric name.
+            value: The amount to add.
+            **labels: The labels of the series.
+        """
+        if value:
+            self.sink.increment(name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Record an observation.
+
+        Args:
+            name: The metric name.
+            value: The observed value.
+            **labels: The labels of the series.
+        """
+        self.sink.observe(name, value, labels)
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Set a gauge.
+
+        Args:
+            name: The metric name.
+            value: The current value.
+            **labels: The labels of the series.
+        """
+        self.sink.set_gauge(name, value, labels)
+
+    def add_collector(self, collector: Callable[[MetricsSink], None]) -> None:
+        """
+        Register a callable that sets gauges before the metrics are read.
+
+        Args:
+            collector: Called with the sink.
+        """
+        self.sink.add_collector(collector)
+
+    def remove_collector(self, collector: Callable[[MetricsSink], None]) -> None:
+        """
+        Unregister a collector, e.g. when the component that added it stops.
+
+        Args:
+            collector: A collector passed to `add_collector`.
+        """
+        self.sink.remove_collector(collector)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """
+        Record the duration of a block, in seconds, including failed runs.
+
+        Args:
+            name: The metric name.
+            **labels: The labels of the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sink.observe(name, time.perf_counter() - start, labels)
+
+    @contextlib.contextmanager
+    def stage(self, stage: str, **attributes: Any) -> Iterator[Any]:
+        """
+        Time a stage of the ingestion or retrieval path.
+
+        The duration is recorded under `sam_rag_stage_duration_seconds` and a
+        failure under `sam_rag_stage_errors_total`, both labelled with the
+        stage only. The attributes are set on the span, if tracing is
+        enabled, and are not used as labels because they can have many
+        values, such as file names.
+
+        Args:
+            stage: The stage name, e.g. "embed".
+            **attributes: Span attributes.
+
+        Yields:
+            The OpenTelemetry span, or None if tracing is disabled.
+        """
+        span_context = (
+            self.tracer.start_as_current_span(f"sam_rag.{stage}")
+            if self.tracer is not None
+            else contextlib.nullcontext()
+        )
+        start = time.perf_counter()
+        with span_context as span:
+            if span is not None:
+                for key, value in attributes.items():
+                    if value is not None:
+                        span.set_attribute(f"sam_rag.{key}", value)
+            try:
+                yield span
+            except Exception:
+                self.sink.increment(STAGE_ERRORS, 1, {"stage": stage})
+                raise
+            finally:
+                self.sink.observe(STAGE_DURATION, time.perf_counter() - start, {"stage": stage})
+
+
+_metrics = Metrics()
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """
+    Get the process-wide metrics.
+
+    Returns:
+        The metrics configured by `configure_metrics`, or a no-op facade.
+    """
+    return _metrics
+
+
+def _create_sink(config: Dict[str, Any]) -> MetricsSink:
+    """
+    Create the sink named in the metrics configuration.
+
+    Args:
+        config: The metrics configuration.
+
+    Returns:
+        The sink.
+    """
+    sink_type = config.get("sink", "prometheus")
+    if sink_type == "prometheus":
+        return PrometheusSink({"descriptions": DESCRIPTIONS, **config.get("prometheus", {})})
+    if sink_type == "memory":
+        return InMemorySink()
+    if sink_type == "none":
+        return NullSink()
+    if ":" in sink_type:
+        # A custom sink, given as "package.module:ClassName"
+        module_name, class_name = sink_type.split(":", 1)
+        sink_class = getattr(importlib.import_module(module_name), class_name)
+        return sink_class(config.get("sink_params", {}))
+    raise ValueError(f"Unsupported metrics sink: {sink_type}") from None
+
+
+def _create_tracer(config: Dict[str, Any]) -> Any:
+    """
+    Get an OpenTelemetry tracer if tracing is enabled and installed.
+
+    Args:
+        config: The metrics configuration.
+
+    Returns:
+        The tracer, or None.
+    """
+    if not config.get("tracing", {}).get("enabled", False):
+        return None
+    if not is_available("opentelemetry"):
+        logger.warning(
+            "Tracing is enabled but opentelemetry-api is not installed; no spans are recorded."
+        )
+        return None
+    from opentelemetry import trace
+
+    return trace.get_tracer("sam_rag")
+
+
+def configure_metrics(config: Optional[Dict[str, Any]]) -> Metrics:
+    """
+    Configure the process-wide metrics.
+
+    Agents in the same process share the metrics, so the first enabled
+    configuration wins and later ones are ignored.
+
+    Args:
+        config: The metrics configuration.
+            - enabled: Whether metrics are recorded (default: False).
+            - sink: "prometheus" (default), "memory", "none" or the dotted
+              path of a `MetricsSink` subclass, as "package.module:Class".
+            - sink_params: Configuration passed to a custom sink.
+            - prometheus: host and port of the /metrics endpoint, and
+              histogram buckets.
+            - tracing: enabled, to open OpenTelemetry spans around stages.
+
+    Returns:
+        The process-wide metrics.
+    """
+    global _metrics
+    config = config or {}
+    if not config.get("enabled", False):
+        return _metrics
+    with _metrics_lock:
+        if _metrics.enabled:
+            logger.debug("Metrics are already configured")
+            return _metrics
+        try:
+            sink = _create_sink(config)
+        except Exception:
+            # E.g. the endpoint port is taken; ingestion runs without metrics
+            logger.exception("Failed to create the metrics sink, metrics are disabled.")
+            return _metrics
+        _metrics = Metrics(sink, _create_tracer(config))
+        logger.info(f"Recording metrics with {type(_metrics.sink).__name__}")
+        return _metrics
+
+
+def set_metrics(metrics: Optional[Metrics]) -> Metrics:
+    """
+    Replace the process-wide metrics, e.g. with an in-memory sink in tests.
+
+    Args:
+        metrics: The new metrics, or None to disable them.
+
+    Returns:
+        The previous metrics.
+    """
+    global _metrics
+    with _metrics_lock:
+        previous = _metrics
+        _metrics = metrics or Metrics()
+        return previous
+
+
+def shutdown_metrics() -> None:
+    """
+    Close the sink of the process-wide metrics and disable them.
+
+    The metrics are shared by all agents in the process, so this is for the
+    host at process exit, not for the cleanup of a single agent.
+    """
+    previous = set_metrics(None)
+    previous.sink.close()
@@ -0,0 +1,418 @@
+"""
+Destinations of the metrics recorded by the RAG services.
+
+A sink receives counter increments, observations of durations and gauge
+values. `NullSink` drops them, `InMemorySink` keeps them for tests and
+`PrometheusSink` aggregates them and serves them in the Prometheus text
+exposition format.
+"""
+
+import bisect
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Labels of a series, sorted by name
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Upper bounds of the duration histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def label_set(labels: Optional[Dict[str, Any]]) -> LabelSet:
+    """Convert labels to a hashable, sorted tuple of strings."""
+    if not labels:
+        return ()
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class MetricsSink(ABC):
+    """
+    Abstract base class of metrics sinks.
+
+    Collectors are callables run before the metrics are read, to set gauges
+    whose value is cheaper to read on demand, such as queue depths.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the sink.
+
+        Args:
+            config: Sink-specific configuration.
+        """
+        self.config = config or {}
+        self._collectors: List[Callable[["MetricsSink"], None]] = []
+
+    @abstractmethod
+    def increment(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name: The metric name.
+            value: The amount to add.
+            labels: Optional labels of the series.
+        """
+        pass
+
+    @abstractmethod
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record an observation, such as a duration in seconds.
+
+        Args:
+            name: The metric name.
+            value: The observed value.
+            labels: Optional labels of the series.
+        """
+        pass
+
+    @abstractmethod
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Set a gauge.
+
+        Args:
+            name: The metric name.
+            value: The current value.
+            labels: Optional labels of the series.
+        """
+        pass
+
+    def add_collector(self, collector: Callable[["MetricsSink"], None]) -> None:
+        """
+        Register a callable run with the sink before the metrics are read.
+
+        Args:
+            collector: Called with the sink; usually sets gauges.
+        """
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[["MetricsSink"], None]) -> None:
+        """
+        Unregister a collector.
+
+        Args:
+            collector: A collector passed to `add_collector`.
+        """
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def collect(self) -> None:
+        """Run the collectors. A failing collector is logged and skipped."""
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+    def close(self) -> None:
+        """Release the resources of the sink."""
+        pass
+
+
+class NullSink(MetricsSink):
+    """
+    Sink that drops all metrics, used while metrics are disabled.
+    """
+
+    def increment(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def add_collector(self, collector: Callable[["MetricsSink"], None]) -> None:
+        pass
+
+
+class InMemorySink(MetricsSink):
+    """
+    Sink that keeps every value in memory, for tests and debugging.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the in-memory sink.
+
+        Args:
+            config: Unused.
+        """
+        super().__init__(config)
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, LabelSet], float] = {}
+        self.observations: Dict[Tuple[str, LabelSet], List[float]] = {}
+        self.gauges: Dict[Tuple[str, LabelSet], float] = {}
+
+    def increment(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = (name, label_set(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = (name, label_set(labels))
+        with self._lock:
+            self.observations.setdefault(key, []).append(value)
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            self.gauges[(name, label_set(labels))] = value
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """
+        Get the value of a counter.
+
+        Args:
+            name: The metric name.
+            **labels: The labels of the series.
+
+        Returns:
+            The counter value, 0 if it was never incremented.
+        """
+        with self._lock:
+            return self.counters.get((name, label_set(labels)), 0.0)
+
+    def values(self, name: str, **labels: Any) -> List[float]:
+        """
+        Get the observations of a series.
+
+        Args:
+            name: The metric name.
+            **labels: The labels of the series.
+
+        Returns:
+            The observed values, oldest first.
+        """
+        with self._lock:
+            return list(self.observations.get((name, label_set(labels)), []))
+
+    def gauge(self, name: str, **labels: Any) -> Optional[float]:
+        """
+        Get the value of a gauge, running the collectors first.
+
+        Args:
+            name: The metric name.
+            **labels: The labels of the series.
+
+        Returns:
+            The gauge value, or None if it was never set.
+        """
+        self.collect()
+        with self._lock:
+            return self.gauges.get((name, label_set(labels)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all metrics, running the collectors first.
+
+        Returns:
+            Counters, observation summaries and gauges, keyed by metric name
+            followed by its labels in Prometheus notation.
+        """
+        self.collect()
+        with self._lock:
+            return {
+                "counters": {_series_name(*key): value for key, value in self.counters.items()},
+                "observations": {
+                    _series_name(*key): {"count": len(values), "sum": sum(values)}
+                    for key, values in self.observations.items()
+                },
+                "gauges": {_series_name(*key): value for key, value in self.gauges.items()},
+            }
+
+    def reset(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self.counters.clear()
+            self.observations.clear()
+            self.gauges.clear()
+
+
+class _Histogram:
+    """Cumulative bucket counts, sum and count of one histogram series."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Sink that aggregates metrics and serves them to Prometheus.
+
+    Counters and gauges are kept as values and observations as histograms.
+    The text exposition format is rendered by `render`, and an optional
+    HTTP server serves it on `/metrics`.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the Prometheus sink.
+
+        Args:
+            config: A dictionary containing configuration parameters.
+                - port: Port of the HTTP endpoint; 0 or unset serves nothing,
+                  for callers that expose `render` themselves.
+                - host: Address the endpoint listens on (default: "0.0.0.0").
+                - buckets: Upper bounds of the histogram buckets, in seconds.
+                - descriptions: Help text of each metric name.
+        """
+        super().__init__(config)
+        self.buckets = tuple(sorted(float(b) for b in self.config.get("buckets", DEFAULT_BUCKETS)))
+        self.descriptions: Dict[str, str] = dict(self.config.get("descriptions", {}))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, _Histogram]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        port = int(self.config.get("port", 0) or 0)
+        if port:
+            self.start_server(self.config.get("host", "0.0.0.0"), port)
+
+    def increment(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = label_set(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = label_set(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[label_set(labels)] = value
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format, version 0.0.4.
+
+        Returns:
+            The exposition text.
+        """
+        self.collect()
+        lines: List[str] = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(metrics):
+                    self._header(lines, name, kind)
+                    for labels, value in sorted(metrics[name].items()):
+                        lines.append(f"{_series_name(name, labels)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                self._header(lines, name, "histogram")
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = labels + (("le", _format_value(bound)),)
+                        lines.append(f"{_series_name(name + '_bucket', bucket_labels)} {cumulative}")
+                    bucket_labels = labels + (("le", "+Inf"),)
+                    lines.append(f"{_series_name(name + '_bucket', bucket_labels)} {histogram.count}")
+                    lines.append(f"{_series_name(name + '_sum', labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{_series_name(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        """Add the HELP and TYPE lines of a metric."""
+        description = self.descriptions.get(name)
+        if description:
+            lines.append(f"# HELP {name} {_escape_help(description)}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def start_server(self, host: str, port: int) -> None:
+        """
+        Serve the metrics on `http://host:port/metrics` from a daemon thread.
+
+        Args:
+            host: The address to listen on.
+            port: The port to listen on.
+        """
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metrics endpoint: " + format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        thread = threading.Thread(
+            target=self._server.serve_forever, name="rag-metrics-endpoint", daemon=True
+        )
+        thread.start()
+        logger.info(f"Serving Prometheus metrics on http://{host}:{self._server.server_port}/metrics")
+
+    @property
+    def server_port(self) -> Optional[int]:
+        """The port the metrics endpoint listens on, or None if it is not served."""
+        return self._server.server_port if self._server else None
+
+    def close(self) -> None:
+        """Stop the metrics endpoint."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+    """Escape help text for the exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _series_name(name: str, labels: LabelSet) -> str:
+    """Format a series as `name{label="value",...}`."""
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the exposition format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -1,10 +1,13 @@
 """The ingestion agent component for the rag"""
 
+import hashlib
 import logging
 import os
 import sys
 import threading
-from typing import Dict, List, Any
+import time
+import uuid
+from typing import Dict, List, Any, Optional
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.dirname(SCRIPT_DIR))
@@ -18,6 +21,16 @@ from sam_rag.services.preprocessor.preprocessor_service import PreprocessorServi
 from sam_rag.services.splitter.splitter_service import SplitterService
 from sam_rag.services.embedder.embedder_service import EmbedderService
 from sam_rag.services.rag.augmentation_service import AugmentationService
+from sam_rag.services.jobs.job_queue import JobQueue, JobWorkerPool, PRIORITY_BATCH
+from sam_rag.services.dedupe import ChunkDeduplicator
+from sam_rag.services.metrics import configure_metrics, get_metrics
+from sam_rag.services.metrics.metrics import CHUNKS, DOCUMENTS, JOB_QUEUE_JOBS, SECTIONS
+
+# Job kind for ingesting one file through process_files
+INGEST_FILE_JOB = "ingest_file"
+
+# Namespace of the deterministic vector database ids of chunks
+CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "sam-rag/chunk")
 
 log = logging.getLogger(__name__)
 
@@ -48,8 +61,26 @@ class Pipeline:
         self.augmentation_handler = None
         self.use_memory_storage = False
         self.batch_mode = False
-        # Create handlers
-        self._create_handlers()
+        self.job_queue = None
+        self.job_workers = None
+        self.deduplicator = None
+        # Chunks deduplicated, embedded and stored together while a file is streamed
+        ingestion_config = self.component_config.get("ingestion", {}) or {}
+        self.window_chunks = max(1, int(ingestion_config.get("window_chunks", 256)))
+        self.sparse_model_ready = False
+        configure_metrics(self.component_config.get("metrics", {}))
+        # Create handlers, timing each stage of startup
+        self.startup_timings = {}
+        started = time.perf_counter()
+        for stage, create in (
+            ("handlers", self._create_handlers),
+            ("dedupe", self._create_deduplicator),
+            ("job_queue", self._create_job_queue),
+        ):
+            stage_started = time.perf_counter()
+            create()
+            self.startup_timings[stage] = time.perf_counter() - stage_started
+        self._check_startup_time(time.perf_counter() - started)
 
         # Run the ingestion pipeline in a separate thread
         self.ingestion_thread = threading.Thread(target=self._run)
@@ -86,6 +117,12 @@ class Pipeline:
         """
         Process files through a complete RAG pipeline: preprocess, chunk, embed, and ingest.
 
+        Each file is read as a stream of sections (pages for PDFs, row groups
+        for CSV files). Sections are split as they arrive, and the chunks are
+        deduplicated, embedded and stored in windows of `ingestion.window_chunks`
+        chunks, so neither a whole document nor all of its chunks are held in
+        memory.
+
         Args:
             file_paths: List of file paths to process.
             metadata: Optional metadata to merge with file metadata for cloud storage files.
@@ -94,156 +131,432 @@ class Pipeline:
             A dictionary containing the processing results.
         """
         log.info("Processing %d files through the RAG pipeline", len(file_paths))
-
-        # Step 1: Preprocess files
-        preprocessed_docs = []
-        preprocessed_metadata = []
-
-        for i, file_path in enumerate(file_paths):
+        metrics = get_metrics()
+
+        document_ids = []
+        duplicate_count = 0
+        errors = []
+        statuses = []
+        for file_path in file_paths:
+            outcome = {"status": "failed", "document_ids": [], "duplicates": 0}
             try:
-                # Handle both cloud URIs and local files
-                if self._is_cloud_uri(file_path):
-                    # Cloud file - should already be downloaded to temp location by cloud provider
-                    log.debug("Processing cloud file: %s", file_path)
-                else:
-                    # Local file - verify it exists
-                    if not os.path.exists(file_path):
-                        log.warning("Local file not found: %s", file_path)
-                        continue
-
-                # Get the document type
-                doc_type = self._get_file_type(file_path)
-
-                # Process the file with the appropriate preprocessor config
-                # The preprocessor service will select the right preprocessor based on file type
-                preprocess_output = self.preprocessing_handler.preprocess_file(
-                    file_path
-                )
-                text = preprocess_output.get("text_content", None)
-                file_metadata = preprocess_output.get("metadata", {})
-
-                # Merge provided metadata with file metadata (provided metadata takes precedence)
-                if metadata:
-                    merged_metadata = file_metadata.copy()
-                    merged_metadata.update(metadata)
-                    # Ensure the file_path is preserved from the provided metadata if it exists
-                    if "file_path" in metadata:
-                        merged_metadata["file_path"] = metadata["file_path"]
-                        # Use the cloud URI as the source for consistency
-                        source_path = metadata["file_path"]
-                    else:
-                        source_path = file_path
-                    
-                    # Ensure artifact_url is preserved if it exists in the provided metadata
-                    if "artifact_url" in metadata:
-                        merged_metadata["artifact_url"] = metadata["artifact_url"]
-                        log.debug("Preserved artifact URL in metadata: %s", metadata['artifact_url'])
-                else:
-                    merged_metadata = file_metadata
-                    source_path = file_path
-
-                if text:
-                    preprocessed_docs.append(text)
-                    preprocessed_metadata.append(
-                        {
-                            "source": source_path,
-                            "metadata": merged_metadata,
-                        }
-                    )
-                    log.info("Successfully preprocessed a file: %s", file_path)
-                else:
-                    log.warning("Failed to preprocess a file.")
+                self._process_file(file_path, metadata, outcome)
             except Exception:
-                log.exception("Error preprocessing file %s.", file_path)
-
-        if not preprocessed_docs:
-            log.warning("No documents were successfully preprocessed")
+                log.exception("Error processing file %s.", file_path)
+                outcome["status"] = "failed"
+            metrics.count(DOCUMENTS, status=outcome["status"])
+            statuses.append(outcome["status"])
+            document_ids.extend(outcome["document_ids"])
+            duplicate_count += outcome["duplicates"]
+            if outcome.get("error"):
+                errors.append(outcome["error"])
+
+        if errors:
             return {
                 "success": False,
-                "message": "No documents were successfully preprocessed",
-                "document_ids": [],
+                "message": " ".join(errors),
+                "document_ids": document_ids,
             }
-
-        # Refit the sparse model if hybrid search is enabled, using all preprocessed document texts
-        if (
-            self.embedding_handler
-            and hasattr(self.embedding_handler, "hybrid_search_enabled")
-            and self.embedding_handler.hybrid_search_enabled
-        ):
-            log.info(
-                "Pipeline: Hybrid search is enabled. Refitting sparse model with actual corpus documents."
-            )
-            log.debug(
-                "[HYBRID_SEARCH_DEBUG] Refitting sparse model with %d actual corpus documents", len(preprocessed_docs)
-            )
-            # Use the new refit method that combines sample corpus with actual documents
-            if hasattr(self.embedding_handler, "refit_sparse_model_with_corpus"):
-                self.embedding_handler.refit_sparse_model_with_corpus(preprocessed_docs)
+        if "ingested" not in statuses:
+            if "empty" in statuses:
+                message = "No chunks were created from the documents"
             else:
-                # Fallback to original method for backward compatibility
-                self.embedding_handler.fit_sparse_model(preprocessed_docs)
-        else:
-            log.info(
-                "Pipeline: Hybrid search is disabled or embedding_handler is not configured for it. Skipping sparse model fitting."
-            )
+                message = "No documents were successfully preprocessed"
+            log.warning(message)
+            return {"success": False, "message": message, "document_ids": document_ids}
 
-        # Step 2: Split documents into chunks
-        chunks = []
-        chunks_metadata = []
+        message = f"Successfully ingested {len(document_ids)} points into vector database"
+        if duplicate_count:
+            message += f" ({duplicate_count} duplicate chunks skipped)"
+        return {
+            "success": True,
+            "message": message,
+            "document_ids": document_ids,
+            "duplicates": duplicate_count,
+        }
 
-        for i, (doc, data) in enumerate(zip(preprocessed_docs, preprocessed_metadata)):
-            try:
-                # Get the metadata
-                meta = data.get("metadata", {})
-                # Get the document type
-                doc_type = meta.get("file_type", "text")
+    def _process_file(
+        self, file_path: str, metadata: Optional[Dict[str, Any]], outcome: Dict[str, Any]
+    ) -> None:
+        """
+        Stream one file through the pipeline, storing its chunks window by window.
 
-                # Split the document
-                doc_chunks = self.splitting_handler.split_text(doc, doc_type)
+        The preprocessor completes the file metadata while its stream is read,
+        so each window is stored with the metadata as it stands at that point:
+        counters such as `pages_extracted` or `row_count` hold their final
+        values only on the chunks of the last window.
 
-                # Add chunks and metadata
-                chunks.extend(doc_chunks)
-                chunks_metadata.extend([meta.copy() for _ in range(len(doc_chunks))])
+        Args:
+            file_path: Path of the file to process.
+            metadata: Optional metadata to merge with the file metadata.
+            outcome: Updated with the document status ("ingested", "empty",
+                "missing" or "failed"), the stored document ids, the number
+                of duplicate chunks skipped and, if embedding or storing a
+                window failed, the error message.
+        """
+        metrics = get_metrics()
+
+        # Handle both cloud URIs and local files
+        if self._is_cloud_uri(file_path):
+            # Cloud file - should already be downloaded to temp location by cloud provider
+            log.debug("Processing cloud file: %s", file_path)
+        elif not os.path.exists(file_path):
+            log.warning("Local file not found: %s", file_path)
+            outcome["status"] = "missing"
+            return
+
+        # Get the document type
+        doc_type = self._get_file_type(file_path)
+
+        # The preprocessor service selects the right preprocessor based on file type.
+        preprocess_output = self.preprocessing_handler.preprocess_file_stream(file_path)
+        if not preprocess_output:
+            log.warning("Failed to preprocess a file.")
+            return
+        file_metadata = preprocess_output.get("metadata", {})
+        stream = iter(preprocess_output["text_stream"])
+
+        section_count = 0
+        chunk_count = 0
+        window = []
+        try:
+            while True:
+                with metrics.stage("preprocess", file=file_path, file_type=doc_type):
+                    section = next(stream, None)
+                if section is not None and not section:
+                    continue
+                if section is not None:
+                    section_count += 1
+                    with metrics.stage("split", file=file_path, file_type=doc_type):
+                        window.extend(self.splitting_handler.split_text(section, doc_type))
+                # Store full windows, and what is left once the stream ends
+                while window and (section is None or len(window) >= self.window_chunks):
+                    chunks = window[: self.window_chunks]
+                    window = window[self.window_chunks :]
+                    if not self._ingest_window(
+                        chunks,
+                        self._merge_metadata(file_metadata, metadata),
+                        chunk_count,
+                        outcome,
+                    ):
+                        return
+                    chunk_count += len(chunks)
+                if section is None:
+                    break
+        finally:
+            metrics.count(SECTIONS, section_count, file_type=doc_type)
+            metrics.count(CHUNKS, chunk_count, status="created", file_type=doc_type)
+
+        if not section_count:
+            log.warning("Failed to preprocess a file.")
+            return
+        if not chunk_count:
+            outcome["status"] = "empty"
+            return
+        outcome["status"] = "ingested"
+        log.info("Ingested a file as %d chunks: %s", chunk_count, file_path)
+
+    @staticmethod
+    def _merge_metadata(
+        file_metadata: Dict[str, Any], metadata: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Merge the provided metadata over the file metadata, which it takes precedence over."""
+        merged_metadata = file_metadata.copy()
+        if metadata:
+            merged_metadata.update(metadata)
+            # Keep the cloud URI as the file path, and so as the chunk source
+            if "file_path" in metadata:
+                merged_metadata["file_path"] = metadata["file_path"]
+            if "artifact_url" in metadata:
+                merged_metadata["artifact_url"] = metadata["artifact_url"]
+        return merged_metadata
+
+    @staticmethod
+    def _chunk_id(source: Optional[str], content_hash: Optional[str], index: int, text: str) -> str:
+        """
+        Get the vector database id of a chunk.
 
-                log.info("Split a document into %d chunks", len(doc_chunks))
-            except Exception:
-                log.error("Error splitting a document")
+        The id is derived from the source, the content hash of the file and
+        the position of the chunk in it, so ingesting the same file again,
+        e.g. when a job is retried after a partial write, overwrites its
+        chunks instead of adding copies. Without a content hash, the chunk
+        text is hashed instead.
 
-        if not chunks:
-            log.warning("No chunks were created from the documents")
-            return {
-                "success": False,
-                "message": "No chunks were created from the documents",
-                "document_ids": [],
-            }
+        Args:
+            source: The file path or URI of the document.
+            content_hash: The SHA-256 of the file content, if known.
+            index: The position of the chunk in the document.
+            text: The chunk text.
+
+        Returns:
+            A UUID string, accepted as an id by every backend.
+        """
+        version = content_hash or hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{source}\n{version}\n{index}"))
+
+    def _ingest_window(
+        self,
+        chunks: List[str],
+        chunk_metadata: Dict[str, Any],
+        first_index: int,
+        outcome: Dict[str, Any],
+    ) -> bool:
+        """
+        Deduplicate, embed and store one window of chunks of a file.
+
+        Args:
+            chunks: The chunks of the window.
+            chunk_metadata: The metadata stored with every chunk.
+            first_index: The position of the first chunk in the document.
+            outcome: The outcome of the file, see `_process_file`.
+
+        Returns:
+            Whether the window was stored.
+        """
+        metrics = get_metrics()
+        ids = [
+            self._chunk_id(
+                chunk_metadata.get("file_path"),
+                chunk_metadata.get("content_hash"),
+                first_index + offset,
+                text,
+            )
+            for offset, text in enumerate(chunks)
+        ]
+
+        # Skip chunks that duplicate an earlier chunk of the window or the corpus
+        dedupe_plan = None
+        if self.deduplicator:
+            try:
+                with metrics.stage("dedupe", chunks=len(chunks)):
+                    dedupe_plan = self.deduplicator.plan(chunks)
+            except Exception:
+                log.exception("Error checking chunks for duplicates, embedding all chunks.")
+                dedupe_plan = None
+        sources = [chunk_metadata.get("file_path")] * len(chunks)
+        if dedupe_plan and dedupe_plan.duplicates:
+            # A chunk stored by an earlier attempt of this file matches itself
+            stored = [
+                duplicate
+                for duplicate in dedupe_plan.duplicates
+                if duplicate.get("canonical_document_id") == ids[duplicate["index"]]
+            ]
+            dedupe_plan.duplicates = [
+                duplicate for duplicate in dedupe_plan.duplicates if duplicate not in stored
+            ]
+            metrics.count(CHUNKS, len(dedupe_plan.duplicates), status="duplicate")
+            outcome["duplicates"] += len(dedupe_plan.duplicates)
+            outcome["document_ids"].extend(ids[duplicate["index"]] for duplicate in stored)
+            chunks = [chunks[i] for i in dedupe_plan.keep]
+            ids = [ids[i] for i in dedupe_plan.keep]
+            if not chunks:
+                self._record_duplicates(dedupe_plan, [], sources)
+                return True
+
+        # The sparse vocabulary is fitted once, on the first chunks ingested,
+        # and only loaded afterwards so that stored sparse vectors stay valid
+        if not self.sparse_model_ready and getattr(
+            self.embedding_handler, "hybrid_search_enabled", False
+        ):
+            try:
+                with metrics.stage("sparse_fit", chunks=len(chunks)):
+                    self.sparse_model_ready = self.embedding_handler.fit_sparse_model_once(
+                        chunks
+                    )
+            except Exception:
+                log.exception("Error fitting the sparse model.")
 
-        # Step 3: Embed chunks
+        # Embed the chunks as one float32 matrix
         try:
-            embeddings = self.embedding_handler.embed_texts(chunks)
-            log.info("Created %d embeddings", len(embeddings))
+            with metrics.stage("embed", chunks=len(chunks)):
+                embeddings = self.embedding_handler.embed_texts_batch(chunks)
         except Exception:
             log.exception("Error embedding chunks.")
-            return {
-                "success": False,
-                "message": "Error embedding chunks.",
-                "document_ids": [],
-            }
+            metrics.count(CHUNKS, len(chunks), status="failed")
+            outcome["error"] = "Error embedding chunks."
+            return False
+        if embeddings.get("sparse_model_version"):
+            # Sparse vectors only match queries vectorized with the same model
+            chunk_metadata = dict(
+                chunk_metadata, sparse_model_version=embeddings["sparse_model_version"]
+            )
 
-        # Step 4: Ingest embeddings into vector database
         try:
-            # Use the ingestion handler to store the embeddings
-            result = self.ingestion_handler.ingest_embeddings(
-                texts=chunks, embeddings=embeddings, metadata=chunks_metadata
-            )
-            log.info("Ingestion result: %s", result['message'])
-            return result
+            with metrics.stage("upsert", chunks=len(chunks)):
+                result = self.ingestion_handler.ingest_embedding_batch(
+                    texts=chunks,
+                    dense_vectors=embeddings["dense_vectors"],
+                    sparse_vectors=embeddings["sparse_vectors"],
+                    metadata=[chunk_metadata.copy() for _ in chunks],
+                    ids=ids,
+                )
         except Exception:
             log.exception("Error ingesting embeddings.")
-            return {
-                "success": False,
-                "message": "Error ingesting embeddings.",
-                "document_ids": [],
-            }
+            metrics.count(CHUNKS, len(chunks), status="failed")
+            outcome["error"] = "Error ingesting embeddings."
+            return False
+
+        log.info("Ingestion result: %s", result["message"])
+        outcome["document_ids"].extend(result.get("document_ids", []))
+        if not result.get("success"):
+            metrics.count(CHUNKS, len(chunks), status="failed")
+            outcome["error"] = result["message"]
+            return False
+        metrics.count(CHUNKS, len(chunks), status="stored")
+        if dedupe_plan:
+            self._record_duplicates(dedupe_plan, result["document_ids"], sources)
+        return True
+
+    def _record_duplicates(
+        self, plan, document_ids: List[str], sources: List[Optional[str]]
+    ) -> None:
+        """Store the signatures of ingested chunks and the links of their duplicates."""
+        try:
+            self.deduplicator.record(plan, document_ids, sources)
+        except Exception:
+            log.exception("Error recording chunk signatures in the dedupe index.")
+
+    def submit_file(
+        self,
+        file_path: str,
+        metadata: Dict[str, Any] = None,
+        priority: int = PRIORITY_BATCH,
+        content_hash: Optional[str] = None,
+        remove_after: bool = False,
+        ingested_state: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """
+        Ingest a file in the background through the job queue.
+
+        When the job queue is disabled the file is processed immediately.
+
+        Args:
+            file_path: Path to the local file to ingest.
+            metadata: Optional metadata to merge with the file metadata.
+            priority: Job priority; interactive ingests use PRIORITY_INTERACTIVE.
+            content_hash: SHA-256 of the file content. If the latest job for the
+                same document has the same hash, that job id is returned instead
+                of queuing the file again. Computed from the file if omitted.
+            remove_after: Whether to delete the file once the job has finished
+                (used for temporary downloads and uploads).
+            ingested_state: Tracker record (path, file, status, size, mtime and
+                content_hash) written once the file was ingested, so a file
+                whose ingest failed is not skipped as unchanged by later scans.
+
+        Returns:
+            The job id, or None if the file was processed immediately.
+        """
+        metadata = metadata or {}
+        if self.job_queue is None:
+            try:
+                result = self.process_files([file_path], metadata=metadata)
+                if result.get("success", False):
+                    self._record_ingested_state(ingested_state)
+            finally:
+                if remove_after:
+                    self._remove_file(file_path)
+            return None
+
+        if content_hash is None:
+            content_hash = self._hash_file(file_path)
+        # The stable identity of the document, as temporary paths change per upload
+        source = metadata.get("file_path") or metadata.get("file_name") or file_path
+        job_id = self.job_queue.enqueue(
+            INGEST_FILE_JOB,
+            {
+                "file_path": file_path,
+                "metadata": metadata,
+                "remove_after": remove_after,
+                "ingested_state": ingested_state,
+            },
+            priority=priority,
+            source=source,
+            content_hash=content_hash,
+        )
+        job = self.job_queue.get(job_id)
+        if remove_after and job and job["payload"].get("file_path") != file_path:
+            # Deduplicated against an earlier job; this copy is not needed
+            self._remove_file(file_path)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the state of an ingestion job.
+
+        Args:
+            job_id: The job id returned by submit_file.
+
+        Returns:
+            The job, or None if it does not exist or the job queue is disabled.
+        """
+        if self.job_queue is None:
+            return None
+        return self.job_queue.get(job_id)
+
+    def _run_ingest_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process the file of an ingest job, raising if the attempt failed.
+
+        Args:
+            job: The claimed job; its payload is written by submit_file.
+
+        Returns:
+            The pipeline result.
+        """
+        payload = job["payload"]
+        file_path = payload["file_path"]
+        succeeded = False
+        try:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File to ingest no longer exists: {file_path}")
+
+            result = self.process_files([file_path], metadata=payload.get("metadata"))
+            if not result.get("success", False):
+                raise RuntimeError(result.get("message", "Unknown error"))
+            succeeded = True
+            self._record_ingested_state(payload.get("ingested_state"))
+            return result
+        finally:
+            # Keep temporary files while the job can still be retried
+            last_attempt = job["attempts"] >= job["max_attempts"]
+            if payload.get("remove_after") and (succeeded or last_attempt):
+                self._remove_file(file_path)
+
+    @staticmethod
+    def _record_ingested_state(ingested_state: Optional[Dict[str, Any]]) -> None:
+        """Write the tracker record of a file once it was ingested."""
+        if not ingested_state:
+            return
+        try:
+            from sam_rag.services.database import connect
+
+            if connect.SessionLocal is None:
+                return
+            with connect.session_scope() as db:
+                connect.upsert_documents(db, [ingested_state])
+        except Exception:
+            log.exception("Error recording the ingested state of %s.", ingested_state.get("path"))
+
+    @staticmethod
+    def _hash_file(file_path: str) -> Optional[str]:
+        """Compute the SHA-256 of a file, or None if it cannot be read."""
+        try:
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            return digest.hexdigest()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _remove_file(file_path: str) -> None:
+        """Delete a temporary file, logging failures."""
+        try:
+            os.unlink(file_path)
+            log.debug("Removed temporary file: %s", file_path)
+        except OSError as e:
+            log.warning("Failed to remove temporary file %s: %s", file_path, e)
 
     def _is_cloud_uri(self, path: str) -> bool:
         """
@@ -457,7 +770,11 @@ class Pipeline:
         # Initialize the embedding handler
         embedder_config = self.component_config.get("embedding", {})
         self.embedding_handler = EmbedderService(
-            config=embedder_config, hybrid_search_config=self._hybrid_search_config
+            config=embedder_config,
+            hybrid_search_config=self._hybrid_search_config,
+            embedding_dimension=self.component_config.get("vector_db", {})
+            .get("db_params", {})
+            .get("embedding_dimension"),
         )
 
         # Initialize the augmentation handler
@@ -467,6 +784,76 @@ class Pipeline:
             hybrid_search_config=self._hybrid_search_config,
         )
 
+    def _check_startup_time(self, elapsed: float) -> None:
+        """Log how long startup took and warn when it exceeds the configured budget."""
+        timings = ", ".join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in self.startup_timings.items()
+        )
+        log.info("PIPELINE: Started in %.2fs (%s)", elapsed, timings)
+
+        startup_config = self.component_config.get("startup", {}) or {}
+        budget = startup_config.get("max_seconds", 10)
+        if budget and elapsed > budget:
+            slowest = max(self.startup_timings, key=self.startup_timings.get)
+            log.warning(
+                "PIPELINE: Startup took %.2fs, over the %.2fs budget; the slowest stage was %s. "
+                "Check the vector database connection and set embedding_dimension in the configuration.",
+                elapsed,
+                budget,
+                slowest,
+            )
+
+    def _create_deduplicator(self):
+        """Open the near-duplicate chunk index, if enabled."""
+        dedupe_config = self.component_config.get("dedupe", {}) or {}
+        if not dedupe_config.get("enabled", False):
+            return
+
+        try:
+            self.deduplicator = ChunkDeduplicator(dedupe_config)
+        except Exception:
+            log.exception("PIPELINE: Failed to open the dedupe index, embedding all chunks.")
+            self.deduplicator = None
+
+    def _create_job_queue(self):
+        """Open the durable ingestion job queue and start its workers, if enabled."""
+        queue_config = self.component_config.get("job_queue", {}) or {}
+        if not queue_config.get("enabled", True):
+            log.info("PIPELINE: Job queue disabled, files are ingested inline")
+            return
+
+        try:
+            self.job_queue = JobQueue(
+                queue_config.get("path", "rag_jobs.db"),
+                max_attempts=queue_config.get("max_attempts", 3),
+                backoff_seconds=queue_config.get("backoff_seconds", 5),
+                max_backoff_seconds=queue_config.get("max_backoff_seconds", 300),
+            )
+            retention_hours = queue_config.get("retention_hours", 168)
+            if retention_hours:
+                self.job_queue.purge(retention_hours * 3600)
+        except Exception:
+            log.exception("PIPELINE: Failed to open the job queue, ingesting inline.")
+            self.job_queue = None
+            return
+
+        self.job_workers = JobWorkerPool(
+            self.job_queue,
+            {INGEST_FILE_JOB: self._run_ingest_job},
+            workers=queue_config.get("workers", 1),
+            poll_interval=queue_config.get("poll_interval", 5),
+        )
+        self.job_workers.start()
+        get_metrics().add_collector(self._collect_queue_depth)
+        log.info("PIPELINE: Job queue opened at %s", self.job_queue.path)
+
+    def _collect_queue_depth(self, sink) -> None:
+        """Set the job queue depth gauges before the metrics are read."""
+        if self.job_queue is None:
+            return
+        for status, count in self.job_queue.counts().items():
+            sink.set_gauge(JOB_QUEUE_JOBS, count, {"status": status})
+
     def get_agent_summary(self):
         """Get a summary of the agent's capabilities."""
         return {
@@ -502,15 +889,31 @@ class Pipeline:
     def get_augmentation_handler(self):
         """Get the augmentation handler."""
         return self.augmentation_handler
+
+    def get_deduplicator(self):
+        """Get the near-duplicate chunk index, or None if dedupe is disabled."""
+        return self.deduplicator
         
     def cleanup(self):
         """Clean up resources used by the pipeline."""
         log.info("=== PIPELINE: Starting cleanup ===")
         
+        # Stop the job workers; unfinished jobs stay queued for the next start
+        if self.job_workers:
+            log.debug("PIPELINE: Stopping job workers")
+            self.job_workers.stop()
+        # Other agents in the process may still use the metrics, so only
+        # this pipeline's collector is removed
+        get_metrics().remove_collector(self._collect_queue_depth)
+        if self.job_queue:
+            self.job_queue.close()
+        if self.deduplicator:
+            self.deduplicator.close()
+
         # Clean up file tracker resources
         if self.file_tracker:
             log.debug("PIPELINE: Cleaning up file tracker resources")
-            # No specific cleanup method for file tracker currently
+            self.file_tracker.cleanup()
             
         # Clean up vector database connections
         if self.ingestion_handler:
@@ -2,15 +2,34 @@
 Document preprocessors for various file formats.
 """
 
+import io
 import logging
 import os
-from typing import Dict, Any, List
-from sam_rag.services.preprocessor.preprocessor_base import PreprocessorBase, PreprocessedOutput
+import sys
+import time
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from sam_rag.services.preprocessor.preprocessor_base import (
+    PreprocessorBase,
+    PreprocessedOutput,
+    PreprocessedStream,
+)
+from sam_rag.services.preprocessor.html_extraction import (
+    DEFAULT_SPLIT_TAGS,
+    DEFAULT_STRIP_TAGS,
+    extract_html,
+    extract_html_with_bs4,
+    is_lxml_available,
+    read_html,
+)
 from sam_rag.services.preprocessor.raw_text_preprocessor import RawTextPreprocessor
 import csv
 
 logger = logging.getLogger(__name__)
 
+# Data rows per section emitted for spreadsheets and CSV files
+DEFAULT_ROWS_PER_CHUNK = 100
+
 def filter_config(config: Dict[str, Any], key: str) -> Dict[str, Any]:
     """
     Filter the configuration dictionary to get the specific settings for a given key.
@@ -140,12 +159,75 @@ class TextFilePreprocessor(PreprocessorBase):
             return {"text_content": "", "metadata": metadata}
 
 
+def _current_rss_mb() -> Optional[float]:
+    """
+    Get the resident set size of this process in megabytes.
+
+    Reads /proc where available and falls back to the peak RSS reported by
+    the resource module. Returns None if neither is available.
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except (ImportError, OSError):
+        return None
+
+
+class _ExtractionBudget:
+    """
+    Per-document limits on the number of pages, time and memory used by extraction.
+
+    A limit of 0 disables that check.
+    """
+
+    def __init__(self, max_pages: int = 0, max_seconds: float = 0, max_memory_mb: float = 0):
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.max_memory_mb = max_memory_mb
+        self.started = time.monotonic()
+        self.rss_start = _current_rss_mb() if max_memory_mb else None
+
+    def exceeded(self, pages_done: int) -> Optional[str]:
+        """
+        Check the budget before extracting another page.
+
+        Args:
+            pages_done: The number of pages extracted so far.
+
+        Returns:
+            The name of the exceeded limit, or None if extraction may continue.
+        """
+        if self.max_pages and pages_done >= self.max_pages:
+            return "max_pages"
+        if self.max_seconds and time.monotonic() - self.started >= self.max_seconds:
+            return "max_seconds"
+        if self.max_memory_mb and self.rss_start is not None:
+            rss = _current_rss_mb()
+            if rss is not None and rss - self.rss_start >= self.max_memory_mb:
+                return "max_memory_mb"
+        return None
+
+
 class PDFPreprocessor(PreprocessorBase):
     """
     High-quality PDF preprocessor using pdfplumber (primary) and pypdf (fallback).
 
     This implementation provides superior text extraction with proper spacing,
     layout preservation, and table handling compared to basic PyPDF2.
+
+    Pages are extracted one at a time and released as soon as their text has
+    been taken, so memory use does not grow with the page count. The extractor
+    is chosen by scoring the first pages only, and extraction stops early when
+    the per-document page, time or memory budget is used up.
     """
 
     def __init__(self, config: Dict[str, Any] = None):
@@ -153,12 +235,28 @@ class PDFPreprocessor(PreprocessorBase):
         Initialize the enhanced PDF preprocessor.
 
         Args:
-            config: Configuration dictionary with PDF-specific settings.
+            config: Configuration dictionary with PDF-specific settings. The
+                optional `preprocessors.pdf.extraction` section accepts:
+                - sample_pages: Pages scored to choose the extractor (default: 5).
+                - max_pages: Maximum pages extracted per document (default: 0, no limit).
+                - max_seconds: Maximum extraction time per document (default: 0, no limit).
+                - max_memory_mb: Maximum growth of the process RSS while
+                  extracting a document (default: 0, no limit). The RSS is
+                  process-wide, so memory allocated by other threads in the
+                  meantime counts toward it too.
         """
         super().__init__(config)
         self.extraction_method = None
         self.quality_threshold = 0.7  # Minimum quality score to accept extraction
 
+        extraction_config = (
+            self.config.get("preprocessors", {}).get("pdf", {}).get("extraction", {})
+        )
+        self.sample_pages = max(1, int(extraction_config.get("sample_pages", 5)))
+        self.max_pages = int(extraction_config.get("max_pages", 0))
+        self.max_seconds = float(extraction_config.get("max_seconds", 0))
+        self.max_memory_mb = float(extraction_config.get("max_memory_mb", 0))
+
     def can_process(self, file_path: str) -> bool:
         """
         Check if this preprocessor can handle the given file.
@@ -181,8 +279,22 @@ class PDFPreprocessor(PreprocessorBase):
         Returns:
             A dictionary containing high-quality preprocessed text content and metadata.
         """
-        logger.info(f"Starting PDF preprocessing for: {file_path}")
+        stream = self.preprocess_stream(file_path)
+        text_content = "\n\n".join(stream["text_stream"])
+        return {"text_content": text_content, "metadata": stream["metadata"]}
+
+    def preprocess_stream(self, file_path: str) -> PreprocessedStream:
+        """
+        Preprocess a PDF file page by page.
 
+        Args:
+            file_path: Path to the PDF file.
+
+        Returns:
+            A dictionary containing an iterator over the preprocessed text of
+            each page and the metadata, which is complete once the iterator is
+            exhausted.
+        """
         metadata: Dict[str, Any] = {
             "file_path": file_path,
             "file_type": "pdf",
@@ -192,194 +304,275 @@ class PDFPreprocessor(PreprocessorBase):
             "extraction_quality": 0.0,
             "has_tables": False,
             "page_count": 0,
+            "pages_extracted": 0,
+            "truncated": None,
+        }
+        return {
+            "text_stream": self._stream_pages(file_path, metadata),
+            "metadata": metadata,
         }
 
-        # Try extraction methods in order of quality
-        extraction_result = self._extract_with_intelligence(file_path, metadata)
-
-        if not extraction_result["text_content"]:
-            logger.warning(f"No text could be extracted from PDF: {file_path}")
-            return {"text_content": "", "metadata": metadata}
+    def _stream_pages(self, file_path: str, metadata: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yield the preprocessed text of each page of a PDF.
 
-        # Apply text preprocessing
-        try:
-            pdf_config = filter_config(self.config, "pdf")
-            text_preprocessor = RawTextPreprocessor(pdf_config)
-            processed_text = text_preprocessor.preprocess(
-                extraction_result["text_content"]
-            )
+        Args:
+            file_path: Path to the PDF file.
+            metadata: Metadata dictionary to update.
 
-            logger.info(
-                f"Successfully processed PDF {file_path} using {metadata['extraction_method']} "
-                f"(quality: {metadata['extraction_quality']:.2f})"
-            )
+        Yields:
+            The preprocessed text of each non-empty page.
+        """
+        logger.info(f"Starting PDF preprocessing for: {file_path}")
 
-            return {"text_content": processed_text, "metadata": metadata}
+        pdf_config = filter_config(self.config, "pdf")
+        text_preprocessor = RawTextPreprocessor(pdf_config)
+        budget = _ExtractionBudget(self.max_pages, self.max_seconds, self.max_memory_mb)
+
+        yielded = False
+        for page_text in self._extract_with_intelligence(file_path, metadata, budget):
+            # Apply text preprocessing
+            try:
+                processed_text = text_preprocessor.preprocess(page_text)
+            except Exception as e:
+                logger.error(f"Error in text preprocessing for {file_path}: {str(e)}")
+                processed_text = page_text
+            if processed_text:
+                yielded = True
+                yield processed_text
+
+        if not yielded:
+            logger.warning(f"No text could be extracted from PDF: {file_path}")
+            return
 
-        except Exception as e:
-            logger.error(f"Error in text preprocessing for {file_path}: {str(e)}")
-            return {
-                "text_content": extraction_result["text_content"],
-                "metadata": metadata,
-            }
+        logger.info(
+            f"Successfully processed PDF {file_path} using {metadata['extraction_method']} "
+            f"(quality: {metadata['extraction_quality']:.2f}, "
+            f"pages: {metadata['pages_extracted']}/{metadata['page_count']})"
+        )
 
     def _extract_with_intelligence(
-        self, file_path: str, metadata: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        self, file_path: str, metadata: Dict[str, Any], budget: _ExtractionBudget
+    ) -> Iterator[str]:
         """
-        Intelligently extract text using the best available method.
+        Intelligently extract text page by page using the best available method.
+
+        pdfplumber extracts the first `sample_pages` pages and their text is
+        scored. If the score meets the quality threshold, pdfplumber carries on
+        from where the sample ended; otherwise the document is handed to pypdf.
+        Either way the document is only parsed in full once.
 
         Args:
             file_path: Path to the PDF file.
             metadata: Metadata dictionary to update.
+            budget: The extraction budget for this document.
 
-        Returns:
-            Dictionary with extracted text content and quality metrics.
+        Yields:
+            The extracted text of each non-empty page.
         """
         # Method 1: Try pdfplumber (best quality)
-        result = self._extract_with_pdfplumber(file_path, metadata)
-        if result["quality"] >= self.quality_threshold:
-            metadata["extraction_method"] = "pdfplumber"
-            metadata["extraction_quality"] = result["quality"]
-            return result
+        try:
+            import pdfplumber
+        except ImportError:
+            logger.warning(
+                "pdfplumber not available. Install with: pip install pdfplumber"
+            )
+            pdfplumber = None
+
+        if pdfplumber is not None:
+            try:
+                logger.debug(f"Attempting pdfplumber extraction for: {file_path}")
+                with pdfplumber.open(file_path) as pdf:
+                    pages = pdf.pages
+                    metadata["page_count"] = len(pages)
+
+                    # Extract metadata from PDF info
+                    self._extract_metadata_pdfplumber(pdf, metadata)
+
+                    sample = []
+                    for page_num in range(min(self.sample_pages, len(pages))):
+                        if self._budget_exceeded(budget, page_num, metadata):
+                            break
+                        sample.append(
+                            self._extract_pdfplumber_page(pages[page_num], metadata)
+                        )
 
-        logger.info(
-            f"pdfplumber quality too low ({result['quality']:.2f}), trying pypdf fallback"
-        )
+                    quality = self._calculate_text_quality(
+                        "".join(text + "\n\n" for text in sample if text)
+                    )
+                    # A budget used up while sampling leaves nothing for a
+                    # second extractor, so keep what pdfplumber produced
+                    if quality >= self.quality_threshold or metadata["truncated"]:
+                        metadata["extraction_method"] = "pdfplumber"
+                        metadata["extraction_quality"] = quality
+                        metadata["pages_extracted"] = len(sample)
+                        for text in sample:
+                            if text:
+                                yield text
+                        if metadata["truncated"]:
+                            return
+
+                        # Process the remaining pages
+                        for page_num in range(len(sample), len(pages)):
+                            if self._budget_exceeded(budget, page_num, metadata):
+                                break
+                            text = self._extract_pdfplumber_page(pages[page_num], metadata)
+                            metadata["pages_extracted"] = page_num + 1
+                            if text:
+                                yield text
+                        return
+
+                logger.info(
+                    f"pdfplumber quality too low ({quality:.2f}) on the first "
+                    f"{len(sample)} pages, trying pypdf fallback"
+                )
+            except Exception as e:
+                if metadata["extraction_method"] == "pdfplumber":
+                    # Pages were already yielded, so do not restart with pypdf
+                    logger.warning(
+                        f"pdfplumber extraction stopped for {file_path} after "
+                        f"{metadata['pages_extracted']} pages: {str(e)}"
+                    )
+                    return
+                logger.warning(f"pdfplumber extraction failed for {file_path}: {str(e)}")
 
         # Method 2: Try pypdf (fallback)
-        result = self._extract_with_pypdf(file_path, metadata)
         metadata["extraction_method"] = "pypdf"
-        metadata["extraction_quality"] = result["quality"]
+        yield from self._extract_with_pypdf(file_path, metadata, budget)
 
-        return result
-
-    def _extract_with_pdfplumber(
-        self, file_path: str, metadata: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    def _budget_exceeded(
+        self, budget: _ExtractionBudget, pages_done: int, metadata: Dict[str, Any]
+    ) -> bool:
         """
-        Extract text using pdfplumber with advanced layout analysis.
+        Check the extraction budget and record in the metadata why extraction stopped.
 
         Args:
-            file_path: Path to the PDF file.
+            budget: The extraction budget for this document.
+            pages_done: The number of pages extracted so far.
             metadata: Metadata dictionary to update.
 
         Returns:
-            Dictionary with extracted text and quality score.
+            True if no more pages should be extracted.
         """
-        try:
-            import pdfplumber
-            from datetime import datetime
-
-            logger.debug(f"Attempting pdfplumber extraction for: {file_path}")
-
-            text_content = ""
-            tables_found = 0
-
-            with pdfplumber.open(file_path) as pdf:
-                metadata["page_count"] = len(pdf.pages)
-
-                # Extract metadata from PDF info
-                self._extract_metadata_pdfplumber(pdf, metadata)
-
-                # Process each page with advanced extraction
-                for page_num, page in enumerate(pdf.pages):
-                    logger.debug(f"Processing page {page_num + 1}/{len(pdf.pages)}")
-
-                    # Extract tables first (they often have better structure)
-                    tables = page.extract_tables()
-                    if tables:
-                        tables_found += len(tables)
-                        for table in tables:
-                            table_text = self._format_table(table)
-                            if table_text:
-                                text_content += f"\n[TABLE]\n{table_text}\n[/TABLE]\n"
-
-                    # Extract regular text with layout preservation
-                    page_text = page.extract_text(
-                        x_tolerance=2,  # Horizontal tolerance for character grouping
-                        y_tolerance=2,  # Vertical tolerance for line grouping
-                        layout=True,  # Preserve layout structure
-                        x_density=7.25,  # Character density for word separation
-                        y_density=13,  # Line density for paragraph separation
-                    )
+        reason = budget.exceeded(pages_done)
+        if reason:
+            metadata["truncated"] = reason
+            logger.warning(
+                f"Stopping PDF extraction for {metadata['file_path']} after "
+                f"{pages_done} of {metadata['page_count']} pages: {reason} budget reached"
+            )
+            return True
+        return False
 
-                    if page_text:
-                        # Clean and enhance the extracted text
-                        cleaned_text = self._enhance_text_spacing(page_text)
-                        text_content += cleaned_text + "\n\n"
+    def _extract_pdfplumber_page(self, page, metadata: Dict[str, Any]) -> str:
+        """
+        Extract the tables and text of a single page with pdfplumber, then release it.
 
-            metadata["has_tables"] = tables_found > 0
-            if tables_found > 0:
-                logger.info(f"Extracted {tables_found} tables from PDF")
+        Args:
+            page: The pdfplumber page.
+            metadata: Metadata dictionary to update.
 
-            # Calculate quality score
-            quality = self._calculate_text_quality(text_content)
+        Returns:
+            The extracted text of the page.
+        """
+        parts = []
+        try:
+            # Extract tables first (they often have better structure)
+            tables = page.extract_tables()
+            if tables:
+                metadata["has_tables"] = True
+                for table in tables:
+                    table_text = self._format_table(table)
+                    if table_text:
+                        parts.append(f"[TABLE]\n{table_text}\n[/TABLE]")
+
+            # Extract regular text with layout preservation
+            page_text = page.extract_text(
+                x_tolerance=2,  # Horizontal tolerance for character grouping
+                y_tolerance=2,  # Vertical tolerance for line grouping
+                layout=True,  # Preserve layout structure
+                x_density=7.25,  # Character density for word separation
+                y_density=13,  # Line density for paragraph separation
+            )
 
-            logger.debug(f"pdfplumber extraction completed. Quality: {quality:.2f}")
-            return {"text_content": text_content.strip(), "quality": quality}
+            if page_text:
+                # Clean and enhance the extracted text
+                cleaned_text = self._enhance_text_spacing(page_text)
+                if cleaned_text:
+                    parts.append(cleaned_text)
+        finally:
+            # Drop the parsed layout objects cached on the page
+            release = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+            if release:
+                release()
 
-        except ImportError:
-            logger.warning(
-                "pdfplumber not available. Install with: pip install pdfplumber"
-            )
-            return {"text_content": "", "quality": 0.0}
-        except Exception as e:
-            logger.warning(f"pdfplumber extraction failed for {file_path}: {str(e)}")
-            return {"text_content": "", "quality": 0.0}
+        return "\n\n".join(parts)
 
     def _extract_with_pypdf(
-        self, file_path: str, metadata: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        self, file_path: str, metadata: Dict[str, Any], budget: _ExtractionBudget
+    ) -> Iterator[str]:
         """
-        Extract text using pypdf as fallback method.
+        Extract text page by page using pypdf as fallback method.
 
         Args:
             file_path: Path to the PDF file.
             metadata: Metadata dictionary to update.
+            budget: The extraction budget for this document.
 
-        Returns:
-            Dictionary with extracted text and quality score.
+        Yields:
+            The extracted text of each non-empty page.
         """
         try:
             import pypdf
-            from datetime import datetime
+        except ImportError:
+            logger.error("pypdf not available. Install with: pip install pypdf")
+            return
 
+        try:
             logger.debug(f"Attempting pypdf extraction for: {file_path}")
 
-            text_content = ""
-
             with open(file_path, "rb") as file:
                 pdf_reader = pypdf.PdfReader(file)
-                metadata["page_count"] = len(pdf_reader.pages)
+                page_count = len(pdf_reader.pages)
+                metadata["page_count"] = page_count
 
                 # Extract metadata
                 self._extract_metadata_pypdf(pdf_reader, metadata)
 
-                # Extract text from all pages
-                for page_num, page in enumerate(pdf_reader.pages):
-                    logger.debug(
-                        f"Processing page {page_num + 1}/{len(pdf_reader.pages)}"
-                    )
-
-                    page_text = page.extract_text()
-                    if page_text:
-                        # Enhance spacing for pypdf extraction
-                        enhanced_text = self._enhance_text_spacing(page_text)
-                        text_content += enhanced_text + "\n\n"
-
-            # Calculate quality score
-            quality = self._calculate_text_quality(text_content)
-
-            logger.debug(f"pypdf extraction completed. Quality: {quality:.2f}")
-            return {"text_content": text_content.strip(), "quality": quality}
+                # Score the same leading pages that pdfplumber was judged on
+                sample = []
+                sample_size = min(self.sample_pages, page_count)
+
+                # Extract text page by page
+                for page_num in range(page_count):
+                    if self._budget_exceeded(budget, page_num, metadata):
+                        break
+                    logger.debug(f"Processing page {page_num + 1}/{page_count}")
+
+                    page_text = pdf_reader.pages[page_num].extract_text()
+                    # Enhance spacing for pypdf extraction
+                    enhanced_text = self._enhance_text_spacing(page_text) if page_text else ""
+                    metadata["pages_extracted"] = page_num + 1
+
+                    if page_num < sample_size:
+                        sample.append(enhanced_text)
+                        if len(sample) == sample_size:
+                            metadata["extraction_quality"] = self._calculate_text_quality(
+                                "".join(text + "\n\n" for text in sample if text)
+                            )
+                    if enhanced_text:
+                        yield enhanced_text
+
+            if len(sample) < sample_size:
+                metadata["extraction_quality"] = self._calculate_text_quality(
+                    "".join(text + "\n\n" for text in sample if text)
+                )
+            logger.debug(
+                f"pypdf extraction completed. Quality: {metadata['extraction_quality']:.2f}"
+            )
 
-        except ImportError:
-            logger.error("pypdf not available. Install with: pip install pypdf")
-            return {"text_content": "", "quality": 0.0}
         except Exception as e:
             logger.error(f"pypdf extraction failed for {file_path}: {str(e)}")
-            return {"text_content": "", "quality": 0.0}
 
     def _extract_metadata_pdfplumber(self, pdf, metadata: Dict[str, Any]) -> None:
         """Extract metadata using pdfplumber."""
@@ -687,6 +880,11 @@ class DocxPreprocessor(PreprocessorBase):
 class HTMLPreprocessor(PreprocessorBase):
     """
     Preprocessor for HTML files.
+
+    Pages are parsed once with lxml. The text is emitted as sections that
+    start at headings and other structural elements, so the splitter gets
+    plain text and does not parse the page again. Without lxml, or with
+    `parser: html.parser`, BeautifulSoup extracts the same sections.
     """
 
     def __init__(self, config: Dict[str, Any] = None):
@@ -694,9 +892,33 @@ class HTMLPreprocessor(PreprocessorBase):
         Initialize the HTML preprocessor.
 
         Args:
-            config: Configuration dictionary.
+            config: Configuration dictionary. The optional
+                `preprocessors.html.extraction` section accepts:
+                - parser: "lxml" or "html.parser" (default: "lxml").
+                - strip_tags: Elements removed with their content (default:
+                  script, style, noscript, template, svg, canvas, iframe,
+                  object, embed).
+                - split_tags: Elements that start a new section (default:
+                  h1, h2, h3, section, article).
+                - min_section_chars: Shorter sections are merged into the next
+                  one (default: 200).
+                - max_bytes: Read at most this many bytes of a file (default:
+                  10485760, 0 = no limit).
+                - max_text_chars: Stop after this much text (default: 0, no limit).
         """
         super().__init__(config)
+        extraction_config = (
+            self.config.get("preprocessors", {}).get("html", {}).get("extraction", {})
+        )
+        self.parser = extraction_config.get("parser", "lxml")
+        self.strip_tags = list(extraction_config.get("strip_tags", DEFAULT_STRIP_TAGS))
+        self.split_tags = list(extraction_config.get("split_tags", DEFAULT_SPLIT_TAGS))
+        self.min_section_chars = int(extraction_config.get("min_section_chars", 200))
+        self.max_bytes = int(extraction_config.get("max_bytes", 10 * 1024 * 1024))
+        self.max_text_chars = int(extraction_config.get("max_text_chars", 0))
+        if self.parser == "lxml" and not is_lxml_available():
+            logger.warning("lxml is not installed, HTML is parsed with BeautifulSoup.")
+            self.parser = "html.parser"
 
     def can_process(self, file_path: str) -> bool:
         """
@@ -720,91 +942,139 @@ class HTMLPreprocessor(PreprocessorBase):
         Returns:
             A dictionary containing preprocessed text content and metadata.
         """
+        stream = self.preprocess_stream(file_path)
+        text_content = "\n\n".join(stream["text_stream"])
+        return {"text_content": text_content, "metadata": stream["metadata"]}
+
+    def preprocess_stream(self, file_path: str) -> PreprocessedStream:
+        """
+        Preprocess an HTML file one section at a time.
+
+        Args:
+            file_path: Path to the HTML file.
+
+        Returns:
+            A dictionary containing an iterator over the preprocessed sections
+            and the metadata, which is complete once the iterator is exhausted.
+        """
         file_extension = os.path.splitext(file_path.lower())[1].lstrip(".")
         metadata: Dict[str, Any] = {
             "file_path": file_path,
             "file_type": file_extension,
             "custom_tags": [],
             "keywords": [],
+            "truncated": None,
+        }
+        return {
+            "text_stream": self._stream_sections(file_path, metadata),
+            "metadata": metadata,
         }
-        text_content = ""
-
-        try:
-            # Import BeautifulSoup only when needed
-            from bs4 import BeautifulSoup
-
-            html_config = filter_config(self.config, "html")
-            self.text_preprocessor = RawTextPreprocessor(html_config)
-
-            with open(file_path, "r", encoding="utf-8") as file:
-                soup = BeautifulSoup(file.read(), "html.parser")
 
-                # Extract html_title_tag
-                if soup.title and soup.title.string:
-                    metadata["html_title_tag"] = soup.title.string.strip()
+    def _stream_sections(self, file_path: str, metadata: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yield the preprocessed sections of an HTML file.
 
-                # Attempt to extract other metadata from meta tags
-                meta_author = soup.find(
-                    "meta", attrs={"name": lambda x: x and x.lower() == "author"}
-                )
-                if meta_author and meta_author.get("content"):
-                    metadata["author"] = meta_author["content"].strip()
+        Args:
+            file_path: Path to the HTML file.
+            metadata: Metadata dictionary to update.
 
-                meta_keywords = soup.find(
-                    "meta", attrs={"name": lambda x: x and x.lower() == "keywords"}
+        Yields:
+            The preprocessed text of each non-empty section.
+        """
+        try:
+            text_preprocessor = RawTextPreprocessor(filter_config(self.config, "html"))
+            data, too_large = read_html(file_path, self.max_bytes)
+            if too_large:
+                logger.warning(
+                    f"HTML file {file_path} is larger than {self.max_bytes} bytes; only the start is extracted."
                 )
-                if meta_keywords and meta_keywords.get("content"):
-                    kw_str = meta_keywords["content"].strip()
-                    if kw_str:
-                        metadata["keywords"] = [
-                            k.strip() for k in kw_str.split(",") if k.strip()
-                        ]
-
-                # Common meta tags for date: 'date', 'dcterms.created', 'article.published_time'
-                date_meta_names = [
-                    "date",
-                    "creation_date",
-                    "dcterms.created",
-                    "article:published_time",
-                    "og:article:published_time",
-                ]
-                for name in date_meta_names:
-                    meta_date = soup.find(
-                        "meta", attrs={"name": lambda x: x and x.lower() == name}
-                    )
-                    if not meta_date:  # Try property attribute for OpenGraph tags
-                        meta_date = soup.find(
-                            "meta",
-                            attrs={"property": lambda x: x and x.lower() == name},
-                        )
-                    if meta_date and meta_date.get("content"):
-                        # Basic parsing, assuming YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS
-                        date_str = meta_date["content"].strip()
-                        if date_str:
-                            metadata["creation_date"] = date_str.split("T")[
-                                0
-                            ]  # Take only date part
-                            break  # Found a date
-
-                # Extract text from HTML
-                text_content = soup.get_text(separator=" ", strip=True)
 
-            processed_text = self.text_preprocessor.preprocess(text_content)
-            return {"text_content": processed_text, "metadata": metadata}
+            extract = extract_html if self.parser == "lxml" else extract_html_with_bs4
+            extraction = extract(
+                data,
+                strip_tags=self.strip_tags,
+                split_tags=self.split_tags,
+                min_section_chars=self.min_section_chars,
+                max_text_chars=self.max_text_chars,
+            )
 
+            metadata.update(extraction.metadata)
+            metadata["truncated"] = "max_bytes" if too_large else extraction.truncated
+            metadata["section_count"] = len(extraction.sections)
         except ImportError:
             logger.error(
                 "BeautifulSoup is not installed. Please install it using: pip install beautifulsoup4"
             )
-            return {"text_content": "", "metadata": metadata}
+            return
         except Exception as e:
             logger.error(f"Error preprocessing HTML file {file_path}: {e}")
-            return {"text_content": "", "metadata": metadata}
+            return
+
+        for section in extraction.sections:
+            processed_text = text_preprocessor.preprocess(section)
+            if processed_text:
+                yield processed_text
+
+
+def _tabular_rows_per_chunk(config: Dict[str, Any], key: str) -> int:
+    """
+    Get the number of data rows grouped into each section of a spreadsheet or CSV file.
+
+    Read from the optional `preprocessors.<key>.tabular.rows_per_chunk` setting.
+    """
+    tabular_config = config.get("preprocessors", {}).get(key, {}).get("tabular", {})
+    return max(1, int(tabular_config.get("rows_per_chunk", DEFAULT_ROWS_PER_CHUNK)))
+
+
+def _format_row_group(
+    header: Optional[List[Any]], rows: List[List[Any]], title: Optional[str] = None
+) -> str:
+    """
+    Format a group of rows as compact CSV, preceded by an optional title and the header.
+
+    Args:
+        header: The header row repeated at the top of the group, if any.
+        rows: The data rows of the group.
+        title: An optional first line, such as the sheet name.
+
+    Returns:
+        The group as text.
+    """
+    output = io.StringIO()
+    if title:
+        output.write(f"{title}\n")
+    writer = csv.writer(output, lineterminator="\n")
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def _row_groups(rows: Iterator[List[Any]], rows_per_chunk: int) -> Iterator[List[List[Any]]]:
+    """Group an iterator of rows into lists of at most `rows_per_chunk` rows."""
+    while True:
+        group = list(islice(rows, rows_per_chunk))
+        if not group:
+            return
+        yield group
+
+
+def _clean_cells(row: Iterable[Any]) -> List[Any]:
+    """Replace empty spreadsheet cells with empty strings and drop trailing empty cells."""
+    cells = ["" if value is None else value for value in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
 
 
 class ExcelPreprocessor(PreprocessorBase):
     """
     Preprocessor for Excel files.
+
+    Sheets are read row by row (with openpyxl in read-only mode for .xlsx
+    files) and emitted as groups of rows in compact CSV form, each repeating
+    the sheet name and header row, so memory use is bounded by the group size
+    rather than the workbook size.
     """
 
     def __init__(self, config: Dict[str, Any] = None):
@@ -812,9 +1082,12 @@ class ExcelPreprocessor(PreprocessorBase):
         Initialize the Excel preprocessor.
 
         Args:
-            config: Configuration dictionary.
+            config: Configuration dictionary. The optional
+                `preprocessors.xls.tabular.rows_per_chunk` setting controls
+                the number of data rows per group (default: 100).
         """
         super().__init__(config)
+        self.rows_per_chunk = _tabular_rows_per_chunk(self.config, "xls")
 
     def can_process(self, file_path: str) -> bool:
         """
@@ -838,49 +1111,122 @@ class ExcelPreprocessor(PreprocessorBase):
         Returns:
             A dictionary containing preprocessed text content and metadata.
         """
+        stream = self.preprocess_stream(file_path)
+        text_content = "\n\n".join(stream["text_stream"])
+        return {"text_content": text_content, "metadata": stream["metadata"]}
+
+    def preprocess_stream(self, file_path: str) -> PreprocessedStream:
+        """
+        Preprocess an Excel file one group of rows at a time.
+
+        Args:
+            file_path: Path to the Excel file.
+
+        Returns:
+            A dictionary containing an iterator over the preprocessed row
+            groups and the metadata, which is complete once the iterator is
+            exhausted.
+        """
         file_extension = os.path.splitext(file_path.lower())[1].lstrip(".")
         metadata: Dict[str, Any] = {
             "file_path": file_path,
             "file_type": file_extension,
             "custom_tags": [],
             # title, author, keywords, creation_date are not typically standard in Excel files
-            # in a way that pandas can easily extract without custom logic or conventions.
+            # in a way that can easily be extracted without custom logic or conventions.
+            "row_count": 0,
+        }
+        return {
+            "text_stream": self._stream_row_groups(file_path, metadata),
+            "metadata": metadata,
         }
-        text_content = ""
-
-        try:
-            # Import pandas only when needed
-            import pandas as pd
-
-            xls_config = filter_config(self.config, "xls")  # or "excel"
-            self.text_preprocessor = RawTextPreprocessor(xls_config)
 
-            # Read all sheets
-            excel_file = pd.ExcelFile(file_path)
-            sheet_names = excel_file.sheet_names
-            if sheet_names:  # Add sheet names to metadata if they exist
-                metadata["sheet_names"] = sheet_names
+    def _stream_row_groups(self, file_path: str, metadata: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yield the preprocessed row groups of every sheet of a workbook.
 
-            for sheet_name in sheet_names:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
-                # Convert dataframe to string
-                text_content += f"Sheet: {sheet_name}\n"
-                # Optionally, add first row as headers for each sheet if relevant
-                # if not df.empty:
-                #     metadata[f"sheet_{sheet_name}_headers"] = list(df.columns)
-                text_content += df.to_string(index=False) + "\n\n"
+        Args:
+            file_path: Path to the Excel file.
+            metadata: Metadata dictionary to update.
 
-            processed_text = self.text_preprocessor.preprocess(text_content)
-            return {"text_content": processed_text, "metadata": metadata}
+        Yields:
+            The text of each group of rows.
+        """
+        xls_config = filter_config(self.config, "xls")  # or "excel"
+        text_preprocessor = RawTextPreprocessor(xls_config)
 
+        try:
+            for sheet_name, rows in self._iter_sheets(file_path, metadata):
+                rows = (cells for cells in map(_clean_cells, rows) if cells)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                title = f"Sheet: {sheet_name}"
+                groups = 0
+                for group in _row_groups(rows, self.rows_per_chunk):
+                    groups += 1
+                    metadata["row_count"] += len(group)
+                    yield text_preprocessor.preprocess(
+                        _format_row_group(header, group, title)
+                    )
+                if not groups:
+                    # A sheet holding a single row is emitted on its own
+                    yield text_preprocessor.preprocess(_format_row_group(header, [], title))
         except ImportError:
             logger.error(
-                "pandas is not installed. Please install it using: pip install pandas"
+                "openpyxl or pandas is not installed. Please install them using: "
+                "pip install openpyxl pandas"
             )
-            return {"text_content": "", "metadata": metadata}
         except Exception as e:
             logger.error(f"Error preprocessing Excel file {file_path}: {e}")
-            return {"text_content": "", "metadata": metadata}
+
+    def _iter_sheets(
+        self, file_path: str, metadata: Dict[str, Any]
+    ) -> Iterator[Tuple[str, Iterator[Tuple[Any, ...]]]]:
+        """
+        Yield the name and a row iterator for each sheet of a workbook.
+
+        .xlsx files are read lazily with openpyxl in read-only mode. Legacy
+        .xls files, or .xlsx files when openpyxl is missing, are loaded one
+        sheet at a time with pandas.
+
+        Args:
+            file_path: Path to the Excel file.
+            metadata: Metadata dictionary to update with the sheet names.
+
+        Yields:
+            Tuples of (sheet name, iterator over the rows of the sheet).
+        """
+        if file_path.lower().endswith(".xlsx"):
+            try:
+                import openpyxl
+            except ImportError:
+                openpyxl = None
+
+            if openpyxl is not None:
+                workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+                try:
+                    metadata["sheet_names"] = workbook.sheetnames
+                    for worksheet in workbook.worksheets:
+                        yield worksheet.title, worksheet.iter_rows(values_only=True)
+                finally:
+                    # Read-only workbooks keep the file open until closed
+                    workbook.close()
+                return
+
+        # Import pandas only when needed
+        import pandas as pd
+
+        with pd.ExcelFile(file_path) as excel_file:
+            sheet_names = excel_file.sheet_names
+            if sheet_names:  # Add sheet names to metadata if they exist
+                metadata["sheet_names"] = sheet_names
+            for sheet_name in sheet_names:
+                df = pd.read_excel(
+                    excel_file, sheet_name=sheet_name, header=None, na_filter=False
+                )
+                yield sheet_name, df.itertuples(index=False, name=None)
+                del df
 
 
 class ODTPreprocessor(PreprocessorBase):
@@ -987,18 +1333,25 @@ class ODTPreprocessor(PreprocessorBase):
 
 class CSVFilePreprocessor(PreprocessorBase):
     """
-    Preprocessor for plain text files.
+    Preprocessor for CSV files.
+
+    When streamed, the file is read with a csv reader and emitted as groups of
+    rows that each repeat the header row. The pipeline splits and stores each
+    group before reading the next, so the whole file is never held in memory.
     """
 
     def __init__(self, config: Dict[str, Any] = None):
         """
-        Initialize the text file preprocessor.
+        Initialize the CSV file preprocessor.
 
         Args:
-            config: Configuration dictionary.
+            config: Configuration dictionary. The optional
+                `preprocessors.csv.tabular.rows_per_chunk` setting controls
+                the number of data rows per group (default: 100).
         """
         super().__init__(config)
         self.extensions = [".csv"]
+        self.rows_per_chunk = _tabular_rows_per_chunk(self.config, "csv")
 
     def can_process(self, file_path: str) -> bool:
         """
@@ -1070,3 +1423,66 @@ class CSVFilePreprocessor(PreprocessorBase):
         except Exception as e:
             logger.error(f"Error preprocessing CSV file {file_path}: {e}")
             return {"text_content": "", "metadata": metadata}
+
+    def preprocess_stream(self, file_path: str) -> PreprocessedStream:
+        """
+        Preprocess a CSV file one group of rows at a time.
+
+        Args:
+            file_path: Path to the CSV file.
+
+        Returns:
+            A dictionary containing an iterator over the row groups, each a
+            CSV text starting with the header row, and the metadata, which is
+            complete once the iterator is exhausted.
+        """
+        metadata: Dict[str, Any] = {
+            "file_path": file_path,
+            "file_type": "csv",
+            "custom_tags": [],
+            "row_count": 0,
+        }
+        return {
+            "text_stream": self._stream_row_groups(file_path, metadata),
+            "metadata": metadata,
+        }
+
+    def _stream_row_groups(self, file_path: str, metadata: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yield the row groups of a CSV file.
+
+        Args:
+            file_path: Path to the CSV file.
+            metadata: Metadata dictionary to update.
+
+        Yields:
+            The CSV text of each group of rows, starting with the header row.
+        """
+        try:
+            with open(file_path, "r", encoding="utf-8", newline="") as file:
+                reader = csv.reader(file)
+                try:
+                    header = next(reader, None)
+                except csv.Error as e:
+                    logger.warning(f"Could not parse CSV headers for {file_path}: {e}")
+                    file.seek(0)
+                    yield file.read()  # Fallback to reading as plain text
+                    return
+                if not header:
+                    return
+                metadata["csv_headers"] = header
+
+                groups = 0
+                for group in _row_groups(reader, self.rows_per_chunk):
+                    groups += 1
+                    metadata["row_count"] += len(group)
+                    yield _format_row_group(header, group)
+                if not groups:
+                    # A file holding only the header row is emitted on its own
+                    yield _format_row_group(header, [])
+        except csv.Error as e:
+            logger.warning(
+                f"Stopped reading CSV file {file_path} at line {reader.line_num}: {e}"
+            )
+        except Exception as e:
+            logger.error(f"Error preprocessing CSV file {file_path}: {e}")
@@ -0,0 +1,346 @@
+"""
+Single-pass HTML extraction with lxml.
+
+One parse of a page yields its metadata, its text with unwanted elements
+removed, and the text split into sections at structural boundaries such as
+headings. The sections are split into chunks separately, so the splitter
+does not parse the page again. Without lxml, BeautifulSoup extracts the same
+text and sections, more slowly.
+"""
+
+import importlib.util
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Elements whose content is never text of the page
+DEFAULT_STRIP_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "object",
+    "embed",
+)
+
+# Elements that start a new section
+DEFAULT_SPLIT_TAGS = ("h1", "h2", "h3", "section", "article")
+
+# Meta tag names holding the creation date: 'date', 'dcterms.created', 'article.published_time'
+DATE_META_NAMES = (
+    "date",
+    "creation_date",
+    "dcterms.created",
+    "article:published_time",
+    "og:article:published_time",
+)
+
+_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-]+)""", re.I)
+_MARKUP_PATTERN = re.compile(r"<\s*/?\s*[a-zA-Z!][^>]*>")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass
+class HTMLExtraction:
+    """
+    The result of extracting an HTML page.
+
+    Attributes:
+        sections: The text of each section, in document order.
+        metadata: Metadata from the title and meta tags.
+        truncated: The limit that cut the extraction short, or None.
+    """
+
+    sections: List[str] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    truncated: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """The text of the whole page."""
+        return " ".join(self.sections)
+
+
+def is_lxml_available() -> bool:
+    """Check whether lxml is installed."""
+    return importlib.util.find_spec("lxml") is not None
+
+
+def looks_like_html(text: str) -> bool:
+    """
+    Check whether text contains markup, e.g. to skip parsing extracted text.
+
+    Args:
+        text: The text to check.
+
+    Returns:
+        True if the text contains at least one tag.
+    """
+    return bool(_MARKUP_PATTERN.search(text[:65536]))
+
+
+def read_html(file_path: str, max_bytes: int = 0) -> Tuple[bytes, bool]:
+    """
+    Read an HTML file as bytes, up to a size limit.
+
+    Args:
+        file_path: Path to the file.
+        max_bytes: Maximum number of bytes read (0 = no limit).
+
+    Returns:
+        The bytes read and whether the file was longer than the limit.
+    """
+    with open(file_path, "rb") as file:
+        if max_bytes and max_bytes > 0:
+            data = file.read(max_bytes + 1)
+            if len(data) > max_bytes:
+                return data[:max_bytes], True
+            return data, False
+        return file.read(), False
+
+
+def _detect_encoding(data: bytes) -> str:
+    """Get the encoding declared in the first bytes of a page, or UTF-8."""
+    if data.startswith(b"\xef\xbb\xbf"):
+        return "utf-8"
+    match = _CHARSET_PATTERN.search(data[:4096])
+    if match:
+        encoding = match.group(1).decode("ascii", "ignore").lower()
+        try:
+            "".encode(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _extract_metadata(title: Optional[str], metas: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Read the title, author, keywords and creation date of a page.
+
+    Args:
+        title: The text of the title element, if any.
+        metas: The meta elements; lxml and BeautifulSoup elements both
+            expose their attributes through `get`.
+
+    Returns:
+        The metadata found.
+    """
+    metadata: Dict[str, Any] = {}
+    if title and title.strip():
+        metadata["html_title_tag"] = title.strip()
+
+    meta_by_name: Dict[str, str] = {}
+    for meta in metas:
+        content = (meta.get("content") or "").strip()
+        if not content:
+            continue
+        for attribute in ("name", "property"):
+            name = (meta.get(attribute) or "").strip().lower()
+            if name and name not in meta_by_name:
+                meta_by_name[name] = content
+
+    if "author" in meta_by_name:
+        metadata["author"] = meta_by_name["author"]
+    if "keywords" in meta_by_name:
+        keywords = [k.strip() for k in meta_by_name["keywords"].split(",") if k.strip()]
+        if keywords:
+            metadata["keywords"] = keywords
+    for name in DATE_META_NAMES:
+        if name in meta_by_name:
+            # Take only the date part of YYYY-MM-DDTHH:MM:SS
+            metadata["creation_date"] = meta_by_name[name].split("T")[0]
+            break
+    return metadata
+
+
+class _SectionBuilder:
+    """Collects the text pieces of a page, in document order, into sections."""
+
+    def __init__(self, max_text_chars: int = 0):
+        self.max_text_chars = max_text_chars
+        self.sections: List[str] = []
+        self.truncated: Optional[str] = None
+        self._pieces: List[str] = []
+        self._size = 0
+
+    def flush(self) -> None:
+        """End the current section."""
+        if self._pieces:
+            section = _WHITESPACE_PATTERN.sub(" ", " ".join(self._pieces)).strip()
+            if section:
+                self.sections.append(section)
+            self._pieces.clear()
+
+    def add(self, text: Optional[str]) -> bool:
+        """Add a piece of text; returns False once max_text_chars is reached."""
+        if not text:
+            return True
+        text = text.strip()
+        if not text:
+            return True
+        if self.max_text_chars and self._size + len(text) > self.max_text_chars:
+            self._pieces.append(text[: max(0, self.max_text_chars - self._size)])
+            self.truncated = "max_text_chars"
+            return False
+        self._pieces.append(text)
+        self._size += len(text) + 1
+        return True
+
+def extract_html(
+    data: Any,
+    strip_tags: Iterable[str] = DEFAULT_STRIP_TAGS,
+    split_tags: Iterable[str] = DEFAULT_SPLIT_TAGS,
+    min_section_chars: int = 200,
+    max_text_chars: int = 0,
+) -> HTMLExtraction:
+    """
+    Parse an HTML page once and extract its metadata and sectioned text.
+
+    Args:
+        data: The page as bytes or text.
+        strip_tags: Elements removed with their content.
+        split_tags: Elements that start a new section.
+        min_section_chars: Sections shorter than this are merged into the next one.
+        max_text_chars: Stop after this much text (0 = no limit).
+
+    Returns:
+        The extracted sections and metadata.
+
+    Raises:
+        ImportError: If lxml is not installed.
+    """
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    result = HTMLExtraction()
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+        encoding = "utf-8"
+    else:
+        encoding = _detect_encoding(data)
+    if not data.strip():
+        return result
+
+    parser = lxml_html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+    try:
+        root = lxml_html.document_fromstring(data, parser=parser)
+    except (etree.ParserError, ValueError):
+        # Nothing parseable, e.g. only whitespace or comments
+        return result
+
+    title = root.find(".//title")
+    result.metadata = _extract_metadata(
+        title.text if title is not None else None, root.iter("meta")
+    )
+
+    # The head holds no page text
+    for head in root.findall("head"):
+        root.remove(head)
+    strip_tags = tuple(strip_tags)
+    if strip_tags:
+        etree.strip_elements(root, *strip_tags, with_tail=False)
+
+    split_tags = set(split_tags)
+    builder = _SectionBuilder(max_text_chars)
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        if not isinstance(element.tag, str):
+            continue
+        if event == "start":
+            if element.tag in split_tags:
+                builder.flush()
+            if not builder.add(element.text):
+                break
+        elif element is not root and not builder.add(element.tail):
+            break
+    builder.flush()
+
+    result.sections = _merge_short_sections(builder.sections, min_section_chars)
+    result.truncated = builder.truncated
+    return result
+
+
+def extract_html_with_bs4(
+    data: Any,
+    strip_tags: Iterable[str] = DEFAULT_STRIP_TAGS,
+    split_tags: Iterable[str] = DEFAULT_SPLIT_TAGS,
+    min_section_chars: int = 200,
+    max_text_chars: int = 0,
+) -> HTMLExtraction:
+    """
+    Extract an HTML page with BeautifulSoup, when lxml is not installed.
+
+    The text, sections and metadata are the same as those of `extract_html`.
+
+    Args:
+        data: The page as bytes or text.
+        strip_tags: Elements removed with their content.
+        split_tags: Elements that start a new section.
+        min_section_chars: Sections shorter than this are merged into the next one.
+        max_text_chars: Stop after this much text (0 = no limit).
+
+    Returns:
+        The extracted sections and metadata.
+
+    Raises:
+        ImportError: If beautifulsoup4 is not installed.
+    """
+    from bs4 import BeautifulSoup
+    from bs4.element import NavigableString, PreformattedString, Tag
+
+    result = HTMLExtraction()
+    if not data.strip():
+        return result
+
+    soup = BeautifulSoup(data, "html.parser")
+    title = soup.find("title")
+    result.metadata = _extract_metadata(
+        title.get_text() if title is not None else None, soup.find_all("meta")
+    )
+
+    # The head holds no page text
+    for element in soup.find_all(["head", *strip_tags]):
+        # Elements nested in one already removed are gone with it
+        if not element.decomposed:
+            element.decompose()
+
+    split_tags = set(split_tags)
+    builder = _SectionBuilder(max_text_chars)
+    for node in soup.descendants:
+        if isinstance(node, Tag):
+            if node.name in split_tags:
+                builder.flush()
+        # Comments, doctypes and processing instructions are not text
+        elif isinstance(node, NavigableString) and not isinstance(node, PreformattedString):
+            if not builder.add(str(node)):
+                break
+    builder.flush()
+
+    result.sections = _merge_short_sections(builder.sections, min_section_chars)
+    result.truncated = builder.truncated
+    return result
+
+
+def _merge_short_sections(sections: List[str], min_chars: int) -> List[str]:
+    """Merge sections shorter than min_chars into the following section."""
+    if min_chars <= 0:
+        return sections
+    merged: List[str] = []
+    pending = ""
+    for section in sections:
+        pending = f"{pending} {section}" if pending else section
+        if len(pending) >= min_chars:
+            merged.append(pending)
+            pending = ""
+    if pending:
+        if merged:
+            merged[-1] = f"{merged[-1]} {pending}"
+        else:
+            merged.append(pending)
+    return merged
@@ -3,7 +3,7 @@ Base class for document preprocessors.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, Iterator, TypedDict
 
 
 class PreprocessedOutput(TypedDict):
@@ -11,6 +11,11 @@ class PreprocessedOutput(TypedDict):
     metadata: Dict[str, Any]
 
 
+class PreprocessedStream(TypedDict):
+    text_stream: Iterator[str]
+    metadata: Dict[str, Any]
+
+
 class PreprocessorBase(ABC):
     """
     Abstract base class for document preprocessors.
@@ -48,6 +53,28 @@ class PreprocessorBase(ABC):
         """
         pass
 
+    def preprocess_stream(self, file_path: str) -> PreprocessedStream:
+        """
+        Preprocess a document incrementally, yielding its text in sections.
+
+        Preprocessors that can extract a document piece by piece (for example
+        page by page) override this to bound memory use. The metadata
+        dictionary may keep being filled in while the stream is consumed.
+
+        Args:
+            file_path: Path to the document file.
+
+        Returns:
+            A dictionary containing an iterator over the preprocessed text
+            sections and the extracted metadata.
+        """
+        output = self.preprocess(file_path)
+        text_content = output.get("text_content", "")
+        return {
+            "text_stream": iter([text_content] if text_content else []),
+            "metadata": output.get("metadata", {}),
+        }
+
     @abstractmethod
     def can_process(self, file_path: str) -> bool:
         """
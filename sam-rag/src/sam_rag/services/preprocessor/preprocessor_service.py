@@ -6,7 +6,11 @@ import logging
 import os
 from typing import Dict, Any, List, Tuple, Optional
 
-from sam_rag.services.preprocessor.preprocessor_base import PreprocessorBase, PreprocessedOutput
+from sam_rag.services.preprocessor.preprocessor_base import (
+    PreprocessorBase,
+    PreprocessedOutput,
+    PreprocessedStream,
+)
 from sam_rag.services.preprocessor.document_preprocessor import (
     TextFilePreprocessor,
     PDFPreprocessor,
@@ -114,6 +118,32 @@ class PreprocessorService:
             logger.warning("No suitable preprocessor found for file.")
             return None
 
+    def preprocess_file_stream(self, file_path: str) -> Optional[PreprocessedStream]:
+        """
+        Preprocess a single file incrementally.
+
+        Args:
+            file_path: Path to the file.
+
+        Returns:
+            An iterator over the preprocessed text sections with the file
+            metadata, or None if the file cannot be processed.
+        """
+        if not os.path.exists(file_path):
+            logger.warning("File not found.")
+            return None
+
+        preprocessor = self._get_preprocessor(file_path)
+        if preprocessor:
+            try:
+                return preprocessor.preprocess_stream(file_path)
+            except Exception:
+                logger.error("Error preprocessing file.")
+                return None
+        else:
+            logger.warning("No suitable preprocessor found for file.")
+            return None
+
     def preprocess_files(
         self, file_paths: List[str]
     ) -> List[Tuple[str, Optional[str]]]:
@@ -0,0 +1,79 @@
+"""
+Confidence checks of adaptive retrieval.
+
+Adaptive retrieval first runs a cheap dense-only search with a small limit.
+The checks here decide from the similarities of those results whether they
+can be returned, or whether the search has to be widened to hybrid search or
+a larger number of results.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reasons to widen a search
+NO_RESULTS = "no_results"
+LOW_SCORE = "low_score"
+FLAT_SCORES = "flat_scores"
+
+
+class AdaptiveRetrievalPolicy:
+    """
+    Decides whether the results of a dense-only first pass are good enough.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, top_k: int = 5):
+        """
+        Initialize the policy.
+
+        Args:
+            config: A dictionary containing configuration parameters.
+                - enabled: Whether retrieval starts with a dense-only pass
+                  (default: False).
+                - initial_k: Results requested by the first pass (default: 3).
+                - min_score: Cosine similarity the best result must reach
+                  (default: 0.5).
+                - min_score_spread: Minimum difference between the best and
+                  the worst similarity of the first pass; results scored
+                  almost alike do not single out an answer. 0 disables the
+                  check (default: 0).
+                - widen_k: Results requested by the widened search
+                  (default: top_k).
+                - hybrid: Whether the widened search is a hybrid search when
+                  hybrid search is enabled (default: True).
+            top_k: The configured number of results.
+        """
+        self.config = config or {}
+        self.enabled = self.config.get("enabled", False)
+        self.initial_k = max(1, min(self.config.get("initial_k", 3), top_k))
+        self.min_score = self.config.get("min_score", 0.5)
+        self.min_score_spread = self.config.get("min_score_spread", 0.0) or 0.0
+        self.widen_k = max(self.config.get("widen_k") or top_k, self.initial_k)
+        self.hybrid = self.config.get("hybrid", True)
+
+    def widen_reason(self, similarities: List[Optional[float]]) -> Optional[str]:
+        """
+        Check the results of the first pass.
+
+        Args:
+            similarities: The cosine similarity of every result, best first;
+                None for results without a score.
+
+        Returns:
+            Why the search has to be widened, or None if the results can be
+            returned.
+        """
+        scores = [score for score in similarities if score is not None]
+        if not scores:
+            return NO_RESULTS
+        best = max(scores)
+        if best < self.min_score:
+            return LOW_SCORE
+        if (
+            self.min_score_spread
+            and len(scores) > 1
+            and best - min(scores) < self.min_score_spread
+        ):
+            return FLAT_SCORES
+        return None
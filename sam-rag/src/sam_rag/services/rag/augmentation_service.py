@@ -3,7 +3,8 @@ Implementation of an augmentor component for RAG systems.
 
 This module provides functionality to augment retrieved documents by:
 1. Retrieving relevant chunks from a vector database
-2. Merging chunks from the same source document
+2. Selecting chunks within a token budget and merging chunks from the same
+   source document
 3. Using an LLM to clean and improve the content
 4. Returning improved content with source information
 """
@@ -15,17 +16,18 @@ from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
-# Import LiteLLM for language model access
-try:
-    import litellm
-except ImportError:
-    logger.warning("LiteLLM not available. Running without LLM augmentation.")
+# LiteLLM is imported on the first LLM call
+from ..lazy_imports import import_litellm, is_available
 
 # Import artifact adapter
 from ..artifact_adapter import ArtifactStorageAdapter
 
 # Import retriever for vector database access
+from ..metrics import get_metrics
+from ..metrics.metrics import LLM_REQUESTS, LLM_TOKENS
+from .context_builder import ContextBuilder
 from .retriever import Retriever
+from .result_cache import ResultCache, freeze_filter, normalize_query
 
 
 class AugmentationService:
@@ -46,6 +48,9 @@ class AugmentationService:
                 - embedding: Configuration for the embedding service.
                 - vector_db: Configuration for the vector database.
                 - llm: Configuration for the LLM service.
+                - retrieval: Retrieval configuration; `retrieval.cache` also
+                  configures the cache of augmented results, and
+                  `retrieval.context` the token budget of the returned content.
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
         """
         self.config = config or {}
@@ -81,16 +86,24 @@ class AugmentationService:
         self.llm_available = len(self.load_balancer_config) > 0
 
         if self.llm_available:
-            try:
-                # Configure LiteLLM with the load balancer
-                litellm.set_verbose = False
+            if is_available("litellm"):
                 logger.info("Augmentor initialized with LiteLLM")
-            except (ImportError, NameError):
+            else:
                 logger.warning(
                     "LiteLLM not available. Running without LLM augmentation."
                 )
                 self.llm_available = False
 
+        # Cache of augmented chunks, invalidated by vector database writes
+        self.cache = ResultCache(
+            self.config.get("retrieval", {}).get("cache", {}), name="Augmentation"
+        )
+
+        # Fits the retrieved chunks and the returned content to a token budget
+        self.context_builder = ContextBuilder(
+            self.config.get("retrieval", {}).get("context", {})
+        )
+
     async def augment(
         self,
         query: str,
@@ -112,28 +125,74 @@ class AugmentationService:
             - The augmented content as a string
             - A list of chunks with source information
         """
+        metrics = get_metrics()
         try:
-            # Retrieve relevant chunks
-            retrieved_chunks = self.retriever.retrieve(query, filter=filter)
+            with metrics.stage("augment", return_chunks=return_chunks):
+                cache_key = self._cache_key(query, filter)
+                augmented_chunks = self.cache.get(cache_key)
+                if augmented_chunks is None:
+                    generation = self.cache.generation()
+
+                    # Retrieve relevant chunks
+                    retrieved_chunks = self.retriever.retrieve(query, filter=filter)
+
+                    # Keep the most relevant chunks that fit the token budget
+                    selected_chunks = self.context_builder.select(retrieved_chunks)
 
-            # Merge chunks by source
-            merged_chunks = self._merge_chunks_by_source(retrieved_chunks)
+                    # Merge chunks by source
+                    merged_chunks = self._merge_chunks_by_source(selected_chunks)
 
-            # Augment merged chunks with LLM
-            augmented_chunks = await self._augment_chunks_with_llm(query, merged_chunks)
+                    # Augment merged chunks with LLM
+                    with metrics.stage("llm_augmentation", chunks=len(merged_chunks)):
+                        augmented_chunks = await self._augment_chunks_with_llm(query, merged_chunks)
 
-            # Upload files to file service
-            files = await self._upload_files_to_fileservice(augmented_chunks, session_id)
+                    # Do not cache chunks that fell back to raw text after an LLM error
+                    fallbacks = [chunk.pop("llm_fallback", False) for chunk in augmented_chunks]
+                    if not any(fallbacks):
+                        self.cache.put(cache_key, augmented_chunks, generation)
+                else:
+                    logger.info(f"Using {len(augmented_chunks)} cached augmented chunks for query")
 
-            # Extract content
-            content = self._extract_content(augmented_chunks)
+                # Upload files to file service (per session, so never cached)
+                with metrics.stage("upload", chunks=len(augmented_chunks)):
+                    files = await self._upload_files_to_fileservice(augmented_chunks, session_id)
 
-            logger.info(f"Augmented {len(augmented_chunks)} chunks for query")
-            return content, augmented_chunks if return_chunks else files
+                # Extract content
+                content = self._extract_content(augmented_chunks)
+
+                logger.info(f"Augmented {len(augmented_chunks)} chunks for query")
+                return content, augmented_chunks if return_chunks else files
         except Exception as e:
             logger.error(f"Error augmenting documents: {e}")
             raise ValueError(f"Error augmenting documents: {e}") from None
 
+    def _cache_key(self, query: str, filter: Optional[Dict[str, Any]]) -> Tuple:
+        """
+        Build the cache key of an augmentation request.
+
+        Args:
+            query: The query text.
+            filter: Optional filter applied to the search.
+
+        Returns:
+            A key covering the query, filter, retrieval and augmentation settings.
+        """
+        model = None
+        if self.llm_available:
+            litellm_params = self.load_balancer_config[0].get("litellm_params", {})
+            model = (
+                litellm_params.get("model"),
+                litellm_params.get("temperature"),
+                litellm_params.get("max_tokens"),
+            )
+        return (
+            normalize_query(query),
+            freeze_filter(filter),
+            self.retriever.top_k,
+            self.retriever.hybrid_search_enabled,
+            model,
+        )
+
     def _merge_chunks_by_source(
         self, chunks: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
@@ -141,10 +200,10 @@ class AugmentationService:
         Merge chunks that come from the same source document.
 
         Args:
-            chunks: List of retrieved chunks.
+            chunks: List of retrieved chunks, most relevant first.
 
         Returns:
-            List of merged chunks.
+            List of merged chunks, ordered by their most relevant chunk.
         """
         # Group chunks by source
         chunks_by_source = defaultdict(list)
@@ -159,16 +218,13 @@ class AugmentationService:
         # Merge chunks for each source
         merged_chunks = []
         for source, source_chunks in chunks_by_source.items():
-            # Sort chunks by distance (lowest first)
-            sorted_chunks = sorted(
-                source_chunks, key=lambda x: x.get("distance", 0), reverse=False
-            )
+            # Chunks keep the relevance order of the search results; the
+            # backends do not agree on whether "distance" grows or shrinks
+            # with relevance, so it is not used to sort them
+            combined_text = "\n".join(chunk["text"] for chunk in source_chunks)
 
-            # Combine text from chunks
-            combined_text = "\n".join(chunk["text"] for chunk in sorted_chunks)
-
-            # Use metadata from the highest-scoring chunk
-            best_metadata = sorted_chunks[0].get("metadata", {}).copy()
+            # Use metadata from the most relevant chunk
+            best_metadata = source_chunks[0].get("metadata", {}).copy()
 
             # Create merged chunk
             merged_chunk = {
@@ -202,6 +258,8 @@ class AugmentationService:
             source = chunk.get("source", "unknown")
             metadata = chunk.get("metadata", {})
 
+            llm_fallback = False
+
             # If LiteLLM is available, use it to improve the content
             if self.llm_available:
                 try:
@@ -216,6 +274,7 @@ class AugmentationService:
                 except Exception as e:
                     logger.warning(f"Error using LiteLLM to improve content: {str(e)}")
                     improved_content = text  # Fall back to original text
+                    llm_fallback = True
             else:
                 improved_content = text  # No LLM available
 
@@ -225,6 +284,8 @@ class AugmentationService:
                 "source": source,
                 "metadata": metadata,
             }
+            if llm_fallback:
+                augmented_chunk["llm_fallback"] = True
 
             augmented_chunks.append(augmented_chunk)
 
@@ -297,14 +358,27 @@ class AugmentationService:
             litellm_params = model_config.get("litellm_params", {})
 
             # Call LiteLLM
-            response = await litellm.acompletion(
-                model=litellm_params.get("model", "openai/gpt-4o"),
-                messages=messages,
-                api_key=litellm_params.get("api_key"),
-                api_base=litellm_params.get("api_base"),
-                temperature=litellm_params.get("temperature", 0.01),
-                max_tokens=litellm_params.get("max_tokens", 1000),
-            )
+            metrics = get_metrics()
+            try:
+                with metrics.stage("llm_request"):
+                    response = await import_litellm().acompletion(
+                        model=litellm_params.get("model", "openai/gpt-4o"),
+                        messages=messages,
+                        api_key=litellm_params.get("api_key"),
+                        api_base=litellm_params.get("api_base"),
+                        temperature=litellm_params.get("temperature", 0.01),
+                        max_tokens=litellm_params.get("max_tokens", 1000),
+                    )
+            except Exception:
+                metrics.count(LLM_REQUESTS, status="error")
+                raise
+            metrics.count(LLM_REQUESTS, status="ok")
+            usage = getattr(response, "usage", None)
+            if usage:
+                metrics.count(LLM_TOKENS, getattr(usage, "prompt_tokens", 0) or 0, kind="prompt")
+                metrics.count(
+                    LLM_TOKENS, getattr(usage, "completion_tokens", 0) or 0, kind="completion"
+                )
 
             end_time = time.time()
             processing_time = round(end_time - start_time, 3)
@@ -346,13 +420,10 @@ class AugmentationService:
             chunks: List of chunks, where each chunk is a dictionary containing 'content' field.
 
         Returns:
-            A string containing all content values from the chunks.
+            The content values of the chunks, in order, cut at the token budget.
         """
-        content = ""
-
-        for chunk in chunks:
-            # Extract content
-            if "content" in chunk:
-                content += chunk["content"]
-
+        content, tokens = self.context_builder.join(
+            [chunk["content"] for chunk in chunks if "content" in chunk]
+        )
+        logger.debug(f"Assembled {tokens} tokens of context")
         return content
@@ -0,0 +1,283 @@
+"""
+Token-budgeted assembly of the context returned by the augmentation service.
+
+Retrieved chunks are taken in relevance order until a token budget is spent,
+with optional caps per source document. Chunks from the same source that
+repeat text, such as the overlap carried between neighbouring chunks by the
+splitters, are trimmed or skipped so the same text is not paid for twice.
+Outputs are built with a single join.
+"""
+
+import functools
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..lazy_imports import is_available
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 4000
+DEFAULT_ENCODING = "cl100k_base"
+DEFAULT_MIN_OVERLAP_CHARS = 50
+
+# Used to estimate token counts when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=8)
+def get_encoding(encoding_name: str) -> Any:
+    """
+    Load a tiktoken encoding once per process.
+
+    Args:
+        encoding_name: The tiktoken encoding name.
+
+    Returns:
+        The encoding, or None if tiktoken is not installed or the encoding
+        cannot be loaded.
+    """
+    if not is_available("tiktoken"):
+        logger.info("tiktoken is not installed, estimating token counts from text length")
+        return None
+    import tiktoken
+
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails offline
+        logger.warning(f"Cannot load the {encoding_name} encoding, estimating token counts: {e}")
+        return None
+
+
+class TokenCounter:
+    """
+    Counts tokens with a tiktoken encoding, or estimates them from length.
+    """
+
+    def __init__(self, encoding_name: str = DEFAULT_ENCODING):
+        """
+        Initialize the token counter.
+
+        Args:
+            encoding_name: The tiktoken encoding (default: "cl100k_base").
+        """
+        self.encoding = get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text: The text.
+
+        Returns:
+            The number of tokens.
+        """
+        if not text:
+            return 0
+        if self.encoding is None:
+            return -(-len(text) // CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut a text to at most the given number of tokens.
+
+        Args:
+            text: The text.
+            max_tokens: The number of tokens to keep.
+
+        Returns:
+            The leading part of the text.
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[: max_tokens * CHARS_PER_TOKEN]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
+
+
+def trim_overlap(text: str, kept: List[str], min_overlap: int) -> Optional[str]:
+    """
+    Remove the text a chunk shares with chunks already kept from its source.
+
+    Args:
+        text: The chunk text.
+        kept: The texts already kept from the same source.
+        min_overlap: The shortest shared prefix or suffix that is removed.
+
+    Returns:
+        The chunk text without the shared part, or None if all of it is
+        already kept.
+    """
+    for other in kept:
+        if text in other:
+            return None
+    if min_overlap <= 0 or len(text) < min_overlap:
+        return text
+    for other in kept:
+        # The chunk continues a kept chunk: drop the shared prefix
+        overlap = _suffix_prefix_overlap(other, text, min_overlap)
+        if overlap:
+            text = text[overlap:]
+        # The chunk precedes a kept chunk: drop the shared suffix
+        overlap = _suffix_prefix_overlap(text, other, min_overlap)
+        if overlap:
+            text = text[: len(text) - overlap]
+        if len(text) < min_overlap:
+            break
+    return text if text.strip() else None
+
+
+def _suffix_prefix_overlap(first: str, second: str, min_overlap: int) -> int:
+    """
+    Get the length of the longest suffix of `first` that is a prefix of `second`.
+
+    Args:
+        first: The text whose end is checked.
+        second: The text whose start is checked.
+        min_overlap: The shortest overlap reported.
+
+    Returns:
+        The overlap length, or 0 if it is shorter than `min_overlap`.
+    """
+    if len(first) < min_overlap or len(second) < min_overlap:
+        return 0
+    anchor = second[:min_overlap]
+    # The longest overlap starts at the earliest occurrence of the anchor
+    start = first.find(anchor, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return len(first) - start
+        start = first.find(anchor, start + 1)
+    return 0
+
+
+class ContextBuilder:
+    """
+    Selects retrieved chunks within a token budget and joins outputs.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the context builder.
+
+        Args:
+            config: A dictionary containing configuration parameters.
+                - max_tokens: Token budget of the returned context; 0 disables
+                  the budget (default: 4000).
+                - max_tokens_per_source: Token cap per source document; 0
+                  disables the cap (default: 0).
+                - max_chunks_per_source: Chunk cap per source document; 0
+                  disables the cap (default: 0).
+                - dedupe: Whether text repeated between chunks of the same
+                  source is removed (default: True).
+                - min_overlap_chars: The shortest repeated text removed from
+                  the start or end of a chunk (default: 50).
+                - encoding_name: The tiktoken encoding used to count tokens
+                  (default: "cl100k_base").
+                - separator: The text placed between outputs (default: "\\n\\n").
+        """
+        self.config = config or {}
+        self.max_tokens = self.config.get("max_tokens", DEFAULT_MAX_TOKENS) or 0
+        self.max_tokens_per_source = self.config.get("max_tokens_per_source", 0) or 0
+        self.max_chunks_per_source = self.config.get("max_chunks_per_source", 0) or 0
+        self.dedupe = self.config.get("dedupe", True)
+        self.min_overlap_chars = self.config.get("min_overlap_chars", DEFAULT_MIN_OVERLAP_CHARS)
+        self.separator = self.config.get("separator", "\n\n")
+        self.counter = TokenCounter(self.config.get("encoding_name", DEFAULT_ENCODING))
+
+    def select(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Select chunks in relevance order until the token budget is spent.
+
+        Chunks are expected in the order returned by the vector database,
+        most relevant first. A chunk that does not fit the remaining budget
+        is skipped, so a smaller, less relevant chunk can still be used.
+
+        Args:
+            chunks: The retrieved chunks, each with a "text" and "metadata".
+
+        Returns:
+            The selected chunks, in relevance order, with repeated text
+            removed and a "tokens" count added.
+        """
+        remaining = self.max_tokens or None
+        kept_by_source: Dict[str, List[str]] = {}
+        tokens_by_source: Dict[str, int] = {}
+        selected = []
+        skipped = 0
+
+        for chunk in chunks:
+            text = chunk.get("text") or ""
+            source = chunk.get("metadata", {}).get("file_path", "unknown")
+            kept = kept_by_source.setdefault(source, [])
+            if self.max_chunks_per_source and len(kept) >= self.max_chunks_per_source:
+                skipped += 1
+                continue
+            if self.dedupe:
+                text = trim_overlap(text, kept, self.min_overlap_chars)
+                if text is None:
+                    skipped += 1
+                    continue
+
+            tokens = self.counter.count(text)
+            if self.max_tokens_per_source and (
+                tokens_by_source.get(source, 0) + tokens > self.max_tokens_per_source
+            ):
+                skipped += 1
+                continue
+            if remaining is not None and tokens > remaining:
+                skipped += 1
+                continue
+
+            kept.append(text)
+            tokens_by_source[source] = tokens_by_source.get(source, 0) + tokens
+            if remaining is not None:
+                remaining -= tokens
+            selected.append({**chunk, "text": text, "tokens": tokens})
+
+        if skipped:
+            logger.debug(
+                f"Selected {len(selected)} of {len(chunks)} chunks "
+                f"({sum(tokens_by_source.values())} tokens)"
+            )
+        return selected
+
+    def join(self, texts: List[str]) -> Tuple[str, int]:
+        """
+        Join outputs within the token budget.
+
+        Outputs are added in order; the first one that does not fit is cut
+        at the budget and the rest are dropped.
+
+        Args:
+            texts: The outputs, most relevant first.
+
+        Returns:
+            The joined text and its number of tokens.
+        """
+        texts = [text for text in texts if text]
+        if not self.max_tokens:
+            content = self.separator.join(texts)
+            return content, self.counter.count(content)
+
+        separator_tokens = self.counter.count(self.separator)
+        used = 0
+        parts = []
+        for text in texts:
+            separator_cost = separator_tokens if parts else 0
+            available = self.max_tokens - used - separator_cost
+            tokens = self.counter.count(text)
+            if tokens > available:
+                text = self.counter.truncate(text, available)
+                if text:
+                    parts.append(text)
+                    used += separator_cost + self.counter.count(text)
+                break
+            parts.append(text)
+            used += separator_cost + tokens
+        return self.separator.join(parts), used
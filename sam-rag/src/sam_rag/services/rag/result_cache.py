@@ -0,0 +1,165 @@
+"""
+Result cache for retrieval and augmentation.
+
+Repeated questions with the same filter and settings are answered from memory
+instead of re-running the embedding, search and LLM calls. Every entry is
+tagged with the index generation it was computed at; the vector database
+service advances the generation on every write, so entries become invalid as
+soon as documents are added, changed or deleted.
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sam_rag.services.database.vector_db_service import get_index_generation
+from sam_rag.services.metrics import get_metrics
+from sam_rag.services.metrics.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+
+_MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use in a cache key.
+
+    Leading, trailing and repeated whitespace does not change the answer, so it
+    is collapsed. Case is kept because it is passed on to the embedder and LLM.
+
+    Args:
+        query: The query text.
+
+    Returns:
+        The normalized query.
+    """
+    return " ".join(query.split())
+
+
+def freeze_filter(filter: Optional[Dict[str, Any]]) -> str:
+    """
+    Turn a search filter into a stable, hashable cache key component.
+
+    Args:
+        filter: The search filter, if any.
+
+    Returns:
+        The filter serialized with sorted keys.
+    """
+    if not filter:
+        return ""
+    return json.dumps(filter, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache whose entries are invalidated by the index generation.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, name: str = "retrieval"):
+        """
+        Initialize the cache.
+
+        Args:
+            config: The `retrieval.cache` configuration:
+                - enabled: Whether results are cached (default: True).
+                - max_entries: Maximum number of cached results (default: 256).
+                - max_age_seconds: Optional maximum age of an entry. Only needed
+                  when other processes write to the same vector database.
+            name: Name used in log messages.
+        """
+        config = config or {}
+        self.name = name
+        self.enabled = config.get("enabled", True)
+        self.max_entries = max(1, int(config.get("max_entries", DEFAULT_MAX_ENTRIES)))
+        max_age = config.get("max_age_seconds")
+        self.max_age_seconds = float(max_age) if max_age else None
+
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> int:
+        """
+        Get the index generation to tag a result with.
+
+        Read it before computing the result, so a write that lands while the
+        result is being computed invalidates it.
+        """
+        return get_index_generation()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Look up a cached result.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            A copy of the cached result, or None if there is no valid entry.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                generation, stored_at, value = entry
+                if generation == get_index_generation() and (
+                    self.max_age_seconds is None
+                    or time.monotonic() - stored_at <= self.max_age_seconds
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    logger.debug(f"{self.name} cache hit")
+                    get_metrics().count(CACHE_REQUESTS, cache=self.name.lower(), result="hit")
+                    return copy.deepcopy(value)
+                del self._entries[key]
+            self.misses += 1
+            get_metrics().count(CACHE_REQUESTS, cache=self.name.lower(), result="miss")
+            return None
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Store a result.
+
+        Args:
+            key: The cache key.
+            value: The result to cache. A copy is stored.
+            generation: The index generation read before computing the result.
+        """
+        if not self.enabled or generation != get_index_generation():
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            A dictionary with the number of entries, hits and misses.
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -11,6 +11,10 @@ from typing import Dict, Any, List, Optional, Tuple
 
 from sam_rag.services.database.vector_db_service import VectorDBService
 from sam_rag.services.embedder.embedder_service import EmbedderService
+from sam_rag.services.metrics import get_metrics
+from sam_rag.services.metrics.metrics import ADAPTIVE_RETRIEVALS
+from sam_rag.services.rag.adaptive_retrieval import AdaptiveRetrievalPolicy
+from sam_rag.services.rag.result_cache import ResultCache, freeze_filter, normalize_query
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +35,8 @@ class Retriever:
             config: A dictionary containing configuration parameters.
                 - embedding: Configuration for the embedding service.
                 - vector_db: Configuration for the vector database.
-                - retrieval: Configuration for retrieval parameters like top_k.
+                - retrieval: Configuration for retrieval parameters like top_k
+                  and the result cache.
             hybrid_search_config: Optional dictionary containing hybrid search configuration.
         """
         self.config = config or {}
@@ -42,6 +47,9 @@ class Retriever:
         self.embedding_service = EmbedderService(
             config=self.config.get("embedding", {}),
             hybrid_search_config=_hybrid_search_config,
+            embedding_dimension=self.config.get("vector_db", {})
+            .get("db_params", {})
+            .get("embedding_dimension"),
         )
         logger.info("Retriever initialized with embedding service")
 
@@ -59,6 +67,14 @@ class Retriever:
             self.top_k = self.retrieval_config.get("top_k", 5)
         logger.info("Retriever initialized with top-k parameter")
 
+        # Cache of search results, invalidated by vector database writes
+        self.cache = ResultCache(self.retrieval_config.get("cache", {}), name="Retrieval")
+
+        # Dense-only first pass, widened only for low-confidence queries
+        self.adaptive = AdaptiveRetrievalPolicy(
+            self.retrieval_config.get("adaptive", {}), top_k=self.top_k
+        )
+
     def retrieve(
         self,
         query: str,
@@ -81,19 +97,67 @@ class Retriever:
             f"[HYBRID_SEARCH_DEBUG] retrieve called with query length: {len(query)}, hybrid_search_enabled: {self.hybrid_search_enabled}, top_k: {self.top_k}"
         )
 
-        try:
-            # Get query embedding (dense and potentially sparse)
+        metrics = get_metrics()
+        with metrics.stage("retrieve", top_k=self.top_k, hybrid=self.hybrid_search_enabled):
+            cache_key = (
+                normalize_query(query),
+                freeze_filter(filter),
+                self.top_k,
+                self.hybrid_search_enabled,
+                self.adaptive.enabled,
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Found {len(cached)} cached results for query")
+                return cached
+            generation = self.cache.generation()
+
+            try:
+                if self.adaptive.enabled:
+                    results = self._adaptive_search(query, filter, metrics)
+                else:
+                    results = self._search(query, filter, metrics)
+
+                logger.info(f"Found {len(results)} results for query")
+                logger.debug(
+                    f"[HYBRID_SEARCH_DEBUG] Search results sample: {[{'score': r.get('score', r.get('distance', 'N/A')), 'text_preview': r.get('text', '')[:50]} for r in results[:3]]}"
+                )
+                self.cache.put(cache_key, results, generation)
+                return results
+            except Exception:
+                logger.error("Error retrieving documents.")
+                raise ValueError(
+                    "Error retrieving documents. Please check the query and try again."
+                ) from None
+
+    def _search(
+        self, query: str, filter: Optional[Dict[str, Any]], metrics: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Embed the query and search for the configured number of results.
+
+        Args:
+            query: The query text.
+            filter: Optional filter to apply to the search.
+            metrics: The metrics the stages are recorded in.
+
+        Returns:
+            The search results.
+        """
+        # Get query embedding (dense and potentially sparse)
+        with metrics.stage("query_embedding"):
             query_embedding_data = self.get_query_embedding(query)
-            dense_query_embedding = query_embedding_data["dense_vector"]
-            sparse_query_vector = query_embedding_data.get("sparse_vector")
+        dense_query_embedding = query_embedding_data["dense_vector"]
+        sparse_query_vector = query_embedding_data.get("sparse_vector")
 
-            logger.debug(
-                f"[HYBRID_SEARCH_DEBUG] Query embeddings - dense_dim: {len(dense_query_embedding) if dense_query_embedding else 0}, sparse_terms: {len(sparse_query_vector) if sparse_query_vector else 0}"
-            )
+        logger.debug(
+            f"[HYBRID_SEARCH_DEBUG] Query embeddings - dense_dim: {len(dense_query_embedding) if dense_query_embedding else 0}, sparse_terms: {len(sparse_query_vector) if sparse_query_vector else 0}"
+        )
 
-            request_hybrid_search = self.hybrid_search_enabled
+        request_hybrid_search = self.hybrid_search_enabled
 
-            # Search the vector database
+        # Search the vector database
+        with metrics.stage("search", top_k=self.top_k, hybrid=request_hybrid_search):
             results = self.vector_db.search(
                 query_embedding=dense_query_embedding,
                 top_k=self.top_k,
@@ -101,31 +165,78 @@ class Retriever:
                 query_sparse_vector=sparse_query_vector,
                 request_hybrid=request_hybrid_search,
             )
+        return results
+
+    def _adaptive_search(
+        self, query: str, filter: Optional[Dict[str, Any]], metrics: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a small dense-only search, and widen it only if its results are weak.
+
+        The first pass skips the sparse query vector and hybrid search. If
+        the best result is not similar enough, or the results are scored
+        almost alike, the search is repeated as a hybrid search, when hybrid
+        search is enabled, for `adaptive.widen_k` results.
 
-            logger.info(f"Found {len(results)} results for query")
-            logger.debug(
-                f"[HYBRID_SEARCH_DEBUG] Search results sample: {[{'score': r.get('score', r.get('distance', 'N/A')), 'text_preview': r.get('text', '')[:50]} for r in results[:3]]}"
+        Args:
+            query: The query text.
+            filter: Optional filter to apply to the search.
+            metrics: The metrics the stages are recorded in.
+
+        Returns:
+            The search results.
+        """
+        with metrics.stage("query_embedding"):
+            query_embedding_data = self.get_query_embedding(query, include_sparse=False)
+        dense_query_embedding = query_embedding_data["dense_vector"]
+
+        with metrics.stage("search", top_k=self.adaptive.initial_k, hybrid=False):
+            results = self.vector_db.search(
+                query_embedding=dense_query_embedding,
+                top_k=self.adaptive.initial_k,
+                filter=filter,
             )
+        reason = self.adaptive.widen_reason(
+            [self.vector_db.similarity(result) for result in results]
+        )
+        if reason is None:
+            metrics.count(ADAPTIVE_RETRIEVALS, path="dense")
             return results
-        except Exception:
-            logger.error("Error retrieving documents.")
-            raise ValueError(
-                "Error retrieving documents. Please check the query and try again."
-            ) from None
 
-    def get_query_embedding(self, query: str) -> Dict[str, Any]:
+        hybrid = self.hybrid_search_enabled and self.adaptive.hybrid
+        logger.debug(
+            f"Widening search ({reason}) to {self.adaptive.widen_k} results, hybrid: {hybrid}"
+        )
+        sparse_query_vector = None
+        if hybrid:
+            with metrics.stage("sparse_query_embedding"):
+                sparse_query_vector = self.embedding_service.embed_sparse_text(query)
+        with metrics.stage("search", top_k=self.adaptive.widen_k, hybrid=hybrid):
+            widened = self.vector_db.search(
+                query_embedding=dense_query_embedding,
+                top_k=self.adaptive.widen_k,
+                filter=filter,
+                query_sparse_vector=sparse_query_vector,
+                request_hybrid=hybrid,
+            )
+        metrics.count(ADAPTIVE_RETRIEVALS, path="hybrid" if hybrid else "widened", reason=reason)
+        return widened
+
+    def get_query_embedding(self, query: str, include_sparse: bool = True) -> Dict[str, Any]:
         """
         Get the embedding data (dense and potentially sparse) for a query.
 
         Args:
             query: The query text.
+            include_sparse: Whether the sparse vector is generated when hybrid
+                search is enabled.
 
         Returns:
             A dictionary containing "dense_vector" and "sparse_vector" (if applicable).
         """
         try:
             # Get query embedding data
-            embedding_data = self.embedding_service.embed_text(query)
+            embedding_data = self.embedding_service.embed_text(query, include_sparse=include_sparse)
             if not embedding_data or not embedding_data.get("dense_vector"):
                 raise ValueError("Failed to generate embedding for query") from None
 
@@ -252,6 +252,10 @@ class CloudStorageDataSource(DataSource):
             logger.debug(f"{self.provider_name} file already ingested: {file_name}")
             return
 
+        if not self.owns_work(file_path):
+            logger.debug(f"{self.provider_name} file is in a shard leased by another instance: {file_name}")
+            return
+
         # Validate file
         if not self._is_valid_cloud_file(file_name, mime_type, file_size):
             logger.debug(f"Invalid {self.provider_name} file: {file_name}")
@@ -277,18 +281,20 @@ class CloudStorageDataSource(DataSource):
                     # Track the file with artifact URL
                     self._track_file(file_path, file_name, "new", metadata)
                     
-                    # Process the downloaded file with metadata
-                    self.pipeline.process_files([temp_file_path], metadata=metadata)
+                    # Queue the downloaded file; the pipeline removes it once ingested
+                    self.pipeline.submit_file(
+                        temp_file_path, metadata=metadata, remove_after=True
+                    )
                 else:
                     logger.warning(f"Failed to store cloud file as artifact: {file_name}")
 
-                # Cleanup temporary file
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to cleanup temp file {temp_file_path}.", trace=e
-                    )
+                    # Cleanup temporary file
+                    try:
+                        os.unlink(temp_file_path)
+                    except Exception as e:
+                        logger.warning(
+                            f"Failed to cleanup temp file {temp_file_path}: {str(e)}"
+                        )
         except Exception as e:
             logger.error(
                 f"Error processing {self.provider_name} file {file_name}: {str(e)}"
@@ -1,9 +1,22 @@
 from abc import ABC, abstractmethod
+import asyncio
+import concurrent.futures
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Defaults for artifact uploads made by the scanners
+DEFAULT_MAX_CONCURRENT_UPLOADS = 4
+DEFAULT_UPLOAD_TIMEOUT = 300
+
+# Tracked file state used to skip unchanged files
+FILE_STATE_KEYS = ("content_hash", "size", "mtime")
+
 # Abstract base class for data sources
 class DataSource(ABC):
     """
@@ -26,6 +39,24 @@ class DataSource(ABC):
         self.pipeline = None
         self.file_service = None
         self.session_id = "rag_session"  # Generate a session ID for artifacts
+        # When set, database tracking is buffered and written by _flush_tracked_files
+        self._defer_tracking = False
+        self._pending_tracked: List[Dict[str, Any]] = []
+        # Set by FileChangeTracker when ingestion is sharded across instances
+        self.work_leases = None
+
+        # Artifact uploads run on one long-lived event loop owned by the source
+        upload_config = (config or {}).get("artifact_uploads", {}) or {}
+        self.max_concurrent_uploads = max(
+            1, int(upload_config.get("max_concurrent", DEFAULT_MAX_CONCURRENT_UPLOADS))
+        )
+        self.upload_timeout = upload_config.get("timeout", DEFAULT_UPLOAD_TIMEOUT)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._upload_semaphore: Optional[asyncio.Semaphore] = None
+        # Path -> (content hash, artifact URL) of the last upload
+        self._uploaded_artifacts: Dict[str, tuple] = {}
 
     @abstractmethod
     def process_config(self, source: Dict = {}) -> None:
@@ -56,6 +87,37 @@ class DataSource(ABC):
         """
         pass
 
+    def owns_work(self, path: str) -> bool:
+        """
+        Check whether this instance should ingest a path.
+
+        Always True unless sharding is enabled, in which case only paths in
+        shards leased by this instance are ingested here.
+
+        Args:
+            path: The file path or cloud URI.
+
+        Returns:
+            True if this instance should ingest the path.
+        """
+        return self.work_leases is None or self.work_leases.owns(path)
+
+    def rescan_shards(self, shards: Iterable[int]) -> None:
+        """
+        Ingest the files of shards this instance has just taken over.
+
+        Runs a batch scan, which skips files in shards leased by other
+        instances and files whose tracked state did not change. Sources that
+        can list the files of given shards more cheaply may override this.
+        Nothing is scanned when batch mode is disabled, as existing files
+        are then never ingested by a scan.
+
+        Args:
+            shards: The newly acquired shards.
+        """
+        if self.batch:
+            self.batch_scan()
+
     def get_tracked_files(self) -> List[Dict[str, Any]]:
         """
         Get all tracked files.
@@ -169,6 +231,10 @@ class DataSource(ABC):
         """
         pass
 
+    def _fallback_artifact_url(self, file_path: str) -> str:
+        """Generate a placeholder artifact URL when a file could not be stored."""
+        return f"artifact://fallback/{self.__class__.__name__}/{int(time.time())}/{os.path.basename(file_path)}"
+
     async def store_as_artifact(self, file_path: str) -> Optional[str]:
         """
         Store a file as an artifact and return the artifact URL.
@@ -182,9 +248,7 @@ class DataSource(ABC):
         if not self.file_service:
             logger.warning("No artifact service available. Cannot store artifact.")
             # Generate a fallback URL for testing purposes
-            import os
-            import time
-            fallback_url = f"artifact://fallback/{self.__class__.__name__}/{int(time.time())}/{os.path.basename(file_path)}"
+            fallback_url = self._fallback_artifact_url(file_path)
             logger.info(f"Generated fallback artifact URL: {fallback_url}")
             return fallback_url
 
@@ -202,36 +266,226 @@ class DataSource(ABC):
             else:
                 logger.warning(f"Failed to store file as artifact: {file_path}")
                 # Generate a fallback URL for testing purposes
-                import os
-                import time
-                fallback_url = f"artifact://fallback/{self.__class__.__name__}/{int(time.time())}/{os.path.basename(file_path)}"
+                fallback_url = self._fallback_artifact_url(file_path)
                 logger.info(f"Generated fallback artifact URL: {fallback_url}")
                 return fallback_url
         except Exception as e:
             logger.error(f"Error storing file as artifact: {str(e)}")
             # Generate a fallback URL for testing purposes
-            import os
-            import time
-            fallback_url = f"artifact://fallback/{self.__class__.__name__}/{int(time.time())}/{os.path.basename(file_path)}"
+            fallback_url = self._fallback_artifact_url(file_path)
             logger.info(f"Generated fallback artifact URL after exception: {fallback_url}")
             return fallback_url
 
-    def store_as_artifact_sync(self, file_path: str) -> Optional[str]:
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
         """
-        Synchronous wrapper for store_as_artifact.
+        Get the background event loop used for artifact uploads, starting it on first use.
+
+        The loop and the artifact service connections made on it are reused for
+        every upload instead of being created and torn down per file.
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name=f"{self.__class__.__name__}-artifact-uploads",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop = loop
+                self._loop_thread = thread
+                self._upload_semaphore = None
+            return self._loop
+
+    async def _store_as_artifact_limited(self, file_path: str) -> Optional[str]:
+        """Store a file as an artifact, with at most `max_concurrent_uploads` in flight."""
+        if self._upload_semaphore is None:
+            self._upload_semaphore = asyncio.Semaphore(self.max_concurrent_uploads)
+        async with self._upload_semaphore:
+            return await self.store_as_artifact(file_path)
+
+    def submit_artifact_upload(
+        self, file_path: str, content_hash: Optional[str] = None
+    ) -> concurrent.futures.Future:
+        """
+        Start storing a file as an artifact on the background event loop.
+
+        A file whose content hash matches its last upload is not uploaded
+        again; the returned future resolves to the earlier artifact URL.
+
+        Args:
+            file_path: The path to the file.
+            content_hash: Optional SHA-256 of the file content.
+
+        Returns:
+            A future resolving to the artifact URL.
         """
-        import asyncio
+        if content_hash:
+            previous = self._uploaded_artifacts.get(file_path)
+            if previous and previous[0] == content_hash:
+                logger.debug(f"Artifact unchanged, upload skipped: {file_path}")
+                future = concurrent.futures.Future()
+                future.set_result(previous[1])
+                return future
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._store_as_artifact_limited(file_path), self._get_loop()
+        )
+        if content_hash:
+            def remember(done: concurrent.futures.Future) -> None:
+                if not done.cancelled() and done.exception() is None and done.result():
+                    url = done.result()
+                    if not url.startswith("artifact://fallback/"):
+                        self._uploaded_artifacts[file_path] = (content_hash, url)
+
+            future.add_done_callback(remember)
+        return future
+
+    def _artifact_upload_result(
+        self, file_path: str, future: concurrent.futures.Future
+    ) -> Optional[str]:
+        """Wait for an upload and return its URL, or a fallback URL if it failed."""
         try:
-            return asyncio.run(self.store_as_artifact(file_path))
+            return future.result(timeout=self.upload_timeout)
         except Exception as e:
-            logger.error(f"Error in store_as_artifact_sync: {str(e)}")
+            if isinstance(e, concurrent.futures.TimeoutError):
+                future.cancel()
+            logger.error(f"Error in store_as_artifact_sync: {str(e) or type(e).__name__}")
             # Generate a fallback URL for testing purposes
-            import os
-            import time
-            fallback_url = f"artifact://fallback/{self.__class__.__name__}/{int(time.time())}/{os.path.basename(file_path)}"
+            fallback_url = self._fallback_artifact_url(file_path)
             logger.info(f"Generated fallback artifact URL in sync method: {fallback_url}")
             return fallback_url
 
+    def store_as_artifact_sync(
+        self, file_path: str, content_hash: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Synchronous wrapper for store_as_artifact.
+
+        Args:
+            file_path: The path to the file.
+            content_hash: Optional SHA-256 of the file content; the upload is
+                skipped if it matches the last upload of the file.
+
+        Returns:
+            The URL of the stored artifact.
+        """
+        return self._artifact_upload_result(
+            file_path, self.submit_artifact_upload(file_path, content_hash)
+        )
+
+    def store_as_artifacts_sync(
+        self, files: Dict[str, Optional[str]]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Store many files as artifacts concurrently.
+
+        At most `max_concurrent_uploads` uploads run at the same time.
+
+        Args:
+            files: Mapping of file path to its content hash (or None).
+
+        Returns:
+            Mapping of file path to its artifact URL.
+        """
+        futures = {
+            file_path: self.submit_artifact_upload(file_path, content_hash)
+            for file_path, content_hash in files.items()
+        }
+        return {
+            file_path: self._artifact_upload_result(file_path, future)
+            for file_path, future in futures.items()
+        }
+
+    def close(self) -> None:
+        """
+        Stop the background event loop used for artifact uploads.
+        """
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        if not loop.is_running():
+            loop.close()
+
+    @staticmethod
+    def _compute_file_state(file_path: str) -> Dict[str, Any]:
+        """
+        Compute the size, modification time and content hash of a local file.
+
+        Args:
+            file_path: The path to the file.
+
+        Returns:
+            A dictionary with `size`, `mtime` and `content_hash`, or an empty
+            dictionary if the file cannot be read.
+        """
+        try:
+            stat = os.stat(file_path)
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            return {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "content_hash": digest.hexdigest(),
+            }
+        except OSError as e:
+            logger.warning(f"Could not compute file state for {file_path}: {str(e)}")
+            return {}
+
+    def _split_file_state(
+        self, file_path: str, status: str, metadata: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Separate the file state from the metadata tracked before ingestion.
+
+        With database tracking, the size, mtime and content hash are written
+        by the pipeline only once the file was ingested, so a failed ingest is
+        retried by the next scan instead of being skipped as unchanged.
+
+        Args:
+            file_path: The path to the file.
+            status: The tracked status of the file.
+            metadata: The file metadata, including its state.
+
+        Returns:
+            The metadata to track now, and the record to write once the file
+            was ingested (None with memory storage).
+        """
+        if self.use_memory_storage:
+            return metadata, None
+        tracked = {key: value for key, value in metadata.items() if key not in FILE_STATE_KEYS}
+        ingested_state = {
+            "path": file_path,
+            "file": os.path.basename(file_path),
+            "status": status,
+            **{key: metadata.get(key) for key in FILE_STATE_KEYS},
+        }
+        return tracked, ingested_state
+
+    def _flush_tracked_files(self) -> None:
+        """
+        Write buffered file tracking records to the database in one transaction.
+        """
+        if not self._pending_tracked:
+            return
+
+        pending, self._pending_tracked = self._pending_tracked, []
+        try:
+            from sam_rag.services.database.connect import session_scope, upsert_documents
+
+            with session_scope() as db:
+                count = upsert_documents(db, pending)
+            logger.info(f"Tracked {count} files in database")
+        except Exception as e:
+            logger.error(f"Error tracking {len(pending)} files in database: {str(e)}")
+
     def _track_file(
         self,
         file_path: str,
@@ -259,14 +513,23 @@ class DataSource(ABC):
             else:
                 # Try to use database storage
                 try:
-                    from sam_rag.services.database.connect import get_db, insert_document
-
-                    insert_document(
-                        get_db(),
-                        status=status,
-                        path=file_path,
-                        file=file_name,
-                    )
+                    from sam_rag.services.database.connect import session_scope, insert_document
+
+                    file_state = {key: (metadata or {}).get(key) for key in FILE_STATE_KEYS}
+                    if self._defer_tracking:
+                        self._pending_tracked.append(
+                            {"path": file_path, "file": file_name, "status": status, **file_state}
+                        )
+                        return
+
+                    with session_scope() as db:
+                        insert_document(
+                            db,
+                            status=status,
+                            path=file_path,
+                            file=file_name,
+                            **file_state,
+                        )
                     logger.info(f"File tracked in database: {file_path}")
                 except ImportError:
                     logger.warning(
@@ -7,7 +7,7 @@ import logging
 import os
 import time
 import threading
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -26,10 +26,17 @@ from google.adk.artifacts import BaseArtifactService # Added import
 
 # Try to import database modules, but don't fail if they're not available
 try:
-    from ..database.connect import get_db, insert_document, update_document, delete_document
+    from ..database.connect import (
+        BULK_CHUNK_SIZE,
+        delete_document,
+        get_document_states,
+        session_scope,
+        update_document,
+    )
     DATABASE_AVAILABLE = True
 except ImportError:
     DATABASE_AVAILABLE = False
+    BULK_CHUNK_SIZE = 500
 
 logger = logging.getLogger(__name__)
 
@@ -165,9 +172,13 @@ class LocalFileSystemDataSource(DataSource):
             logger.error(f"Error uploading files: {e}")
             return "Failed to upload documents"
 
-    def batch_scan(self) -> None:
+    def batch_scan(self, shards: Optional[Iterable[int]] = None) -> None:
         """
         Scan all existing files in configured directories that match the format filters.
+
+        Args:
+            shards: Only scan files in these work shards, when ingestion is
+                sharded across instances (default: all shards held).
         """
         logger.info(f"Starting batch scan of directories: {self.directories}")
 
@@ -175,44 +186,202 @@ class LocalFileSystemDataSource(DataSource):
             logger.warning("No directories configured for batch scan.")
             return
 
-        for directory in self.directories:
-            if not os.path.exists(directory):
-                logger.warning(f"Directory does not exist: {directory}")
-                continue
-
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    file_path = os.path.join(root, file)
-
-                    if self.is_valid_file(file_path):
-                        # Check if the document already exists in the vector database
-                        if file_path in self.ingested_documents:
-                            logger.info(
-                                "Batch: Document already exists in vector database."
-                            )
-                            continue
-
-                        # Store the file as an artifact
-                        artifact_url = self.store_as_artifact_sync(file_path)
-                        
-                        if artifact_url:
-                            logger.info(f"Stored file as artifact: {artifact_url}")
-                            
-                            # Use inherited tracking method with artifact URL
-                            metadata = self.extract_file_metadata(
-                                file_path=file_path, 
-                                artifact_url=artifact_url,
-                                source="filesystem"
-                            )
-                            
-                            self._track_file(
-                                file_path, os.path.basename(file_path), "new", metadata
-                            )
-                            
-                            # Process the file with the pipeline
-                            self.pipeline.process_files([file_path], metadata=metadata)
-                        else:
-                            logger.warning(f"Failed to store file as artifact: {file_path}")
+        # Buffer database tracking so each chunk of files is one transaction
+        use_database = not self.use_memory_storage and DATABASE_AVAILABLE
+        self._defer_tracking = use_database
+
+        try:
+            for directory in self.directories:
+                if not os.path.exists(directory):
+                    logger.warning(f"Directory does not exist: {directory}")
+                    continue
+
+                candidates = []
+                for root, _, files in os.walk(directory):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+
+                        if self.is_valid_file(file_path):
+                            # Check if the document already exists in the vector database
+                            if file_path in self.ingested_documents:
+                                logger.info(
+                                    "Batch: Document already exists in vector database."
+                                )
+                                continue
+                            candidates.append(file_path)
+
+                if self.work_leases is not None:
+                    owned = self.work_leases.filter_owned(candidates)
+                    if shards is not None:
+                        wanted = set(shards)
+                        owned = [
+                            path for path in owned if self.work_leases.shard_of(path) in wanted
+                        ]
+                    logger.info(
+                        f"Batch: {len(owned)} of {len(candidates)} files are in shards leased by this instance"
+                    )
+                    candidates = owned
+
+                for start in range(0, len(candidates), BULK_CHUNK_SIZE):
+                    chunk = candidates[start : start + BULK_CHUNK_SIZE]
+                    stored_states = self._get_stored_states(chunk) if use_database else {}
+                    self._batch_process_files(chunk, stored_states)
+                    self._flush_tracked_files()
+        finally:
+            self._defer_tracking = False
+            self._flush_tracked_files()
+
+    def rescan_shards(self, shards: Iterable[int]) -> None:
+        """
+        Ingest the files of shards this instance has just taken over.
+
+        Args:
+            shards: The newly acquired shards.
+        """
+        if self.batch:
+            self.batch_scan(shards)
+
+    def _get_stored_states(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the tracked size, mtime and content hash for many paths in one query.
+
+        Args:
+            paths: The file paths to look up.
+
+        Returns:
+            Mapping of path to its stored file state.
+        """
+        try:
+            with session_scope() as db:
+                return {
+                    path: {
+                        "size": doc.size,
+                        "mtime": doc.mtime,
+                        "content_hash": doc.content_hash,
+                    }
+                    for path, doc in get_document_states(db, paths).items()
+                }
+        except Exception as e:
+            logger.error(f"Error reading tracked file states: {str(e)}")
+            return {}
+
+    def _batch_process_files(
+        self, file_paths: List[str], stored_states: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """
+        Store, track and process a chunk of files found by a batch scan.
+
+        Changed files are uploaded as artifacts concurrently, then tracked and
+        queued for ingestion in scan order.
+
+        Args:
+            file_paths: The file paths of the chunk.
+            stored_states: The tracked state of the files, by path.
+        """
+        to_upload = {}
+        for file_path in file_paths:
+            file_state = self._batch_file_state(file_path, stored_states.get(file_path))
+            if file_state is not None:
+                to_upload[file_path] = file_state
+
+        artifact_urls = self.store_as_artifacts_sync(
+            {path: state.get("content_hash") for path, state in to_upload.items()}
+        )
+        for file_path, file_state in to_upload.items():
+            self._batch_ingest_file(
+                file_path,
+                stored_states.get(file_path),
+                file_state,
+                artifact_urls.get(file_path),
+            )
+
+    def _batch_file_state(
+        self, file_path: str, stored_state: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Decide whether a file found by a batch scan needs to be ingested.
+
+        Files whose size and mtime, or content hash, match the tracked state are
+        skipped without being re-ingested.
+
+        Args:
+            file_path: The path to the file.
+            stored_state: The tracked state of the file, if any.
+
+        Returns:
+            The current file state if the file changed, otherwise None.
+        """
+        if stored_state:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+            if (
+                stored_state.get("size") == stat.st_size
+                and stored_state.get("mtime") == stat.st_mtime
+            ):
+                logger.debug(f"Batch: Unchanged file skipped: {file_path}")
+                return None
+
+        file_state = self._compute_file_state(file_path)
+        if (
+            stored_state
+            and file_state.get("content_hash")
+            and file_state["content_hash"] == stored_state.get("content_hash")
+        ):
+            # Only the mtime changed; refresh the tracked state without re-ingesting
+            logger.debug(f"Batch: Content unchanged, skipped: {file_path}")
+            self._pending_tracked.append(
+                {
+                    "path": file_path,
+                    "file": os.path.basename(file_path),
+                    "status": "modified",
+                    **file_state,
+                }
+            )
+            return None
+        return file_state
+
+    def _batch_ingest_file(
+        self,
+        file_path: str,
+        stored_state: Optional[Dict[str, Any]],
+        file_state: Dict[str, Any],
+        artifact_url: Optional[str],
+    ) -> None:
+        """
+        Track a changed file found by a batch scan and queue it for ingestion.
+
+        Args:
+            file_path: The path to the file.
+            stored_state: The tracked state of the file, if any.
+            file_state: The current size, mtime and content hash of the file.
+            artifact_url: The URL of the stored artifact.
+        """
+        if artifact_url:
+            logger.info(f"Stored file as artifact: {artifact_url}")
+
+            # Use inherited tracking method with artifact URL
+            metadata = self.extract_file_metadata(
+                file_path=file_path,
+                artifact_url=artifact_url,
+                source="filesystem",
+                **file_state,
+            )
+
+            status = "modified" if stored_state else "new"
+            tracked_metadata, ingested_state = self._split_file_state(file_path, status, metadata)
+            self._track_file(file_path, os.path.basename(file_path), status, tracked_metadata)
+
+            # Queue the file for ingestion by the pipeline
+            self.pipeline.submit_file(
+                file_path,
+                metadata=metadata,
+                content_hash=metadata.get("content_hash"),
+                ingested_state=ingested_state,
+            )
+        else:
+            logger.warning(f"Failed to store file as artifact: {file_path}")
 
     def scan(self) -> None:
         """
@@ -275,14 +444,21 @@ class LocalFileSystemDataSource(DataSource):
             logger.warning(f"Invalid file: {event.src_path}")
             return
 
+        if not self.owns_work(event.src_path):
+            logger.debug(f"File is in a shard leased by another instance: {event.src_path}")
+            return
+
         # Check if the document already exists in the vector database
         if event.src_path in self.ingested_documents:
             logger.info(
                 f"Document already exists in vector database. Re-ingest {event.src_path}"
             )
 
-        # Store the file as an artifact
-        artifact_url = self.store_as_artifact_sync(event.src_path)
+        # Store the file as an artifact, unless this content was already stored
+        file_state = self._compute_file_state(event.src_path)
+        artifact_url = self.store_as_artifact_sync(
+            event.src_path, file_state.get("content_hash")
+        )
         
         if artifact_url:
             logger.info(f"Stored file as artifact: {artifact_url}")
@@ -291,18 +467,27 @@ class LocalFileSystemDataSource(DataSource):
             metadata = self.extract_file_metadata(
                 file_path=event.src_path, 
                 artifact_url=artifact_url,
-                source="filesystem"
+                source="filesystem",
+                **file_state,
             )
             
+            tracked_metadata, ingested_state = self._split_file_state(
+                event.src_path, "new", metadata
+            )
             self._track_file(
-                event.src_path, os.path.basename(event.src_path), "new", metadata
+                event.src_path, os.path.basename(event.src_path), "new", tracked_metadata
             )
             
             # Add the new document to the existing sources list
             self.ingested_documents.append(event.src_path)
             
-            # Process the file with the pipeline
-            self.pipeline.process_files([event.src_path], metadata=metadata)
+            # Queue the file for ingestion by the pipeline
+            self.pipeline.submit_file(
+                event.src_path,
+                metadata=metadata,
+                content_hash=metadata.get("content_hash"),
+                ingested_state=ingested_state,
+            )
         else:
             logger.warning(f"Failed to store file as artifact: {event.src_path}")
 
@@ -320,7 +505,8 @@ class LocalFileSystemDataSource(DataSource):
                 memory_storage.delete_document(path=event.src_path)
                 logger.info(f"Document deleted from memory: {event.src_path}")
             elif DATABASE_AVAILABLE:
-                delete_document(get_db(), path=event.src_path)
+                with session_scope() as db:
+                    delete_document(db, path=event.src_path)
                 logger.info(f"Document deleted from database: {event.src_path}")
             else:
                 logger.warning("Neither memory storage nor database is available")
@@ -337,6 +523,10 @@ class LocalFileSystemDataSource(DataSource):
         if not self.is_valid_file(event.src_path):
             return
 
+        if not self.owns_work(event.src_path):
+            logger.debug(f"File is in a shard leased by another instance: {event.src_path}")
+            return
+
         # Check if the document already exists in the vector database
         # For modified files, we still want to update them even if they exist
         # But we'll log that they exist for tracking purposes
@@ -345,8 +535,11 @@ class LocalFileSystemDataSource(DataSource):
                 f"Modified document exists in vector database: {event.src_path}"
             )
 
-        # Store the file as an artifact
-        artifact_url = self.store_as_artifact_sync(event.src_path)
+        # Store the file as an artifact, unless this content was already stored
+        file_state = self._compute_file_state(event.src_path)
+        artifact_url = self.store_as_artifact_sync(
+            event.src_path, file_state.get("content_hash")
+        )
         
         if artifact_url:
             logger.info(f"Stored modified file as artifact: {artifact_url}")
@@ -357,7 +550,8 @@ class LocalFileSystemDataSource(DataSource):
                 metadata = self.extract_file_metadata(
                     file_path=event.src_path, 
                     artifact_url=artifact_url,
-                    source="filesystem"
+                    source="filesystem",
+                    **file_state,
                 )
                 
                 if self.use_memory_storage:
@@ -368,18 +562,21 @@ class LocalFileSystemDataSource(DataSource):
                     )
                     logger.info(f"Document updated in memory: {event.src_path}")
                 elif DATABASE_AVAILABLE:
-                    update_document(
-                        get_db(), 
-                        path=event.src_path, 
-                        status="modified",
-                        artifact_url=artifact_url
-                    )
+                    # The new file state is written once the file was ingested
+                    with session_scope() as db:
+                        update_document(db, path=event.src_path, status="modified")
                     logger.info(f"Document updated in database: {event.src_path}")
                 else:
                     logger.warning("Neither memory storage nor database is available")
                     
-                # Process the modified file with the pipeline
-                self.pipeline.process_files([event.src_path], metadata=metadata)
+                # Queue the modified file for ingestion by the pipeline
+                _, ingested_state = self._split_file_state(event.src_path, "modified", metadata)
+                self.pipeline.submit_file(
+                    event.src_path,
+                    metadata=metadata,
+                    content_hash=file_state.get("content_hash"),
+                    ingested_state=ingested_state if DATABASE_AVAILABLE else None,
+                )
             except Exception as e:
                 logger.error(f"Error updating document {event.src_path}: {str(e)}")
         else:
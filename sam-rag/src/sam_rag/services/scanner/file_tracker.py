@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Dict, Any, Union
+import threading
+from typing import List, Dict, Any, Set, Union
 
 from sam_rag.services.scanner.file_system import LocalFileSystemDataSource
 from sam_rag.services.scanner.cloud_storage import CloudStorageDataSource
@@ -13,6 +14,7 @@ from sam_rag.services.database.vector_db_service import VectorDBService
 # Try to import database modules, but don't fail if they're not available
 try:
     from sam_rag.services.database.connect import connect
+    from sam_rag.services.scanner.work_leases import WorkLeaseManager
 
     DATABASE_AVAILABLE = True
 except ImportError:
@@ -43,6 +45,9 @@ class FileChangeTracker:
         self.vector_db_config = config.get("vector_db", {})
         self.artifact_config = config.get("artifact_service", {})
         self.data_sources = []  # Support multiple data sources
+        self.work_leases = None
+        # Serializes the rescans of shards taken over from other instances
+        self._rescan_lock = threading.Lock()
         self.use_memory_storage = self.scanner_config.get("use_memory_storage", False)
         self.batch = self.scanner_config.get("batch", False)
 
@@ -86,6 +91,24 @@ class FileChangeTracker:
                 connect(db_config)
                 logger.info("FILE_TRACKER: Database connected")
 
+        # Split ingestion across instances sharing the tracker database
+        sharding_config = self.scanner_config.get("sharding", {})
+        if sharding_config.get("enabled", False):
+            if self.use_memory_storage or not DATABASE_AVAILABLE:
+                logger.warning(
+                    "FILE_TRACKER: Sharding requires a shared tracker database; "
+                    "ingesting all files on this instance"
+                )
+            else:
+                self.work_leases = WorkLeaseManager(sharding_config)
+                self.work_leases.start()
+
+        # Configure the in-memory change log (bounded, optionally spilled to SQLite)
+        if self.use_memory_storage:
+            memory_config = self.scanner_config.get("memory_storage", {})
+            if memory_config:
+                memory_storage.configure(**memory_config)
+
         # Support multiple sources (new format) or single source (backward compatibility)
         sources_config = self.scanner_config.get("sources", [])
         logger.info(
@@ -145,6 +168,7 @@ class FileChangeTracker:
             )
             data_source = self._create_data_source(source_config, ingested_documents)
             if data_source:
+                data_source.work_leases = self.work_leases
                 self.data_sources.append(data_source)
                 logger.info(f"FILE_TRACKER: Successfully created data source {i}")
             else:
@@ -163,6 +187,8 @@ class FileChangeTracker:
         logger.info(
             f"FILE_TRACKER: Initialized {len(self.data_sources)} data source(s)"
         )
+        if self.work_leases and self.data_sources:
+            self.work_leases.add_listener(self._on_shards_acquired)
         logger.info("=== FILE_TRACKER: Finished _create_handlers ===")
 
     def _create_data_source(
@@ -314,6 +340,33 @@ class FileChangeTracker:
 
         logger.info("Completed scanning all data sources")
 
+    def _on_shards_acquired(self, shards: Set[int]) -> None:
+        """
+        Scan the files of shards taken over from other instances.
+
+        The scan runs on its own thread so that it does not hold up lease
+        renewal.
+
+        Args:
+            shards: The newly acquired shards.
+        """
+        logger.info(f"Acquired work shards {sorted(shards)}, scanning their files")
+        threading.Thread(
+            target=self._rescan_shards, args=(shards,), name="rag-shard-rescan", daemon=True
+        ).start()
+
+    def _rescan_shards(self, shards: Set[int]) -> None:
+        """Ingest the files of newly acquired shards from every data source."""
+        with self._rescan_lock:
+            for data_source in self.data_sources:
+                try:
+                    data_source.rescan_shards(shards)
+                except Exception as e:
+                    logger.error(
+                        f"Error scanning acquired shards of {type(data_source).__name__}: {str(e)}"
+                    )
+        logger.info(f"Finished scanning work shards {sorted(shards)}")
+
     def upload_files(self, documents) -> str:
         """
         Upload files to the first available data source that supports uploads.
@@ -388,6 +441,20 @@ class FileChangeTracker:
             )
         return info
 
+    def cleanup(self) -> None:
+        """
+        Release resources held by the tracker, including any work leases and
+        the artifact upload loops of the data sources.
+        """
+        for data_source in self.data_sources:
+            try:
+                data_source.close()
+            except Exception as e:
+                logger.warning(f"Error closing data source {type(data_source).__name__}: {str(e)}")
+        if self.work_leases:
+            self.work_leases.stop()
+            self.work_leases = None
+
     # Backward compatibility - maintain single data source interface
     @property
     def data_source(self):
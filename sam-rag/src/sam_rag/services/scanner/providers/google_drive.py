@@ -12,7 +12,7 @@ import threading
 import time
 from typing import Dict, List, Any, Optional
 
-from sam_rag.services.cloud_storage import CloudStorageDataSource
+from sam_rag.services.scanner.cloud_storage import CloudStorageDataSource
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +58,15 @@ class GoogleDriveDataSource(CloudStorageDataSource):
         },
     }
 
+    # Google Drive batch HTTP requests accept at most 100 calls per batch
+    BATCH_LIMIT = 100
+
+    # Sub-request statuses that indicate throttling or a transient service error
+    RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+    # 403 reasons that Drive uses for rate limiting rather than permissions
+    RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
     def __init__(self, config: Dict, ingested_documents: List[str], pipeline):
         """
         Initialize the GoogleDriveDataSource.
@@ -82,6 +91,9 @@ class GoogleDriveDataSource(CloudStorageDataSource):
         self.include_google_formats = False
         self.change_token = None
 
+        # Metadata resolved by listing or batch requests, keyed by file/folder id
+        self._metadata_cache: Dict[str, Dict[str, Any]] = {}
+
         # Initialize the service
         self.process_config(config)
 
@@ -112,6 +124,11 @@ class GoogleDriveDataSource(CloudStorageDataSource):
         self.webhook_url = real_time_config.get("webhook_url")
         self.polling_interval = real_time_config.get("polling_interval", 300)
 
+        # Get batch request configuration
+        batch_config = source.get("batch_requests", {})
+        self.batch_max_retries = batch_config.get("max_retries", 3)
+        self.batch_retry_backoff = batch_config.get("retry_backoff", 2.0)
+
         logger.info(
             f"Google Drive configuration processed: {len(self.folders)} folders, "
             f"real-time: {self.real_time_enabled}, include_google_formats: {self.include_google_formats}"
@@ -150,6 +167,136 @@ class GoogleDriveDataSource(CloudStorageDataSource):
             )
             return False
 
+    def _is_retryable_http_error(self, error: Exception) -> bool:
+        """
+        Check whether a Drive API error is caused by throttling or a transient failure.
+
+        Args:
+            error: The exception raised for a request.
+
+        Returns:
+            True if the request should be retried, False otherwise.
+        """
+        if not isinstance(error, HttpError):
+            return False
+
+        status = error.resp.status
+        if status in self.RETRYABLE_STATUSES:
+            return True
+        if status == 403:
+            details = getattr(error, "error_details", None) or []
+            if isinstance(details, list):
+                return any(
+                    isinstance(detail, dict)
+                    and detail.get("reason") in self.RATE_LIMIT_REASONS
+                    for detail in details
+                )
+        return False
+
+    def _batch_get_metadata(
+        self,
+        file_ids: List[str],
+        fields: str,
+        supports_all_drives: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch metadata for many files or folders using Drive batch HTTP requests.
+
+        IDs are grouped into batches of at most 100 calls. Sub-requests that are
+        rate limited or fail transiently are retried with exponential backoff,
+        without resending the ones that already succeeded.
+
+        Args:
+            file_ids: The IDs of the files or folders.
+            fields: The fields to request for each item.
+            supports_all_drives: Whether the items may live in shared drives.
+
+        Returns:
+            Mapping of ID to metadata. IDs that could not be fetched are omitted.
+        """
+        if not self.service:
+            logger.error("Google Drive service not initialized")
+            return {}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        unique_ids = list(dict.fromkeys(file_ids))
+
+        for start in range(0, len(unique_ids), self.BATCH_LIMIT):
+            pending = unique_ids[start : start + self.BATCH_LIMIT]
+            attempt = 0
+
+            while pending:
+                retry_ids: List[str] = []
+
+                def callback(request_id, response, exception):
+                    if exception is None:
+                        results[request_id] = response
+                    elif self._is_retryable_http_error(exception):
+                        retry_ids.append(request_id)
+                    else:
+                        logger.warning(
+                            f"Google Drive batch metadata request failed for {request_id}: {str(exception)}"
+                        )
+
+                batch = self.service.new_batch_http_request(callback=callback)
+                for file_id in pending:
+                    get_params = {"fileId": file_id, "fields": fields}
+                    if supports_all_drives:
+                        get_params["supportsAllDrives"] = True
+                    batch.add(self.service.files().get(**get_params), request_id=file_id)
+
+                try:
+                    batch.execute()
+                except HttpError as e:
+                    if not self._is_retryable_http_error(e):
+                        logger.error(f"Google Drive batch request failed: {str(e)}")
+                        break
+                    retry_ids = list(pending)
+
+                pending = retry_ids
+                if not pending:
+                    break
+
+                attempt += 1
+                if attempt > self.batch_max_retries:
+                    logger.error(
+                        f"Giving up on {len(pending)} rate limited Google Drive requests "
+                        f"after {self.batch_max_retries} retries"
+                    )
+                    break
+
+                delay = self.batch_retry_backoff * (2 ** (attempt - 1))
+                logger.warning(
+                    f"{len(pending)} Google Drive batch sub-requests rate limited, "
+                    f"retrying in {delay:.1f}s (attempt {attempt}/{self.batch_max_retries})"
+                )
+                time.sleep(delay)
+
+        return results
+
+    def _prefetch_folder_metadata(self) -> None:
+        """
+        Resolve metadata for all configured folders with a single batch request.
+
+        This replaces the per-folder access validation and drive ID lookups
+        that were previously made one call at a time.
+        """
+        folders_by_type: Dict[bool, List[str]] = {}
+        for folder_config in self.folders:
+            folder_id = folder_config.get("folder_id")
+            if folder_id and folder_id not in self._metadata_cache:
+                shared = folder_config.get("type", "personal") == "shared_drive"
+                folders_by_type.setdefault(shared, []).append(folder_id)
+
+        for shared, folder_ids in folders_by_type.items():
+            self._metadata_cache.update(
+                self._batch_get_metadata(
+                    folder_ids,
+                    fields="id, name, mimeType, parents, driveId",
+                    supports_all_drives=shared,
+                )
+            )
+
     def _validate_folder_access(
         self, folder_id: str, folder_type: str = "personal"
     ) -> bool:
@@ -168,15 +315,22 @@ class GoogleDriveDataSource(CloudStorageDataSource):
             return False
 
         try:
-            # Build parameters for folder access check
-            get_params = {"fileId": folder_id, "fields": "id, name, mimeType, parents"}
-
-            # Handle shared drives
-            if folder_type == "shared_drive":
-                get_params["supportsAllDrives"] = True
-
-            # Try to get folder metadata
-            folder_metadata = self.service.files().get(**get_params).execute()
+            # Use metadata already resolved by a listing or batch request
+            folder_metadata = self._metadata_cache.get(folder_id)
+            if folder_metadata is None:
+                # Build parameters for folder access check
+                get_params = {
+                    "fileId": folder_id,
+                    "fields": "id, name, mimeType, parents, driveId",
+                }
+
+                # Handle shared drives
+                if folder_type == "shared_drive":
+                    get_params["supportsAllDrives"] = True
+
+                # Try to get folder metadata
+                folder_metadata = self.service.files().get(**get_params).execute()
+                self._metadata_cache[folder_id] = folder_metadata
 
             # Check if it's actually a folder
             if folder_metadata.get("mimeType") != "application/vnd.google-apps.folder":
@@ -216,13 +370,17 @@ class GoogleDriveDataSource(CloudStorageDataSource):
             return None
 
         try:
-            folder_metadata = (
-                self.service.files()
-                .get(
-                    fileId=folder_id, fields="driveId, parents", supportsAllDrives=True
+            folder_metadata = self._metadata_cache.get(folder_id)
+            if folder_metadata is None:
+                folder_metadata = (
+                    self.service.files()
+                    .get(
+                        fileId=folder_id,
+                        fields="driveId, parents",
+                        supportsAllDrives=True,
+                    )
+                    .execute()
                 )
-                .execute()
-            )
 
             drive_id = folder_metadata.get("driveId")
             if drive_id:
@@ -312,6 +470,9 @@ class GoogleDriveDataSource(CloudStorageDataSource):
                 )
 
                 for item in items:
+                    # Cache listing metadata so later per-item lookups are not needed
+                    self._metadata_cache[item["id"]] = item
+
                     # Handle folders recursively
                     if (
                         item["mimeType"] == "application/vnd.google-apps.folder"
@@ -385,8 +546,10 @@ class GoogleDriveDataSource(CloudStorageDataSource):
             return ""
 
         try:
-            # Get file metadata to determine MIME type
-            file_metadata = self.service.files().get(fileId=file_id).execute()
+            # Get file metadata to determine MIME type, preferring the cached listing
+            file_metadata = self._metadata_cache.pop(file_id, None)
+            if file_metadata is None:
+                file_metadata = self.service.files().get(fileId=file_id).execute()
             mime_type = file_metadata.get("mimeType")
 
             # Handle Google Workspace formats
@@ -457,6 +620,10 @@ class GoogleDriveDataSource(CloudStorageDataSource):
 
         logger.info("Google Drive authentication successful")
 
+        # Resolve all configured folders in one batch request up front
+        self._metadata_cache.clear()
+        self._prefetch_folder_metadata()
+
         for i, folder_config in enumerate(self.folders):
             folder_id = folder_config.get("folder_id")
             folder_name = folder_config.get("name", "Unknown")
@@ -511,6 +678,12 @@ class GoogleDriveDataSource(CloudStorageDataSource):
         # Also create a display path for logging
         display_path = f"google_drive://{file_id}/{file_name}"
 
+        if not self.owns_work(google_drive_uri):
+            logger.debug(
+                f"Google Drive file is in a shard leased by another instance: {file_name}"
+            )
+            return
+
         # Check if already ingested using multiple strategies for robustness
         if self._is_file_already_ingested(
             file_id, file_name, google_drive_uri, modified_time
@@ -531,17 +704,12 @@ class GoogleDriveDataSource(CloudStorageDataSource):
         try:
             temp_file_path = self._download_file(file_id, file_name)
             if temp_file_path:
-                # Process the downloaded file with enhanced metadata
-                # Pass the metadata to the pipeline for proper Google Drive URI storage
-                self.pipeline.process_files([temp_file_path], metadata=metadata)
-
-                # Cleanup temporary file
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to cleanup temp file {temp_file_path}: {str(e)}"
-                    )
+                # Queue the downloaded file with enhanced metadata
+                # Pass the metadata to the pipeline for proper Google Drive URI storage;
+                # the pipeline removes the temporary file once it is ingested
+                self.pipeline.submit_file(
+                    temp_file_path, metadata=metadata, remove_after=True
+                )
         except Exception as e:
             logger.error(f"Error processing Google Drive file {file_name}: {str(e)}")
 
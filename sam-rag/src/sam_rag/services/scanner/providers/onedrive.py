@@ -12,7 +12,7 @@ import threading
 import time
 from typing import Dict, List, Any, Optional
 
-from sam_rag.services.cloud_storage import CloudStorageDataSource
+from sam_rag.services.scanner.cloud_storage import CloudStorageDataSource
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +47,15 @@ class OneDriveDataSource(CloudStorageDataSource):
     # Microsoft Graph API endpoints
     GRAPH_API_ENDPOINT = "https://graph.microsoft.com/v1.0"
 
+    # Microsoft Graph JSON batching accepts at most 20 requests per $batch call
+    GRAPH_BATCH_LIMIT = 20
+
+    # Sub-request statuses that indicate throttling or a transient service error
+    GRAPH_RETRYABLE_STATUSES = (429, 503, 504)
+
+    # Pre-authenticated download URLs are short-lived (about an hour)
+    DOWNLOAD_URL_TTL = 45 * 60
+
     # Office format mappings for download
     OFFICE_FORMATS = {
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
@@ -84,6 +93,9 @@ class OneDriveDataSource(CloudStorageDataSource):
         self.authority = ""
         self.account_type = "personal"  # personal or business
 
+        # Download URLs resolved by listing or $batch, keyed by item id
+        self._download_url_cache: Dict[str, Dict[str, Any]] = {}
+
         # Initialize the service
         self.process_config(config)
 
@@ -121,6 +133,11 @@ class OneDriveDataSource(CloudStorageDataSource):
         self.webhook_url = real_time_config.get("webhook_url")
         self.polling_interval = real_time_config.get("polling_interval", 300)
 
+        # Get Graph $batch configuration
+        batch_config = source.get("graph_batch", {})
+        self.batch_max_retries = batch_config.get("max_retries", 3)
+        self.batch_retry_backoff = batch_config.get("retry_backoff", 2.0)
+
         logger.info(
             f"OneDrive configuration processed: {len(self.folders)} folders, "
             f"account_type: {self.account_type}, real-time: {self.real_time_enabled}"
@@ -271,6 +288,163 @@ class OneDriveDataSource(CloudStorageDataSource):
                 logger.error(f"Response body: {e.response.text[:500]}")
             return {}
 
+    def _make_graph_batch_request(self, endpoints: List[str]) -> Dict[str, Dict]:
+        """
+        Make GET requests to Microsoft Graph API using JSON batching.
+
+        Endpoints are grouped into `$batch` calls of at most 20 sub-requests.
+        Sub-requests that are throttled (429) or hit a transient error (503/504)
+        are retried individually, honouring the largest Retry-After header.
+
+        Args:
+            endpoints: The API endpoints (relative to graph API base).
+
+        Returns:
+            Mapping of endpoint to response body. Endpoints that failed are omitted.
+        """
+        if not self.access_token:
+            logger.error("No access token available for Graph API batch request")
+            return {}
+
+        headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+        }
+        url = f"{self.GRAPH_API_ENDPOINT}/$batch"
+        results: Dict[str, Dict] = {}
+
+        for start in range(0, len(endpoints), self.GRAPH_BATCH_LIMIT):
+            pending = {
+                str(i): endpoint.lstrip("/")
+                for i, endpoint in enumerate(
+                    endpoints[start : start + self.GRAPH_BATCH_LIMIT]
+                )
+            }
+            attempt = 0
+
+            while pending:
+                body = {
+                    "requests": [
+                        {"id": request_id, "method": "GET", "url": f"/{endpoint}"}
+                        for request_id, endpoint in pending.items()
+                    ]
+                }
+                logger.info(f"Making Graph API batch request with {len(pending)} requests")
+
+                try:
+                    response = requests.post(url, headers=headers, json=body)
+                    response.raise_for_status()
+                    responses = response.json().get("responses", [])
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    logger.error(f"Graph API batch request failed: {str(e)}")
+                    break
+
+                retry_after = 0.0
+                for sub_response in responses:
+                    request_id = sub_response.get("id")
+                    if request_id not in pending:
+                        continue
+                    status = sub_response.get("status", 0)
+                    if 200 <= status < 300:
+                        results[pending.pop(request_id)] = sub_response.get("body", {})
+                    elif status in self.GRAPH_RETRYABLE_STATUSES:
+                        sub_headers = sub_response.get("headers") or {}
+                        try:
+                            retry_after = max(
+                                retry_after, float(sub_headers.get("Retry-After", 0))
+                            )
+                        except (TypeError, ValueError):
+                            pass
+                    else:
+                        logger.warning(
+                            f"Graph API batch sub-request failed with status {status}: "
+                            f"{pending.pop(request_id)}"
+                        )
+
+                if not pending:
+                    break
+
+                attempt += 1
+                if attempt > self.batch_max_retries:
+                    logger.error(
+                        f"Giving up on {len(pending)} throttled Graph API requests "
+                        f"after {self.batch_max_retries} retries"
+                    )
+                    break
+
+                delay = retry_after or self.batch_retry_backoff * (2 ** (attempt - 1))
+                logger.warning(
+                    f"{len(pending)} Graph API batch sub-requests throttled, "
+                    f"retrying in {delay:.1f}s (attempt {attempt}/{self.batch_max_retries})"
+                )
+                time.sleep(delay)
+
+        return results
+
+    def _cache_download_url(self, item_id: str, download_url: Optional[str]) -> None:
+        """
+        Remember a pre-authenticated download URL for an item.
+
+        Args:
+            item_id: The OneDrive item ID.
+            download_url: The download URL, if any.
+        """
+        if item_id and download_url:
+            self._download_url_cache[item_id] = {
+                "url": download_url,
+                "fetched_at": time.time(),
+            }
+
+    def _get_cached_download_url(self, item_id: str) -> Optional[str]:
+        """
+        Get a cached download URL for an item if it has not expired.
+
+        Args:
+            item_id: The OneDrive item ID.
+
+        Returns:
+            The download URL, or None if missing or expired.
+        """
+        entry = self._download_url_cache.get(item_id)
+        if not entry:
+            return None
+        if time.time() - entry["fetched_at"] > self.DOWNLOAD_URL_TTL:
+            self._download_url_cache.pop(item_id, None)
+            return None
+        return entry["url"]
+
+    def _prefetch_download_urls(self, files: List[Dict[str, Any]]) -> None:
+        """
+        Resolve download URLs for files in bulk using Graph JSON batching.
+
+        Only files without a fresh cached URL are requested, so a scan issues one
+        `$batch` call per 20 files instead of one metadata call per file.
+
+        Args:
+            files: File metadata dictionaries as returned by `_list_files`.
+        """
+        item_ids = [
+            file_info["id"]
+            for file_info in files
+            if file_info.get("id") and not self._get_cached_download_url(file_info["id"])
+        ]
+        if not item_ids:
+            return
+
+        endpoints = {
+            f"me/drive/items/{item_id}?$select=id,@microsoft.graph.downloadUrl": item_id
+            for item_id in item_ids
+        }
+        responses = self._make_graph_batch_request(list(endpoints.keys()))
+        for endpoint, body in responses.items():
+            self._cache_download_url(
+                endpoints[endpoint], body.get("@microsoft.graph.downloadUrl")
+            )
+
+        logger.debug(
+            f"Prefetched {len(responses)}/{len(item_ids)} OneDrive download URLs"
+        )
+
     def _list_files(
         self, folder_path: str = None, recursive: bool = True
     ) -> List[Dict[str, Any]]:
@@ -362,6 +536,9 @@ class OneDriveDataSource(CloudStorageDataSource):
                         logger.debug(
                             f"Found file: {file_info['name']} (path: {file_info['path']})"
                         )
+                        self._cache_download_url(
+                            file_info["id"], file_info["download_url"]
+                        )
                         files.append(file_info)
 
                 # Handle pagination
@@ -401,10 +578,14 @@ class OneDriveDataSource(CloudStorageDataSource):
             return ""
 
         try:
-            # Get download URL
-            endpoint = f"me/drive/items/{file_id}"
-            response = self._make_graph_request(endpoint)
-            download_url = response.get("@microsoft.graph.downloadUrl")
+            # Get download URL, preferring one resolved by listing or $batch
+            download_url = self._get_cached_download_url(file_id)
+            if not download_url:
+                endpoint = f"me/drive/items/{file_id}"
+                response = self._make_graph_request(endpoint)
+                download_url = response.get("@microsoft.graph.downloadUrl")
+            # Drop the entry once used so the cache does not grow across polls
+            self._download_url_cache.pop(file_id, None)
 
             if not download_url:
                 logger.error(f"No download URL available for OneDrive file {file_name}")
@@ -487,6 +668,32 @@ class OneDriveDataSource(CloudStorageDataSource):
             logger.error(f"Traceback: {traceback.format_exc()}")
             return []
 
+    def _process_files_batched(self, files: List[Dict[str, Any]]) -> None:
+        """
+        Process files in windows, resolving each window's download URLs with
+        one `$batch` call before downloading.
+
+        Args:
+            files: File metadata dictionaries as returned by `_list_files`.
+        """
+        for start in range(0, len(files), self.GRAPH_BATCH_LIMIT):
+            window = files[start : start + self.GRAPH_BATCH_LIMIT]
+            # Skip files that are already ingested or filtered out
+            candidates = [
+                file_info
+                for file_info in window
+                if f"{self.provider_name}://{file_info.get('id')}/{file_info.get('name')}"
+                not in self.ingested_documents
+                and self._is_valid_cloud_file(
+                    file_info.get("name"),
+                    file_info.get("mime_type"),
+                    file_info.get("size", 0),
+                )
+            ]
+            self._prefetch_download_urls(candidates)
+            for file_info in candidates:
+                self._process_cloud_file(file_info)
+
     def batch_scan(self) -> None:
         """
         Perform batch scanning of all files in configured OneDrive folders.
@@ -541,8 +748,7 @@ class OneDriveDataSource(CloudStorageDataSource):
                         logger.info(
                             f"Successfully listed {len(files)} files from path '{path}'"
                         )
-                        for file_info in files:
-                            self._process_cloud_file(file_info)
+                        self._process_files_batched(files)
                         success = True
                         break
                     else:
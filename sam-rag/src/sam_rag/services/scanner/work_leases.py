@@ -0,0 +1,250 @@
+"""
+Lease-based sharding of ingestion work across agent instances.
+
+Paths are hashed into a fixed number of shards. Every instance registers a
+membership lease in the tracker database and holds leases on its share of the
+shards, renewing them from a heartbeat thread. Scanners only ingest paths in
+shards their instance holds, so replicas sharing a tracker database split a
+corpus without embedding or writing the same file twice. When an instance
+stops renewing, its leases expire and the remaining instances take its shards
+over; when an instance joins, the others release their surplus shards.
+Listeners are told about shards taken over after startup, so the files in
+them are scanned even though no file changed.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import socket
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sam_rag.services.database.connect import (
+    acquire_leases,
+    get_live_leases,
+    release_leases,
+    renew_leases,
+    session_scope,
+)
+
+logger = logging.getLogger(__name__)
+
+SHARD_PREFIX = "shard:"
+MEMBER_PREFIX = "member:"
+
+DEFAULT_NUM_SHARDS = 64
+DEFAULT_LEASE_SECONDS = 120.0
+
+
+class WorkLeaseManager:
+    """
+    Holds this instance's share of the path shards in the tracker database.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the lease manager.
+
+        Args:
+            config: The `scanner.sharding` configuration:
+                - num_shards: Number of path shards; must be the same on every
+                  instance (default: 64).
+                - lease_seconds: Lease lifetime without renewal (default: 120).
+                - renew_interval: Seconds between heartbeats (default: a third
+                  of lease_seconds).
+                - instance_id: Unique identity of this instance (default:
+                  hostname, process id and a random suffix).
+        """
+        config = config or {}
+        self.num_shards = max(1, int(config.get("num_shards", DEFAULT_NUM_SHARDS)))
+        self.lease_seconds = float(config.get("lease_seconds", DEFAULT_LEASE_SECONDS))
+        self.renew_interval = float(config.get("renew_interval", self.lease_seconds / 3))
+        self.owner = config.get("instance_id") or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.member_key = f"{MEMBER_PREFIX}{self.owner}"
+
+        self._shards: Set[int] = set()
+        self._listeners: List[Callable[[Set[int]], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Claim this instance's shards and start renewing them in the background."""
+        self.rebalance()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._heartbeat, name="rag-work-leases", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Work leases started for {self.owner}: holding {len(self._shards)} "
+            f"of {self.num_shards} shards"
+        )
+
+    def stop(self) -> None:
+        """Stop renewing and release all leases so other instances take over at once."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.renew_interval)
+            self._thread = None
+        with self._lock:
+            keys = [self._shard_key(shard) for shard in self._shards] + [self.member_key]
+            self._shards = set()
+        try:
+            with session_scope() as db:
+                release_leases(db, keys, self.owner)
+            logger.info(f"Released work leases held by {self.owner}")
+        except Exception as e:
+            logger.error(f"Error releasing work leases: {str(e)}")
+
+    def add_listener(self, listener: Callable[[Set[int]], None]) -> None:
+        """
+        Register a callable told about shards this instance takes over.
+
+        It is called from the heartbeat thread with the shards acquired by a
+        rebalance, e.g. from an instance that stopped or after a lease was
+        lost and won back, and should return quickly.
+
+        Args:
+            listener: Called with the set of newly acquired shards.
+        """
+        self._listeners.append(listener)
+
+    def shard_of(self, path: str) -> int:
+        """
+        Get the shard a path belongs to.
+
+        The shard depends only on the path and `num_shards`, so every instance
+        computes the same assignment.
+        """
+        digest = hashlib.sha1(path.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.num_shards
+
+    def owns(self, path: str) -> bool:
+        """
+        Check whether this instance holds the lease for a path's shard.
+
+        Args:
+            path: The file path or cloud URI.
+
+        Returns:
+            True if this instance should ingest the path.
+        """
+        return self.shard_of(path) in self._shards
+
+    def filter_owned(self, paths: Iterable[str]) -> List[str]:
+        """
+        Keep the paths whose shard this instance holds.
+
+        Args:
+            paths: The file paths or cloud URIs.
+
+        Returns:
+            The paths this instance should ingest, in order.
+        """
+        shards = self._shards
+        return [path for path in paths if self.shard_of(path) in shards]
+
+    def rebalance(self) -> None:
+        """
+        Renew held leases and move this instance towards its fair share of shards.
+
+        The fair share is the number of shards divided by the number of live
+        instances. Each instance prefers a contiguous block of "home" shards
+        given by its position among the live instances, which keeps
+        contention low, and takes over any other free or expired shard while
+        it is below its share.
+        """
+        with self._lock:
+            try:
+                with session_scope() as db:
+                    acquire_leases(db, [self.member_key], self.owner, self.lease_seconds)
+                    members = sorted(
+                        set(get_live_leases(db, MEMBER_PREFIX).values()) | {self.owner}
+                    )
+                    share = math.ceil(self.num_shards / len(members))
+                    first_home = members.index(self.owner) * share
+                    home = {
+                        shard % self.num_shards for shard in range(first_home, first_home + share)
+                    }
+
+                    held = {
+                        self._key_shard(key)
+                        for key in renew_leases(
+                            db,
+                            [self._shard_key(shard) for shard in self._shards],
+                            self.owner,
+                            self.lease_seconds,
+                        )
+                    }
+                    lost = self._shards - held
+                    if lost:
+                        logger.warning(f"Lost work leases on shards {sorted(lost)}")
+
+                    if len(held) > share:
+                        # Give back shards outside the home block first
+                        surplus = sorted(held, key=lambda shard: (shard in home, shard))
+                        surplus = surplus[: len(held) - share]
+                        release_leases(db, [self._shard_key(s) for s in surplus], self.owner)
+                        held -= set(surplus)
+                    elif len(held) < share:
+                        taken = {
+                            self._key_shard(key)
+                            for key, owner in get_live_leases(db, SHARD_PREFIX).items()
+                            if owner != self.owner
+                        }
+                        free = [s for s in range(self.num_shards) if s not in held and s not in taken]
+                        # Try home shards first, then the rest starting after the home block
+                        free.sort(
+                            key=lambda s: (s not in home, (s - first_home) % self.num_shards)
+                        )
+                        wanted = free[: share - len(held)]
+                        held |= {
+                            self._key_shard(key)
+                            for key in acquire_leases(
+                                db,
+                                [self._shard_key(s) for s in wanted],
+                                self.owner,
+                                self.lease_seconds,
+                            )
+                        }
+            except Exception as e:
+                # Keep the current shards; they expire if renewal keeps failing
+                logger.error(f"Error rebalancing work leases: {str(e)}")
+                return
+
+            if held != self._shards:
+                logger.info(
+                    f"Work leases for {self.owner}: {len(held)} shards "
+                    f"({len(members)} live instances, fair share {share})"
+                )
+            # A shard lost and won back in the same round is acquired again,
+            # its files may have changed while another instance held it
+            acquired = held - (self._shards - lost)
+            self._shards = held
+
+        if acquired:
+            for listener in self._listeners:
+                try:
+                    listener(acquired)
+                except Exception as e:
+                    logger.error(f"Error notifying about acquired shards: {str(e)}")
+
+    def _heartbeat(self) -> None:
+        """Renew and rebalance the leases until stopped."""
+        while not self._stop.wait(self.renew_interval):
+            self.rebalance()
+
+    @staticmethod
+    def _shard_key(shard: int) -> str:
+        """Get the lease key of a shard."""
+        return f"{SHARD_PREFIX}{shard}"
+
+    @staticmethod
+    def _key_shard(key: str) -> int:
+        """Get the shard number from a lease key."""
+        return int(key[len(SHARD_PREFIX) :])
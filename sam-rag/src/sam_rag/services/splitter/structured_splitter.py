@@ -5,18 +5,21 @@ Splitters for structured data formats like JSON, HTML, Markdown, and CSV.
 import json
 import re
 import csv
+import importlib.util
 import io
+from itertools import islice
 from typing import Dict, Any, List
 
+from sam_rag.services.preprocessor.html_extraction import (
+    extract_html,
+    extract_html_with_bs4,
+    is_lxml_available,
+    looks_like_html,
+)
 from sam_rag.services.splitter.splitter_base import SplitterBase
 from sam_rag.services.splitter.text_splitter import RecursiveCharacterTextSplitter
 
-try:
-    from bs4 import BeautifulSoup
-
-    BEAUTIFULSOUP_AVAILABLE = True
-except ImportError:
-    BEAUTIFULSOUP_AVAILABLE = False
+BEAUTIFULSOUP_AVAILABLE = importlib.util.find_spec("bs4") is not None
 
 try:
     import markdown
@@ -26,6 +29,59 @@ except ImportError:
     MARKDOWN_AVAILABLE = False
 
 
+class _SizedChunk:
+    """
+    A chunk dictionary built by RecursiveJSONSplitter, with its serialized size.
+
+    The size of every top-level entry is kept so that adding or replacing an
+    entry updates the size of the chunk without serializing it again.
+    """
+
+    __slots__ = ("data", "size", "entries")
+
+    def __init__(self):
+        self.data: Dict[Any, Any] = {}
+        self.size = 2  # "{}"
+        self.entries: Dict[Any, int] = {}
+
+    @classmethod
+    def from_dict(
+        cls, data: dict, splitter: "RecursiveJSONSplitter", sizes: Dict[Any, int]
+    ) -> "_SizedChunk":
+        """Wrap an existing chunk dictionary, measuring its entries once."""
+        chunk = cls()
+        chunk.data = data
+        chunk.refresh(splitter, sizes)
+        return chunk
+
+    def set(self, key: Any, value: Any, entry_size: int) -> None:
+        """Set an entry whose serialized `"key": value` size is known."""
+        previous = self.entries.get(key)
+        if previous is not None:
+            self.size += entry_size - previous
+        else:
+            # ", " before every entry but the first
+            self.size += entry_size + (2 if self.entries else 0)
+        self.entries[key] = entry_size
+        self.data[key] = value
+
+    def update(self, other: "_SizedChunk") -> None:
+        """Merge another chunk into this one, like dict.update."""
+        for key, value in other.data.items():
+            self.set(key, value, other.entries[key])
+
+    def refresh(self, splitter: "RecursiveJSONSplitter", sizes: Dict[Any, int]) -> None:
+        """Re-measure every entry after the dictionary was changed directly."""
+        # Values set through a nested path are dicts that may change again,
+        # so they are serialized rather than taken from the node cache
+        self.entries = {
+            key: splitter._key_size(key, sizes) + 2 + len(json.dumps(value))
+            for key, value in self.data.items()
+        }
+        count = len(self.entries)
+        self.size = 2 + sum(self.entries.values()) + 2 * max(count - 1, 0)
+
+
 class JSONSplitter(SplitterBase):
     """
     Split JSON data into chunks.
@@ -122,6 +178,52 @@ class RecursiveJSONSplitter(SplitterBase):
             d = d.setdefault(key, {})
         d[path[-1]] = value
 
+    def _value_size(self, value: Any, sizes: Dict[Any, int]) -> int:
+        """
+        Calculate the serialized size of a value, caching it per node.
+
+        Container sizes are derived from the cached sizes of their children, so
+        every node of the document is serialized at most once.
+
+        Args:
+            value: The value to measure. It must not be mutated while cached.
+            sizes: Cache of sizes, keyed by object id for values.
+
+        Returns:
+            The length of `json.dumps(value)`.
+        """
+        size = sizes.get(id(value))
+        if size is not None:
+            return size
+        if isinstance(value, dict):
+            entries = [
+                self._key_size(key, sizes) + 2 + self._value_size(item, sizes)
+                for key, item in value.items()
+            ]
+        elif isinstance(value, list):
+            entries = [self._value_size(item, sizes) for item in value]
+        else:
+            entries = None
+
+        if entries is None:
+            size = len(json.dumps(value))
+        else:
+            # Brackets, plus ", " between entries
+            size = 2 + sum(entries) + 2 * max(len(entries) - 1, 0)
+        sizes[id(value)] = size
+        return size
+
+    @staticmethod
+    def _key_size(key: Any, sizes: Dict[Any, int]) -> int:
+        """Calculate the serialized size of a dictionary key, caching it by value."""
+        cache_key = ("key", type(key), key)
+        size = sizes.get(cache_key)
+        if size is None:
+            # json.dumps converts non-string keys, so measure the key in a dict
+            size = len(json.dumps({key: None})) - len('{: null}')
+            sizes[cache_key] = size
+        return size
+
     def _json_split(
         self,
         data: Any,
@@ -129,92 +231,94 @@ class RecursiveJSONSplitter(SplitterBase):
         chunks: list = None,
     ) -> list:
         """Split json into maximum size dictionaries while preserving structure."""
+        sizes: Dict[Any, int] = {}
+        sized_chunks = None
+        if chunks is not None:
+            sized_chunks = [_SizedChunk.from_dict(chunk, self, sizes) for chunk in chunks]
+        return [
+            chunk.data
+            for chunk in self._json_split_sized(data, sizes, current_path, sized_chunks)
+        ]
+
+    def _json_split_sized(
+        self,
+        data: Any,
+        sizes: Dict[Any, int],
+        current_path: list = None,
+        chunks: List["_SizedChunk"] = None,
+    ) -> List["_SizedChunk"]:
+        """
+        Split json into maximum size dictionaries, tracking the size of each chunk.
+
+        Chunk sizes are updated as entries are added instead of re-serializing
+        the chunk at every step, and value sizes come from the per-node cache.
+
+        Args:
+            data: The JSON value to split.
+            sizes: Cache of serialized sizes shared across the whole document.
+            current_path: The path prefix for values set at this level.
+            chunks: The chunks to add to (default: a single empty chunk).
+
+        Returns:
+            The non-empty chunks.
+        """
         current_path = current_path or []
         if chunks is None:
-            chunks = [{}]
+            chunks = [_SizedChunk()]
+
         if isinstance(data, dict):
-            for key, value in data.items():
-                new_path = current_path + [key]
-                value_dict = {key: value}
-                value_size = self._json_size(value_dict)
-                chunk_size = self._json_size(chunks[-1])
-                remaining = self.chunk_size - chunk_size
-                # If value is a dict or list, try to split its children into chunks
-                if isinstance(value, (dict, list)):
-                    sub_chunks = self._json_split(value, [], [{}])
-                    for sub_chunk in sub_chunks:
-                        sub_chunk_size = self._json_size(sub_chunk)
-                        chunk_size = self._json_size(chunks[-1])
-                        if sub_chunk_size > self.chunk_size:
-                            # If still too big, flatten further
-                            deeper_chunks = self._json_split(sub_chunk, [], [{}])
-                            for deeper_chunk in deeper_chunks:
-                                if self._json_size(deeper_chunk) > self.chunk_size:
-                                    chunks.append(deeper_chunk)
-                                else:
-                                    if (
-                                        self._json_size(chunks[-1])
-                                        + self._json_size(deeper_chunk)
-                                        > self.chunk_size
-                                    ):
-                                        chunks.append({})
-                                    chunks[-1].update(deeper_chunk)
-                        else:
-                            if chunk_size + sub_chunk_size > self.chunk_size:
-                                chunks.append({})
-                            chunks[-1].update(sub_chunk)
-                else:
-                    # For primitives, add to current chunk or start new chunk
-                    if value_size > self.chunk_size:
-                        # Should not happen for primitives, but handle just in case
-                        chunks.append({key: value})
-                    elif value_size > remaining:
-                        if chunk_size > 0:
-                            chunks.append({})
-                        self._set_nested_dict(chunks[-1], new_path, value)
-                    else:
-                        self._set_nested_dict(chunks[-1], new_path, value)
+            items = data.items()
         elif isinstance(data, list):
-            for idx, item in enumerate(data):
-                new_path = current_path + [str(idx)]
-                value_dict = {str(idx): item}
-                value_size = self._json_size(value_dict)
-                chunk_size = self._json_size(chunks[-1])
-                remaining = self.chunk_size - chunk_size
-                if isinstance(item, (dict, list)):
-                    sub_chunks = self._json_split(item, [], [{}])
-                    for sub_chunk in sub_chunks:
-                        sub_chunk_size = self._json_size(sub_chunk)
-                        chunk_size = self._json_size(chunks[-1])
-                        if sub_chunk_size > self.chunk_size:
-                            deeper_chunks = self._json_split(sub_chunk, [], [{}])
-                            for deeper_chunk in deeper_chunks:
-                                if self._json_size(deeper_chunk) > self.chunk_size:
-                                    chunks.append(deeper_chunk)
-                                else:
-                                    if (
-                                        self._json_size(chunks[-1])
-                                        + self._json_size(deeper_chunk)
-                                        > self.chunk_size
-                                    ):
-                                        chunks.append({})
-                                    chunks[-1].update(deeper_chunk)
-                        else:
-                            if chunk_size + sub_chunk_size > self.chunk_size:
-                                chunks.append({})
-                            chunks[-1].update(sub_chunk)
-                else:
-                    if value_size > self.chunk_size:
-                        chunks.append({str(idx): item})
-                    elif value_size > remaining:
-                        if chunk_size > 0:
-                            chunks.append({})
-                        self._set_nested_dict(chunks[-1], new_path, item)
-                    else:
-                        self._set_nested_dict(chunks[-1], new_path, item)
+            items = ((str(idx), item) for idx, item in enumerate(data))
         else:
-            self._set_nested_dict(chunks[-1], current_path, data)
-        return [chunk for chunk in chunks if chunk]  # Remove empty chunks
+            self._set_nested_dict(chunks[-1].data, current_path, data)
+            chunks[-1].refresh(self, sizes)
+            return [chunk for chunk in chunks if chunk.data]
+
+        for key, value in items:
+            new_path = current_path + [key]
+            chunk_size = chunks[-1].size
+            remaining = self.chunk_size - chunk_size
+            # If value is a dict or list, try to split its children into chunks
+            if isinstance(value, (dict, list)):
+                sub_chunks = self._json_split_sized(value, sizes)
+                for sub_chunk in sub_chunks:
+                    sub_chunk_size = sub_chunk.size
+                    chunk_size = chunks[-1].size
+                    if sub_chunk_size > self.chunk_size:
+                        # If still too big, flatten further
+                        deeper_chunks = self._json_split_sized(sub_chunk.data, sizes)
+                        for deeper_chunk in deeper_chunks:
+                            if deeper_chunk.size > self.chunk_size:
+                                chunks.append(deeper_chunk)
+                            else:
+                                if chunks[-1].size + deeper_chunk.size > self.chunk_size:
+                                    chunks.append(_SizedChunk())
+                                chunks[-1].update(deeper_chunk)
+                    else:
+                        if chunk_size + sub_chunk_size > self.chunk_size:
+                            chunks.append(_SizedChunk())
+                        chunks[-1].update(sub_chunk)
+            else:
+                # For primitives, add to current chunk or start new chunk
+                key_size = self._key_size(key, sizes)
+                entry_size = key_size + 2 + self._value_size(value, sizes)
+                # Size of {key: value} on its own
+                value_size = 2 + entry_size
+                if value_size > self.chunk_size:
+                    # Should not happen for primitives, but handle just in case
+                    chunks.append(_SizedChunk())
+                    chunks[-1].set(key, value, entry_size)
+                    continue
+                if value_size > remaining:
+                    # An empty chunk still serializes to "{}"
+                    chunks.append(_SizedChunk())
+                if len(new_path) == 1:
+                    chunks[-1].set(key, value, entry_size)
+                else:
+                    self._set_nested_dict(chunks[-1].data, new_path, value)
+                    chunks[-1].refresh(self, sizes)
+        return [chunk for chunk in chunks if chunk.data]  # Remove empty chunks
 
     def split_text(self, text: str) -> List[str]:
         """
@@ -278,10 +382,12 @@ class HTMLSplitter(SplitterBase):
             {"chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
         )
 
-        if not BEAUTIFULSOUP_AVAILABLE:
+        self.use_lxml = is_lxml_available()
+
+        if not self.use_lxml and not BEAUTIFULSOUP_AVAILABLE:
             raise ImportError(
-                "The beautifulsoup4 package is required for HTMLSplitter. "
-                "Please install it with `pip install beautifulsoup4`."
+                "The lxml or beautifulsoup4 package is required for HTMLSplitter. "
+                "Please install it with `pip install lxml`."
             ) from None
 
     def split_text(self, text: str) -> List[str]:
@@ -297,27 +403,19 @@ class HTMLSplitter(SplitterBase):
         if not text:
             return []
 
-        try:
-            # Parse the HTML
-            soup = BeautifulSoup(text, "html.parser")
-
-            # Extract chunks from the HTML structure
-            chunks = []
+        # Text extracted by the HTML preprocessor has no markup left to parse
+        if not looks_like_html(text):
+            return self.text_splitter.split_text(text)
 
-            # Find all elements of the specified tags
-            for tag in self.tags_to_extract:
-                elements = soup.find_all(tag)
-                for element in elements:
-                    # Extract text from the element
-                    element_text = element.get_text(separator=" ", strip=True)
-                    if element_text:
-                        chunks.append(element_text)
+        try:
+            # One parse; the text is split at the specified tags
+            extract = extract_html if self.use_lxml else extract_html_with_bs4
+            extraction = extract(text, split_tags=self.tags_to_extract, min_section_chars=0)
+            chunks = extraction.sections
 
             # If no chunks were extracted or they're too small, fall back to the text splitter
             if not chunks or all(len(chunk) < self.chunk_size / 2 for chunk in chunks):
-                # Extract all text from the HTML
-                all_text = soup.get_text(separator=" ", strip=True)
-                return self.text_splitter.split_text(all_text)
+                return self.text_splitter.split_text(extraction.text)
 
             # Merge small chunks if necessary
             merged_chunks = []
@@ -532,31 +630,35 @@ class CSVSplitter(SplitterBase):
             return []
 
         try:
-            # Parse the CSV
+            # Parse the CSV lazily, one chunk of rows at a time
             csv_reader = csv.reader(io.StringIO(text))
-            rows = list(csv_reader)
-
-            if not rows:
-                return []
 
             # Get the header
-            header = rows[0]
+            header = next(csv_reader, None)
+            if header is None:
+                return []
 
             # Split the rows into chunks
             chunks = []
-            for i in range(1, len(rows), self.chunk_size):
-                chunk_rows = rows[i : i + self.chunk_size]
+            while True:
+                chunk_rows = list(islice(csv_reader, self.chunk_size))
+                if not chunk_rows:
+                    break
 
-                if self.include_header and i > 1:
-                    # Include the header in each chunk
-                    chunk_rows = [header] + chunk_rows
-
-                # Convert the chunk back to CSV
+                # Convert the chunk back to CSV, giving every chunk the header
+                # so that each one can be read on its own
                 output = io.StringIO()
                 csv_writer = csv.writer(output)
+                if self.include_header:
+                    csv_writer.writerow(header)
                 csv_writer.writerows(chunk_rows)
                 chunks.append(output.getvalue())
 
+            if not chunks and any(header):
+                # A header without rows is still the text of the file
+                output = io.StringIO()
+                csv.writer(output).writerow(header)
+                chunks.append(output.getvalue())
             return chunks
         except Exception:
             # If the CSV parsing fails, fall back to treating it as plain text
@@ -0,0 +1,335 @@
+"""
+Offset-based core shared by the text splitters.
+
+The splitters locate separators and recurse over (start, end) offsets into the
+original string. The pieces that survive splitting are stored once as leaves
+of a `TextSpanIndex`, and every chunk is described as ranges of leaves. Runs
+of pieces are measured from a prefix sum of their lengths (in characters or
+tokens), so sizing a chunk is O(1), finding where the overlap carried into the
+next chunk starts is a binary search, and chunk strings are only built once
+the final chunks are known.
+"""
+
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[int, int]
+# A segment is a run of text: either the index of a single leaf, or one or more
+# (first, last) ranges of leaves. Single leaves are plain ints so that millions
+# of them do not put pressure on the garbage collector.
+Segment = Union[int, Tuple[Span, ...]]
+
+
+def token_char_offsets(
+    text: str, tokenizer: Any, tokens: Optional[List[int]] = None
+) -> Optional[List[int]]:
+    """
+    Get the character offset at which each token of the text starts.
+
+    Args:
+        text: The text that was tokenized.
+        tokenizer: A tiktoken encoding.
+        tokens: The tokens of the text, if already encoded.
+
+    Returns:
+        A list of character offsets, one per token, or None if the tokenizer
+        cannot map tokens back onto the original text.
+    """
+    if not hasattr(tokenizer, "decode_with_offsets"):
+        return None
+    if tokens is None:
+        tokens = tokenizer.encode(text)
+    decoded, offsets = tokenizer.decode_with_offsets(tokens)
+    if decoded != text:
+        return None
+    return offsets
+
+
+class TextSpanIndex:
+    """
+    The original text, its optional token offsets, and the leaves cut from it.
+
+    Lengths are characters by default. When a tokenizer is given, the length of
+    a range of the original text is the number of tokens overlapping it,
+    answered with two binary searches over the token offsets of the whole text,
+    so the text is encoded exactly once.
+    """
+
+    def __init__(self, text: str, tokenizer: Any = None):
+        """
+        Initialize the span index.
+
+        Args:
+            text: The original text.
+            tokenizer: Optional tiktoken encoding used to measure lengths in tokens.
+        """
+        self.text = text
+        self.tokenizer = tokenizer
+        self.leaves: List[str] = []
+        self._token_offsets: Optional[List[int]] = None
+        if tokenizer is not None:
+            self._token_offsets = token_char_offsets(text, tokenizer)
+            if self._token_offsets is None:
+                logger.debug(
+                    "Tokenizer cannot map tokens onto the text, measuring token "
+                    "lengths per piece instead"
+                )
+
+    def span_length(self, start: int, end: int) -> int:
+        """
+        Measure a range of the original text.
+
+        Args:
+            start: The start offset (inclusive).
+            end: The end offset (exclusive).
+
+        Returns:
+            The length of the range in characters or tokens.
+        """
+        if end <= start:
+            return 0
+        if self.tokenizer is None:
+            return end - start
+        if self._token_offsets is None:
+            return len(self.tokenizer.encode(self.text[start:end]))
+        # Tokens starting inside the range, plus the token containing `start`
+        offsets = self._token_offsets
+        return bisect_left(offsets, end) - bisect_right(offsets, start) + 1
+
+    def measure(self, value: str) -> int:
+        """
+        Measure a string that is not a plain range of the original text.
+
+        Args:
+            value: The string to measure.
+
+        Returns:
+            The length of the string in characters or tokens.
+        """
+        if self.tokenizer is None:
+            return len(value)
+        return len(self.tokenizer.encode(value))
+
+    def add_leaves(self, values: List[str]) -> range:
+        """
+        Store leaves and return their indices, which are also their segments.
+
+        Args:
+            values: The leaf strings, in text order.
+
+        Returns:
+            The indices of the new leaves.
+        """
+        first = len(self.leaves)
+        self.leaves.extend(values)
+        return range(first, len(self.leaves))
+
+    def materialize(self, segment: Segment) -> str:
+        """
+        Build the string for a segment.
+
+        Args:
+            segment: The leaf ranges making up the segment.
+
+        Returns:
+            The concatenated text of the leaves.
+        """
+        leaves = self.leaves
+        if isinstance(segment, int):
+            return leaves[segment]
+        if len(segment) == 1:
+            first, last = segment[0]
+            return "".join(leaves[first:last])
+        return "".join(leaf for first, last in segment for leaf in leaves[first:last])
+
+
+def strip_span(text: str, start: int, end: int) -> Span:
+    """
+    Narrow a range so that it excludes leading and trailing whitespace.
+
+    Equivalent to `text[start:end].strip()` without copying the substring.
+    """
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_spans(
+    text: str,
+    separator: str,
+    is_separator_regex: bool,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Span]:
+    """
+    Split a range of the text on a separator, yielding the ranges between separators.
+
+    Equivalent to `text[start:end].split(separator)` (or `re.split` for regex
+    separators, including the ranges of capturing groups) expressed as offsets.
+
+    Args:
+        text: The original text.
+        separator: The separator string or pattern.
+        is_separator_regex: Whether the separator is a regex.
+        start: The start of the range.
+        end: The end of the range (default: end of text).
+
+    Returns:
+        An iterator over the ranges of the split parts, in order.
+    """
+    if end is None:
+        end = len(text)
+
+    if is_separator_regex:
+        return _split_regex_spans(text, re.compile(separator), start, end)
+
+    # Let str.split find the separators, then recover the offsets from the
+    # part lengths
+    part_lengths = [len(part) for part in text[start:end].split(separator)]
+    separator_len = len(separator)
+    starts = list(
+        accumulate(
+            (length + separator_len for length in part_lengths[:-1]), initial=start
+        )
+    )
+    return zip(starts, map(int.__add__, starts, part_lengths))
+
+
+def _split_regex_spans(
+    text: str, pattern: re.Pattern, start: int, end: int
+) -> Iterator[Span]:
+    """Yield the ranges `re.split` would return for a range of the text."""
+    previous = start
+    for match in pattern.finditer(text, start, end):
+        yield previous, match.start()
+        for group in range(1, pattern.groups + 1):
+            group_start, group_end = match.span(group)
+            if group_start >= 0:
+                yield group_start, group_end
+        previous = match.end()
+    yield previous, end
+
+
+def find_separator(
+    text: str,
+    separator: str,
+    is_separator_regex: bool,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Optional[Span]:
+    """
+    Find the first occurrence of a separator in a range of the text.
+
+    Returns:
+        The range of the first match, or None if the separator does not occur.
+    """
+    if end is None:
+        end = len(text)
+    if is_separator_regex:
+        match = re.compile(separator).search(text, start, end)
+        return match.span() if match else None
+    position = text.find(separator, start, end)
+    return (position, position + len(separator)) if position != -1 else None
+
+
+def merge_segments(
+    index: TextSpanIndex,
+    segments: Sequence[Segment],
+    lengths: Sequence[int],
+    chunk_size: int,
+    chunk_overlap: int,
+) -> Tuple[List[Segment], List[int]]:
+    """
+    Merge segments into chunks of at most `chunk_size`, overlapping by up to `chunk_overlap`.
+
+    The segment lengths are accumulated into a prefix sum, so both the end of
+    a chunk and the start of the overlap carried into the next chunk are
+    binary searches, and the work per chunk does not depend on how many
+    segments it holds. Segments longer than `chunk_size` are cut into
+    character windows and emitted on their own.
+
+    Args:
+        index: The span index holding the leaves.
+        segments: The segments to merge, in order.
+        lengths: The length of each segment.
+        chunk_size: The maximum size of a chunk.
+        chunk_overlap: The maximum overlap carried between consecutive chunks.
+
+    Returns:
+        The merged chunks as segments, and the length of each chunk.
+    """
+    if not segments:
+        return [], []
+    if len(segments) == 1 and lengths[0] <= chunk_size:
+        return list(segments), list(lengths)
+
+    # prefix[i] is the total length of segments[:i]
+    prefix = list(accumulate(lengths, initial=0))
+
+    # Leaves are stored in text order, so when every segment is a single leaf
+    # and there are no gaps between them, any run of segments is a single
+    # range of leaves
+    contiguous = isinstance(segments, range) or (
+        all(isinstance(segment, int) for segment in segments)
+        and segments[-1] - segments[0] == len(segments) - 1
+    )
+
+    chunks: List[Segment] = []
+    chunk_lengths: List[int] = []
+
+    def emit(first: int, last: int) -> None:
+        if last - first == 1:
+            chunks.append(segments[first])
+        elif contiguous:
+            chunks.append(((segments[first], segments[last - 1] + 1),))
+        else:
+            ranges: List[Span] = []
+            for segment in segments[first:last]:
+                if isinstance(segment, int):
+                    segment = ((segment, segment + 1),)
+                for leaf_range in segment:
+                    if ranges and ranges[-1][1] == leaf_range[0]:
+                        ranges[-1] = (ranges[-1][0], leaf_range[1])
+                    else:
+                        ranges.append(leaf_range)
+            chunks.append(tuple(ranges))
+        chunk_lengths.append(prefix[last] - prefix[first])
+
+    step = chunk_size - chunk_overlap
+    count = len(lengths)
+    oversized = [i for i, length in enumerate(lengths) if length > chunk_size]
+
+    first = 0
+    for stop in oversized + [count]:
+        # Merge the run of segments before the next oversized one, one chunk
+        # per iteration. A chunk always takes the segments up to `forced`;
+        # the first one because it starts the chunk, and after an overlap the
+        # one that closed the previous chunk.
+        forced = first + 1
+        while first < stop:
+            last = bisect_right(
+                prefix, prefix[first] + chunk_size, forced, stop + 1
+            ) - 1
+            last = max(last, forced)
+            emit(first, last)
+            if last == stop:
+                break
+            # Keep the longest run of trailing segments that fits in the overlap
+            first = bisect_left(prefix, prefix[last] - chunk_overlap, first, last + 1)
+            forced = last + 1
+
+        if stop < count:
+            value = index.materialize(segments[stop])
+            windows = [value[j : j + chunk_size] for j in range(0, len(value), step)]
+            chunks.extend(index.add_leaves(windows))
+            chunk_lengths.extend(index.measure(window) for window in windows)
+            first = stop + 1
+
+    return chunks, chunk_lengths
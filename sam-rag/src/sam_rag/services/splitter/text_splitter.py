@@ -2,10 +2,19 @@
 Text splitters for unstructured text.
 """
 
-from typing import Dict, Any, List
 import re
+from typing import Dict, Any, List, Tuple
 
 from sam_rag.services.splitter.splitter_base import SplitterBase
+from sam_rag.services.splitter.text_spans import (
+    Segment,
+    TextSpanIndex,
+    find_separator,
+    merge_segments,
+    split_spans,
+    strip_span,
+    token_char_offsets,
+)
 
 try:
     import tiktoken
@@ -33,6 +42,10 @@ class CharacterTextSplitter(SplitterBase):
                 - is_separator_regex: Whether the separator is a regex (default: False).
                 - keep_separator: Whether to keep the separator in the chunks (default: True).
                 - strip_whitespace: Whether to strip whitespace from the chunks (default: True).
+                - length_function: How chunk sizes are measured, "characters" or
+                  "tokens" (default: "characters"). Token counts require tiktoken.
+                - encoding_name: The tiktoken encoding used when measuring tokens
+                  (default: "cl100k_base").
         """
         super().__init__(config)
         self.chunk_size = self.config.get("chunk_size", 2048)
@@ -41,7 +54,29 @@ class CharacterTextSplitter(SplitterBase):
         self.is_separator_regex = self.config.get("is_separator_regex", False)
         self.keep_separator = self.config.get("keep_separator", True)
         self.strip_whitespace = self.config.get("strip_whitespace", True)
-        self._length_function = len
+
+        self.tokenizer = None
+        if self.config.get("length_function", "characters") == "tokens":
+            if not TIKTOKEN_AVAILABLE:
+                raise ImportError(
+                    "The tiktoken package is required to measure chunks in tokens. "
+                    "Please install it with `pip install tiktoken`."
+                )
+            self.tokenizer = tiktoken.get_encoding(
+                self.config.get("encoding_name", "cl100k_base")
+            )
+
+    def _build_index(self, text: str) -> TextSpanIndex:
+        """
+        Build the span index used to measure pieces of the text.
+
+        Args:
+            text: The text to split.
+
+        Returns:
+            A span index measuring characters or tokens.
+        """
+        return TextSpanIndex(text, self.tokenizer)
 
     def split_text(self, text: str) -> List[str]:
         """
@@ -56,112 +91,64 @@ class CharacterTextSplitter(SplitterBase):
         if not text:
             return []
 
-        # First, get appropriate splits
-        if self.is_separator_regex:
-            splits = re.split(self.separator, text)
-        else:
-            splits = text.split(self.separator)
-
-        # Now, clean and filter out empty splits
-        cleaned_splits = []
-        separator = (
-            self.separator
-            if not self.is_separator_regex
-            else re.search(self.separator, text).group()
-            if re.search(self.separator, text)
-            else ""
-        )
+        index = self._build_index(text)
 
-        for i, split in enumerate(splits):
-            if self.strip_whitespace:
-                split = split.strip()
-            if split == "":
-                continue
-            if i == len(splits) - 1:
-                cleaned_splits.append(split)
-            elif self.keep_separator:
-                cleaned_splits.append(split + separator)
+        # The separator re-attached to each split is the first one found in the text
+        separator = ""
+        separator_span = find_separator(text, self.separator, self.is_separator_regex)
+        if self.keep_separator and separator_span:
+            separator = text[separator_span[0] : separator_span[1]]
+
+        # First, get appropriate splits, then clean and filter out empty ones
+        pieces: List[str] = []
+        lengths: List[int] = []
+        if self.tokenizer is None:
+            if self.is_separator_regex:
+                parts = re.split(self.separator, text)
             else:
-                cleaned_splits.append(split)
+                parts = text.split(self.separator)
+            last = len(parts) - 1
+            if self.strip_whitespace:
+                parts = [part.strip() for part in parts]
+            pieces = [
+                part + separator if i != last else part
+                for i, part in enumerate(parts)
+                if part
+            ]
+            lengths = [len(piece) for piece in pieces]
+        else:
+            # Measure the splits as offsets into the text, which was tokenized once
+            splits = list(split_spans(text, self.separator, self.is_separator_regex))
+            last = len(splits) - 1
+            separator_len = index.span_length(*separator_span) if separator else 0
+            for i, (start, end) in enumerate(splits):
+                if self.strip_whitespace:
+                    start, end = strip_span(text, start, end)
+                if start == end:
+                    continue
+                length = index.span_length(start, end)
+                if i != last and separator:
+                    pieces.append(text[start:end] + separator)
+                    lengths.append(length + separator_len)
+                else:
+                    pieces.append(text[start:end])
+                    lengths.append(length)
 
         # If we have no splits, return the original text
-        if not cleaned_splits:
+        if not pieces:
             if self.strip_whitespace:
                 text = text.strip()
             return [text] if text else []
 
         # Create chunks with proper overlap
-        return self._create_overlapping_chunks(cleaned_splits)
-
-    def _create_overlapping_chunks(self, splits: List[str]) -> List[str]:
-        """
-        Create chunks from splits with proper overlap.
-
-        Args:
-            splits: List of text splits
-
-        Returns:
-            List of text chunks with proper overlap
-        """
-        # If we only have one split and it's smaller than chunk size, return it
-        if len(splits) == 1 and self._length_function(splits[0]) <= self.chunk_size:
-            return splits
-
-        # Create chunks
-        chunks = []
-        current_chunk: List[str] = []
-        current_chunk_len = 0
-
-        for i, split in enumerate(splits):
-            split_len = self._length_function(split)
-
-            # If this split alone exceeds chunk size, we need to handle it separately
-            if split_len > self.chunk_size:
-                # If we have accumulated content, add it as a chunk
-                if current_chunk:
-                    chunks.append("".join(current_chunk))
-                    current_chunk = []
-                    current_chunk_len = 0
-
-                # Split this large piece by characters
-                for j in range(0, len(split), self.chunk_size - self.chunk_overlap):
-                    chunks.append(split[j : j + self.chunk_size])
-
-                continue
-
-            # If adding this split would exceed chunk size, finalize current chunk
-            if current_chunk_len + split_len > self.chunk_size and current_chunk:
-                chunks.append("".join(current_chunk))
-
-                # Calculate how many splits to keep for overlap
-                overlap_splits = []
-                overlap_len = 0
-
-                # Work backwards through current_chunk to find splits for overlap
-                for j in range(len(current_chunk) - 1, -1, -1):
-                    split_to_keep = current_chunk[j]
-                    split_to_keep_len = self._length_function(split_to_keep)
-
-                    if overlap_len + split_to_keep_len <= self.chunk_overlap:
-                        overlap_splits.insert(0, split_to_keep)
-                        overlap_len += split_to_keep_len
-                    else:
-                        # If this split would exceed overlap size, we're done
-                        break
-
-                # Start new chunk with overlap content
-                current_chunk = overlap_splits
-                current_chunk_len = overlap_len
-
-            # Add the current split to the chunk
-            current_chunk.append(split)
-            current_chunk_len += split_len
-
-        # Add the final chunk if there's anything left
-        if current_chunk:
-            chunks.append("".join(current_chunk))
-
-        return chunks
+        chunks, _ = merge_segments(
+            index,
+            index.add_leaves(pieces),
+            lengths,
+            self.chunk_size,
+            self.chunk_overlap,
+        )
+        return [index.materialize(chunk) for chunk in chunks]
 
     def can_handle(self, data_type: str) -> bool:
         """
@@ -215,122 +202,144 @@ class RecursiveCharacterTextSplitter(CharacterTextSplitter):
         if not text:
             return []
 
-        # Get the appropriate separator to use
-        separator = self._get_separator_for_text(text)
+        index = self._build_index(text)
+        chunks, _ = self._split_range(index, 0, len(text), self.separators)
+        return [index.materialize(chunk) for chunk in chunks]
 
-        # Now split the text
-        if separator:
-            if self.is_separator_regex:
-                splits = re.split(separator, text)
-            else:
-                splits = text.split(separator)
-        else:
-            # If no separator is found, use the default behavior
-            return self._split_text_with_size_limit(text)
-
-        # Now process the splits
-        final_chunks = []
-
-        # Clean and filter splits
-        good_splits = []
-        for split in splits:
-            if self.strip_whitespace:
-                split = split.strip()
-            if split:
-                good_splits.append(split)
-
-        # Process each split
-        for split in good_splits:
-            if self._length_function(split) < self.chunk_size:
-                final_chunks.append(split)
-            else:
-                # If the split is too big, recursively split it
-                # using the next separator
-                other_info = self._get_next_splitter_config()
-                if other_info:
-                    # Create a new splitter with the next separator
-                    sub_splitter = RecursiveCharacterTextSplitter(other_info)
-                    sub_chunks = sub_splitter.split_text(split)
-                    final_chunks.extend(sub_chunks)
-                else:
-                    # If there are no more separators, split by character
-                    final_chunks.extend(self._split_text_with_size_limit(split))
-
-        # Create chunks with proper overlap
-        if len(final_chunks) > 1:
-            # Join the chunks first to handle any separators properly
-            joined_chunks = []
-            for chunk in final_chunks:
-                joined_chunks.append(chunk)
-
-            # Then create overlapping chunks
-            return self._create_overlapping_chunks(joined_chunks)
-
-        return final_chunks
-
-    def _get_separator_for_text(self, text: str) -> str:
+    def _split_range(
+        self, index: TextSpanIndex, start: int, end: int, separators: List[str]
+    ) -> Tuple[List[Segment], List[int]]:
         """
-        Get the first separator that appears in the text.
+        Recursively split a range of the text, working on offsets only.
 
         Args:
-            text: The text to check.
+            index: The span index for the whole text.
+            start: The start of the range.
+            end: The end of the range.
+            separators: The separators still available at this level.
 
         Returns:
-            The first separator that appears in the text, or None if none are found.
+            The chunks for the range as segments, and the length of each chunk.
         """
-        for separator in self.separators:
-            if separator == "":
-                # Special case: empty separator always matches
-                return separator
+        text = index.text
 
-            if self.is_separator_regex:
-                if re.search(separator, text):
-                    return separator
-            else:
-                if separator in text:
-                    return separator
+        # Get the appropriate separator to use
+        separator = separators[-1]
+        for candidate in separators:
+            if candidate == "" or find_separator(
+                text, candidate, self.is_separator_regex, start, end
+            ):
+                separator = candidate
+                break
+
+        # If no separator is found, split by character
+        if not separator:
+            return self._split_range_with_size_limit(index, start, end)
+
+        if self.tokenizer is None and not self.is_separator_regex:
+            # When every split is below the chunk size, none of them needs
+            # its offsets and they can all be stored as leaves in one go
+            splits = text[start:end].split(separator)
+            if self.strip_whitespace:
+                splits = [split.strip() for split in splits]
+            lengths = [len(split) for split in splits]
+            if max(lengths) < self.chunk_size:
+                splits = [split for split in splits if split]
+                return merge_segments(
+                    index,
+                    index.add_leaves(splits),
+                    [length for length in lengths if length],
+                    self.chunk_size,
+                    self.chunk_overlap,
+                )
+
+        # Consecutive splits below the chunk size are stored as leaves in bulk
+        final_chunks: List[Segment] = []
+        final_lengths: List[int] = []
+        small_splits: List[str] = []
+
+        def flush_small_splits() -> None:
+            final_chunks.extend(index.add_leaves(small_splits))
+            small_splits.clear()
+
+        # Process each split
+        for split_start, split_end in split_spans(
+            text, separator, self.is_separator_regex, start, end
+        ):
+            if split_end - split_start < self.chunk_size and self.tokenizer is None:
+                # Short splits are cheaper to copy and strip than to scan
+                split = text[split_start:split_end]
+                if self.strip_whitespace:
+                    split = split.strip()
+                if split:
+                    small_splits.append(split)
+                    final_lengths.append(len(split))
+                continue
 
-        return self.separators[-1]  # Default to the last separator (usually "")
+            if self.strip_whitespace:
+                split_start, split_end = strip_span(text, split_start, split_end)
+            if split_start == split_end:
+                continue
 
-    def _get_next_splitter_config(self) -> Dict[str, Any]:
-        """
-        Get the configuration for the next splitter in the recursive chain.
+            length = index.span_length(split_start, split_end)
+            if length < self.chunk_size:
+                small_splits.append(text[split_start:split_end])
+                final_lengths.append(length)
+                continue
 
-        Returns:
-            A dictionary containing the configuration for the next splitter,
-            or None if there are no more separators.
-        """
-        if len(self.separators) <= 1:
-            return None
+            flush_small_splits()
+            if len(separators) > 1:
+                # If the split is too big, recursively split it
+                # using the next separator
+                chunks, lengths = self._split_range(
+                    index, split_start, split_end, separators[1:]
+                )
+            else:
+                # If there are no more separators, split by character
+                chunks, lengths = self._split_range_with_size_limit(
+                    index, split_start, split_end
+                )
+            final_chunks.extend(chunks)
+            final_lengths.extend(lengths)
+        flush_small_splits()
 
-        # Create a new config with the next separator
-        next_config = self.config.copy() if self.config else {}
-        next_config["separators"] = self.separators[1:]
+        # Create chunks with proper overlap
+        if len(final_chunks) > 1:
+            return merge_segments(
+                index, final_chunks, final_lengths, self.chunk_size, self.chunk_overlap
+            )
 
-        return next_config
+        return final_chunks, final_lengths
 
-    def _split_text_with_size_limit(self, text: str) -> List[str]:
+    def _split_range_with_size_limit(
+        self, index: TextSpanIndex, start: int, end: int
+    ) -> Tuple[List[Segment], List[int]]:
         """
-        Split text by characters to ensure chunks are below the chunk size.
+        Split a range by characters to ensure chunks are below the chunk size.
 
         Args:
-            text: The text to split.
+            index: The span index for the whole text.
+            start: The start of the range.
+            end: The end of the range.
 
         Returns:
-            A list of text chunks.
+            The chunks for the range as segments, and the length of each chunk.
         """
-        # If the text is already small enough, return it as is
-        if self._length_function(text) <= self.chunk_size:
-            return [text]
-
-        # Otherwise, split it by characters
-        result = []
-        for i in range(0, len(text), self.chunk_size - self.chunk_overlap):
-            chunk = text[i : i + self.chunk_size]
-            if chunk:
-                result.append(chunk)
-
-        return result
+        text = index.text
+        length = index.span_length(start, end)
+        if length <= self.chunk_size:
+            if start == end:
+                return [], []
+            return list(index.add_leaves([text[start:end]])), [length]
+
+        windows = [
+            (i, min(i + self.chunk_size, end))
+            for i in range(start, end, self.chunk_size - self.chunk_overlap)
+        ]
+        return (
+            list(index.add_leaves([text[i:j] for i, j in windows])),
+            [index.span_length(i, j) for i, j in windows],
+        )
 
     def can_handle(self, data_type: str) -> bool:
         """
@@ -393,14 +402,20 @@ class TokenTextSplitter(SplitterBase):
         if len(tokens) <= self.chunk_size:
             return [text]
 
+        # Map each token to its character offset so chunks are sliced from the
+        # original text instead of decoding every window separately
+        offsets = token_char_offsets(text, self.tokenizer, tokens)
+
         # Split the tokens into chunks with proper overlap
         chunks = []
         for i in range(0, len(tokens), self.chunk_size - self.chunk_overlap):
-            # Get the tokens for this chunk
-            chunk_tokens = tokens[i : i + self.chunk_size]
-            # Decode the tokens back to text
-            chunk_text = self.tokenizer.decode(chunk_tokens)
-            chunks.append(chunk_text)
+            if offsets is None:
+                # Decode the tokens back to text
+                chunks.append(self.tokenizer.decode(tokens[i : i + self.chunk_size]))
+                continue
+            end = i + self.chunk_size
+            end_offset = offsets[end] if end < len(tokens) else len(text)
+            chunks.append(text[offsets[i] : end_offset])
 
         return chunks
 
@@ -1,5 +1,6 @@
 """Tool implementations for the SAM RAG plugin."""
 
+import hashlib
 import logging
 from typing import Dict, Any, Optional, List
 import os
@@ -22,6 +23,8 @@ from solace_agent_mesh.common.utils.mime_helpers import is_text_based_mime_type
 from solace_agent_mesh.agent.utils.artifact_helpers import save_artifact_with_metadata
 from solace_agent_mesh.agent.utils.context_helpers import get_original_session_id
 
+from sam_rag.services.jobs.job_queue import PRIORITY_INTERACTIVE
+
 log = logging.getLogger(__name__)
 
 async def ingest_document(
@@ -31,6 +34,9 @@ async def ingest_document(
 ) -> Dict[str, Any]:
     """
     Ingest a file into the RAG system or vector database.
+
+    When the ingestion job queue is enabled, the document is queued and the
+    returned job id can be passed to get_ingestion_status to follow it.
     
     Args:
         input_file: The filename (and :version) of the input artifact from artifact service. The file can be a PDF, TXT, etc file. The file is the original document to be ingested.
@@ -38,7 +44,8 @@ async def ingest_document(
         tool_config: Optional tool configuration.
         
     Returns:
-        A dictionary containing the status of the ingestion operation.
+        A dictionary containing the status of the ingestion operation, and the
+        job id when the document was queued.
     """
     if not tool_context:
         return {
@@ -132,6 +139,7 @@ async def ingest_document(
             log.error("%s Content for '%s' v%s not found. Cannot ingest document.", log_identifier, filename_base_for_load, version_to_load)
             raise FileNotFoundError(f"Content for artifact '{filename_base_for_load}' v{version_to_load} not found.")
         input_bytes = input_artifact_part.inline_data.data
+        content_hash = hashlib.sha256(input_bytes).hexdigest()
 
         # Determine MIME type
         mime_type = input_metadata.get("mime_type") if 'input_metadata' in locals() else mimetypes.guess_type(final_name)[0] or "application/octet-stream"
@@ -172,10 +180,23 @@ async def ingest_document(
         artifact_url = f"artifact://{app_name}/{user_id}/{original_session_id}/{final_name}?version={version_to_load}"
         document_metadata["artifact_url"] = artifact_url
         
-        # Process the file through the complete RAG pipeline
-        log.info("%s Processing file through RAG pipeline: %s", log_identifier, temp_file_path)
-        pipeline_result = pipeline.process_files([temp_file_path], metadata=document_metadata)
-        log.debug("%s Pipeline processing result: %s", log_identifier, pipeline_result)
+        job_id = None
+        if pipeline.job_queue is not None:
+            # Queue the file for the ingestion workers; they remove the temporary file
+            log.info("%s Queuing file for RAG ingestion: %s", log_identifier, temp_file_path)
+            job_id = pipeline.submit_file(
+                temp_file_path,
+                metadata=document_metadata,
+                priority=PRIORITY_INTERACTIVE,
+                content_hash=content_hash,
+                remove_after=True,
+            )
+            log.debug("%s Queued ingestion job: %s", log_identifier, job_id)
+        else:
+            # Process the file through the complete RAG pipeline
+            log.info("%s Processing file through RAG pipeline: %s", log_identifier, temp_file_path)
+            pipeline_result = pipeline.process_files([temp_file_path], metadata=document_metadata)
+            log.debug("%s Pipeline processing result: %s", log_identifier, pipeline_result)
         
         mime_type = document_metadata["file_type"]
         log.debug("%s Saving document as artifact in session %s", log_identifier, original_session_id)
@@ -204,6 +225,14 @@ async def ingest_document(
         
         log.info("%s Stored document as artifact in %s: %s", log_identifier, original_session_id, artifact_result)
         
+        if job_id is not None:
+            return {
+                "status": "queued",
+                "message": f"Document '{final_name}' queued for ingestion. Use get_ingestion_status with the job id to follow its progress.",
+                "job_id": job_id,
+                "artifact_url": artifact_url
+            }
+
         # Clean up temporary file
         try:
             os.unlink(temp_file_path)
@@ -237,6 +266,75 @@ async def ingest_document(
         log.exception("%s Unexpected error in ingest_document: %s", log_identifier, e)
         return {"status": "error", "error_message": f"Failed to ingest document: {str(e)}"}
 
+async def get_ingestion_status(
+    job_id: Optional[str] = None,
+    tool_context: ToolContext = None,
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Get the status of a document ingestion job, or a summary of the ingestion queue.
+    
+    Args:
+        job_id: The job id returned by ingest_document. If omitted, the number of jobs in each status is returned.
+        tool_context: The context provided by the ADK framework.
+        tool_config: Optional tool configuration.
+        
+    Returns:
+        A dictionary containing the job status (queued, running, succeeded or failed) and details.
+    """
+    if not tool_context:
+        return {
+            "status": "error",
+            "error_message": "ToolContext is missing, cannot get ingestion status.",
+        }
+
+    inv_context = tool_context._invocation_context
+    log_identifier = f"[RAGIngestStatusTool:{inv_context.agent.name}]"
+
+    host_component = getattr(inv_context.agent, "host_component", None)
+    if not host_component:
+        return {
+            "status": "error",
+            "error_message": "Host component not found, cannot access RAG services.",
+        }
+
+    pipeline = host_component.get_agent_specific_state("rag_pipeline")
+    if not pipeline:
+        return {
+            "status": "error",
+            "error_message": "Pipeline not found in agent_specific_state.",
+        }
+    if pipeline.job_queue is None:
+        return {
+            "status": "error",
+            "error_message": "The ingestion job queue is disabled; documents are ingested immediately.",
+        }
+
+    try:
+        if not job_id:
+            return {"status": "success", "jobs": pipeline.job_queue.counts()}
+
+        job = pipeline.get_job(job_id)
+        if not job:
+            return {"status": "error", "error_message": f"Ingestion job '{job_id}' not found."}
+
+        result = job.get("result") or {}
+        return {
+            "status": "success",
+            "job_id": job["id"],
+            "job_status": job["status"],
+            "file_name": job["payload"].get("metadata", {}).get("file_name"),
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "error_message": job.get("error"),
+            "document_ids": result.get("document_ids", []),
+            "created_at": datetime.fromtimestamp(job["created_at"], timezone.utc).isoformat(),
+            "updated_at": datetime.fromtimestamp(job["updated_at"], timezone.utc).isoformat(),
+        }
+    except Exception as e:
+        log.exception("%s Error getting ingestion status: %s", log_identifier, e)
+        return {"status": "error", "error_message": f"Failed to get ingestion status: {str(e)}"}
+
 async def search_documents(
     query: str,
     filter_criteria: Optional[Dict[str, Any]] = None,
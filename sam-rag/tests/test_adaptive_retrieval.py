@@ -0,0 +1,151 @@
+import pytest
+
+from sam_rag.services.database.vector_db_service import VectorDBService
+from sam_rag.services.metrics.metrics import ADAPTIVE_RETRIEVALS, Metrics, set_metrics
+from sam_rag.services.metrics.sinks import InMemorySink
+from sam_rag.services.rag.adaptive_retrieval import (
+    FLAT_SCORES,
+    LOW_SCORE,
+    NO_RESULTS,
+    AdaptiveRetrievalPolicy,
+)
+from sam_rag.services.rag.result_cache import ResultCache
+from sam_rag.services.rag.retriever import Retriever
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.sparse_calls = 0
+
+    def embed_text(self, text, include_sparse=True):
+        assert not include_sparse
+        return {"dense_vector": [1.0, 0.0]}
+
+    def embed_sparse_text(self, text):
+        self.sparse_calls += 1
+        return {3: 0.5}
+
+
+class FakeVectorDB:
+    similarity = VectorDBService.similarity
+
+    def __init__(self, first_pass, widened, db_type="qdrant"):
+        self.db_type = db_type
+        self.responses = [first_pass, widened]
+        self.searches = []
+
+    def search(self, query_embedding, top_k, filter=None, query_sparse_vector=None, request_hybrid=False):
+        self.searches.append(
+            {"top_k": top_k, "sparse": query_sparse_vector, "hybrid": request_hybrid}
+        )
+        return self.responses[len(self.searches) - 1]
+
+
+@pytest.fixture
+def sink():
+    memory_sink = InMemorySink()
+    previous = set_metrics(Metrics(memory_sink))
+    yield memory_sink
+    set_metrics(previous)
+
+
+def make_retriever(vector_db, hybrid=True, **adaptive):
+    retriever = object.__new__(Retriever)
+    retriever.hybrid_search_enabled = hybrid
+    retriever.embedding_service = FakeEmbedder()
+    retriever.vector_db = vector_db
+    retriever.top_k = 10
+    retriever.cache = ResultCache({}, name="Retrieval")
+    retriever.adaptive = AdaptiveRetrievalPolicy(
+        {"enabled": True, "initial_k": 3, "min_score": 0.5, **adaptive}, top_k=10
+    )
+    return retriever
+
+
+def scored(*scores):
+    return [{"text": f"doc {i}", "score": score} for i, score in enumerate(scores)]
+
+
+@pytest.mark.parametrize(
+    "similarities, expected",
+    [
+        ([], NO_RESULTS),
+        ([None, None], NO_RESULTS),
+        ([0.4, 0.3], LOW_SCORE),
+        ([0.9, 0.88, 0.87], FLAT_SCORES),
+        ([0.9, 0.6, None], None),
+        ([0.9], None),
+    ],
+)
+def test_widen_reason(similarities, expected):
+    policy = AdaptiveRetrievalPolicy({"min_score": 0.5, "min_score_spread": 0.1})
+
+    assert policy.widen_reason(similarities) == expected
+
+
+def test_flat_scores_are_accepted_without_a_spread_threshold():
+    policy = AdaptiveRetrievalPolicy({"min_score": 0.5})
+
+    assert policy.widen_reason([0.9, 0.9, 0.9]) is None
+
+
+def test_limits_are_bounded_by_top_k():
+    policy = AdaptiveRetrievalPolicy({"initial_k": 8, "widen_k": 2}, top_k=5)
+
+    assert policy.initial_k == 5
+    assert policy.widen_k == 5
+    assert AdaptiveRetrievalPolicy({}, top_k=20).widen_k == 20
+
+
+def test_confident_first_pass_is_returned(sink):
+    vector_db = FakeVectorDB(scored(0.9, 0.6), scored(0.1))
+    retriever = make_retriever(vector_db, min_score_spread=0.1)
+
+    results = retriever.retrieve("query")
+
+    assert results == scored(0.9, 0.6)
+    assert vector_db.searches == [{"top_k": 3, "sparse": None, "hybrid": False}]
+    assert retriever.embedding_service.sparse_calls == 0
+    assert sink.counter(ADAPTIVE_RETRIEVALS, path="dense") == 1
+
+
+@pytest.mark.parametrize(
+    "first_pass, reason",
+    [
+        (scored(0.4, 0.35), LOW_SCORE),
+        (scored(0.8, 0.79, 0.78), FLAT_SCORES),
+        ([], NO_RESULTS),
+    ],
+)
+def test_weak_first_pass_is_widened_to_hybrid(sink, first_pass, reason):
+    widened = scored(0.7, 0.5, 0.3)
+    vector_db = FakeVectorDB(first_pass, widened)
+    retriever = make_retriever(vector_db, min_score_spread=0.1)
+
+    results = retriever.retrieve("query")
+
+    assert results == widened
+    assert vector_db.searches[1] == {"top_k": 10, "sparse": {3: 0.5}, "hybrid": True}
+    assert retriever.embedding_service.sparse_calls == 1
+    assert sink.counter(ADAPTIVE_RETRIEVALS, path="hybrid", reason=reason) == 1
+
+
+def test_widening_stays_dense_without_hybrid_search(sink):
+    vector_db = FakeVectorDB(scored(0.2), scored(0.3, 0.2))
+    retriever = make_retriever(vector_db, hybrid=False, widen_k=6)
+
+    retriever.retrieve("query")
+
+    assert vector_db.searches[1] == {"top_k": 6, "sparse": None, "hybrid": False}
+    assert retriever.embedding_service.sparse_calls == 0
+    assert sink.counter(ADAPTIVE_RETRIEVALS, path="widened", reason=LOW_SCORE) == 1
+
+
+def test_cosine_distances_are_read_as_similarities():
+    # A distance of 0.3 is a similarity of 0.7, above min_score
+    vector_db = FakeVectorDB([{"text": "doc", "distance": 0.3}], [], db_type="chroma")
+    retriever = make_retriever(vector_db)
+
+    retriever.retrieve("query")
+
+    assert len(vector_db.searches) == 1
@@ -0,0 +1,244 @@
+import numpy as np
+import pytest
+
+from sam_rag.services.database.vector_db_base import PartialWriteError
+from sam_rag.services.database.vector_db_implementation.chroma_db import ChromaDB
+from sam_rag.services.ingestor.ingestion_service import IngestionService
+
+IDS = [f"doc-{i}" for i in range(5)]
+TEXTS = [f"text {i}" for i in range(5)]
+EMBEDDINGS = np.arange(10, dtype=np.float32).reshape(5, 2)
+
+
+class FakeCollection:
+    def __init__(self, fail_calls=()):
+        self.fail_calls = set(fail_calls)
+        self.calls = []
+
+    def _call(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        if len(self.calls) - 1 in self.fail_calls:
+            raise ConnectionError("server unavailable")
+        return {"ids": kwargs.get("ids", []), "documents": None, "metadatas": None, "embeddings": None}
+
+    def upsert(self, **kwargs):
+        return self._call("upsert", **kwargs)
+
+    def update(self, **kwargs):
+        return self._call("update", **kwargs)
+
+    def delete(self, **kwargs):
+        return self._call("delete", **kwargs)
+
+    def get(self, **kwargs):
+        return self._call("get", **kwargs)
+
+
+def make_chroma(collection, batch_size=2):
+    db = object.__new__(ChromaDB)
+    db.collection = collection
+    db.batch_size = batch_size
+    return db
+
+
+def test_chroma_writes_in_batches_of_lists():
+    collection = FakeCollection()
+
+    assert make_chroma(collection).add_documents(TEXTS, EMBEDDINGS, ids=IDS) == IDS
+
+    assert [call["ids"] for _, call in collection.calls] == [IDS[:2], IDS[2:4], IDS[4:]]
+    assert collection.calls[1][1]["embeddings"] == [[4.0, 5.0], [6.0, 7.0]]
+
+
+def test_chroma_reports_a_partial_write():
+    db = make_chroma(FakeCollection(fail_calls={1}))
+
+    with pytest.raises(PartialWriteError) as raised:
+        db.add_documents(TEXTS, EMBEDDINGS, ids=IDS)
+
+    assert raised.value.written_ids == IDS[:2] + IDS[4:]
+    assert raised.value.failed_ids == IDS[2:4]
+    assert [type(e) for e in raised.value.errors] == [ConnectionError]
+
+
+def test_chroma_raises_the_error_when_nothing_was_written():
+    db = make_chroma(FakeCollection(fail_calls={0, 1, 2}))
+
+    with pytest.raises(ConnectionError):
+        db.add_documents(TEXTS, EMBEDDINGS, ids=IDS)
+
+
+def test_chroma_update_reports_a_partial_write():
+    db = make_chroma(FakeCollection(fail_calls={0}), batch_size=3)
+
+    with pytest.raises(PartialWriteError) as raised:
+        db.update(IDS, metadatas=[{"n": i} for i in range(5)])
+
+    assert raised.value.written_ids == IDS[3:]
+    assert raised.value.failed_ids == IDS[:3]
+
+
+def test_chroma_reads_and_deletes_in_batches():
+    collection = FakeCollection()
+    db = make_chroma(collection)
+
+    db.delete(IDS)
+    db.get(IDS)
+
+    assert [(method, call["ids"]) for method, call in collection.calls] == [
+        ("delete", IDS[:2]),
+        ("delete", IDS[2:4]),
+        ("delete", IDS[4:]),
+        ("get", IDS[:2]),
+        ("get", IDS[2:4]),
+        ("get", IDS[4:]),
+    ]
+
+
+def test_chroma_batch_size_is_capped_at_the_server_maximum():
+    class Client:
+        def get_max_batch_size(self):
+            return 3
+
+    db = make_chroma(FakeCollection(), batch_size=10)
+    db.client = Client()
+
+    assert db._effective_batch_size() == 3
+
+
+def test_ingestion_reports_written_and_failed_ids():
+    class FailingVectorDB:
+        def add_documents(self, **kwargs):
+            raise PartialWriteError("partly stored", IDS[:3], IDS[3:])
+
+    ingestor = object.__new__(IngestionService)
+    ingestor.vector_db = FailingVectorDB()
+
+    result = ingestor.ingest_embedding_batch(TEXTS, EMBEDDINGS, ids=IDS)
+
+    assert not result["success"]
+    assert result["document_ids"] == IDS[:3]
+    assert result["failed_ids"] == IDS[3:]
+    assert "3 of 5" in result["message"]
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def exists(self, key):
+        self.commands.append(("exists", key))
+
+    def hset(self, key, mapping):
+        self.commands.append(("hset", key))
+        self.client.hashes[key] = dict(self.client.hashes.get(key, {}), **mapping)
+
+    def hgetall(self, key):
+        self.commands.append(("hgetall", key))
+
+    def execute(self):
+        self.client.executed.append(self.commands)
+        results = []
+        for command, key in self.commands:
+            if command == "exists":
+                results.append(key in self.client.hashes)
+            elif command == "hgetall":
+                results.append(self.client.hashes.get(key, {}))
+            else:
+                results.append(1)
+        return results
+
+
+class FakeRedis:
+    def __init__(self, keys=()):
+        self.hashes = {key: {b"content": b"text"} for key in keys}
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakeSchema:
+    index_prefix = "rag"
+
+
+class FakeSearchIndex:
+    schema = FakeSchema()
+
+    def __init__(self, fail_calls=()):
+        self.fail_calls = set(fail_calls)
+        self.loads = []
+
+    def load(self, records, id_field, batch_size):
+        self.loads.append(records)
+        if len(self.loads) - 1 in self.fail_calls:
+            raise ConnectionError("connection reset")
+
+
+@pytest.fixture
+def make_redis():
+    pytest.importorskip("redisvl")
+    from sam_rag.services.database.vector_db_implementation.redis_vl_db import RedisDB
+
+    def make(index, client=None):
+        db = object.__new__(RedisDB)
+        db.index_name = "rag"
+        db.index = index
+        db.client = client or FakeRedis()
+        db.text_field_name = "content"
+        db.vector_field_name = "embedding"
+        db.vector_datatype, db.vector_dtype = "FLOAT32", np.float32
+        db.write_batch_size = 2
+        db.read_batch_size = 2
+        return db
+
+    return make
+
+
+def test_redis_loads_one_pipeline_per_batch_with_raw_vectors(make_redis):
+    index = FakeSearchIndex()
+
+    assert make_redis(index).add_documents(TEXTS, EMBEDDINGS, [{"tag": ["a"]}] * 5, ids=IDS) == IDS
+
+    assert [[record["id"] for record in records] for records in index.loads] == [IDS[:2], IDS[2:4], IDS[4:]]
+    record = index.loads[1][0]
+    assert record["embedding"] == EMBEDDINGS[2].tobytes()
+    assert record["tag"] == '["a"]'
+
+
+def test_redis_reports_a_partial_write(make_redis):
+    db = make_redis(FakeSearchIndex(fail_calls={2}))
+
+    with pytest.raises(PartialWriteError) as raised:
+        db.add_documents(TEXTS, EMBEDDINGS, ids=IDS)
+
+    assert raised.value.written_ids == IDS[:4]
+    assert raised.value.failed_ids == IDS[4:]
+
+
+def test_redis_metadata_updates_are_pipelined_to_existing_documents(make_redis):
+    client = FakeRedis(keys=["rag:doc-0", "rag:doc-2"])
+    db = make_redis(FakeSearchIndex(), client)
+
+    db.update(IDS[:3], metadatas=[{"n": i} for i in range(3)])
+
+    # One EXISTS pipeline and one HSET pipeline per write batch
+    assert [[command for command, _ in commands] for commands in client.executed] == [
+        ["exists", "exists"],
+        ["hset"],
+        ["exists"],
+        ["hset"],
+    ]
+    assert "rag:doc-1" not in client.hashes
+    assert client.hashes["rag:doc-2"]["n"] == 2
+
+
+def test_redis_reads_are_pipelined_per_batch(make_redis):
+    client = FakeRedis(keys=["rag:" + doc_id for doc_id in IDS])
+    db = make_redis(FakeSearchIndex(), client)
+
+    documents = db.get(IDS)
+
+    assert [doc["id"] for doc in documents] == IDS
+    assert [len(commands) for commands in client.executed] == [2, 2, 1]
@@ -0,0 +1,87 @@
+import pytest
+
+from sam_rag.services.dedupe import ChunkDeduplicator
+
+BASE = (
+    "The quarterly report covers revenue growth in every region, the cost of "
+    "new hires, the marketing budget and the plans for the next product launch"
+)
+
+
+@pytest.fixture
+def dedupe(tmp_path):
+    deduplicator = ChunkDeduplicator({"path": str(tmp_path / "dedupe.db"), "threshold": 0.7})
+    yield deduplicator
+    deduplicator.close()
+
+
+def test_bands_must_divide_permutations(tmp_path):
+    with pytest.raises(ValueError):
+        ChunkDeduplicator({"path": str(tmp_path / "dedupe.db"), "num_perm": 128, "bands": 7})
+
+
+def test_exact_duplicate_in_batch_ignores_case_and_whitespace(dedupe):
+    plan = dedupe.plan([BASE, "  " + BASE.upper() + "\n", "Something else entirely"])
+
+    assert plan.keep == [0, 2]
+    assert plan.duplicates == [
+        {"canonical_index": 0, "similarity": 1.0, "exact": True, "index": 1}
+    ]
+
+
+def test_near_duplicate_in_batch(dedupe):
+    near = BASE.replace("next product launch", "next big product launch")
+    plan = dedupe.plan([BASE, near])
+
+    assert plan.keep == [0]
+    duplicate = plan.duplicates[0]
+    assert duplicate["canonical_index"] == 0
+    assert not duplicate["exact"]
+    assert 0.7 <= duplicate["similarity"] < 1.0
+
+
+def test_short_chunks_are_only_checked_exactly(dedupe):
+    assert dedupe.signature("too short to shingle") is None
+    plan = dedupe.plan(["too short to shingle", "Too  short to shingle", "too short to shingle!"])
+
+    assert plan.keep == [0, 2]
+    assert plan.duplicates[0]["exact"]
+
+
+def test_recorded_chunks_are_found_in_later_batches(dedupe):
+    first = dedupe.plan([BASE, "An unrelated chunk about the holiday schedule of the office staff"])
+    dedupe.record(first, ["doc-1", "doc-2"], ["a.txt", "a.txt"])
+
+    plan = dedupe.plan([BASE])
+    assert plan.keep == []
+    assert plan.duplicates[0]["canonical_document_id"] == "doc-1"
+
+    dedupe.record(plan, [], ["b.txt"])
+    assert dedupe.linked_sources("doc-1") == ["b.txt"]
+    assert dedupe.stats() == {"chunks": 2, "duplicates": 1}
+
+
+def test_record_skips_mismatched_ids(dedupe):
+    plan = dedupe.plan([BASE])
+    dedupe.record(plan, [])
+
+    assert dedupe.stats()["chunks"] == 0
+
+
+def test_forget_documents_removes_chunks_and_links(dedupe):
+    dedupe.record(dedupe.plan([BASE]), ["doc-1"], ["a.txt"])
+    dedupe.record(dedupe.plan([BASE]), [], ["b.txt"])
+
+    assert dedupe.forget_documents(["doc-1", "missing"]) == 1
+    assert dedupe.stats() == {"chunks": 0, "duplicates": 0}
+    assert dedupe.plan([BASE]).keep == [0]
+
+
+def test_forget_source(dedupe):
+    dedupe.record(dedupe.plan([BASE]), ["doc-1"], ["a.txt"])
+    dedupe.record(dedupe.plan([BASE]), [], ["b.txt"])
+
+    assert dedupe.forget_source("b.txt") == 0
+    assert dedupe.stats() == {"chunks": 1, "duplicates": 0}
+    assert dedupe.forget_source("a.txt") == 1
+    assert dedupe.stats()["chunks"] == 0
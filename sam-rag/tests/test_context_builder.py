@@ -0,0 +1,85 @@
+import pytest
+
+from sam_rag.services.rag.context_builder import ContextBuilder, trim_overlap
+
+SHARED = "the overlap carried between neighbouring chunks "
+
+
+def make_builder(**config):
+    builder = ContextBuilder(config)
+    # Count 4 characters per token whether or not tiktoken is installed
+    builder.counter.encoding = None
+    return builder
+
+
+def chunk(text, source="a.txt"):
+    return {"text": text, "metadata": {"file_path": source}}
+
+
+def test_trim_overlap_drops_text_already_kept():
+    assert trim_overlap("kept chunk", ["a longer kept chunk"], 5) is None
+
+
+def test_trim_overlap_removes_shared_prefix_and_suffix():
+    previous = "The first chunk ends with " + SHARED
+    following = SHARED + "and the last chunk goes on"
+
+    assert trim_overlap(following, [previous], 20) == "and the last chunk goes on"
+    assert trim_overlap(previous, [following], 20) == "The first chunk ends with "
+
+
+def test_trim_overlap_keeps_short_overlaps():
+    text = "chunk ends here. next"
+    assert trim_overlap(text, ["text before chunk ends here."], 50) == text
+
+
+def test_select_trims_overlap_within_a_source_only():
+    builder = make_builder(min_overlap_chars=20)
+    first = "The first chunk ends with " + SHARED
+    second = SHARED + "and the last chunk goes on"
+
+    selected = builder.select([chunk(first), chunk(second), chunk(second, "b.txt")])
+
+    assert [c["text"] for c in selected] == [first, "and the last chunk goes on", second]
+    assert selected[1]["tokens"] == 7
+
+
+def test_select_skips_chunks_over_the_budget():
+    builder = make_builder(max_tokens=10)
+
+    selected = builder.select([chunk("x" * 32), chunk("y" * 16, "b.txt"), chunk("z" * 8, "c.txt")])
+
+    # The second chunk does not fit, the smaller third one still does
+    assert [c["text"][0] for c in selected] == ["x", "z"]
+    assert sum(c["tokens"] for c in selected) == 10
+
+
+@pytest.mark.parametrize(
+    "config, expected",
+    [
+        ({"max_chunks_per_source": 1}, ["a", "c"]),
+        ({"max_tokens_per_source": 5}, ["a", "c"]),
+        ({"max_tokens_per_source": 8}, ["a", "b", "c"]),
+    ],
+)
+def test_select_applies_per_source_caps(config, expected):
+    builder = make_builder(max_tokens=0, dedupe=False, **config)
+    chunks = [chunk("a" * 16), chunk("b" * 16), chunk("c" * 16, "b.txt")]
+
+    assert [c["text"][0] for c in builder.select(chunks)] == expected
+
+
+def test_join_without_budget_joins_everything():
+    builder = make_builder(max_tokens=0)
+
+    assert builder.join(["one", "", "two"]) == ("one\n\ntwo", 2)
+
+
+def test_join_cuts_the_first_output_over_the_budget():
+    builder = make_builder(max_tokens=6)
+
+    content, tokens = builder.join(["a" * 8, "b" * 40, "c" * 8])
+
+    # 2 tokens, a 1 token separator, and the rest of the budget for "b"
+    assert content == "a" * 8 + "\n\n" + "b" * 12
+    assert tokens == 6
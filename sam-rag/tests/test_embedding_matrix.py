@@ -0,0 +1,115 @@
+import base64
+
+import numpy as np
+import pytest
+
+from sam_rag.services.database.vector_db_base import as_embedding_matrix
+from sam_rag.services.embedder import litellm_embedder
+from sam_rag.services.embedder.embedder_service import EmbedderService
+from sam_rag.services.embedder.litellm_embedder import LiteLLMEmbedder
+from sam_rag.services.ingestor.ingestion_service import IngestionService
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.embeddings = None
+
+    def add_documents(self, documents, embeddings, metadatas=None, ids=None, sparse_vectors=None):
+        self.embeddings = embeddings
+        return ids
+
+
+class FakeLiteLLM:
+    def __init__(self, dimension):
+        self.dimension = dimension
+        self.calls = []
+
+    def embedding(self, model, input, **kwargs):
+        self.calls.append((input, kwargs))
+        rows = [np.full(self.dimension, len(text), dtype="<f4") for text in input]
+        return {"data": [{"embedding": base64.b64encode(row.tobytes()).decode()} for row in rows]}
+
+
+def make_ingestor():
+    ingestor = object.__new__(IngestionService)
+    ingestor.vector_db = FakeVectorDB()
+    return ingestor
+
+
+def test_float32_matrix_is_used_without_a_copy():
+    matrix = np.ones((2, 3), dtype=np.float32)
+
+    assert as_embedding_matrix(matrix) is matrix
+    assert as_embedding_matrix(matrix, np.float16).dtype == np.float16
+
+
+def test_lists_are_converted_to_one_matrix():
+    matrix = as_embedding_matrix([[1.0, 2.0], [3.0, 4.0]])
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    assert matrix.shape == (2, 2)
+    assert as_embedding_matrix([]).shape == (0, 0)
+
+
+def test_embed_texts_batch_returns_the_embedder_matrix(monkeypatch):
+    service = EmbedderService({"embedder_type": "hashing", "embedder_params": {"embedding_dimension": 16}})
+    produced = []
+    embed_texts_array = service.embedder.embed_texts_array
+
+    def record(texts):
+        produced.append(embed_texts_array(texts))
+        return produced[-1]
+
+    def no_lists(texts):
+        raise AssertionError("embeddings were built as lists")
+
+    monkeypatch.setattr(service.embedder, "embed_texts_array", record)
+    monkeypatch.setattr(service.embedder, "embed_texts", no_lists)
+
+    result = service.embed_texts_batch(["first text", "second text"])
+
+    assert result["dense_vectors"] is produced[0]
+    assert result["dense_vectors"].dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(result["dense_vectors"], axis=1), 1.0, rtol=1e-6)
+    assert result["sparse_vectors"] is None
+
+
+def test_ingest_embedding_batch_passes_the_matrix_through():
+    ingestor = make_ingestor()
+    matrix = np.ones((2, 4), dtype=np.float32)
+
+    result = ingestor.ingest_embedding_batch(["a", "b"], matrix, ids=["1", "2"])
+
+    assert result["success"]
+    assert ingestor.vector_db.embeddings is matrix
+
+
+def test_ingest_embeddings_builds_one_matrix_from_dicts():
+    ingestor = make_ingestor()
+    embeddings = [{"dense_vector": [1.0, 0.0]}, {"dense_vector": [0.0, 1.0], "sparse_vector": {3: 0.5}}]
+
+    result = ingestor.ingest_embeddings(["a", "b"], embeddings, ids=["1", "2"])
+
+    assert result["document_ids"] == ["1", "2"]
+    assert isinstance(ingestor.vector_db.embeddings, np.ndarray)
+    assert ingestor.vector_db.embeddings.dtype == np.float32
+
+
+def test_packed_embeddings_are_decoded_into_the_matrix(monkeypatch):
+    fake = FakeLiteLLM(dimension=3)
+    monkeypatch.setattr(litellm_embedder, "is_available", lambda name: True)
+    monkeypatch.setattr(LiteLLMEmbedder, "litellm", property(lambda self: fake))
+    monkeypatch.setattr(
+        LiteLLMEmbedder,
+        "_decode_embedding",
+        staticmethod(lambda value: pytest.fail("packed embedding decoded to a list")),
+    )
+    embedder = LiteLLMEmbedder({"model": "test/embedding", "batch_size": 2, "encoding_format": "base64"})
+
+    matrix = embedder.embed_texts_array(["a", "bb", "", "dddd"])
+
+    assert [texts for texts, _ in fake.calls] == [["a", "bb"], ["dddd"]]
+    assert fake.calls[0][1]["encoding_format"] == "base64"
+    assert matrix.dtype == np.float32
+    np.testing.assert_array_equal(matrix[:, 0], [1, 2, 0, 4])
@@ -0,0 +1,164 @@
+import pytest
+
+from sam_rag.services.preprocessor.document_preprocessor import HTMLPreprocessor
+from sam_rag.services.preprocessor.html_extraction import (
+    extract_html,
+    extract_html_with_bs4,
+    read_html,
+)
+from sam_rag.services.splitter.structured_splitter import HTMLSplitter
+
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title> Release notes </title>
+  <meta name="Author" content="Docs team">
+  <meta name="keywords" content="release, notes, ">
+  <meta property="article:published_time" content="2024-05-01T10:00:00">
+  <style>body { color: red; }</style>
+</head>
+<body>
+  <!-- navigation comment -->
+  <p>Intro with <b>bold</b> and <a href="#">a link</a> &amp; an entity.</p>
+  <script>var hidden = "script text";</script>
+  <h1>First heading</h1>
+  <p>First paragraph of the first part.</p>
+  <section>
+    <h2>Nested heading</h2>
+    <div>Text in a div<br>after a break</div>
+    <noscript>no script text</noscript>
+  </section>
+  <article><p>An article</p></article>
+  Trailing body text
+</body>
+</html>
+"""
+
+EXTRACTORS = [extract_html, extract_html_with_bs4]
+
+
+def test_page_is_split_at_headings_and_sections():
+    extraction = extract_html(PAGE, min_section_chars=0)
+
+    assert extraction.sections == [
+        "Intro with bold and a link & an entity.",
+        "First heading First paragraph of the first part.",
+        "Nested heading Text in a div after a break",
+        "An article Trailing body text",
+    ]
+    assert "script text" not in extraction.text
+    assert "no script text" not in extraction.text
+    assert "navigation comment" not in extraction.text
+    assert "color: red" not in extraction.text
+
+
+@pytest.mark.parametrize("min_section_chars", [0, 40, 200])
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_bs4_fallback_matches_lxml(min_section_chars, as_bytes):
+    data = PAGE.encode("utf-8") if as_bytes else PAGE
+    expected = extract_html(data, min_section_chars=min_section_chars)
+
+    extraction = extract_html_with_bs4(data, min_section_chars=min_section_chars)
+
+    assert extraction.sections == expected.sections
+    assert extraction.metadata == expected.metadata == {
+        "html_title_tag": "Release notes",
+        "author": "Docs team",
+        "keywords": ["release", "notes"],
+        "creation_date": "2024-05-01",
+    }
+    assert extraction.truncated is expected.truncated is None
+
+
+@pytest.mark.parametrize("extract", EXTRACTORS)
+def test_split_and_strip_tags_are_configurable(extract):
+    extraction = extract(PAGE, strip_tags=["script"], split_tags=["p"], min_section_chars=0)
+
+    assert extraction.sections == [
+        "Intro with bold and a link & an entity. First heading",
+        "First paragraph of the first part. Nested heading Text in a div after a break "
+        "no script text",
+        "An article Trailing body text",
+    ]
+
+
+@pytest.mark.parametrize("extract", EXTRACTORS)
+def test_text_beyond_max_text_chars_is_dropped(extract):
+    extraction = extract(PAGE, min_section_chars=0, max_text_chars=50)
+
+    assert extraction.truncated == "max_text_chars"
+    assert len(extraction.text) <= 50
+    assert extraction.sections == extract_html(PAGE, min_section_chars=0, max_text_chars=50).sections
+
+
+@pytest.mark.parametrize("extract", EXTRACTORS)
+def test_empty_page_has_no_sections(extract):
+    extraction = extract("  \n ")
+
+    assert extraction.sections == []
+    assert extraction.metadata == {}
+
+
+def test_splitter_fallback_matches_lxml():
+    page = "<html><body>" + "".join(
+        f"<h2>Part {i}</h2><p>{'word ' * 40}</p><p>{'more ' * 30}</p>" for i in range(6)
+    ) + "</body></html>"
+    splitter = HTMLSplitter(
+        {"chunk_size": 400, "chunk_overlap": 0, "tags_to_extract": ["h2", "section"]}
+    )
+    splitter.use_lxml = True
+    expected = splitter.split_text(page)
+
+    splitter.use_lxml = False
+
+    assert splitter.split_text(page) == expected
+    assert len(expected) == 6
+    assert all(chunk.startswith("Part ") for chunk in expected)
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_preprocessor_parsers_emit_the_same_sections(tmp_path, parser):
+    path = tmp_path / "page.html"
+    path.write_text(PAGE, encoding="utf-8")
+    config = {"preprocessors": {"html": {"extraction": {"min_section_chars": 0}}}}
+    expected = list(HTMLPreprocessor(config).preprocess_stream(str(path))["text_stream"])
+    config["preprocessors"]["html"]["extraction"]["parser"] = parser
+
+    stream = HTMLPreprocessor(config).preprocess_stream(str(path))
+
+    assert list(stream["text_stream"]) == expected
+    assert len(expected) > 1
+    assert stream["metadata"]["html_title_tag"] == "Release notes"
+    assert stream["metadata"]["section_count"] == len(expected)
+
+
+def test_read_html_stops_at_max_bytes(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_bytes(b"x" * 100)
+
+    assert read_html(str(path), 10) == (b"x" * 10, True)
+    assert read_html(str(path), 100) == (b"x" * 100, False)
+    assert read_html(str(path), 0) == (b"x" * 100, False)
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_oversized_file_is_cut_at_max_bytes(tmp_path, parser):
+    head = "<html><body><h1>Kept</h1><p>" + "kept text " * 20 + "</p>"
+    path = tmp_path / "large.html"
+    path.write_text(head + "<h1>Dropped</h1><p>" + "dropped " * 1000 + "</p></body></html>")
+    config = {
+        "preprocessors": {
+            "html": {"extraction": {"parser": parser, "max_bytes": len(head)}}
+        }
+    }
+
+    stream = HTMLPreprocessor(config).preprocess_stream(str(path))
+    text = " ".join(stream["text_stream"])
+
+    assert stream["metadata"]["truncated"] == "max_bytes"
+    assert "kept text" in text
+    assert "dropped" not in text.lower()
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from sam_rag.services.jobs.job_queue import (
+    FAILED,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    QUEUED,
+    RUNNING,
+    JobQueue,
+)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    job_queue = JobQueue(
+        str(tmp_path / "jobs.db"), max_attempts=2, backoff_seconds=10, max_backoff_seconds=15
+    )
+    yield job_queue
+    job_queue.close()
+
+
+def test_same_content_is_not_queued_again(queue):
+    first = queue.enqueue("ingest", {"n": 1}, source="a.txt", content_hash="h1")
+    again = queue.enqueue("ingest", {"n": 2}, source="a.txt", content_hash="h1")
+    changed = queue.enqueue("ingest", {"n": 3}, source="a.txt", content_hash="h2")
+
+    assert again == first
+    assert changed != first
+    assert queue.get(first)["payload"] == {"n": 1}
+    assert queue.counts()[QUEUED] == 2
+
+
+def test_failed_job_does_not_block_a_new_one(queue):
+    job_id = queue.enqueue("ingest", {}, source="a.txt", content_hash="h1", max_attempts=1)
+    queue.claim()
+    assert queue.fail(job_id, "boom") == FAILED
+
+    assert queue.enqueue("ingest", {}, source="a.txt", content_hash="h1") != job_id
+
+
+def test_jobs_without_source_are_never_deduplicated(queue):
+    assert queue.enqueue("ingest", {}, content_hash="h1") != queue.enqueue(
+        "ingest", {}, content_hash="h1"
+    )
+
+
+def test_interactive_jobs_are_claimed_first(queue):
+    batch = queue.enqueue("ingest", {}, priority=PRIORITY_BATCH)
+    interactive = queue.enqueue("ingest", {}, priority=PRIORITY_INTERACTIVE)
+
+    assert queue.claim()["id"] == interactive
+    assert queue.claim()["id"] == batch
+    assert queue.claim() is None
+
+
+def test_failed_attempt_is_retried_after_backoff(queue):
+    job_id = queue.enqueue("ingest", {})
+    assert queue.claim()["attempts"] == 1
+
+    before = time.time()
+    assert queue.fail(job_id, "boom") == QUEUED
+    job = queue.get(job_id)
+    # The first retry waits between half and all of backoff_seconds
+    assert before + 5 <= job["available_at"] <= time.time() + 10
+    assert job["error"] == "boom"
+    assert queue.claim() is None
+    assert 0 < queue.next_available_in() <= 10
+
+
+def test_job_fails_once_attempts_are_used_up(queue):
+    job_id = queue.enqueue("ingest", {})
+    queue.claim()
+    queue.fail(job_id, "first")
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    assert queue.claim()["attempts"] == 2
+
+    assert queue.fail(job_id, "second") == FAILED
+    assert queue.get(job_id)["status"] == FAILED
+    assert queue.next_available_in() is None
+
+
+def test_backoff_doubles_up_to_the_maximum(queue):
+    for attempts, cap in ((1, 10), (2, 15), (5, 15)):
+        delays = [queue._backoff(attempts) for _ in range(50)]
+        assert all(cap / 2 <= delay <= cap for delay in delays)
+
+
+def test_running_jobs_are_requeued_on_reopen(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    job_id = queue.enqueue("ingest", {})
+    assert queue.claim()["status"] == RUNNING
+    queue.close()
+
+    reopened = JobQueue(path)
+    try:
+        assert reopened.get(job_id)["status"] == QUEUED
+        assert reopened.job_available.is_set()
+    finally:
+        reopened.close()
@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from sam_rag.lifecycle import RagAgentConfig
+
+BASE_CONFIG = {
+    "embedding": {"embedder_type": "openai"},
+    "vector_db": {"db_type": "qdrant"},
+}
+
+
+def agent_config(**sections):
+    return RagAgentConfig(**{**BASE_CONFIG, **sections}).dict()
+
+
+def test_memory_storage_settings_are_kept():
+    config = agent_config(
+        scanner={"memory_storage": {"max_changes": 100, "spill_path": "changes.db"}}
+    )
+
+    assert config["scanner"]["memory_storage"] == {"max_changes": 100, "spill_path": "changes.db"}
+
+
+def test_ingestion_window_is_kept():
+    assert agent_config()["ingestion"] == {"window_chunks": 256}
+    assert agent_config(ingestion={"window_chunks": 8})["ingestion"]["window_chunks"] == 8
+
+
+def test_job_queue_poll_interval_is_kept():
+    assert agent_config(job_queue={"poll_interval": 0.5})["job_queue"]["poll_interval"] == 0.5
+
+
+def test_sharding_settings_reach_the_file_tracker(tmp_path, monkeypatch):
+    pytest.importorskip("qdrant_client")
+    from sam_rag.services.database import connect as tracker_db
+    from sam_rag.services.database.model import init_db
+    from sam_rag.services.scanner.file_tracker import FileChangeTracker
+
+    database = {"type": "sqlite", "path": str(tmp_path / "scanner.db")}
+    init_db(database)
+    monkeypatch.setattr(tracker_db, "SessionLocal", None)
+    config = agent_config(
+        scanner={
+            "batch": False,
+            "use_memory_storage": False,
+            "database": database,
+            "sharding": {"enabled": True, "num_shards": 4, "instance_id": "a"},
+        },
+        vector_db={
+            "db_type": "qdrant",
+            "db_params": {"path": ":memory:", "embedding_dimension": 4},
+        },
+    )
+
+    tracker = FileChangeTracker(config, pipeline=None)
+    try:
+        assert tracker.work_leases is not None
+        assert tracker.work_leases.owner == "a"
+        assert tracker.work_leases._shards == {0, 1, 2, 3}
+    finally:
+        tracker.cleanup()
@@ -0,0 +1,84 @@
+import atexit
+
+import pytest
+
+from sam_rag.services.memory.memory_storage import MemoryStorage
+
+
+def new_storage():
+    # A private instance instead of the process-wide singleton
+    memory = object.__new__(MemoryStorage)
+    memory._initialize()
+    return memory
+
+
+def close(memory):
+    if memory._spill_conn is not None:
+        atexit.unregister(memory.flush)
+        memory._spill_conn.close()
+
+
+@pytest.fixture
+def storage():
+    memory = new_storage()
+    yield memory
+    close(memory)
+
+
+def test_only_the_latest_change_per_path_is_kept(storage):
+    storage.insert_document("a.txt", "a.txt")
+    storage.insert_document("b.txt", "b.txt")
+    storage.update_document("a.txt", "modified")
+
+    assert [(c["path"], c["status"]) for c in storage.changes] == [
+        ("b.txt", "new"),
+        ("a.txt", "modified"),
+    ]
+
+
+def test_changes_since_a_timestamp(storage):
+    storage.insert_document("a.txt", "a.txt")
+    since = storage.changes[-1]["timestamp"]
+    storage.insert_document("b.txt", "b.txt")
+    storage.delete_document("a.txt")
+
+    assert [c["path"] for c in storage.get_changes_since(since)] == ["b.txt", "a.txt"]
+    assert storage.get_changes_since(storage.changes[-1]["timestamp"]) == []
+
+
+def test_oldest_changes_are_evicted_beyond_the_bound(storage):
+    storage.configure(max_changes=10)
+    for i in range(11):
+        storage.insert_document(f"{i}.txt", f"{i}.txt")
+
+    # Eviction goes down to 90% of the bound
+    assert [c["path"] for c in storage.changes] == [f"{i}.txt" for i in range(2, 11)]
+    assert len(storage.get_changes_since()) == 9
+
+
+def test_evicted_changes_are_spilled_and_still_returned(storage, tmp_path):
+    storage.configure(max_changes=10, spill_path=str(tmp_path / "changes.db"))
+    for i in range(11):
+        storage.insert_document(f"{i}.txt", f"{i}.txt")
+    storage.update_document("0.txt", "modified")
+
+    changes = storage.get_changes_since()
+    assert len(storage.changes) == 10
+    assert [c["path"] for c in changes] == [f"{i}.txt" for i in range(1, 11)] + ["0.txt"]
+    assert changes[-1]["status"] == "modified"
+
+
+def test_spilled_changes_survive_a_restart(tmp_path):
+    spill_path = str(tmp_path / "changes.db")
+    first = new_storage()
+    first.configure(max_changes=5, spill_path=spill_path)
+    first.insert_document("a.txt", "a.txt")
+    first.flush()
+    close(first)
+
+    second = new_storage()
+    second.configure(spill_path=spill_path)
+    try:
+        assert [c["path"] for c in second.get_changes_since()] == ["a.txt"]
+    finally:
+        close(second)
@@ -0,0 +1,76 @@
+import pytest
+
+from sam_rag.evaluation.corpus import write_pdf
+from sam_rag.services.preprocessor import document_preprocessor
+from sam_rag.services.preprocessor.document_preprocessor import PDFPreprocessor, _ExtractionBudget
+
+pytest.importorskip("pdfplumber")
+
+PARAGRAPH = "Revenue grew in every region while the cost of new hires stayed flat. " * 6
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = str(tmp_path / "report.pdf")
+    sections = [{"heading": f"Section {i}", "text": PARAGRAPH} for i in range(8)]
+    # Short pages, so the document has several
+    write_pdf(path, "Report", sections, lines_per_page=8)
+    return path
+
+
+def make_preprocessor(**extraction):
+    return PDFPreprocessor({"preprocessors": {"pdf": {"extraction": extraction}}})
+
+
+def test_pages_are_streamed_one_by_one(pdf_path):
+    stream = make_preprocessor(sample_pages=2).preprocess_stream(pdf_path)
+
+    pages = list(stream["text_stream"])
+
+    metadata = stream["metadata"]
+    assert len(pages) == metadata["page_count"] == metadata["pages_extracted"] > 3
+    assert pages[0].startswith("section revenue grew")
+    assert metadata["extraction_method"] == "pdfplumber"
+    assert metadata["truncated"] is None
+
+
+@pytest.mark.parametrize("sample_pages", [2, 5])
+def test_page_budget_stops_extraction(pdf_path, sample_pages):
+    stream = make_preprocessor(sample_pages=sample_pages, max_pages=3).preprocess_stream(pdf_path)
+
+    assert len(list(stream["text_stream"])) == 3
+    assert stream["metadata"]["pages_extracted"] == 3
+    assert stream["metadata"]["truncated"] == "max_pages"
+
+
+def test_time_budget_stops_extraction(pdf_path, monkeypatch):
+    clock = iter(range(0, 1000, 10))
+    monkeypatch.setattr(document_preprocessor.time, "monotonic", lambda: next(clock))
+    stream = make_preprocessor(sample_pages=1, max_seconds=25).preprocess_stream(pdf_path)
+
+    # Started at 0, checked at 10, 20 and stopped at 30
+    assert len(list(stream["text_stream"])) == 2
+    assert stream["metadata"]["truncated"] == "max_seconds"
+
+
+def test_memory_budget_stops_extraction(pdf_path, monkeypatch):
+    rss = iter([100.0, 100.0, 120.0, 180.0])
+    monkeypatch.setattr(document_preprocessor, "_current_rss_mb", lambda: next(rss))
+    stream = make_preprocessor(sample_pages=1, max_memory_mb=50).preprocess_stream(pdf_path)
+
+    assert len(list(stream["text_stream"])) == 2
+    assert stream["metadata"]["truncated"] == "max_memory_mb"
+
+
+def test_preprocess_joins_the_pages(pdf_path):
+    output = make_preprocessor(max_pages=2).preprocess(pdf_path)
+
+    assert output["text_content"].count("\n\n") == 1
+    assert output["metadata"]["truncated"] == "max_pages"
+
+
+def test_budget_without_limits_never_stops():
+    budget = _ExtractionBudget()
+
+    assert budget.exceeded(10_000) is None
+    assert budget.rss_start is None
@@ -0,0 +1,143 @@
+import threading
+
+import numpy as np
+import pytest
+
+from sam_rag.services.database.vector_db_implementation import pinecone_db
+from sam_rag.services.database.vector_db_implementation.pinecone_db import PineconeDB
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class GrpcCode:
+    def __init__(self, name):
+        self.name = name
+
+
+class GrpcError(Exception):
+    def __init__(self, name):
+        super().__init__(name)
+        self._code = GrpcCode(name)
+
+    def code(self):
+        return self._code
+
+
+class FakeIndex:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.upserts = []
+        self.attempts = 0
+        self.lock = threading.Lock()
+
+    def upsert(self, vectors, namespace):
+        with self.lock:
+            self.attempts += 1
+            if self.errors:
+                raise self.errors.pop(0)
+            self.upserts.append((namespace, [vector["id"] for vector in vectors]))
+
+
+@pytest.fixture
+def make_db(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(pinecone_db.time, "sleep", sleeps.append)
+    monkeypatch.setattr(pinecone_db.random, "random", lambda: 0.5)
+
+    def make(index, **config):
+        monkeypatch.setattr(PineconeDB, "_setup_client", lambda self: setattr(self, "index", index))
+        db = PineconeDB({"api_key": "key", "index_name": "docs", "retry_backoff": 0.5, **config})
+        db.sleeps = sleeps
+        return db
+
+    return make
+
+
+def add(db, count, metadata=None):
+    ids = [f"doc-{i}" for i in range(count)]
+    embeddings = np.ones((count, 4), dtype=np.float32)
+    return db.add_documents(
+        ["text"] * count, embeddings, [dict(metadata or {}) for _ in ids], ids=ids
+    )
+
+
+def vector_bytes(db):
+    return db._estimate_bytes({"id": "doc-0", "values": [1.0] * 4, "metadata": {"text": "text"}})
+
+
+def test_upserts_are_split_by_payload_bytes(make_db):
+    index = FakeIndex()
+    db = make_db(index)
+    db.batch_max_bytes = 2 * vector_bytes(db)
+
+    assert add(db, 5) == [f"doc-{i}" for i in range(5)]
+
+    assert sorted(len(ids) for _, ids in index.upserts) == [1, 2, 2]
+    assert sorted(i for _, ids in index.upserts for i in ids) == [f"doc-{i}" for i in range(5)]
+
+
+def test_upserts_are_split_by_vector_count(make_db):
+    index = FakeIndex()
+    db = make_db(index, batch_max_vectors=3)
+
+    add(db, 5)
+
+    assert sorted(len(ids) for _, ids in index.upserts) == [2, 3]
+
+
+def test_batch_limits_are_capped_at_the_pinecone_limits(make_db):
+    db = make_db(FakeIndex(), batch_max_bytes=10**9, batch_max_vectors=10**6)
+
+    assert db.batch_max_bytes == pinecone_db.MAX_REQUEST_BYTES
+    assert db.batch_max_vectors == pinecone_db.MAX_REQUEST_VECTORS
+
+
+def test_documents_are_routed_to_namespaces(make_db):
+    index = FakeIndex()
+    db = make_db(index, namespace_field="tenant")
+
+    db.add_documents(
+        ["a", "b", "c"],
+        np.ones((3, 4), dtype=np.float32),
+        [{"tenant": "acme"}, {"tenant": "x/y"}, {}],
+        ids=["1", "2", "3"],
+    )
+
+    assert sorted(index.upserts) == [("acme", ["1"]), ("default", ["3"]), ("x_y", ["2"])]
+
+
+@pytest.mark.parametrize("error", [ApiError(429), ApiError(503), GrpcError("UNAVAILABLE")])
+def test_throttled_and_server_errors_are_retried(make_db, error):
+    index = FakeIndex(errors=[error, error])
+    db = make_db(index)
+
+    add(db, 2)
+
+    assert index.attempts == 3
+    assert index.upserts == [("default", ["doc-0", "doc-1"])]
+    # Exponential backoff from retry_backoff, with the jitter factor fixed at 1
+    assert db.sleeps == [0.5, 1.0]
+
+
+@pytest.mark.parametrize("error", [ApiError(400), GrpcError("INVALID_ARGUMENT"), ValueError("bad")])
+def test_client_errors_are_not_retried(make_db, error):
+    index = FakeIndex(errors=[error])
+    db = make_db(index)
+
+    with pytest.raises(type(error)):
+        add(db, 1)
+    assert index.attempts == 1
+    assert db.sleeps == []
+
+
+def test_retries_stop_after_max_retries(make_db):
+    index = FakeIndex(errors=[ApiError(429)] * 5)
+    db = make_db(index, max_retries=2)
+
+    with pytest.raises(ApiError):
+        add(db, 1)
+    assert index.attempts == 3
@@ -0,0 +1,128 @@
+import pytest
+
+pytest.importorskip("google.adk")
+pytest.importorskip("solace_agent_mesh")
+
+import numpy as np
+
+from sam_rag.services.pipeline.pipeline import Pipeline
+
+
+class FakePreprocessor:
+    def __init__(self, sections):
+        self.sections = sections
+
+    def preprocess_file_stream(self, file_path):
+        metadata = {"file_path": file_path, "file_type": "text", "sections_read": 0}
+
+        def stream():
+            for section in self.sections:
+                metadata["sections_read"] += 1
+                yield section
+
+        return {"text_stream": stream(), "metadata": metadata}
+
+
+class FakeSplitter:
+    def split_text(self, text, doc_type):
+        return text.split("|")
+
+
+class FakeEmbedder:
+    hybrid_search_enabled = False
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_texts_batch(self, texts):
+        self.batches.append(list(texts))
+        return {
+            "dense_vectors": np.zeros((len(texts), 4), dtype=np.float32),
+            "sparse_vectors": [None] * len(texts),
+        }
+
+
+class FakeIngestor:
+    def __init__(self, fail_on_call=None):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+
+    def ingest_embedding_batch(self, texts, dense_vectors, sparse_vectors, metadata, ids):
+        self.calls.append({"texts": texts, "metadata": metadata, "ids": ids})
+        if len(self.calls) == self.fail_on_call:
+            return {"success": False, "message": "write failed", "document_ids": []}
+        return {"success": True, "message": "ok", "document_ids": ids}
+
+
+def make_pipeline(sections, window_chunks, ingestor=None):
+    # Only the attributes used by process_files, without starting services
+    pipeline = Pipeline.__new__(Pipeline)
+    pipeline.window_chunks = window_chunks
+    pipeline.deduplicator = None
+    pipeline.sparse_model_ready = False
+    pipeline.preprocessing_handler = FakePreprocessor(sections)
+    pipeline.splitting_handler = FakeSplitter()
+    pipeline.embedding_handler = FakeEmbedder()
+    pipeline.ingestion_handler = ingestor or FakeIngestor()
+    return pipeline
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("content")
+    return str(path)
+
+
+def test_chunks_are_stored_in_windows(text_file):
+    pipeline = make_pipeline(["a|b|c", "", "d|e", "f|g"], window_chunks=3)
+
+    result = pipeline.process_files([text_file])
+
+    assert result["success"]
+    assert pipeline.embedding_handler.batches == [["a", "b", "c"], ["d", "e", "f"], ["g"]]
+    calls = pipeline.ingestion_handler.calls
+    assert [len(call["ids"]) for call in calls] == [3, 3, 1]
+    assert result["document_ids"] == [i for call in calls for i in call["ids"]]
+    assert len(set(result["document_ids"])) == 7
+
+
+def test_window_metadata_is_a_snapshot_of_the_stream(text_file):
+    pipeline = make_pipeline(["a|b", "c|d", "e"], window_chunks=2)
+
+    pipeline.process_files([text_file], metadata={"source": "upload"})
+
+    calls = pipeline.ingestion_handler.calls
+    assert [call["metadata"][0]["sections_read"] for call in calls] == [1, 2, 3]
+    assert all(m["source"] == "upload" for call in calls for m in call["metadata"])
+
+
+def test_chunk_ids_do_not_depend_on_the_window_size(text_file):
+    sections = ["a|b|c", "d|e"]
+    small = make_pipeline(sections, window_chunks=2).process_files([text_file], {"content_hash": "h"})
+    large = make_pipeline(sections, window_chunks=256).process_files([text_file], {"content_hash": "h"})
+
+    assert small["document_ids"] == large["document_ids"]
+
+
+def test_failed_window_stops_the_file(text_file):
+    pipeline = make_pipeline(["a|b", "c|d", "e|f"], window_chunks=2, ingestor=FakeIngestor(fail_on_call=2))
+
+    result = pipeline.process_files([text_file])
+
+    assert not result["success"]
+    assert result["message"] == "write failed"
+    assert len(pipeline.ingestion_handler.calls) == 2
+    assert len(result["document_ids"]) == 2
+
+
+def test_missing_and_empty_files(text_file, tmp_path):
+    pipeline = make_pipeline([""], window_chunks=2)
+
+    assert pipeline.process_files([str(tmp_path / "missing.txt")])["message"] == (
+        "No documents were successfully preprocessed"
+    )
+
+    pipeline.splitting_handler.split_text = lambda text, doc_type: []
+    pipeline.preprocessing_handler.sections = ["text"]
+    assert pipeline.process_files([text_file])["message"] == "No chunks were created from the documents"
@@ -0,0 +1,141 @@
+import pytest
+
+from sam_rag.services.database.reconcile import (
+    SourceChecker,
+    VectorStoreReconciler,
+    _SpillStore,
+)
+
+
+class FakeDB:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def iter_documents(self, batch_size, include_embeddings=True):
+        for start in range(0, len(self.documents), batch_size):
+            yield self.documents[start : start + batch_size]
+
+
+class FakeVectorDB:
+    def __init__(self, documents):
+        self.db = FakeDB(documents)
+        self.deleted = []
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+class TrackedChecker(SourceChecker):
+    def __init__(self, scope, tracked):
+        super().__init__(scope, use_tracker=True, check_files=False)
+        self.tracked = tracked
+
+    def _tracked(self, sources):
+        return {source: self.tracked[source] for source in sources if source in self.tracked}
+
+
+def doc(doc_id, source, text="text", content_hash=None):
+    metadata = {"file_path": source} if source else {}
+    if content_hash:
+        metadata["content_hash"] = content_hash
+    return {"id": doc_id, "text": text, "metadata": metadata}
+
+
+@pytest.fixture
+def store(tmp_path):
+    spill_store = _SpillStore(str(tmp_path))
+    yield spill_store
+    spill_store.close()
+
+
+def test_first_seen_across_and_within_batches(store):
+    assert store.first_seen([b"a", b"b", b"a"]) == [True, True, False]
+    assert store.first_seen([b"b", b"c"]) == [False, True]
+
+
+def test_marked_ids_are_read_back_in_batches(store):
+    store.mark([1, "two", 3])
+
+    assert list(store.iter_marked(2)) == [[1, "two"], [3]]
+
+
+def test_spill_file_is_removed_on_close(tmp_path):
+    spill_store = _SpillStore(str(tmp_path))
+    spill_store.close()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_orphans_in_scope_are_deleted(tmp_path):
+    live = tmp_path / "docs" / "live.txt"
+    live.parent.mkdir()
+    live.write_text("live")
+    gone = str(tmp_path / "docs" / "gone.txt")
+    vector_db = FakeVectorDB(
+        [
+            doc(1, str(live)),
+            doc(2, gone),
+            doc(3, gone, "other"),
+            doc(4, "/elsewhere/gone.txt"),
+            doc(5, None),
+        ]
+    )
+    reconciler = VectorStoreReconciler(
+        vector_db, SourceChecker([str(tmp_path / "docs")]), batch_size=2, work_dir=str(tmp_path)
+    )
+
+    stats = reconciler.run()
+
+    assert vector_db.deleted == [2, 3]
+    assert stats["orphans"] == 2
+    assert stats["orphan_sources"] == 1
+    assert stats["sample_sources"] == [gone]
+    assert stats["unmanaged"] == 1
+    assert stats["unsourced"] == 1
+
+
+def test_dry_run_deletes_nothing(tmp_path):
+    vector_db = FakeVectorDB([doc(1, "/docs/gone.txt")])
+    reconciler = VectorStoreReconciler(vector_db, SourceChecker(["/docs"]), work_dir=str(tmp_path))
+
+    stats = reconciler.run(dry_run=True)
+
+    assert stats["orphans"] == 1
+    assert vector_db.deleted == []
+
+
+def test_duplicates_of_a_source_are_deleted(tmp_path):
+    vector_db = FakeVectorDB(
+        [doc(1, "/docs/a.txt"), doc(2, "/docs/a.txt"), doc(3, "/docs/b.txt")]
+    )
+    checker = TrackedChecker(["/docs"], {"/docs/a.txt": None, "/docs/b.txt": None})
+    reconciler = VectorStoreReconciler(vector_db, checker, work_dir=str(tmp_path))
+
+    stats = reconciler.run()
+
+    assert vector_db.deleted == [2]
+    assert stats["duplicates"] == 1
+
+
+def test_chunks_of_an_earlier_version_are_stale(tmp_path):
+    vector_db = FakeVectorDB(
+        [
+            doc(1, "/docs/a.txt", "old", content_hash="h1"),
+            doc(2, "/docs/a.txt", "new", content_hash="h2"),
+            doc(3, "/docs/a.txt", "unversioned"),
+            doc(4, "/docs/untracked.txt", content_hash="h1"),
+        ]
+    )
+    checker = TrackedChecker(["/docs"], {"/docs/a.txt": "h2"})
+    reconciler = VectorStoreReconciler(vector_db, checker, work_dir=str(tmp_path))
+
+    stats = reconciler.run()
+
+    assert stats["stale"] == 1
+    assert stats["orphans"] == 1
+    assert sorted(vector_db.deleted) == [1, 4]
+
+    kept = FakeVectorDB([doc(1, "/docs/a.txt", content_hash="h1")])
+    stats = VectorStoreReconciler(kept, checker, work_dir=str(tmp_path)).run(stale=False)
+    assert stats["stale"] == 0
+    assert kept.deleted == []
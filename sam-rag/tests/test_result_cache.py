@@ -0,0 +1,71 @@
+from sam_rag.services.database.vector_db_service import bump_index_generation
+from sam_rag.services.rag.result_cache import ResultCache, freeze_filter, normalize_query
+
+
+def test_hit_returns_a_copy():
+    cache = ResultCache()
+    cache.put("q", {"results": [1]}, cache.generation())
+
+    result = cache.get("q")
+    result["results"].append(2)
+
+    assert cache.get("q") == {"results": [1]}
+    assert cache.stats()["hits"] == 2
+
+
+def test_index_write_invalidates_entries():
+    cache = ResultCache()
+    cache.put("q", "answer", cache.generation())
+
+    bump_index_generation()
+
+    assert cache.get("q") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["misses"] == 1
+
+
+def test_result_computed_across_a_write_is_not_stored():
+    cache = ResultCache()
+    generation = cache.generation()
+    bump_index_generation()
+
+    cache.put("q", "stale", generation)
+
+    assert cache.get("q") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache({"max_entries": 2})
+    generation = cache.generation()
+    cache.put("a", 1, generation)
+    cache.put("b", 2, generation)
+    cache.get("a")
+    cache.put("c", 3, generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_expired_entry_is_dropped():
+    cache = ResultCache({"max_age_seconds": 60})
+    cache.put("q", "answer", cache.generation())
+    key = next(iter(cache._entries))
+    generation, stored_at, value = cache._entries[key]
+    cache._entries[key] = (generation, stored_at - 61, value)
+
+    assert cache.get("q") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache({"enabled": False})
+    cache.put("q", "answer", cache.generation())
+
+    assert cache.get("q") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_key_helpers():
+    assert normalize_query("  what   is\tRAG ") == "what is RAG"
+    assert freeze_filter({"b": 1, "a": 2}) == freeze_filter({"a": 2, "b": 1})
+    assert freeze_filter(None) == ""
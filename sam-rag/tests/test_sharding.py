@@ -0,0 +1,229 @@
+import json
+
+import numpy as np
+import pytest
+
+from sam_rag.services.database.sharding import ShardedVectorDB
+from sam_rag.services.database.vector_db_base import PartialWriteError, VectorDBBase
+
+# Documents of every fake collection, by collection name
+COLLECTIONS = {}
+
+
+class FakeBackend(VectorDBBase):
+    failing = set()
+
+    def __init__(self, config=None, hybrid_search_config=None):
+        super().__init__(config, hybrid_search_config)
+        self.name = self.config["collection_name"]
+        self.docs = COLLECTIONS.setdefault(self.name, {})
+
+    def add_documents(self, documents, embeddings, metadatas=None, ids=None, sparse_vectors=None):
+        if self.name in self.failing:
+            raise ConnectionError(f"{self.name} is unavailable")
+        for i, doc_id in enumerate(ids):
+            self.docs[doc_id] = {
+                "id": doc_id,
+                "text": documents[i],
+                "metadata": dict(metadatas[i]),
+                "embedding": list(np.asarray(embeddings[i], dtype=float)),
+            }
+        return ids
+
+    def search(self, query_embedding, top_k=5, filter=None, query_sparse_vector=None, request_hybrid=False):
+        results = [
+            {"id": doc["id"], "text": doc["text"], "metadata": doc["metadata"], "score": doc["metadata"]["score"]}
+            for doc in self.docs.values()
+        ]
+        return sorted(results, key=lambda result: -result["score"])[:top_k]
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+    def get(self, ids):
+        return [self.docs[doc_id] for doc_id in ids if doc_id in self.docs]
+
+    def update(self, ids, documents=None, embeddings=None, metadatas=None, sparse_vectors=None):
+        for i, doc_id in enumerate(ids):
+            self.docs[doc_id]["metadata"] = metadatas[i]
+
+    def count(self):
+        return len(self.docs)
+
+    def clear(self):
+        self.docs.clear()
+
+    def iter_documents(self, batch_size=500, include_embeddings=True):
+        documents = list(self.docs.values())
+        for start in range(0, len(documents), batch_size):
+            yield documents[start : start + batch_size]
+
+
+@pytest.fixture(autouse=True)
+def collections():
+    COLLECTIONS.clear()
+    FakeBackend.failing = set()
+    yield COLLECTIONS
+    COLLECTIONS.clear()
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    def make(db_type="qdrant", **sharding):
+        return ShardedVectorDB(
+            db_type,
+            FakeBackend,
+            {"collection_name": "docs"},
+            {"registry_path": str(tmp_path / "shards.json"), **sharding},
+        )
+
+    return make
+
+
+def add(db, rows):
+    """Add (id, tenant, score) rows."""
+    metadatas = [{"score": score, **({"tenant": tenant} if tenant else {})} for _, tenant, score in rows]
+    return db.add_documents(
+        [f"text of {doc_id}" for doc_id, _, _ in rows],
+        np.ones((len(rows), 2), dtype=np.float32),
+        metadatas,
+        ids=[doc_id for doc_id, _, _ in rows],
+    )
+
+
+def test_documents_are_routed_by_key(make_db, collections):
+    db = make_db(key="tenant")
+
+    add(db, [("1", "Acme Corp", 0.5), ("2", "globex", 0.4), ("3", None, 0.3)])
+
+    assert set(collections["docs_acme_corp"]) == {"1"}
+    assert set(collections["docs_globex"]) == {"2"}
+    assert set(collections["docs_default"]) == {"3"}
+    assert db.shard_names() == ["acme_corp", "default", "globex"]
+
+
+def test_hash_routing_locates_documents_by_id(make_db, collections):
+    db = make_db(num_shards=3)
+    ids = [str(i) for i in range(12)]
+    add(db, [(doc_id, None, 0.1) for doc_id in ids])
+
+    assert sorted(name for name, docs in collections.items() if docs) == ["docs_0", "docs_1", "docs_2"]
+    for doc_id in ids:
+        assert doc_id in collections[f"docs_{db.route(doc_id, None)}"]
+    assert sorted(doc["id"] for doc in db.get(ids)) == sorted(ids)
+
+    db.delete(ids[:6])
+
+    assert db.count() == 6
+
+
+def test_filtered_search_queries_one_shard(make_db):
+    db = make_db(key="tenant")
+    add(db, [("1", "acme", 0.9), ("2", "globex", 0.8)])
+
+    assert [r["id"] for r in db.search([1.0, 1.0], filter={"tenant": "globex"})] == ["2"]
+    assert [r["id"] for r in db.search([1.0, 1.0], filter={"tenant": {"$eq": "acme"}})] == ["1"]
+    assert db.search([1.0, 1.0], filter={"tenant": "unknown"}) == []
+
+
+@pytest.mark.parametrize("db_type, expected", [("qdrant", ["3", "1", "2"]), ("chroma", ["4", "2", "1"])])
+def test_fan_out_merges_by_score_or_distance(make_db, db_type, expected):
+    db = make_db(db_type, key="tenant")
+    add(db, [("1", "acme", 0.5), ("2", "acme", 0.2), ("3", "globex", 0.9), ("4", "globex", 0.1)])
+
+    # Qdrant results are ranked by score, high first; chroma results by
+    # distance, low first
+    for shard in db._shards.values():
+        shard.search = lambda *args, docs=shard.docs, **kwargs: [
+            {"id": doc["id"], "distance" if db_type == "chroma" else "score": doc["metadata"]["score"]}
+            for doc in docs.values()
+        ]
+
+    assert [r["id"] for r in db.search([1.0, 1.0], top_k=3)] == expected
+
+
+def test_partial_write_reports_the_ids_of_each_shard(make_db, collections):
+    db = make_db(key="tenant", shards=["acme", "globex"])
+    FakeBackend.failing = {"docs_globex"}
+
+    with pytest.raises(PartialWriteError) as raised:
+        add(db, [("1", "acme", 0.1), ("2", "globex", 0.1), ("3", "acme", 0.1)])
+
+    assert sorted(raised.value.written_ids) == ["1", "3"]
+    assert raised.value.failed_ids == ["2"]
+    assert set(collections["docs_acme"]) == {"1", "3"}
+
+
+def test_failed_write_to_every_shard_raises_the_error(make_db):
+    db = make_db(key="tenant")
+    FakeBackend.failing = {"docs_acme"}
+
+    with pytest.raises(ConnectionError):
+        add(db, [("1", "acme", 0.1)])
+
+
+def test_reingest_with_a_new_key_removes_the_earlier_chunks(make_db, collections):
+    db = make_db(key="tenant")
+    add(db, [("1", "acme", 0.1), ("2", "acme", 0.1)])
+
+    add(db, [("1", "globex", 0.1)])
+
+    assert set(collections["docs_acme"]) == {"2"}
+    assert set(collections["docs_globex"]) == {"1"}
+
+
+def test_failed_write_keeps_the_earlier_chunks(make_db, collections):
+    db = make_db(key="tenant")
+    add(db, [("1", "acme", 0.1), ("2", "acme", 0.1)])
+    db._get_shard("globex")
+    FakeBackend.failing = {"docs_globex"}
+
+    with pytest.raises(PartialWriteError):
+        add(db, [("1", "globex", 0.1), ("3", "initech", 0.1)])
+
+    assert set(collections["docs_acme"]) == {"1", "2"}
+
+
+def test_registry_is_shared_between_instances(make_db, tmp_path):
+    ingestion = make_db(key="tenant")
+    retrieval = make_db(key="tenant")
+
+    add(ingestion, [("1", "acme", 0.7)])
+
+    assert json.loads((tmp_path / "shards.json").read_text()) == {"qdrant:docs": ["acme", "default"]}
+    assert retrieval.shard_names() == ["acme", "default"]
+    assert [r["id"] for r in retrieval.search([1.0, 1.0])] == ["1"]
+
+
+def test_rebalance_moves_documents_to_the_new_routing(make_db, collections, tmp_path):
+    db = make_db(num_shards=4)
+    ids = [str(i) for i in range(20)]
+    add(db, [(doc_id, None, 0.1) for doc_id in ids])
+
+    resized = make_db(num_shards=2)
+    stats = resized.rebalance(batch_size=3)
+
+    assert stats["moved"] + stats["kept"] == 20
+    assert stats["retired"] == 2
+    assert resized.shard_names() == ["0", "1"]
+    for doc_id in ids:
+        assert doc_id in collections[f"docs_{resized.route(doc_id, None)}"]
+    assert resized.count() == 20
+    assert not collections["docs_2"] and not collections["docs_3"]
+
+
+def test_rebalance_migrates_an_unsharded_collection(make_db, collections):
+    source = FakeBackend({"collection_name": "docs"})
+    add(source, [("1", "acme", 0.1), ("2", None, 0.1)])
+    db = make_db(key="tenant")
+
+    assert db.rebalance(source=source, dry_run=True)["moved"] == 2
+    assert len(collections["docs"]) == 2
+
+    stats = db.rebalance(source=source)
+
+    assert stats["moved"] == 2
+    assert collections["docs"] == {}
+    assert set(collections["docs_acme"]) == {"1"}
+    assert set(collections["docs_default"]) == {"2"}
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pytest
+
+from sam_rag.services.embedder import sparse_model_store
+from sam_rag.services.embedder.sparse_model_store import CURRENT_FILE, SparseModelStore
+
+VOCABULARY = {"revenue": 1, "growth": 0, "region": 2}
+IDF = np.array([1.5, 2.0, 1.25])
+PARAMS = {"type": "tfidf", "ngram_range": [1, 2]}
+
+
+def versions(path):
+    return sorted(name for name in os.listdir(path) if not name.startswith("."))
+
+
+def test_publish_makes_the_version_current_and_loadable(tmp_path):
+    store = SparseModelStore(str(tmp_path / "model"))
+    assert store.current_version() is None
+
+    version = store.publish(VOCABULARY, IDF, PARAMS)
+
+    assert store.current_version() == version
+    vocabulary, idf, params = store.load(version)
+    assert vocabulary == VOCABULARY
+    assert isinstance(idf, np.memmap)
+    np.testing.assert_array_equal(idf, IDF)
+    assert params == PARAMS
+
+
+def test_only_the_first_publisher_wins_without_replace(tmp_path):
+    store = SparseModelStore(str(tmp_path))
+    first = store.publish(VOCABULARY, IDF, PARAMS, replace=False)
+
+    assert store.publish({"other": 0}, np.ones(1), PARAMS, replace=False) is None
+    assert store.current_version() == first
+    assert versions(tmp_path) == sorted([CURRENT_FILE, first])
+
+
+def test_replace_swaps_current_to_the_new_version(tmp_path):
+    store = SparseModelStore(str(tmp_path))
+    first = store.publish(VOCABULARY, IDF, PARAMS)
+
+    second = store.publish({"other": 0}, np.ones(1), PARAMS)
+
+    assert second > first
+    assert store.current_version() == second
+    assert store.load(first)[0] == VOCABULARY
+
+
+def test_failed_publish_keeps_the_current_version(tmp_path, monkeypatch):
+    store = SparseModelStore(str(tmp_path))
+    first = store.publish(VOCABULARY, IDF, PARAMS)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sparse_model_store.np, "save", fail)
+    with pytest.raises(OSError):
+        store.publish({"other": 0}, np.ones(1), PARAMS)
+
+    assert store.current_version() == first
+    # Neither the staging directory nor a temporary CURRENT file is left
+    assert sorted(os.listdir(tmp_path)) == sorted([CURRENT_FILE, first])
+
+
+def test_old_versions_are_pruned(tmp_path):
+    store = SparseModelStore(str(tmp_path), keep_versions=2)
+
+    published = [store.publish(VOCABULARY, IDF, PARAMS) for _ in range(3)]
+
+    assert versions(tmp_path) == sorted([CURRENT_FILE] + published[1:])
+
+
+def test_load_rejects_a_corrupt_version(tmp_path):
+    store = SparseModelStore(str(tmp_path))
+    version = store.publish(VOCABULARY, IDF, PARAMS)
+    np.save(os.path.join(tmp_path, version, "idf.npy"), np.ones(2))
+
+    with pytest.raises(ValueError, match="corrupt"):
+        store.load(version)
+
+
+def test_services_reload_a_newly_published_version(tmp_path):
+    pytest.importorskip("sklearn")
+    from sam_rag.services.embedder.embedder_service import EmbedderService
+
+    def service():
+        return EmbedderService(
+            {
+                "embedder_type": "hashing",
+                "hybrid_search": {
+                    "sparse_model_config": {"artifact": {"path": str(tmp_path), "check_interval": 0}}
+                },
+            },
+            hybrid_search_config={"enabled": True},
+        )
+
+    ingestion, retrieval = service(), service()
+    assert ingestion.fit_sparse_model_once(["quarterly revenue grew in every region"])
+    first = ingestion.sparse_model_version
+
+    assert retrieval.sparse_model()[1] == first
+    assert retrieval.embed_sparse_text("revenue") == ingestion.embed_sparse_text("revenue")
+
+    ingestion.refit_sparse_model_with_corpus(["warehouse inventory", "inventory turnover"])
+    second = ingestion.sparse_model_version
+
+    assert second != first
+    assert retrieval.sparse_model()[1] == second
+    assert retrieval.embed_sparse_text("inventory") == ingestion.embed_sparse_text("inventory")
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sam_rag.services.embedder.embedder_service import EmbedderService
+from sam_rag.services.embedder.sparse_refit import SparseModelRefitter
+
+FIRST_WINDOW = ["quarterly revenue grew in every region"]
+LATER = ["warehouse inventory counts", "inventory turnover by warehouse"]
+
+
+class FakeDB:
+    def __init__(self):
+        self.documents = {}
+
+    def iter_documents(self, batch_size, include_embeddings=True):
+        documents = list(self.documents.values())
+        for start in range(0, len(documents), batch_size):
+            yield [
+                dict(document, embedding=document["embedding"] if include_embeddings else [])
+                for document in documents[start : start + batch_size]
+            ]
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.db = FakeDB()
+        self.writes = 0
+
+    def add_documents(self, documents, embeddings, metadatas=None, ids=None, sparse_vectors=None):
+        self.writes += 1
+        for i, doc_id in enumerate(ids):
+            self.db.documents[doc_id] = {
+                "id": doc_id,
+                "text": documents[i],
+                "embedding": list(np.asarray(embeddings[i], dtype=float)),
+                "metadata": metadatas[i],
+                "sparse_vector": sparse_vectors[i],
+            }
+        return ids
+
+
+@pytest.fixture
+def embedder(tmp_path):
+    return EmbedderService(
+        {
+            "embedder_type": "hashing",
+            "embedder_params": {"embedding_dimension": 8},
+            "hybrid_search": {"sparse_model_config": {"artifact": {"path": str(tmp_path)}}},
+        },
+        hybrid_search_config={"enabled": True},
+    )
+
+
+def ingest(embedder, vector_db, texts, start=0):
+    batch = embedder.embed_texts_batch(texts)
+    vector_db.add_documents(
+        texts,
+        batch["dense_vectors"],
+        [{"file_path": "a.txt", "sparse_model_version": batch["sparse_model_version"]} for _ in texts],
+        ids=[str(start + i) for i in range(len(texts))],
+        sparse_vectors=batch["sparse_vectors"],
+    )
+
+
+def test_refit_requires_tfidf_hybrid_search():
+    embedder = EmbedderService({"embedder_type": "hashing"})
+
+    with pytest.raises(ValueError):
+        SparseModelRefitter(embedder, FakeVectorDB())
+
+
+def test_sample_is_bounded_and_skips_empty_texts(embedder):
+    vector_db = FakeVectorDB()
+    for i in range(20):
+        vector_db.db.documents[str(i)] = {"id": str(i), "text": f"chunk {i}" if i else "", "embedding": []}
+
+    sample = SparseModelRefitter(embedder, vector_db, sample_chunks=5, batch_size=3, seed=1).sample_corpus()
+
+    assert len(sample) == 5
+    assert len(set(sample)) == 5
+    assert "" not in sample
+
+
+def test_refit_publishes_a_version_and_reembeds_older_chunks(embedder):
+    vector_db = FakeVectorDB()
+    embedder.fit_sparse_model_once(FIRST_WINDOW)
+    first = embedder.sparse_model_version
+    ingest(embedder, vector_db, FIRST_WINDOW + LATER)
+    dense_before = {doc_id: doc["embedding"] for doc_id, doc in vector_db.db.documents.items()}
+    # Terms first seen after the first window have no sparse weight yet
+    assert vector_db.db.documents["1"]["sparse_vector"] == {}
+
+    stats = SparseModelRefitter(embedder, vector_db).run()
+
+    assert stats["version"] not in (None, first)
+    assert stats["scanned"] == stats["updated"] == 3
+    documents = vector_db.db.documents
+    assert {doc["metadata"]["sparse_model_version"] for doc in documents.values()} == {stats["version"]}
+    assert all(doc["metadata"]["file_path"] == "a.txt" for doc in documents.values())
+    assert documents["1"]["sparse_vector"]
+    assert {doc_id: doc["embedding"] for doc_id, doc in documents.items()} == dense_before
+    inventory = embedder.embed_sparse_text("inventory")
+    assert inventory and set(inventory) <= set(documents["1"]["sparse_vector"])
+
+
+def test_reembed_only_updates_outdated_chunks(embedder):
+    vector_db = FakeVectorDB()
+    refitter = SparseModelRefitter(embedder, vector_db)
+    ingest(embedder, vector_db, FIRST_WINDOW)
+    version = refitter.refit()
+    ingest(embedder, vector_db, LATER, start=1)
+    writes = vector_db.writes
+
+    assert refitter.reembed() == {"scanned": 3, "updated": 1, "failed": 0}
+    assert vector_db.writes == writes + 1
+    assert refitter.reembed(version) == {"scanned": 3, "updated": 0, "failed": 0}
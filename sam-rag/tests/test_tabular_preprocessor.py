@@ -0,0 +1,85 @@
+import csv
+import io
+
+import pytest
+
+from sam_rag.services.preprocessor.document_preprocessor import (
+    CSVFilePreprocessor,
+    ExcelPreprocessor,
+)
+from sam_rag.services.splitter.structured_splitter import CSVSplitter
+
+
+def rows_of(text):
+    return list(csv.reader(io.StringIO(text)))
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def csv_preprocessor(rows_per_chunk):
+    return CSVFilePreprocessor({"preprocessors": {"csv": {"tabular": {"rows_per_chunk": rows_per_chunk}}}})
+
+
+def test_csv_groups_repeat_the_header(tmp_path):
+    header = ["name", "city"]
+    rows = [[f"person {i}", "Oslo, Norway"] for i in range(5)]
+    path = write_csv(tmp_path / "people.csv", [header] + rows)
+
+    stream = csv_preprocessor(2).preprocess_stream(path)
+    groups = [rows_of(text) for text in stream["text_stream"]]
+
+    assert groups == [[header] + rows[0:2], [header] + rows[2:4], [header] + rows[4:5]]
+    assert stream["metadata"]["row_count"] == 5
+    assert stream["metadata"]["csv_headers"] == header
+
+
+def test_header_only_csv_keeps_its_text(tmp_path):
+    path = write_csv(tmp_path / "empty.csv", [["name", "city"]])
+
+    groups = list(csv_preprocessor(2).preprocess_stream(path)["text_stream"])
+
+    assert groups == ["name,city\n"]
+    assert CSVSplitter({"chunk_size": 10}).split_text(groups[0]) == ["name,city\r\n"]
+
+
+def test_empty_csv_yields_nothing(tmp_path):
+    path = tmp_path / "blank.csv"
+    path.write_text("")
+
+    assert list(csv_preprocessor(2).preprocess_stream(str(path))["text_stream"]) == []
+
+
+def test_csv_splitter_repeats_the_header():
+    text = "name,city\na,Oslo\nb,Rome\nc,Bern\n"
+
+    chunks = CSVSplitter({"chunk_size": 2, "include_header": True}).split_text(text)
+    assert [rows_of(chunk)[0] for chunk in chunks] == [["name", "city"]] * 2
+
+    chunks = CSVSplitter({"chunk_size": 2, "include_header": False}).split_text(text)
+    assert rows_of(chunks[1]) == [["c", "Bern"]]
+
+
+def test_excel_sheets_are_grouped_with_title_and_header(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Sales"
+    for row in [["region", "total"], ["north", 1], ["south", 2], ["east", 3]]:
+        sheet.append(row)
+    workbook.create_sheet("Empty").append(["only", "header"])
+    path = str(tmp_path / "sales.xlsx")
+    workbook.save(path)
+
+    preprocessor = ExcelPreprocessor({"preprocessors": {"xls": {"tabular": {"rows_per_chunk": 2}}}})
+    stream = preprocessor.preprocess_stream(path)
+    groups = list(stream["text_stream"])
+
+    assert len(groups) == 3
+    assert all(group.lower().startswith("sheet: sales") for group in groups[:2])
+    assert "only,header" in groups[2]
+    assert stream["metadata"]["row_count"] == 3
+    assert stream["metadata"]["sheet_names"] == ["Sales", "Empty"]
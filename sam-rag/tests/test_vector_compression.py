@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from sam_rag.services.database.vector_db_implementation.redis_legacy_db import RedisDB
+from sam_rag.services.database.vector_db_implementation.redis_vector_types import (
+    resolve_redis_datatype,
+)
+from sam_rag.services.embedder import litellm_embedder
+from sam_rag.services.embedder.litellm_embedder import LiteLLMEmbedder
+
+
+class FakeLiteLLM:
+    def __init__(self, embedding):
+        self.embedding_values = embedding
+        self.calls = []
+
+    def embedding(self, model, input, **kwargs):
+        self.calls.append(input)
+        return {"data": [{"embedding": list(self.embedding_values)} for _ in input]}
+
+
+class FakeRedisPipeline:
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, mapping):
+        self.hashes[key] = mapping
+
+    def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.pipelines = []
+
+    def pipeline(self):
+        self.pipelines.append(FakeRedisPipeline())
+        return self.pipelines[-1]
+
+
+@pytest.fixture
+def make_embedder(monkeypatch):
+    def make(embedding, **config):
+        fake = FakeLiteLLM(embedding)
+        monkeypatch.setattr(litellm_embedder, "is_available", lambda name: True)
+        monkeypatch.setattr(LiteLLMEmbedder, "litellm", property(lambda self: fake))
+        return LiteLLMEmbedder({"model": "test/embedding", **config})
+
+    return make
+
+
+def test_truncate_embedding_keeps_a_unit_length_prefix(make_embedder):
+    embedder = make_embedder([3.0, 4.0, 12.0])
+
+    assert embedder.truncate_embedding([3.0, 4.0, 12.0], 2) == pytest.approx([0.6, 0.8])
+    assert embedder.truncate_embedding([3.0, 4.0], 2) == [3.0, 4.0]
+    assert embedder.truncate_embedding([3.0, 4.0, 12.0], None) == [3.0, 4.0, 12.0]
+
+
+def test_truncate_dimension_applies_to_single_and_batched_embeddings(make_embedder):
+    embedder = make_embedder([3.0, 4.0, 12.0], truncate_dimension=2)
+
+    assert embedder.embedding_dimension == 2
+    assert embedder.embed_text("query") == pytest.approx([0.6, 0.8])
+
+    matrix = embedder.embed_texts_array(["a", "", "b"])
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, [[0.6, 0.8], [0.0, 0.0], [0.6, 0.8]], rtol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        (None, ("FLOAT32", np.float32)),
+        ("float16", ("FLOAT16", np.float16)),
+        ("FLOAT64", ("FLOAT64", np.float64)),
+    ],
+)
+def test_resolve_redis_datatype(name, expected):
+    assert resolve_redis_datatype(name) == expected
+
+
+def test_resolve_redis_datatype_rejects_unknown_types():
+    with pytest.raises(ValueError, match="BFLOAT16"):
+        resolve_redis_datatype("BFLOAT16")
+
+
+def test_float16_vectors_are_written_as_half_precision_bytes():
+    db = object.__new__(RedisDB)
+    db.prefix = "doc:"
+    db.vector_datatype, db.vector_dtype = resolve_redis_datatype("FLOAT16")
+    db.client = FakeRedis()
+    embeddings = np.array([[0.5, -0.25, 1.0], [0.1, 0.2, 0.3]], dtype=np.float32)
+
+    db.add_documents(["a", "b"], embeddings, [{"source": "x"}] * 2, ids=["1", "2"])
+
+    hashes = db.client.pipelines[0].hashes
+    assert [len(hashes[key]["embedding"]) for key in ("doc:1", "doc:2")] == [6, 6]
+    assert hashes["doc:1"]["embedding"] == np.array([0.5, -0.25, 1.0], dtype="<f2").tobytes()
+    decoded = np.frombuffer(hashes["doc:2"]["embedding"], dtype=np.float16)
+    np.testing.assert_allclose(decoded, [0.1, 0.2, 0.3], rtol=1e-3)
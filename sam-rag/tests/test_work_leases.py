@@ -0,0 +1,125 @@
+import pytest
+
+from sam_rag.services.database import connect as tracker_db
+from sam_rag.services.database.connect import (
+    acquire_leases,
+    get_live_leases,
+    release_leases,
+    renew_leases,
+    session_scope,
+)
+from sam_rag.services.database.model import Lease, init_db
+from sam_rag.services.scanner.work_leases import WorkLeaseManager
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    config = {"type": "sqlite", "path": str(tmp_path / "scanner.db")}
+    init_db(config)
+    monkeypatch.setattr(tracker_db, "SessionLocal", None)
+    tracker_db.connect(config)
+    return config
+
+
+def expire(key):
+    with session_scope() as db:
+        db.get(Lease, key).expires_at = 0
+
+
+def test_held_leases_are_not_acquired_by_others(database):
+    with session_scope() as db:
+        assert acquire_leases(db, ["shard:0", "shard:1"], "a", 60) == ["shard:0", "shard:1"]
+        assert acquire_leases(db, ["shard:1", "shard:2"], "b", 60) == ["shard:2"]
+        assert get_live_leases(db, "shard:") == {"shard:0": "a", "shard:1": "a", "shard:2": "b"}
+
+
+def test_expired_leases_are_taken_over(database):
+    with session_scope() as db:
+        acquire_leases(db, ["shard:0"], "a", 60)
+    expire("shard:0")
+
+    with session_scope() as db:
+        assert get_live_leases(db, "shard:") == {}
+        assert acquire_leases(db, ["shard:0"], "b", 60) == ["shard:0"]
+        assert renew_leases(db, ["shard:0"], "a", 60) == []
+
+
+def test_renew_extends_only_the_owners_leases(database):
+    with session_scope() as db:
+        acquire_leases(db, ["shard:0"], "a", 1)
+        acquire_leases(db, ["shard:1"], "b", 1)
+        assert renew_leases(db, ["shard:0", "shard:1"], "a", 600) == ["shard:0"]
+        assert db.get(Lease, "shard:0").expires_at > db.get(Lease, "shard:1").expires_at + 500
+
+
+def test_release_only_removes_the_owners_leases(database):
+    with session_scope() as db:
+        acquire_leases(db, ["shard:0"], "a", 60)
+        acquire_leases(db, ["shard:1"], "b", 60)
+        assert release_leases(db, ["shard:0", "shard:1"], "a") == 1
+        assert get_live_leases(db, "shard:") == {"shard:1": "b"}
+
+
+def test_live_leases_are_filtered_by_prefix(database):
+    with session_scope() as db:
+        acquire_leases(db, ["member:a", "shard:0", "shard_x"], "a", 60)
+        assert get_live_leases(db, "shard:") == {"shard:0": "a"}
+        assert get_live_leases(db, "member:") == {"member:a": "a"}
+
+
+def manager(owner, acquired=None):
+    leases = WorkLeaseManager({"num_shards": 4, "instance_id": owner, "lease_seconds": 60})
+    if acquired is not None:
+        leases.add_listener(acquired.append)
+    return leases
+
+
+def test_rebalance_splits_shards_between_instances(database):
+    a_acquired, b_acquired = [], []
+    a = manager("a", a_acquired)
+    b = manager("b", b_acquired)
+
+    a.rebalance()
+    assert a._shards == {0, 1, 2, 3}
+
+    # b joins while a holds every shard, then a gives back its surplus
+    b.rebalance()
+    assert b._shards == set()
+    a.rebalance()
+    assert a._shards == {0, 1}
+    b.rebalance()
+    assert b._shards == {2, 3}
+
+    assert a_acquired == [{0, 1, 2, 3}]
+    assert b_acquired == [{2, 3}]
+    assert all(a.owns(path) != b.owns(path) for path in map(str, range(50)))
+
+
+def test_shards_of_a_stopped_instance_are_taken_over(database):
+    b_acquired = []
+    a = manager("a")
+    b = manager("b", b_acquired)
+    a.rebalance()
+    b.rebalance()
+    a.rebalance()
+    b.rebalance()
+
+    a.stop()
+    b.rebalance()
+
+    assert b._shards == {0, 1, 2, 3}
+    assert b_acquired == [{2, 3}, {0, 1}]
+
+
+def test_lost_leases_are_dropped_and_won_back(database):
+    acquired = []
+    a = manager("a", acquired)
+    a.rebalance()
+    with session_scope() as db:
+        db.get(Lease, "shard:3").owner = "other"
+    expire("shard:3")
+
+    a.rebalance()
+
+    assert a._shards == {0, 1, 2, 3}
+    assert acquired == [{0, 1, 2, 3}, {3}]